@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+import html
+import importlib.util
+import os
+import queue
+import selectors
+import socket
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from pathlib import Path
+from types import ModuleType
+
+try:
+    from utility.common.generation_defaults import WORKSPACE_ROOT
+except ModuleNotFoundError:
+    from pathlib import Path as _Path
+    for _p in _Path(__file__).resolve().parents:
+        if (_p / 'utility').exists():
+            sys.path.append(str(_p))
+            break
+    from utility.common.generation_defaults import WORKSPACE_ROOT
+
+STUDIO_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(STUDIO_DIR))
+from common.webui_shell import render_page
+
+WORKSPACE = WORKSPACE_ROOT
+# 요청 라인이 안 오는 연결(브라우저 preconnect 등)은 worker 없이 이만큼 기다렸다가 닫는다
+ROUTE_IDLE_SEC = 10.0
+ROUTE_PEEK_MAX = 8192
+# 요청 라인이 일부만 온 연결을 다시 들여다보는 간격
+ROUTE_PARTIAL_POLL_SEC = 0.02
+
+# mount -> webui 파일 / 기동 시 훅(각 webui main()에서 하던 준비 작업)
+APPS: dict[str, dict] = {
+    'dashboard': {'path': STUDIO_DIR / 'dashboard' / 'webui.py', 'label': '대시보드', 'startup': '_ensure_dm_bulk_runtime'},
+    'shorts': {'path': STUDIO_DIR / 'shorts' / 'webui.py', 'label': '쇼츠'},
+    'image': {'path': STUDIO_DIR / 'image' / 'webui.py', 'label': '이미지', 'startup': 'ensure_publish_worker'},
+    'music': {'path': STUDIO_DIR / 'music' / 'webui.py', 'label': '음악', 'startup': 'ensure_publish_worker'},
+}
+
+
+def _load_app(name: str, path: Path) -> ModuleType:
+    # webui마다 자기 폴더 기준 import(from http_handler import ... 등)를 쓰므로 폴더를 path에 올린다.
+    app_dir = str(path.parent)
+    if app_dir not in sys.path:
+        sys.path.insert(0, app_dir)
+    spec = importlib.util.spec_from_file_location(f'studio_app_{name}', path)
+    if spec is None or spec.loader is None:
+        raise ImportError(f'cannot load {path}')
+    mod = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = mod
+    spec.loader.exec_module(mod)
+    return mod
+
+
+def _mounted(handler_cls: type[BaseHTTPRequestHandler], prefix: str) -> type[BaseHTTPRequestHandler]:
+    """앱 Handler가 단독 실행 때와 같은 경로(/, /save, /jobs ...)를 보도록 prefix를 떼어낸다."""
+
+    class Mounted(handler_cls):  # type: ignore[misc, valid-type]
+        def parse_request(self) -> bool:
+            ok = super().parse_request()
+            if ok and self.path.startswith(prefix):
+                self.path = self.path[len(prefix):] or '/'
+                if not self.path.startswith('/'):
+                    self.path = '/' + self.path
+            return ok
+
+    Mounted.__name__ = f'{handler_cls.__name__}@{prefix}'
+    return Mounted
+
+
+def _index_page(mounts: dict[str, dict], errors: dict[str, str]) -> bytes:
+    items = []
+    for name, info in mounts.items():
+        items.append(f"<li><a href='/{name}/'>{html.escape(info['label'])}</a> <span class='muted'>/{name}/</span></li>")
+    for name, err in errors.items():
+        items.append(f"<li class='muted'>{html.escape(name)}: 로드 실패 ({html.escape(err)})</li>")
+    body = f"<div class='card'><ul>{''.join(items) or '<li>마운트된 UI 없음</li>'}</ul></div>"
+    return render_page(
+        title='Studio',
+        heading='Studio 통합 호스트',
+        desc='studio UI를 한 프로세스/한 포트에서 경로별로 띄운 화면이야. 단독 포트 실행(ui_runtime.py)도 그대로 쓸 수 있어.',
+        badges=list(mounts.keys()),
+        body_html=body,
+    )
+
+
+class _RootHandler(BaseHTTPRequestHandler):
+    index_body = b''
+
+    def _send(self, status: int, body: bytes, ctype: str = 'text/html; charset=utf-8', location: str = '') -> None:
+        self.send_response(status)
+        self.send_header('Content-Type', ctype)
+        if location:
+            self.send_header('Location', location)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):  # noqa: N802
+        name = self.path.strip('/').split('?', 1)[0]
+        if name in self.server.mounts:  # type: ignore[attr-defined]
+            # 앱 내부 링크/폼이 상대 경로라서 마운트 루트는 항상 / 로 끝나야 한다.
+            self._send(301, b'', location=f'/{name}/')
+            return
+        if self.path not in {'/', '/index.html'}:
+            self._send(404, b'not found', 'text/plain; charset=utf-8')
+            return
+        self._send(200, self.index_body)
+
+    def do_POST(self):  # noqa: N802
+        self._send(404, b'not found', 'text/plain; charset=utf-8')
+
+
+def _peek_request_line(sock: socket.socket) -> str | None:
+    """요청 라인이 다 들어왔으면 그 줄, 아직이면 None, 연결이 끊겼으면 ''. 소켓에서 읽어 가지는 않는다."""
+    try:
+        head = sock.recv(ROUTE_PEEK_MAX, socket.MSG_PEEK | socket.MSG_DONTWAIT)
+    except (BlockingIOError, InterruptedError):
+        return None
+    except OSError:
+        return ''
+    if not head:
+        return ''
+    if b'\n' not in head and len(head) < ROUTE_PEEK_MAX:
+        return None
+    return head.split(b'\n', 1)[0].decode('latin-1', errors='replace')
+
+
+class StudioHostServer(HTTPServer):
+    """요청마다 스레드를 만드는 대신 공용 worker pool에서 처리하는 HTTP 서버.
+
+    HTTP/1.0 기본 핸들러라 연결당 요청 1개이므로, 요청 라인을 MSG_PEEK로 보고
+    연결 단위로 마운트된 앱 Handler를 고른다. 요청 라인을 기다리는 건 router 스레드 하나가
+    selector로 하고, 라인이 다 온 연결만 pool에 넘긴다 (빈 preconnect가 worker를 잡지 않게).
+    """
+
+    daemon_threads = True
+
+    def __init__(self, addr: tuple[str, int], mounts: dict[str, dict], max_workers: int):
+        super().__init__(addr, _RootHandler)
+        self.mounts = mounts
+        self.pool = ThreadPoolExecutor(max_workers=max(2, int(max_workers)), thread_name_prefix='studio-host')
+        self._incoming: queue.SimpleQueue = queue.SimpleQueue()
+        self._wake_r, self._wake_w = socket.socketpair()
+        self._wake_r.setblocking(False)
+        self._closing = False
+        self._router = threading.Thread(target=self._route_loop, name='studio-host-router', daemon=True)
+        self._router.start()
+
+    def process_request(self, request, client_address):  # type: ignore[override]
+        self._incoming.put((request, client_address))
+        try:
+            self._wake_w.send(b'\0')
+        except OSError:
+            pass
+
+    def _route_loop(self) -> None:
+        sel = selectors.DefaultSelector()
+        sel.register(self._wake_r, selectors.EVENT_READ)
+        waiting: dict[socket.socket, tuple[object, float]] = {}
+        # 일부만 온 연결은 select가 계속 readable을 돌려주니 selector에서 빼고 짧게 폴링한다
+        partial: set[socket.socket] = set()
+
+        def drop(sock: socket.socket) -> None:
+            waiting.pop(sock, None)
+            if sock in partial:
+                partial.discard(sock)
+            else:
+                sel.unregister(sock)
+
+        def check(sock: socket.socket) -> None:
+            line = _peek_request_line(sock)
+            if line is None:
+                if sock not in partial:
+                    sel.unregister(sock)
+                    partial.add(sock)
+                return
+            client_address = waiting[sock][0]
+            drop(sock)
+            if not line:
+                self.shutdown_request(sock)
+                return
+            self.pool.submit(self._process, self._route(line), sock, client_address)
+
+        while not self._closing:
+            now = time.monotonic()
+            timeout = min((dl for _addr, dl in waiting.values()), default=now + 3600.0) - now
+            if partial:
+                timeout = min(timeout, ROUTE_PARTIAL_POLL_SEC)
+            for key, _mask in sel.select(max(0.0, timeout)):
+                if key.fileobj is self._wake_r:
+                    try:
+                        while self._wake_r.recv(4096):
+                            pass
+                    except (BlockingIOError, InterruptedError):
+                        pass
+                    while True:
+                        try:
+                            sock, client_address = self._incoming.get_nowait()
+                        except queue.Empty:
+                            break
+                        waiting[sock] = (client_address, time.monotonic() + ROUTE_IDLE_SEC)
+                        sel.register(sock, selectors.EVENT_READ)
+                    continue
+                check(key.fileobj)
+            for sock in list(partial):
+                check(sock)
+            now = time.monotonic()
+            for sock, (_addr, dl) in list(waiting.items()):
+                if now >= dl:
+                    drop(sock)
+                    self.shutdown_request(sock)
+        for sock in list(waiting):
+            self.shutdown_request(sock)
+        sel.close()
+
+    def _process(self, handler: type[BaseHTTPRequestHandler], request, client_address) -> None:
+        try:
+            handler(request, client_address, self)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def _route(self, request_line: str) -> type[BaseHTTPRequestHandler]:
+        parts = request_line.split(' ', 2)
+        path = parts[1] if len(parts) >= 2 else '/'
+        seg = path.lstrip('/').split('/', 1)
+        if len(seg) == 2 and seg[0] in self.mounts:
+            return self.mounts[seg[0]]['handler']
+        return _RootHandler
+
+    def server_close(self) -> None:
+        super().server_close()
+        self._closing = True
+        try:
+            self._wake_w.send(b'\0')
+        except OSError:
+            pass
+        self._router.join(timeout=2.0)
+        self._wake_r.close()
+        self._wake_w.close()
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+
+def build_mounts(names: list[str]) -> tuple[dict[str, dict], dict[str, str]]:
+    mounts: dict[str, dict] = {}
+    errors: dict[str, str] = {}
+    for name in names:
+        info = APPS[name]
+        path: Path = info['path']
+        if not path.exists():
+            errors[name] = f'{path.relative_to(STUDIO_DIR.parent)} 없음'
+            continue
+        try:
+            mod = _load_app(name, path)
+            startup = info.get('startup')
+            if startup and callable(getattr(mod, startup, None)):
+                getattr(mod, startup)()
+            mounts[name] = {'label': info['label'], 'module': mod, 'handler': _mounted(mod.Handler, f'/{name}')}
+        except Exception as e:
+            errors[name] = str(e)
+    return mounts, errors
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description='Studio multi-app host (all web UIs on one port)')
+    ap.add_argument('--host', default='0.0.0.0')
+    ap.add_argument('--port', type=int, default=int(os.getenv('STUDIO_HOST_PORT', '8760') or '8760'))
+    ap.add_argument('--apps', default=','.join(APPS.keys()), help='comma separated mounts')
+    ap.add_argument('--workers', type=int, default=int(os.getenv('STUDIO_HOST_WORKERS', '16') or '16'))
+    args = ap.parse_args()
+
+    names = [x.strip() for x in args.apps.split(',') if x.strip()]
+    unknown = [n for n in names if n not in APPS]
+    if unknown:
+        raise SystemExit(f'unknown app: {",".join(unknown)}')
+
+    mounts, errors = build_mounts(names)
+    for name, err in errors.items():
+        print(f'[studio-host] skip {name}: {err}')
+    _RootHandler.index_body = _index_page(mounts, errors)
+
+    server = StudioHostServer((args.host, args.port), mounts, args.workers)
+    for name in mounts:
+        print(f'STUDIO_HOST_{name.upper()}:http://127.0.0.1:{args.port}/{name}/')
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+from utility.common.generation_defaults import WORKSPACE_ROOT
+from utility.common.json_cache import load_json_cached
+
+# 업로드 대상 공통 allowlist (image/music/shorts webui 공용)
+ALLOWLIST_PATH = WORKSPACE_ROOT / 'studio' / 'publish_channels_allowlist.json'
+
+
+def load_publish_allowlist() -> list[tuple[str, str]]:
+    data = load_json_cached(ALLOWLIST_PATH, [])
+    out: list[tuple[str, str]] = []
+    if isinstance(data, list):
+        for row in data:
+            if not isinstance(row, dict):
+                continue
+            cid = str(row.get('id', '')).strip()
+            label = str(row.get('label', '')).strip() or f'채널 {cid}'
+            if cid.isdigit():
+                out.append((cid, f'{label} ({cid})'))
+    elif isinstance(data, dict):
+        for cid, label in data.items():
+            cid = str(cid).strip()
+            if cid.isdigit():
+                name = str(label).strip() or f'채널 {cid}'
+                out.append((cid, f'{name} ({cid})'))
+
+    dedup: dict[str, str] = {}
+    for cid, label in out:
+        dedup[cid] = label
+    return sorted(dedup.items(), key=lambda x: x[1].lower())
+
+
+def publish_channel_options(default_channel_id: str) -> list[tuple[str, str]]:
+    default_opt = (default_channel_id, f'요청 채널 ({default_channel_id})')
+    allowed = load_publish_allowlist()
+    if not allowed:
+        return [default_opt]
+    if not any(cid == default_channel_id for cid, _ in allowed):
+        return [default_opt] + allowed
+    return allowed
@@ -0,0 +1,204 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Iterator
+
+from utility.common.generation_defaults import WORKSPACE_ROOT
+from utility.common.json_state import locked_json_state, read_json_state
+from utility.discord.discord_rest import MAX_FILES_PER_MESSAGE, send_files
+
+# image/music UI 공용 배포 큐. UI 요청은 등록만 하고 업로드는 백그라운드 worker가 처리한다.
+QUEUE_PATH = WORKSPACE_ROOT / 'memory' / 'runtime' / 'publish_queue.json'
+LOCK_PATH = QUEUE_PATH.with_suffix('.lock')
+
+MAX_ATTEMPTS = int(os.getenv('PUBLISH_MAX_ATTEMPTS', '6') or '6')
+BACKOFF_BASE_SEC = 5.0
+BACKOFF_MAX_SEC = 600.0
+# 전송 중(sending) 상태로 이 시간을 넘기면 worker가 죽은 것으로 보고 다시 대기열로
+SEND_LEASE_SEC = 300.0
+POLL_SEC = 2.0
+KEEP_DONE = 200
+ACTIVE_STATUSES = {'queued', 'sending'}
+
+
+def _now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _sha256(path: Path) -> str:
+    h = hashlib.sha256()
+    with path.open('rb') as fp:
+        for chunk in iter(lambda: fp.read(1024 * 1024), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _prepare(data: dict[str, Any]) -> None:
+    if not isinstance(data.get('items'), list):
+        data.clear()
+        data['items'] = []
+
+
+def _trim_done(data: dict[str, Any]) -> None:
+    items = data['items']
+    done = [it for it in items if it.get('status') not in ACTIVE_STATUSES]
+    if len(done) > KEEP_DONE:
+        drop = {id(it) for it in done[:len(done) - KEEP_DONE]}
+        data['items'] = [it for it in items if id(it) not in drop]
+
+
+@contextmanager
+def _locked() -> Iterator[dict[str, Any]]:
+    """여러 UI 프로세스가 같은 큐 파일을 쓰므로 flock으로 read-modify-write를 묶는다.
+    worker가 POLL_SEC마다 훑으므로 바뀐 게 없으면 쓰지 않는다."""
+    with locked_json_state(QUEUE_PATH, LOCK_PATH, prepare=_prepare, before_save=_trim_done) as data:
+        yield data
+
+
+def enqueue_publish(channel_id: str, paths: list[str | Path], caption: str = '') -> tuple[bool, str]:
+    """배포 등록. 같은 채널에 같은 내용(sha256)이 대기/전송 중이면 건너뛴다.
+
+    이미 보낸(sent) 항목은 막지 않는다. 연타 중복만 거르고 일부러 다시 배포하는 건 허용.
+    """
+    cid = str(channel_id or '').strip()
+    if not cid.isdigit():
+        return False, f'채널 ID가 올바르지 않아: {cid}'
+    files = [Path(p).expanduser().resolve() for p in paths]
+    missing = [str(p) for p in files if not p.is_file()]
+    if missing:
+        return False, f'파일 없음: {", ".join(missing)}'
+    if not files:
+        return False, '배포할 파일이 없어'
+
+    hashes = [_sha256(p) for p in files]
+    group = uuid.uuid4().hex[:8]
+    added, skipped = [], []
+    with _locked() as data:
+        seen = {(it.get('channel_id'), it.get('sha256')) for it in data['items'] if it.get('status') in ACTIVE_STATUSES}
+        for p, digest in zip(files, hashes):
+            if (cid, digest) in seen:
+                skipped.append(p.name)
+                continue
+            seen.add((cid, digest))
+            data['items'].append({
+                'id': uuid.uuid4().hex[:12],
+                'group': group,
+                'channel_id': cid,
+                'path': str(p),
+                'sha256': digest,
+                'caption': caption.strip(),
+                'status': 'queued',
+                'attempts': 0,
+                'next_at': 0.0,
+                'error': '',
+                'created_at': _now_iso(),
+            })
+            added.append(p.name)
+    ensure_publish_worker()
+    _WAKE.set()
+    msg = f'배포 대기열 등록: {cid} ← {", ".join(added)}' if added else '배포 대기열: 새로 등록할 파일 없음'
+    if skipped:
+        msg += f' (중복 건너뜀: {", ".join(skipped)})'
+    return True, msg
+
+
+def _claim_batch() -> list[dict[str, Any]]:
+    """due 항목 중 같은 채널+같은 캡션을 최대 10개까지 묶어 sending으로 표시."""
+    now = time.time()
+    with _locked() as data:
+        for it in data['items']:
+            if it.get('status') == 'sending' and now - float(it.get('lease_at', 0)) > SEND_LEASE_SEC:
+                it['status'] = 'queued'
+        due = [it for it in data['items'] if it.get('status') == 'queued' and float(it.get('next_at', 0)) <= now]
+        if not due:
+            return []
+        head = due[0]
+        batch = [it for it in due if it['channel_id'] == head['channel_id'] and it.get('caption', '') == head.get('caption', '')]
+        batch = batch[:MAX_FILES_PER_MESSAGE]
+        for it in batch:
+            it['status'] = 'sending'
+            it['lease_at'] = now
+            it['attempts'] = int(it.get('attempts', 0)) + 1
+        return [dict(it) for it in batch]
+
+
+def _finish_batch(batch: list[dict[str, Any]], ok: bool, msg: str) -> None:
+    ids = {it['id'] for it in batch}
+    now = time.time()
+    with _locked() as data:
+        for it in data['items']:
+            if it.get('id') not in ids:
+                continue
+            if ok:
+                it.update(status='sent', sent_at=_now_iso(), error='')
+            elif int(it.get('attempts', 0)) >= MAX_ATTEMPTS:
+                it.update(status='failed', error=msg[-300:])
+            else:
+                delay = min(BACKOFF_MAX_SEC, BACKOFF_BASE_SEC * (2 ** (int(it.get('attempts', 1)) - 1)))
+                it.update(status='queued', next_at=now + delay, error=msg[-300:])
+
+
+def process_once() -> bool:
+    """배치 1개 전송. 보낼 게 없으면 False."""
+    batch = _claim_batch()
+    if not batch:
+        return False
+    ok, msg = send_files(batch[0]['channel_id'], [it['path'] for it in batch], batch[0].get('caption', ''))
+    _finish_batch(batch, ok, msg)
+    return True
+
+
+def retry_failed() -> int:
+    with _locked() as data:
+        n = 0
+        for it in data['items']:
+            if it.get('status') == 'failed':
+                it.update(status='queued', attempts=0, next_at=0.0)
+                n += 1
+    _WAKE.set()
+    return n
+
+
+def queue_status(limit: int = 12) -> dict[str, Any]:
+    items = read_json_state(QUEUE_PATH).get('items')
+    if not isinstance(items, list):
+        items = []
+    counts: dict[str, int] = {}
+    for it in items:
+        st = str(it.get('status', '-'))
+        counts[st] = counts.get(st, 0) + 1
+    recent = sorted(items, key=lambda it: str(it.get('created_at', '')), reverse=True)[:limit]
+    return {'counts': counts, 'items': recent}
+
+
+_WAKE = threading.Event()
+_WORKER: threading.Thread | None = None
+_WORKER_LOCK = threading.Lock()
+
+
+def _worker_loop() -> None:
+    while True:
+        try:
+            if process_once():
+                continue
+        except Exception:
+            pass
+        _WAKE.wait(POLL_SEC)
+        _WAKE.clear()
+
+
+def ensure_publish_worker() -> None:
+    """프로세스당 worker 스레드 1개. 여러 프로세스가 띄워도 flock+sending 표시로 중복 전송하지 않는다."""
+    global _WORKER
+    with _WORKER_LOCK:
+        if _WORKER is not None and _WORKER.is_alive():
+            return
+        _WORKER = threading.Thread(target=_worker_loop, name='publish-queue', daemon=True)
+        _WORKER.start()
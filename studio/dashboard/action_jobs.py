@@ -0,0 +1,162 @@
+from __future__ import annotations
+
+import json
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable
+
+MAX_JOBS = 50
+MAX_TAIL_LINES = 40
+MAX_LINE_CHARS = 400
+# 출력 줄마다 state 파일을 다시 쓰지 않게, 로그만 바뀐 경우 이 간격으로 묶어 저장
+TAIL_SAVE_SEC = 1.0
+ACTIVE_STATUSES = {'queued', 'running'}
+
+JobLog = Callable[[str], None]
+JobFn = Callable[[JobLog], tuple[bool, str]]
+
+
+def now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+class ActionJobs:
+    """대시보드 장시간 액션 실행기.
+
+    - 요청 스레드 대신 bounded worker pool에서 실행한다.
+    - 작업마다 job id/상태/출력 tail을 state 파일에 남긴다(재기동 후에도 조회 가능, tail은 TAIL_SAVE_SEC 단위로 묶어 저장).
+    - 같은 kind 작업이 대기/실행 중이면 새로 만들지 않고 기존 job id를 돌려준다.
+    """
+
+    def __init__(self, state_path: Path, max_workers: int = 2):
+        self.state_path = state_path
+        self._lock = threading.Lock()
+        # 파일 쓰기는 _lock 밖에서 한다. 스냅샷 순번으로 늦게 찍힌 스냅샷이 새 것을 덮지 않게
+        self._write_lock = threading.Lock()
+        self._seq = 0
+        self._written_seq = 0
+        self._saved_at = 0.0
+        self._jobs: dict[str, dict[str, Any]] = self._load()
+        self._pool = ThreadPoolExecutor(max_workers=max(1, int(max_workers)), thread_name_prefix='dash-action')
+
+    def _load(self) -> dict[str, dict[str, Any]]:
+        try:
+            data = json.loads(self.state_path.read_text(encoding='utf-8'))
+        except Exception:
+            return {}
+        rows = data.get('jobs') if isinstance(data, dict) else None
+        out: dict[str, dict[str, Any]] = {}
+        for row in rows if isinstance(rows, list) else []:
+            if not isinstance(row, dict) or not row.get('id'):
+                continue
+            # 이전 프로세스에서 끝나지 못한 작업은 중단으로 표시
+            if row.get('status') in ACTIVE_STATUSES:
+                row['status'] = 'interrupted'
+                row['finished_at'] = row.get('finished_at') or now_iso()
+                row['message'] = row.get('message') or '대시보드 재시작으로 중단됨'
+            out[str(row['id'])] = row
+        return out
+
+    def _snapshot_locked(self) -> tuple[int, str]:
+        rows = sorted(self._jobs.values(), key=lambda r: str(r.get('created_at', '')))
+        if len(rows) > MAX_JOBS:
+            for old in rows[:-MAX_JOBS]:
+                if old.get('status') not in ACTIVE_STATUSES:
+                    self._jobs.pop(str(old.get('id')), None)
+            rows = sorted(self._jobs.values(), key=lambda r: str(r.get('created_at', '')))
+        self._seq += 1
+        self._saved_at = time.monotonic()
+        return self._seq, json.dumps({'jobs': rows}, ensure_ascii=False, indent=2) + '\n'
+
+    def _write(self, snap: tuple[int, str] | None) -> None:
+        if snap is None:
+            return
+        seq, text = snap
+        with self._write_lock:
+            if seq <= self._written_seq:
+                return
+            try:
+                self.state_path.parent.mkdir(parents=True, exist_ok=True)
+                tmp = self.state_path.with_suffix(self.state_path.suffix + '.tmp')
+                tmp.write_text(text, encoding='utf-8')
+                tmp.replace(self.state_path)
+                self._written_seq = seq
+            except Exception:
+                pass
+
+    def _find_active(self, kind: str) -> dict[str, Any] | None:
+        for row in self._jobs.values():
+            if row.get('kind') == kind and row.get('status') in ACTIVE_STATUSES:
+                return row
+        return None
+
+    def submit(self, kind: str, label: str, fn: JobFn) -> tuple[bool, str]:
+        """작업 등록. (새로 등록했는지, job id)를 돌려준다."""
+        with self._lock:
+            running = self._find_active(kind)
+            if running:
+                return False, str(running['id'])
+            job_id = f'act-{int(time.time())}-{uuid.uuid4().hex[:8]}'
+            self._jobs[job_id] = {
+                'id': job_id,
+                'kind': kind,
+                'label': label,
+                'status': 'queued',
+                'created_at': now_iso(),
+                'started_at': '',
+                'finished_at': '',
+                'message': '',
+                'tail': [],
+            }
+            snap = self._snapshot_locked()
+        self._write(snap)
+        self._pool.submit(self._run, job_id, fn)
+        return True, job_id
+
+    def _update(self, job_id: str, **fields: Any) -> None:
+        with self._lock:
+            row = self._jobs.get(job_id)
+            if row is None:
+                return
+            row.update(fields)
+            snap = self._snapshot_locked()
+        self._write(snap)
+
+    def _log(self, job_id: str, line: str) -> None:
+        text = (line or '').rstrip()
+        if not text:
+            return
+        with self._lock:
+            row = self._jobs.get(job_id)
+            if row is None:
+                return
+            tail = row.setdefault('tail', [])
+            tail.append(text[:MAX_LINE_CHARS])
+            if len(tail) > MAX_TAIL_LINES:
+                del tail[:-MAX_TAIL_LINES]
+            # 조회(get/recent)는 메모리를 보니 파일은 throttle. 끝날 때 _run의 _update가 최종 저장
+            snap = self._snapshot_locked() if time.monotonic() - self._saved_at >= TAIL_SAVE_SEC else None
+        self._write(snap)
+
+    def _run(self, job_id: str, fn: JobFn) -> None:
+        self._update(job_id, status='running', started_at=now_iso())
+        try:
+            ok, msg = fn(lambda line: self._log(job_id, line))
+            status = 'ok' if ok else 'error'
+        except Exception as e:
+            status, msg = 'error', f'실패: {e}'
+        self._update(job_id, status=status, message=str(msg or ''), finished_at=now_iso())
+
+    def get(self, job_id: str) -> dict[str, Any] | None:
+        with self._lock:
+            row = self._jobs.get(job_id)
+            return json.loads(json.dumps(row)) if row else None
+
+    def recent(self, limit: int = 10) -> list[dict[str, Any]]:
+        with self._lock:
+            rows = sorted(self._jobs.values(), key=lambda r: str(r.get('created_at', '')), reverse=True)
+            return json.loads(json.dumps(rows[:max(0, int(limit))]))
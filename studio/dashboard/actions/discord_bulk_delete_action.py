@@ -16,6 +16,7 @@ import discord
 
 try:
     from utility.common.generation_defaults import WORKSPACE_ROOT
+    from utility.common import metrics
 except ModuleNotFoundError:
     import sys
     from pathlib import Path as _Path
@@ -24,6 +25,7 @@ except ModuleNotFoundError:
             sys.path.append(str(_p))
             break
     from utility.common.generation_defaults import WORKSPACE_ROOT
+    from utility.common import metrics
 BASE = WORKSPACE_ROOT
 RUNTIME_DIR = BASE / 'studio' / 'dashboard' / 'runtime'
 QUEUE_PATH = RUNTIME_DIR / 'discord_bulk_delete_queue.jsonl'
@@ -108,7 +110,8 @@ async def bulk_delete_messages(channel: discord.TextChannel | discord.Thread, me
         batch = messages[i:i + 100]
         if not batch:
             continue
-        await channel.delete_messages(batch)
+        with metrics.timer('discord.delete', op='bulk'):
+            await channel.delete_messages(batch)
         deleted += len(batch)
     return deleted
 
@@ -117,7 +120,8 @@ async def delete_messages_one_by_one(messages: list[discord.Message]) -> int:
     deleted = 0
     for msg in messages:
         try:
-            await msg.delete()
+            with metrics.timer('discord.delete', op='single'):
+                await msg.delete()
             deleted += 1
             await asyncio.sleep(0.35)
         except discord.HTTPException:
@@ -261,6 +265,7 @@ def _pop_next_job() -> dict[str, Any] | None:
 
 
 def _run_job(job: dict[str, Any]) -> dict[str, Any]:
+    metrics.observe_queue_wait('discord_bulk_delete', job)
     started = now_iso()
     code, stdout, stderr = asyncio.run(run_bulk_delete_job(job))
     finished = now_iso()
@@ -319,7 +324,7 @@ def runtime_loop(poll_sec: float = 2.0) -> int:
         _release_lock()
 
 
-def main() -> int:
+def main(argv: list[str] | None = None) -> int:
     ap = argparse.ArgumentParser(description='Discord bulk-delete runtime / enqueue helper')
     sub = ap.add_subparsers(dest='cmd', required=True)
 
@@ -336,7 +341,7 @@ def main() -> int:
     p_q.add_argument('--skip-pinned', action='store_true', default=True)
     p_q.add_argument('--no-skip-pinned', dest='skip_pinned', action='store_false')
 
-    args = ap.parse_args()
+    args = ap.parse_args(argv)
     if args.cmd == 'run':
         return runtime_loop(poll_sec=args.poll_sec)
 
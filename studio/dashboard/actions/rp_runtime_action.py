@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 from __future__ import annotations
 
+import asyncio
 import hashlib
 import os
 from pathlib import Path
@@ -11,6 +12,7 @@ import discord
 
 try:
     from utility.common.env_prefer_dotenv import load_env_prefer_dotenv
+    from utility.common import metrics
     from utility.rp.rp_engine import (
         Ctx,
         acquire_runtime_lock,
@@ -39,6 +41,7 @@ except ModuleNotFoundError:
             sys.path.append(str(_p))
             break
     from utility.common.env_prefer_dotenv import load_env_prefer_dotenv
+    from utility.common import metrics
     from utility.rp.rp_engine import (
         Ctx,
         acquire_runtime_lock,
@@ -155,8 +158,9 @@ class RpDiscordClient(discord.Client):
         ingest_plain_chat(bctx, text, message_id=message_id, speaker_name=bot_name)
 
     @staticmethod
-    def _compose_opening(user_alias: str, opening: str = '', bot_name: str = 'RP') -> str:
-        return generate_rp_opening(user_alias=user_alias, opening=opening, bot_name=bot_name)
+    async def _compose_opening(user_alias: str, opening: str = '', bot_name: str = 'RP') -> str:
+        # LLM 호출/quota 대기는 동기라서 이벤트 루프(게이트웨이 heartbeat)를 막지 않게 스레드로
+        return await asyncio.to_thread(generate_rp_opening, user_alias=user_alias, opening=opening, bot_name=bot_name)
 
     @staticmethod
     def _parent_channel_id(message: discord.Message) -> str:
@@ -318,18 +322,20 @@ class RpDiscordClient(discord.Client):
         except Exception:
             pass
         alias = self._resolve_alias(ctx, message)
-        opening_text = self._compose_opening(alias, opening, bot_name=(self.user.display_name if self.user else "RP"))
+        opening_text = await self._compose_opening(alias, opening, bot_name=(self.user.display_name if self.user else "RP"))
         if (opening_text or '').strip():
-            sent = await thread.send(opening_text)
+            with metrics.timer('discord.send', op='opening'):
+                sent = await thread.send(opening_text)
             self._log_bot_turn(ctx, opening_text, message_id=str(getattr(sent, 'id', '') or ''))
 
     async def _start_in_current(self, message: discord.Message, kind: str, opening: str = '') -> None:
         ctx = Ctx(platform='discord', channel_id=str(message.channel.id), user_id=str(message.author.id))
         start_room(ctx, title=getattr(message.channel, 'name', ''), kind=kind, opening=opening)
         alias = self._resolve_alias(ctx, message)
-        opening_text = self._compose_opening(alias, opening, bot_name=(self.user.display_name if self.user else "RP"))
+        opening_text = await self._compose_opening(alias, opening, bot_name=(self.user.display_name if self.user else "RP"))
         if (opening_text or '').strip():
-            sent = await message.channel.send(opening_text)
+            with metrics.timer('discord.send', op='opening'):
+                sent = await message.channel.send(opening_text)
             self._log_bot_turn(ctx, opening_text, message_id=str(getattr(sent, 'id', '') or ''))
 
     async def _end_in_current(self, message: discord.Message) -> None:
@@ -491,14 +497,19 @@ class RpDiscordClient(discord.Client):
             return
 
         alias = self._resolve_alias(ctx, message)
-        reply = generate_rp_reply(
-            ctx,
-            user_display=alias,
-            bot_name=(self.user.display_name if self.user else 'RP'),
-        )
-        if not (reply or '').strip():
-            return
-        sent = await message.reply(reply, mention_author=False)
+        # 메시지 수신 -> 답장 전송까지 (빈 답변은 실패로 센다)
+        with metrics.timer('rp.reply', room=ctx.channel_id) as t:
+            reply = await asyncio.to_thread(
+                generate_rp_reply,
+                ctx,
+                user_display=alias,
+                bot_name=(self.user.display_name if self.user else 'RP'),
+            )
+            if not (reply or '').strip():
+                t['ok'] = False
+                return
+            with metrics.timer('discord.send', op='reply'):
+                sent = await message.reply(reply, mention_author=False)
         self._log_bot_turn(ctx, reply, message_id=str(getattr(sent, 'id', '') or ''))
 
     async def on_message(self, message: discord.Message) -> None:
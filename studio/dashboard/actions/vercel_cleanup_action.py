@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import subprocess
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Callable
+
+try:
+    from utility.common.generation_defaults import WORKSPACE_ROOT
+except ModuleNotFoundError:
+    import sys
+    from pathlib import Path as _Path
+    for _p in _Path(__file__).resolve().parents:
+        if (_p / 'utility').exists():
+            sys.path.append(str(_p))
+            break
+    from utility.common.generation_defaults import WORKSPACE_ROOT
+
+CONFIG_PATH = WORKSPACE_ROOT / 'studio' / 'dashboard' / 'config' / 'vercel_cleanup.json'
+API_BASE = 'https://api.vercel.com'
+MAX_LIST_PAGES = 20
+DEFAULT_CONFIG = {
+    'project': 'nulsight',
+    'scope': 'team_QtyiuCIFBns7dbiuGkXiPKgq',
+    'repoDir': str(WORKSPACE_ROOT / 'tcg'),
+    'keepLatest': 1,
+    'keepProductionLatest': 1,
+    'keepAliased': True,
+    'parallelism': 4,
+}
+
+Log = Callable[[str], None]
+
+
+def load_config() -> dict[str, Any]:
+    cfg = dict(DEFAULT_CONFIG)
+    try:
+        data = json.loads(CONFIG_PATH.read_text(encoding='utf-8'))
+        if isinstance(data, dict):
+            cfg.update(data)
+    except Exception:
+        pass
+    env_par = (os.getenv('VERCEL_CLEANUP_PARALLELISM') or '').strip()
+    if env_par.isdigit():
+        cfg['parallelism'] = int(env_par)
+    return cfg
+
+
+# ---- REST API (VERCEL_TOKEN 있을 때) ----
+def _api(method: str, path: str, token: str, params: dict[str, Any]) -> dict[str, Any]:
+    qs = urllib.parse.urlencode({k: v for k, v in params.items() if v not in (None, '')})
+    req = urllib.request.Request(
+        f'{API_BASE}{path}?{qs}',
+        headers={'Authorization': f'Bearer {token}'},
+        method=method,
+    )
+    with urllib.request.urlopen(req, timeout=30) as r:
+        raw = r.read().decode('utf-8', errors='replace')
+    return json.loads(raw) if raw.strip() else {}
+
+
+def _paged(path: str, key: str, token: str, params: dict[str, Any]) -> list[dict[str, Any]]:
+    out: list[dict[str, Any]] = []
+    until = None
+    for _ in range(MAX_LIST_PAGES):
+        data = _api('GET', path, token, {**params, 'limit': 100, 'until': until})
+        out.extend(x for x in (data.get(key) or []) if isinstance(x, dict))
+        until = (data.get('pagination') or {}).get('next')
+        if not until:
+            break
+    return out
+
+
+def _list_deployments_api(cfg: dict[str, Any], token: str) -> list[dict[str, Any]]:
+    params = {'projectId': cfg['project'], 'teamId': cfg['scope']}
+    aliased = {
+        str(a.get('deploymentId'))
+        for a in _paged('/v4/aliases', 'aliases', token, params)
+        if a.get('deploymentId')
+    }
+    deps = []
+    for d in _paged('/v6/deployments', 'deployments', token, params):
+        uid = str(d.get('uid') or '')
+        if not uid:
+            continue
+        url = str(d.get('url') or '')
+        deps.append({
+            'id': uid,
+            'url': f'https://{url}' if url and not url.startswith('https://') else url,
+            'created': int(d.get('created') or d.get('createdAt') or 0),
+            'production': str(d.get('target') or '') == 'production',
+            'aliased': uid in aliased,
+        })
+    deps.sort(key=lambda x: x['created'], reverse=True)
+    return deps
+
+
+def _remove_api(dep: dict[str, Any], cfg: dict[str, Any], token: str) -> tuple[bool, str]:
+    try:
+        _api('DELETE', f"/v13/deployments/{urllib.parse.quote(dep['id'])}", token, {'teamId': cfg['scope']})
+        return True, ''
+    except urllib.error.HTTPError as e:
+        return False, f'HTTP {e.code}'
+    except Exception as e:
+        return False, str(e)
+
+
+# ---- vercel CLI 폴백 ----
+def _list_deployments_cli(cfg: dict[str, Any]) -> list[dict[str, Any]]:
+    cmd = ['vercel', 'list', cfg['project'], '--yes', '--scope', cfg['scope']]
+    p = subprocess.run(cmd, cwd=str(cfg['repoDir']), text=True, capture_output=True)
+    out = ((p.stdout or '') + ('\n' + p.stderr if p.stderr else '')).strip()
+    if p.returncode != 0:
+        raise RuntimeError(out.splitlines()[-1] if out else '배포 목록 조회 실패')
+    deps = []
+    # CLI 목록은 최신순 출력이며 alias/production 정보가 없으므로 keepLatest만 적용된다.
+    for i, ln in enumerate(x.strip() for x in out.splitlines()):
+        if ln.startswith('https://') and '.vercel.app' in ln:
+            deps.append({'id': ln, 'url': ln, 'created': -i, 'production': False, 'aliased': False})
+    return deps
+
+
+def _remove_cli(dep: dict[str, Any], cfg: dict[str, Any]) -> tuple[bool, str]:
+    cmd = ['vercel', 'remove', dep['url'], '--yes', '--scope', cfg['scope']]
+    p = subprocess.run(cmd, cwd=str(cfg['repoDir']), text=True, capture_output=True)
+    if p.returncode == 0:
+        return True, ''
+    out = ((p.stdout or '') + ('\n' + p.stderr if p.stderr else '')).strip()
+    return False, (out.splitlines()[-1] if out else f'exit {p.returncode}')
+
+
+# ---- retention policy ----
+def plan_cleanup(deps: list[dict[str, Any]], cfg: dict[str, Any]) -> tuple[list[dict[str, Any]], list[dict[str, Any]]]:
+    """(keep, delete) 분리. deps는 최신순 정렬을 가정한다."""
+    keep_latest = max(1, int(cfg.get('keepLatest', 1)))
+    keep_prod = max(0, int(cfg.get('keepProductionLatest', 1)))
+    keep_aliased = bool(cfg.get('keepAliased', True))
+
+    keep: list[dict[str, Any]] = []
+    targets: list[dict[str, Any]] = []
+    prod_seen = 0
+    for i, d in enumerate(deps):
+        reason = ''
+        if i < keep_latest:
+            reason = 'latest'
+        elif keep_aliased and d.get('aliased'):
+            reason = 'aliased'
+        elif d.get('production') and prod_seen < keep_prod:
+            reason = 'production'
+        if d.get('production'):
+            prod_seen += 1
+        if reason:
+            keep.append({**d, 'keepReason': reason})
+        else:
+            targets.append(d)
+    return keep, targets
+
+
+def cleanup_deployments(dry_run: bool = False, log: Log | None = None, cfg: dict[str, Any] | None = None) -> tuple[bool, str]:
+    cfg = cfg or load_config()
+    say = log or (lambda _line: None)
+    token = (os.getenv('VERCEL_TOKEN') or '').strip()
+    mode = 'api' if token else 'cli'
+
+    try:
+        deps = _list_deployments_api(cfg, token) if token else _list_deployments_cli(cfg)
+    except urllib.error.HTTPError as e:
+        return False, f'배포 목록 조회 실패(api): HTTP {e.code}'
+    except Exception as e:
+        return False, f'배포 목록 조회 실패({mode}): {e}'
+
+    keep, targets = plan_cleanup(deps, cfg)
+    say(f'mode={mode} total={len(deps)} keep={len(keep)} delete={len(targets)}')
+    for d in keep:
+        say(f"keep[{d['keepReason']}] {d['url']}")
+
+    if not targets:
+        return True, '정리할 이전 배포가 없어.'
+
+    if dry_run:
+        for d in targets:
+            say(f"delete-target {d['url']}")
+        return True, f'dry-run({mode}): keep {len(keep)}개, delete 대상 {len(targets)}개'
+
+    parallelism = max(1, int(cfg.get('parallelism', 4)))
+    remove = (lambda d: _remove_api(d, cfg, token)) if token else (lambda d: _remove_cli(d, cfg))
+    deleted = 0
+    done = 0
+    with ThreadPoolExecutor(max_workers=min(parallelism, len(targets)), thread_name_prefix='vercel-rm') as pool:
+        futs = {pool.submit(remove, d): d for d in targets}
+        for fut in as_completed(futs):
+            d = futs[fut]
+            ok, err = fut.result()
+            done += 1
+            if ok:
+                deleted += 1
+            say(f"[{done}/{len(targets)}] {'removed' if ok else 'failed'} {d['url']}" + (f' ({err})' if err else ''))
+
+    summary = f'keep {len(keep)}개, 삭제 {deleted}/{len(targets)}개 (mode={mode}, parallel={parallelism})'
+    if deleted == len(targets):
+        return True, f'배포 정리 완료: {summary}'
+    return False, f'배포 정리 부분 실패: {summary}'
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description='Vercel deployment cleanup (retention policy + bounded parallel removal)')
+    ap.add_argument('--dry-run', action='store_true')
+    ap.add_argument('--parallelism', type=int, default=0, help='override config parallelism')
+    args = ap.parse_args()
+
+    cfg = load_config()
+    if args.parallelism > 0:
+        cfg['parallelism'] = args.parallelism
+    ok, msg = cleanup_deployments(args.dry_run, log=lambda line: print(line, flush=True), cfg=cfg)
+    print(msg)
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -1,10 +1,11 @@
 from __future__ import annotations
 
+import json
 from http.server import BaseHTTPRequestHandler
-from urllib.parse import parse_qs
+from urllib.parse import parse_qs, urlsplit
 
 
-def create_handler(render_page_fn, handle_post_fn, api_builder):
+def create_handler(render_page_fn, handle_post_fn, api_builder, json_get_fn=None):
     class Handler(BaseHTTPRequestHandler):
         def _read_form(self) -> dict[str, list[str]]:
             ln = int(self.headers.get("Content-Length", "0") or "0")
@@ -21,7 +22,21 @@ def create_handler(render_page_fn, handle_post_fn, api_builder):
             self.end_headers()
             self.wfile.write(body)
 
+        def _respond_json(self, obj: dict, status: int = 200):
+            body = json.dumps(obj, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Cache-Control", "no-store")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
         def do_GET(self):
+            if json_get_fn is not None:
+                data = json_get_fn(urlsplit(self.path).path)
+                if data is not None:
+                    self._respond_json(data, 404 if data.get("error") else 200)
+                    return
             self._respond_html(render_page_fn())
 
         def do_POST(self):
@@ -0,0 +1,241 @@
+from __future__ import annotations
+
+import html
+import json
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+try:
+    from utility.common import metrics
+except ModuleNotFoundError:
+    import sys
+    from pathlib import Path as _Path
+    for _p in _Path(__file__).resolve().parents:
+        if (_p / 'utility').exists():
+            sys.path.append(str(_p))
+            break
+    from utility.common import metrics
+
+# metrics.jsonl을 시간 단위 ring buffer로 접어 둔다. 렌더할 때는 새로 붙은 줄만 읽는다.
+BUCKET_SEC = 3600
+SLOTS = 24
+REFRESH_SEC = 5.0
+# 백분위 추정용 로그 눈금 (5ms ~ 약 280s, 1.5배 간격)
+BOUNDS_MS = tuple(round(5 * 1.5 ** i) for i in range(28))
+
+GROUPS = ('gemini', 'discord', 'gateway', 'rp', 'queue', 'throughput')
+
+
+def _classify(ev: dict[str, Any]) -> tuple[str, str] | None:
+    name = str(ev.get('name', ''))
+    tags = ev.get('tags') or {}
+    if name == 'gemini.call':
+        return 'gemini', f"{tags.get('model', '?')} · {tags.get('op', '')}".rstrip(' ·')
+    if name == 'gemini.quota_wait':
+        return 'gemini', f"{tags.get('model', '?')} · quota 대기"
+    if name == 'veo.poll':
+        return 'gemini', 'veo · poll'
+    if name in ('discord.send', 'discord.delete'):
+        return 'discord', f"{name.split('.', 1)[1]} · {tags.get('op', '')}".rstrip(' ·')
+    if name == 'gateway.call':
+        return 'gateway', str(tags.get('method', '?'))
+    if name == 'rp.reply':
+        return 'rp', str(tags.get('room', '?'))
+    if name == 'queue.wait':
+        return 'queue', str(tags.get('queue', '?'))
+    if name == 'media.generated':
+        return 'throughput', str(tags.get('kind', '?'))
+    return None
+
+
+def _bucket_index(ms: float) -> int:
+    for i, b in enumerate(BOUNDS_MS):
+        if ms <= b:
+            return i
+    return len(BOUNDS_MS)
+
+
+def _hist_percentile(hist: list[int], total: int, p: float, max_ms: float) -> float:
+    if total <= 0:
+        return 0.0
+    need = p / 100.0 * total
+    cum = 0
+    for i, c in enumerate(hist):
+        cum += c
+        if cum >= need:
+            return float(min(BOUNDS_MS[i], max_ms)) if i < len(BOUNDS_MS) else max_ms
+    return max_ms
+
+
+class PerfRollup:
+    """시리즈마다 SLOTS칸 ring buffer. 칸 = [hour_id, count, errors, n합계, max_ms, hist]"""
+
+    def __init__(self, path: Path | None = None, bucket_sec: int = BUCKET_SEC, slots: int = SLOTS):
+        self.path = Path(path or metrics.METRICS_PATH)
+        self.bucket_sec = int(bucket_sec)
+        self.slots = int(slots)
+        self._lock = threading.Lock()
+        self._rings: dict[tuple[str, str], list[list[Any] | None]] = {}
+        self._inode: int | None = None
+        self._offset = 0
+        self._checked_at = 0.0
+
+    # ---- ingest ----
+    def _add(self, ev: dict[str, Any]) -> None:
+        key = _classify(ev)
+        if key is None:
+            return
+        try:
+            ts = float(ev.get('ts', 0))
+        except (TypeError, ValueError):
+            return
+        hour = int(ts // self.bucket_sec)
+        if hour <= int(time.time() // self.bucket_sec) - self.slots:
+            return
+        ring = self._rings.setdefault(key, [None] * self.slots)
+        i = hour % self.slots
+        slot = ring[i]
+        if slot is None or slot[0] != hour:
+            if slot is not None and slot[0] > hour:
+                return
+            slot = ring[i] = [hour, 0, 0, 0.0, 0.0, [0] * (len(BOUNDS_MS) + 1)]
+        if 'ms' in ev:
+            ms = float(ev['ms'])
+            slot[1] += 1
+            slot[2] += 0 if ev.get('ok', True) else 1
+            slot[4] = max(slot[4], ms)
+            slot[5][_bucket_index(ms)] += 1
+        elif 'n' in ev:
+            slot[3] += float(ev['n'])
+
+    def _read_from(self, path: Path, offset: int) -> int:
+        """offset부터 완성된 줄만 읽고 다음 offset을 돌려준다."""
+        try:
+            with path.open('rb') as fp:
+                fp.seek(offset)
+                data = fp.read()
+        except OSError:
+            return offset
+        end = data.rfind(b'\n')
+        if end < 0:
+            return offset
+        for line in data[:end].split(b'\n'):
+            try:
+                ev = json.loads(line)
+            except ValueError:
+                continue
+            if isinstance(ev, dict):
+                self._add(ev)
+        return offset + end + 1
+
+    def refresh(self, force: bool = False) -> None:
+        now = time.monotonic()
+        with self._lock:
+            if not force and now - self._checked_at < REFRESH_SEC:
+                return
+            self._checked_at = now
+            metrics.flush()
+            try:
+                ino = self.path.stat().st_ino
+            except OSError:
+                ino = None
+            rotated = [self.path.with_name(f'{self.path.name}.{i}') for i in range(metrics.KEEP_FILES, 0, -1)]
+            if self._inode is None:
+                # 처음: 회전 파일까지 창 안의 이벤트를 한 번 다 접는다
+                since = time.time() - self.bucket_sec * self.slots
+                for p in rotated:
+                    try:
+                        if p.stat().st_mtime >= since:
+                            self._read_from(p, 0)
+                    except OSError:
+                        continue
+            elif ino != self._inode:
+                # 회전됨: 예전 파일 나머지 + 그 뒤에 회전된 파일 전부 + 새 파일 처음부터
+                found = False
+                for p in rotated:
+                    try:
+                        if found:
+                            self._read_from(p, 0)
+                        elif p.stat().st_ino == self._inode:
+                            self._read_from(p, self._offset)
+                            found = True
+                    except OSError:
+                        continue
+                self._offset = 0
+            if ino is None:
+                self._inode, self._offset = -1, 0
+                return
+            if ino != self._inode:
+                self._inode, self._offset = ino, 0
+            self._offset = self._read_from(self.path, self._offset)
+
+    # ---- read ----
+    def table(self, group: str) -> list[dict[str, Any]]:
+        self.refresh()
+        cur = int(time.time() // self.bucket_sec)
+        hours = list(range(cur - self.slots + 1, cur + 1))
+        rows: list[dict[str, Any]] = []
+        with self._lock:
+            for (g, label), ring in sorted(self._rings.items()):
+                if g != group:
+                    continue
+                by_hour = {s[0]: s for s in ring if s is not None and s[0] in hours}
+                if not by_hour:
+                    continue
+                hist = [0] * (len(BOUNDS_MS) + 1)
+                count = errors = 0
+                total_n = max_ms = 0.0
+                spark: list[float | None] = []
+                for h in hours:
+                    s = by_hour.get(h)
+                    if s is None:
+                        spark.append(None if group != 'throughput' else 0.0)
+                        continue
+                    count += s[1]
+                    errors += s[2]
+                    total_n += s[3]
+                    max_ms = max(max_ms, s[4])
+                    hist = [a + b for a, b in zip(hist, s[5])]
+                    if group == 'throughput':
+                        spark.append(s[3])
+                    else:
+                        spark.append(_hist_percentile(s[5], s[1], 95, s[4]) if s[1] else None)
+                rows.append({
+                    'label': label,
+                    'count': count,
+                    'errors': errors,
+                    'total': total_n,
+                    'p50': round(_hist_percentile(hist, count, 50, max_ms), 1),
+                    'p95': round(_hist_percentile(hist, count, 95, max_ms), 1),
+                    'p99': round(_hist_percentile(hist, count, 99, max_ms), 1),
+                    'spark': spark,
+                })
+        return rows
+
+    def tables(self) -> dict[str, list[dict[str, Any]]]:
+        return {g: self.table(g) for g in GROUPS}
+
+
+def sparkline_svg(values: list[float | None], width: int = 144, height: int = 26, color: str = '#38bdf8') -> str:
+    """서버에서 그리는 인라인 SVG. None은 빈 칸(선을 끊는다)."""
+    nums = [v for v in values if v is not None]
+    if not nums or len(values) < 2:
+        return ''
+    top = max(nums) or 1.0
+    step = width / (len(values) - 1)
+    segments: list[list[str]] = [[]]
+    for i, v in enumerate(values):
+        if v is None:
+            if segments[-1]:
+                segments.append([])
+            continue
+        segments[-1].append(f'{i * step:.1f},{height - 2 - (v / top) * (height - 4):.1f}')
+    lines = ''.join(
+        f"<polyline fill='none' stroke='{html.escape(color)}' stroke-width='1.5' points='{' '.join(seg)}'/>"
+        if len(seg) > 1 else
+        f"<circle cx='{seg[0].split(',')[0]}' cy='{seg[0].split(',')[1]}' r='1.5' fill='{html.escape(color)}'/>"
+        for seg in segments if seg
+    )
+    return f"<svg width='{width}' height='{height}' viewBox='0 0 {width} {height}'>{lines}</svg>"
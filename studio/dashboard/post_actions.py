@@ -1,6 +1,14 @@
 from __future__ import annotations
 
 
+def _queue(api: dict, kind: str, label: str, fn) -> str:
+    """장시간 액션은 작업 큐에 넘기고 즉시 응답한다(진행 상황은 작업 현황 패널에서 확인)."""
+    created, job_id = api["submit_job"](kind, label, fn)
+    if created:
+        return f"작업 등록: {label} ({job_id}) · 진행 상황은 작업 현황에서 확인해."
+    return f"이미 진행 중인 작업이 있어: {label} ({job_id})"
+
+
 def handle_post(path: str, form: dict[str, list[str]], api: dict) -> str:
     """Dashboard POST action router (phase-1 split)."""
     val = api["val"]
@@ -23,12 +31,10 @@ def handle_post(path: str, form: dict[str, list[str]], api: dict) -> str:
             return f"상태 변경 완료: {jid} -> {'on' if enabled else 'off'}" if ok else f"상태 변경 실패: {raw[-300:]}"
 
         if path == "/rp-on":
-            _, msg = api["rp_turn_on"]()
-            return msg
+            return _queue(api, "rp", "RP ON", lambda log: api["rp_turn_on"](log=log))
 
         if path == "/rp-off":
-            _, msg = api["rp_turn_off"]()
-            return msg
+            return _queue(api, "rp", "RP OFF", lambda log: api["rp_turn_off"](log=log))
 
         if path == "/dm-bulk-delete":
             sources_cfg = api["load_sources_cfg"]()
@@ -46,36 +52,34 @@ def handle_post(path: str, form: dict[str, list[str]], api: dict) -> str:
             target = val(form, "target", "workspace")
             if target not in {"workspace", "tcg"}:
                 target = "workspace"
-            _, msg = api["commit_push"](message, target)
-            return msg
+            return _queue(api, f"git-{target}", f"[{target}] 커밋 + 푸시", lambda log: api["commit_push"](message, target, log=log))
 
         if path == "/initial-reset":
             reason = val(form, "reason", "dashboard requested initial reset")
             target = val(form, "target", "workspace")
             if target not in {"workspace", "tcg"}:
                 target = "workspace"
-            _, msg = api["initial_reset_run"](reason, target)
-            return msg
+            return _queue(api, f"git-{target}", f"[{target}] 이니셜 커밋으로 밀기", lambda log: api["initial_reset_run"](reason, target, log=log))
 
         if path == "/pin-message":
             sources_cfg = api["load_sources_cfg"]()
             channel_id = str(sources_cfg.get('discordDmChannelId', '')).strip()
             if not channel_id:
                 return 'sources.json에 discordDmChannelId가 없어.'
-            _, msg = api["create_and_pin_message"](channel_id)
-            return msg
+            return _queue(api, "pin-message", "고정 메시지 생성/고정", lambda log: api["create_and_pin_message"](channel_id, log=log))
 
         if path == "/portproxy-refresh":
-            _, msg = api["run_portproxy_update"]()
-            return msg
+            return _queue(api, "portproxy", "포트 프록시 갱신", lambda log: api["run_portproxy_update"](log=log))
 
         if path == "/vercel-cleanup":
-            _, msg = api["cleanup_vercel_deployments"](False)
-            return msg
+            return _queue(api, "vercel-cleanup", "Vercel 배포 정리", lambda log: api["cleanup_vercel_deployments"](False, log=log))
 
         if path == "/vercel-cleanup-dry":
-            _, msg = api["cleanup_vercel_deployments"](True)
-            return msg
+            return _queue(api, "vercel-cleanup", "Vercel 배포 정리 dry-run", lambda log: api["cleanup_vercel_deployments"](True, log=log))
+
+        if path == "/publish-retry":
+            n = api["retry_failed_publish"]()
+            return f"배포 대기열 재시도 등록: {n}건" if n else "다시 시도할 실패 항목이 없어."
 
         return "지원하지 않는 액션"
 
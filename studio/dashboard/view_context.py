@@ -3,6 +3,20 @@ from __future__ import annotations
 import html
 import json
 import time
+from pathlib import Path
+
+PERF_SECTIONS = (
+    ('gemini', 'Gemini (모델별)'),
+    ('discord', 'Discord'),
+    ('gateway', 'Gateway'),
+    ('rp', 'RP 응답 (룸별)'),
+    ('queue', '작업 대기열 대기'),
+    ('throughput', '시간당 생성량'),
+)
+
+
+def _fmt_ms(ms: float) -> str:
+    return f"{ms:.0f}ms" if ms < 1000 else f"{ms / 1000:.1f}s"
 
 
 def build_dashboard_context(alert: str, api: dict) -> dict:
@@ -20,6 +34,11 @@ def build_dashboard_context(alert: str, api: dict) -> dict:
     load_cron_columns = api["load_cron_columns"]
     fmt_kst = api["fmt_kst"]
     due_label = api["due_label"]
+    recent_action_jobs = api["recent_action_jobs"]
+    publish_queue_status = api["publish_queue_status"]
+    gemini_usage = api["gemini_usage"]
+    perf_tables = api["perf_tables"]
+    sparkline_svg = api["sparkline_svg"]
 
     ok, data, raw = gateway_call("cron.list", {"includeDisabled": True})
     jobs = data.get("jobs", []) if ok else []
@@ -88,9 +107,9 @@ def build_dashboard_context(alert: str, api: dict) -> dict:
             f"<td><code>{schedule}</code></td>"
             f"<td>{next_run}</td>"
             f"<td>"
-            f"<form method='post' action='/run' style='display:inline'><input type='hidden' name='id' value='{jid}'><button>{html.escape(btn.get('run','즉시 실행'))}</button></form> "
-            f"<form method='post' action='/toggle' style='display:inline'><input type='hidden' name='id' value='{jid}'><input type='hidden' name='enabled' value={'0' if enabled else '1'}><button>{btn_toggle}</button></form> "
-            f"<form method='post' action='/remove' style='display:inline' onsubmit=\"return confirm('정말 삭제할까?')\"><input type='hidden' name='id' value='{jid}'><button style='background:#4a1d1d'>{html.escape(btn.get('delete','삭제'))}</button></form>"
+            f"<form method='post' action='run' style='display:inline'><input type='hidden' name='id' value='{jid}'><button>{html.escape(btn.get('run','즉시 실행'))}</button></form> "
+            f"<form method='post' action='toggle' style='display:inline'><input type='hidden' name='id' value='{jid}'><input type='hidden' name='enabled' value={'0' if enabled else '1'}><button>{btn_toggle}</button></form> "
+            f"<form method='post' action='remove' style='display:inline' onsubmit=\"return confirm('정말 삭제할까?')\"><input type='hidden' name='id' value='{jid}'><button style='background:#4a1d1d'>{html.escape(btn.get('delete','삭제'))}</button></form>"
             f"</td>"
             f"</tr>"
         )
@@ -171,6 +190,88 @@ def build_dashboard_context(alert: str, api: dict) -> dict:
 
     dashboard_check_rows = ''.join(dashboard_rows)
 
+    job_status_colors = {'queued': '#94a3b8', 'running': '#f59e0b', 'ok': '#22c55e', 'error': '#ef4444', 'interrupted': '#ef4444'}
+    action_rows = []
+    for jr in recent_action_jobs(8):
+        st = str(jr.get('status', '-'))
+        tail = '\n'.join(str(x) for x in (jr.get('tail') or [])[-12:])
+        detail = html.escape(str(jr.get('message') or ''))
+        if tail:
+            detail += f"<details><summary class='muted'>출력 tail</summary><pre class='err' style='background:#0b1220'>{html.escape(tail)}</pre></details>"
+        action_rows.append(
+            f"<tr data-job-id='{html.escape(str(jr.get('id', '')))}'>"
+            f"<td>{html.escape(str(jr.get('label', '-')))}<div class='muted'>{html.escape(str(jr.get('id', '')))}</div></td>"
+            f"<td style='color:{job_status_colors.get(st, '#94a3b8')}'>{html.escape(st.upper())}</td>"
+            f"<td>{detail}</td>"
+            f"</tr>"
+        )
+    if not action_rows:
+        action_rows.append("<tr><td colspan='3'>최근 작업 없음</td></tr>")
+
+    pub_status_colors = {'queued': '#94a3b8', 'sending': '#f59e0b', 'sent': '#22c55e', 'failed': '#ef4444'}
+    pub = publish_queue_status(10)
+    pub_counts = pub.get('counts', {})
+    publish_counts_html = ' · '.join(
+        f"<span style='color:{pub_status_colors.get(k, '#94a3b8')}'>{html.escape(k)} {int(pub_counts.get(k, 0))}</span>"
+        for k in ('queued', 'sending', 'sent', 'failed')
+    )
+    publish_rows = []
+    for it in pub.get('items', []):
+        st = str(it.get('status', '-'))
+        publish_rows.append(
+            f"<tr>"
+            f"<td>{html.escape(Path(str(it.get('path', ''))).name)}<div class='muted'>{html.escape(str(it.get('caption', ''))[:60])}</div></td>"
+            f"<td>{html.escape(str(it.get('channel_id', '-')))}</td>"
+            f"<td style='color:{pub_status_colors.get(st, '#94a3b8')}'>{html.escape(st.upper())} ({int(it.get('attempts', 0))})</td>"
+            f"<td>{html.escape(str(it.get('error') or ''))}</td>"
+            f"</tr>"
+        )
+    if not publish_rows:
+        publish_rows.append("<tr><td colspan='4'>배포 대기열 비어 있음</td></tr>")
+
+    gemini_rows = []
+    for m in gemini_usage(1).get('models', []):
+        rpm, cap = m.get('rpm'), m.get('cap')
+        # rpm은 429 뒤 학습한 속도 (없으면 설정 상한만, 둘 다 없으면 제한 없음)
+        throttled = rpm is not None and (cap is None or float(rpm) < float(cap))
+        blocked = float(m.get('blocked_sec') or 0)
+        state = f"<span style='color:#ef4444'>대기 {blocked:.0f}s</span>" if blocked > 0 else "<span style='color:#22c55e'>OK</span>"
+        gemini_rows.append(
+            f"<tr>"
+            f"<td>{html.escape(str(m.get('model', '-')))}</td>"
+            f"<td style='color:{'#f59e0b' if throttled else '#e2e8f0'}'>{'-' if rpm is None else f'{float(rpm):g}'} / {'-' if cap is None else f'{float(cap):g}'}</td>"
+            f"<td>{state}</td>"
+            f"<td>{int(m.get('calls', 0))} · ok {int(m.get('ok', 0))} · 429 {int(m.get('rate_limited', 0))} · err {int(m.get('errors', 0))}</td>"
+            f"<td>{float(m.get('wait_sec', 0)):.0f}s</td>"
+            f"</tr>"
+        )
+    if not gemini_rows:
+        gemini_rows.append("<tr><td colspan='5'>오늘 Gemini 호출 없음</td></tr>")
+
+    perf = perf_tables()
+    perf_blocks = []
+    for group, title in PERF_SECTIONS:
+        rows_ = perf.get(group) or []
+        if group == 'throughput':
+            head = "<tr><th>종류</th><th>24시간 합계</th><th>최대/시간</th><th>추이</th></tr>"
+            body_rows = [
+                f"<tr><td>{html.escape(r['label'])}</td><td>{int(r['total'])}</td>"
+                f"<td>{int(max(v for v in r['spark'] if v is not None))}</td><td>{sparkline_svg(r['spark'], color='#22c55e')}</td></tr>"
+                for r in rows_
+            ]
+        else:
+            head = "<tr><th>대상</th><th>호출</th><th>오류</th><th>p50</th><th>p95</th><th>p99</th><th>p95 추이</th></tr>"
+            body_rows = [
+                f"<tr><td>{html.escape(r['label'])}</td><td>{r['count']}</td>"
+                f"<td style='color:{'#ef4444' if r['errors'] else '#94a3b8'}'>{r['errors']}</td>"
+                f"<td>{_fmt_ms(r['p50'])}</td><td>{_fmt_ms(r['p95'])}</td><td>{_fmt_ms(r['p99'])}</td>"
+                f"<td>{sparkline_svg(r['spark'])}</td></tr>"
+                for r in rows_
+            ]
+        if not body_rows:
+            body_rows = [f"<tr><td colspan='7' class='muted'>기록 없음</td></tr>"]
+        perf_blocks.append(f"<h3>{html.escape(title)}</h3><table><thead>{head}</thead><tbody>{''.join(body_rows)}</tbody></table>")
+
     cols = load_cron_columns()
     cron_head_html = ''.join([f"<th>{html.escape(str(c.get('label', '')))}</th>" for c in cols])
     alert_html = f"<div class='alert'>{html.escape(alert)}</div>" if alert else ""
@@ -202,4 +303,9 @@ def build_dashboard_context(alert: str, api: dict) -> dict:
         'cron_head_html': cron_head_html,
         'alert_html': alert_html,
         'err_html': err_html,
+        'action_job_rows': ''.join(action_rows),
+        'publish_counts_html': publish_counts_html,
+        'publish_rows': ''.join(publish_rows),
+        'gemini_rows': ''.join(gemini_rows),
+        'perf_html': ''.join(perf_blocks),
     }
@@ -6,17 +6,26 @@ import html
 import json
 import os
 import subprocess
+import sys
+import threading
 import time
 from datetime import datetime, timezone
 from http.server import ThreadingHTTPServer
 from pathlib import Path
 
+from action_jobs import ActionJobs
+from actions.vercel_cleanup_action import cleanup_deployments as cleanup_vercel_deployments
 from http_handler import create_handler
 from post_actions import handle_post
+from perf_rollup import PerfRollup, sparkline_svg
 from view_context import build_dashboard_context
 
 try:
     from utility.common.generation_defaults import WORKSPACE_ROOT
+    from utility.common.json_cache import load_json_cached
+    from utility.common.supervisor_client import supervisor_request
+    from utility.common.gemini_quota import usage_summary as gemini_usage
+    from utility.common import metrics
 except ModuleNotFoundError:
     import sys
     from pathlib import Path as _Path
@@ -25,6 +34,14 @@ except ModuleNotFoundError:
             sys.path.append(str(_p))
             break
     from utility.common.generation_defaults import WORKSPACE_ROOT
+    from utility.common.json_cache import load_json_cached
+    from utility.common.supervisor_client import supervisor_request
+    from utility.common.gemini_quota import usage_summary as gemini_usage
+    from utility.common import metrics
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from common.publish_queue import queue_status as publish_queue_status
+from common.publish_queue import retry_failed as retry_failed_publish
 
 
 def _val(form: dict[str, list[str]], key: str, default: str = "") -> str:
@@ -68,6 +85,39 @@ def _due_label(ms: int | None, now_ms: int) -> str:
     return f'{h//24}d {h%24}h'
 
 
+def _run_logged(cmd: list[str], log=None, timeout: float | None = None, **kwargs) -> tuple[int, str]:
+    """subprocess 실행 후 (returncode, stdout+stderr)를 돌려준다.
+
+    log 콜백이 있으면 출력 줄을 실시간으로 흘려보낸다(작업 현황 tail 용).
+    """
+    if log is None:
+        p = subprocess.run(cmd, text=True, capture_output=True, timeout=timeout, **kwargs)
+        return p.returncode, ((p.stdout or '') + ('\n' + p.stderr if p.stderr else '')).strip()
+
+    proc = subprocess.Popen(cmd, text=True, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, **kwargs)
+    timed_out = threading.Event()
+
+    def _kill() -> None:
+        timed_out.set()
+        proc.kill()
+
+    timer = threading.Timer(timeout, _kill) if timeout else None
+    if timer:
+        timer.start()
+    lines: list[str] = []
+    try:
+        for ln in proc.stdout or []:
+            lines.append(ln.rstrip('\n'))
+            log(ln)
+        proc.wait()
+    finally:
+        if timer:
+            timer.cancel()
+    if timed_out.is_set():
+        raise subprocess.TimeoutExpired(cmd, timeout)
+    return proc.returncode, '\n'.join(lines).strip()
+
+
 def gateway_call(method: str, params: dict) -> tuple[bool, dict, str]:
     cmd = [
         "openclaw",
@@ -79,13 +129,20 @@ def gateway_call(method: str, params: dict) -> tuple[bool, dict, str]:
         "--params",
         json.dumps(params, ensure_ascii=False),
     ]
-    p = subprocess.run(cmd, text=True, capture_output=True)
+    with metrics.timer("gateway.call", method=method) as t:
+        p = subprocess.run(cmd, text=True, capture_output=True)
+        t["ok"] = p.returncode == 0
     out = (p.stdout or "") + ("\n" + p.stderr if p.stderr else "")
     data = _extract_json(out)
     return (p.returncode == 0), data, out[-1500:]
 
 
 def studio_ui_status() -> tuple[bool, list[dict], str]:
+    # supervisor가 떠 있으면 소켓 조회 한 번으로 끝 (ui_runtime 프로세스/포트 probe 생략)
+    res = supervisor_request({'cmd': 'status'})
+    if res and res.get('ok'):
+        rows = [r for r in res.get('rows', []) if r.get('port')]
+        return True, rows, json.dumps(res, ensure_ascii=False)[-1200:]
     cmd = [PYTHON_BIN, str((WORKSPACE / 'studio' / 'ui_runtime.py').resolve()), "status"]
     p = subprocess.run(cmd, text=True, capture_output=True)
     out = (p.stdout or "") + ("\n" + p.stderr if p.stderr else "")
@@ -110,6 +167,9 @@ PIN_MESSAGE_ACTION = WORKSPACE / 'studio' / 'dashboard' / 'actions' / 'discord_p
 RP_RT_LOCK = WORKSPACE / 'memory' / 'rp_rooms' / '_runtime_lock.json'
 RP_RUNTIME_SCRIPT = WORKSPACE / 'studio' / 'dashboard' / 'actions' / 'rp_runtime_action.py'
 NETWORK_CFG = WORKSPACE / 'studio' / 'dashboard' / 'config' / 'network.json'
+ACTION_JOBS_PATH = DM_RUNTIME_DIR / 'dashboard_action_jobs.json'
+ACTION_JOBS = ActionJobs(ACTION_JOBS_PATH, max_workers=int(os.getenv('DASHBOARD_ACTION_WORKERS', '2') or '2'))
+PERF = PerfRollup()
 
 
 def _system_dup_signal(jobs: list[dict]) -> tuple[str, str]:
@@ -143,22 +203,17 @@ def _aiven_mysql_status() -> tuple[str, str, str]:
 
 
 def _load_dashboard_checks() -> list[dict]:
-    try:
-        data = json.loads(DASHBOARD_CHECKS.read_text(encoding='utf-8'))
-        if isinstance(data, list):
-            return data
-    except Exception:
-        pass
-    return []
+    data = load_json_cached(DASHBOARD_CHECKS, [])
+    return data if isinstance(data, list) else []
 
 
 
 
 def _load_ui_texts() -> dict:
-    try:
-        return json.loads(UI_TEXTS.read_text(encoding='utf-8'))
-    except Exception:
-        return {
+    data = load_json_cached(UI_TEXTS)
+    if isinstance(data, dict):
+        return data
+    return {
             'appTitle':'Studio Dashboard',
             'tabDashboard':'대시보드',
             'tabCronManager':'크론 매니저',
@@ -169,15 +224,13 @@ def _load_ui_texts() -> dict:
 
 
 def _load_sources_cfg() -> dict:
-    try:
-        return json.loads(SOURCES_CFG.read_text(encoding='utf-8'))
-    except Exception:
-        return {}
+    data = load_json_cached(SOURCES_CFG, {})
+    return data if isinstance(data, dict) else {}
 
 
 def _load_cron_columns() -> list[dict]:
     try:
-        data=json.loads(CRON_MANAGER_COLUMNS.read_text(encoding='utf-8'))
+        data=load_json_cached(CRON_MANAGER_COLUMNS) or {}
         cols=[c for c in (data.get('columns') or []) if c.get('enabled',True)]
         return cols
     except Exception:
@@ -215,33 +268,43 @@ def _rp_status() -> tuple[bool, str]:
         return False, 'OFF'
 
 
-def _rp_recover_only() -> tuple[bool, str]:
+def _rp_recover_only(log=None) -> tuple[bool, str]:
     cmd = [PYTHON_BIN, str((WORKSPACE / 'utility' / 'taeyul' / 'taeyul_cli.py').resolve()), 'rp-healthcheck', '--recover']
-    p = subprocess.run(cmd, text=True, capture_output=True)
-    out = ((p.stdout or '') + ('\n' + p.stderr if p.stderr else '')).strip()
-    if p.returncode == 0:
+    code, out = _run_logged(cmd, log)
+    if code == 0:
         return True, (out.splitlines()[-1] if out else 'RP 복구 완료')
     return False, (out.splitlines()[-1] if out else 'RP 복구 실패')
 
 
-def _rp_turn_on() -> tuple[bool, str]:
+def _rp_turn_on(log=None) -> tuple[bool, str]:
     on, st = _rp_status()
     if on:
-        ok, msg = _rp_recover_only()
+        ok, msg = _rp_recover_only(log)
         return ok, f'RP 이미 ON · {msg}'
 
-    ok, rec = _rp_recover_only()
-    cmd = [PYTHON_BIN, str(RP_RUNTIME_SCRIPT)]
-    subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-    time.sleep(1.0)
+    ok, rec = _rp_recover_only(log)
+    res = supervisor_request({'cmd': 'start', 'target': 'rp'})
+    if res and res.get('ok'):
+        if log:
+            log(f"supervisor: {res.get('message', '')}")
+        time.sleep(3.0)
+    else:
+        cmd = [PYTHON_BIN, str(RP_RUNTIME_SCRIPT)]
+        subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        time.sleep(1.0)
     on2, st2 = _rp_status()
     if on2:
         return True, f'RP ON 완료 · {st2} · {rec}'
     return False, f'RP ON 실패 · {rec}'
 
 
-def _rp_turn_off() -> tuple[bool, str]:
+def _rp_turn_off(log=None) -> tuple[bool, str]:
     killed = 0
+    # supervisor 관리 중이면 재기동되지 않게 먼저 desired=down으로 내린다.
+    res = supervisor_request({'cmd': 'stop', 'target': 'rp'}, timeout=15)
+    if res and res.get('ok'):
+        if log:
+            log(f"supervisor: {res.get('message', '')}")
     try:
         if RP_RT_LOCK.exists():
             obj = json.loads(RP_RT_LOCK.read_text(encoding='utf-8') or '{}')
@@ -250,6 +313,8 @@ def _rp_turn_off() -> tuple[bool, str]:
                 try:
                     os.kill(pid, 15)
                     killed += 1
+                    if log:
+                        log(f'SIGTERM pid={pid}')
                 except Exception:
                     pass
             RP_RT_LOCK.unlink(missing_ok=True)
@@ -268,6 +333,13 @@ def _rp_turn_off() -> tuple[bool, str]:
     return False, f'RP OFF 일부 실패 · {st}'
 
 def _ensure_dm_bulk_runtime() -> None:
+    res = supervisor_request({'cmd': 'status', 'target': 'dm-bulk'})
+    if res and res.get('ok'):
+        row = (res.get('rows') or [{}])[0]
+        if row.get('want') != 'up' or row.get('state') == 'fatal':
+            supervisor_request({'cmd': 'start', 'target': 'dm-bulk'})
+        return
+
     # stale lock 정리
     try:
         if DM_BULK_LOCK.exists():
@@ -282,7 +354,7 @@ def _ensure_dm_bulk_runtime() -> None:
                     cmdline = Path(f'/proc/{pid}/cmdline').read_text(errors='ignore')
                 except Exception:
                     remove_lock = True
-                if cmdline and 'discord_bulk_delete_runtime.py' not in cmdline:
+                if cmdline and 'discord_bulk_delete_action.py' not in cmdline:
                     remove_lock = True
             if remove_lock:
                 DM_BULK_LOCK.unlink(missing_ok=True)
@@ -312,7 +384,7 @@ def _dm_bulk_delete_enqueue(channel_id: str, limit: int, delete_pinned: bool = F
     return False, (out.splitlines()[-1] if out else 'DM 일괄 삭제 큐 등록 실패')
 
 
-def _create_and_pin_message(channel_id: str) -> tuple[bool, str]:
+def _create_and_pin_message(channel_id: str, log=None) -> tuple[bool, str]:
     if not PIN_MESSAGE_FILE.exists():
         return False, f'파일 없음: {PIN_MESSAGE_FILE}'
     cmd = [
@@ -320,14 +392,13 @@ def _create_and_pin_message(channel_id: str) -> tuple[bool, str]:
         '--channel-id', str(channel_id),
         '--text-path', str(PIN_MESSAGE_FILE),
     ]
-    p = subprocess.run(cmd, text=True, capture_output=True)
-    out = ((p.stdout or '') + ('\n' + p.stderr if p.stderr else '')).strip()
-    if p.returncode == 0:
+    code, out = _run_logged(cmd, log)
+    if code == 0:
         return True, (out.splitlines()[-1] if out else '고정 메시지 생성/고정 완료')
     return False, (out.splitlines()[-1] if out else '고정 메시지 생성/고정 실패')
 
 
-def _commit_push(message: str, target: str = 'workspace') -> tuple[bool, str]:
+def _commit_push(message: str, target: str = 'workspace', log=None) -> tuple[bool, str]:
     default_msg = 'chore(tcg): update from dashboard' if target == 'tcg' else 'chore(workspace): update from dashboard'
     msg = (message or '').strip() or default_msg
     repo_dir = str((WORKSPACE / 'tcg').resolve()) if target == 'tcg' else str(WORKSPACE.resolve())
@@ -355,20 +426,19 @@ def _commit_push(message: str, target: str = 'workspace') -> tuple[bool, str]:
             "fi"
         )
     ]
-    p = subprocess.run(cmd, text=True, capture_output=True)
-    out = ((p.stdout or '') + ('\n' + p.stderr if p.stderr else '')).strip()
+    code, out = _run_logged(cmd, log)
     if 'PUSHED_AHEAD' in out:
         return True, f'[{target}] 로컬 커밋(앞선 이력) 푸시 완료.'
     if 'NO_CHANGES' in out:
         return True, f'[{target}] 커밋할 변경사항이 없어.'
-    if p.returncode == 0:
+    if code == 0:
         tail = out.splitlines()[-1] if out else '커밋/푸시 완료'
         return True, f'[{target}] {tail}'
     tail = out.splitlines()[-1] if out else '커밋/푸시 실패'
     return False, f'[{target}] {tail}'
 
 
-def _initial_reset_run(reason: str, target: str = 'workspace') -> tuple[bool, str]:
+def _initial_reset_run(reason: str, target: str = 'workspace', log=None) -> tuple[bool, str]:
     repo_dir = str((WORKSPACE / 'tcg').resolve()) if target == 'tcg' else str(WORKSPACE.resolve())
     reason_clean = ' '.join((reason or '').split()).strip()
     if reason_clean:
@@ -391,9 +461,8 @@ def _initial_reset_run(reason: str, target: str = 'workspace') -> tuple[bool, st
             "echo done: dashboard initial reset completed"
         )
     ]
-    p = subprocess.run(cmd, text=True, capture_output=True)
-    out = ((p.stdout or '') + ('\n' + p.stderr if p.stderr else '')).strip()
-    if p.returncode == 0:
+    code, out = _run_logged(cmd, log)
+    if code == 0:
         tail = out.splitlines()[-1] if out else '이니셜 커밋 밀기 완료'
         return True, f'[{target}] {tail}'
     tail = out.splitlines()[-1] if out else '이니셜 커밋 밀기 실패'
@@ -403,10 +472,8 @@ def _initial_reset_run(reason: str, target: str = 'workspace') -> tuple[bool, st
 
 
 def _load_network_cfg() -> dict:
-    try:
-        return json.loads(NETWORK_CFG.read_text(encoding='utf-8'))
-    except Exception:
-        return {}
+    data = load_json_cached(NETWORK_CFG, {})
+    return data if isinstance(data, dict) else {}
 
 
 def _remote_urls() -> list[str]:
@@ -432,7 +499,7 @@ def _remote_urls() -> list[str]:
     return uniq
 
 
-def _run_portproxy_update() -> tuple[bool, str]:
+def _run_portproxy_update(log=None) -> tuple[bool, str]:
     cfg = _load_network_cfg()
     script = str(cfg.get('portproxyScriptWindows', '') or '').strip()
     ports = cfg.get('ports') or [8767, 8787, 8791, 8795]
@@ -447,9 +514,8 @@ def _run_portproxy_update() -> tuple[bool, str]:
     last = ''
     for cmd in cmds:
         try:
-            p = subprocess.run(cmd, text=True, capture_output=True, timeout=120)
-            out = ((p.stdout or '') + ('\n' + p.stderr if p.stderr else '')).strip()
-            if p.returncode == 0:
+            code, out = _run_logged(cmd, log, timeout=120)
+            if code == 0:
                 return True, (out.splitlines()[-1] if out else 'portproxy 갱신 완료')
             last = out[-260:]
         except Exception as e:
@@ -461,42 +527,9 @@ def _run_portproxy_update() -> tuple[bool, str]:
     return False, manual
 
 
-def _cleanup_vercel_deployments(dry_run: bool = False) -> tuple[bool, str]:
-    tcg_dir = WORKSPACE / 'tcg'
-    project_name = 'nulsight'
-    scope = 'team_QtyiuCIFBns7dbiuGkXiPKgq'
-
-    list_cmd = ['vercel', 'list', project_name, '--yes', '--scope', scope]
-    lp = subprocess.run(list_cmd, cwd=str(tcg_dir), text=True, capture_output=True)
-    lout = ((lp.stdout or '') + ('\n' + lp.stderr if lp.stderr else '')).strip()
-    if lp.returncode != 0:
-        tail = lout.splitlines()[-1] if lout else '배포 목록 조회 실패'
-        return False, tail
-
-    urls = []
-    for ln in lout.splitlines():
-        s = ln.strip()
-        if s.startswith('https://') and '.vercel.app' in s:
-            urls.append(s)
-
-    if len(urls) <= 1:
-        return True, '정리할 이전 배포가 없어.'
-
-    keep = urls[0]
-    targets = urls[1:]
-
-    if dry_run:
-        return True, f'dry-run: keep 1개, delete 대상 {len(targets)}개'
-
-    deleted = 0
-    for u in targets:
-        dp = subprocess.run(['vercel', 'remove', u, '--yes', '--scope', scope], cwd=str(tcg_dir), text=True, capture_output=True)
-        if dp.returncode == 0:
-            deleted += 1
-
-    if deleted == len(targets):
-        return True, f'배포 정리 완료: keep 1개 ({keep}), 삭제 {deleted}개'
-    return False, f'배포 정리 부분 실패: keep 1개 ({keep}), 삭제 {deleted}/{len(targets)}개'
+def _cleanup_vercel_deployments(dry_run: bool = False, log=None) -> tuple[bool, str]:
+    # 보존 정책/병렬도는 config/vercel_cleanup.json, VERCEL_TOKEN 있으면 REST API 사용
+    return cleanup_vercel_deployments(dry_run, log=log)
 
 
 def _dm_bulk_runtime_status() -> tuple[str, str, str]:
@@ -553,6 +586,11 @@ def render_page(alert: str = "") -> bytes:
         "load_cron_columns": _load_cron_columns,
         "fmt_kst": _fmt_kst,
         "due_label": _due_label,
+        "recent_action_jobs": ACTION_JOBS.recent,
+        "publish_queue_status": publish_queue_status,
+        "gemini_usage": gemini_usage,
+        "perf_tables": PERF.tables,
+        "sparkline_svg": sparkline_svg,
     })
 
     jobs = ctx["jobs"]
@@ -579,6 +617,12 @@ def render_page(alert: str = "") -> bytes:
     cron_head_html = ctx["cron_head_html"]
     alert_html = ctx["alert_html"]
     err_html = ctx["err_html"]
+    action_job_rows = ctx["action_job_rows"]
+    publish_counts_html = ctx["publish_counts_html"]
+    publish_rows = ctx["publish_rows"]
+    gemini_rows = ctx["gemini_rows"]
+    perf_html = ctx["perf_html"]
+    any_active_job = any(j.get('status') in {'queued', 'running'} for j in ACTION_JOBS.recent(8))
 
     body = f"""
 <!doctype html>
@@ -673,7 +717,7 @@ details.fold > summary::-webkit-details-marker{{display:none}}
       <div class='stats' style='margin-bottom:10px'>{app_cards_html}</div>
       <div class='muted' style='margin-bottom:8px'>같은 네트워크 접속 주소</div>
       <div style='font-size:12px;line-height:1.6;margin-bottom:10px'>{remote_urls_html}</div>
-      <form method='post' action='/portproxy-refresh'>
+      <form method='post' action='portproxy-refresh'>
         <button class='btn btn-blue'>포트 프록시 갱신</button>
       </form>
     </div>
@@ -693,26 +737,26 @@ details.fold > summary::-webkit-details-marker{{display:none}}
           <div class='op-title'>런타임 제어</div>
           <div class='op-desc'>현재 상태: <b style='color:{'#22c55e' if rp_on else '#ef4444'}'>{'ON' if rp_on else 'OFF'}</b> · {html.escape(rp_state_text)}</div>
           <div class='grid' style='grid-template-columns:1fr 1fr;gap:8px'>
-            <form method='post' action='/rp-on'>
+            <form method='post' action='rp-on'>
               <button class='btn btn-green'>RP ON</button>
             </form>
-            <form method='post' action='/rp-off' onsubmit="return confirm('RP를 끌까?')"> 
+            <form method='post' action='rp-off' onsubmit="return confirm('RP를 끌까?')"> 
               <button class='btn btn-red'>RP OFF</button>
             </form>
           </div>
           <div class='muted' style='margin-top:8px'>Vercel 배포 정리 (tcg 프로젝트 고정)</div>
-          <div class='muted' style='font-size:12px;margin-bottom:8px'>dry-run은 삭제 없이 대상만 미리 보여주고, 배포 정리 실행은 실제 삭제해.</div>
+          <div class='muted' style='font-size:12px;margin-bottom:8px'>dry-run은 삭제 없이 대상만 미리 보여주고, 배포 정리 실행은 실제 삭제해. 최신/alias/production 보존 규칙은 config/vercel_cleanup.json.</div>
           <div class='grid' style='grid-template-columns:1fr 1fr;gap:8px'>
-            <form method='post' action='/vercel-cleanup'>
+            <form method='post' action='vercel-cleanup'>
               <button class='btn btn-blue'>배포 정리 실행</button>
             </form>
-            <form method='post' action='/vercel-cleanup-dry'>
+            <form method='post' action='vercel-cleanup-dry'>
               <button class='btn'>배포 정리 dry-run</button>
             </form>
           </div>
         </div>
 
-        <form method='post' action='/dm-bulk-delete' class='op-card'>
+        <form method='post' action='dm-bulk-delete' class='op-card'>
           <div class='op-title'>DM 일괄 삭제</div>
           <div class='op-desc'>대시보드 전용 실행 · 대상 채널 {html.escape(dm_channel_id)}</div>
           <div class='muted' style='color:{dm_rt_color}'>runtime {dm_rt_label} · {html.escape(dm_rt_detail)}</div>
@@ -722,7 +766,7 @@ details.fold > summary::-webkit-details-marker{{display:none}}
           <button class='btn btn-lime'>DM 일괄 삭제 실행</button>
         </form>
 
-        <form method='post' action='/commit-push' class='op-card'>
+        <form method='post' action='commit-push' class='op-card'>
           <div class='op-title'>커밋 + 푸시</div>
           <div class='op-desc'>선택한 저장소 변경사항 반영</div>
           <label class='op-label'>대상 저장소</label>
@@ -735,7 +779,7 @@ details.fold > summary::-webkit-details-marker{{display:none}}
           <button class='btn btn-blue'>커밋 푸시 실행</button>
         </form>
 
-        <form method='post' action='/initial-reset' class='op-card danger' onsubmit="return confirm('이니셜 커밋을 진행할까?')">
+        <form method='post' action='initial-reset' class='op-card danger' onsubmit="return confirm('이니셜 커밋을 진행할까?')">
           <div class='op-title'>이니셜 커밋으로 밀기</div>
           <div class='op-desc'>선택한 저장소 히스토리 정리 즉시 실행</div>
           <label class='op-label'>대상 저장소</label>
@@ -750,6 +794,42 @@ details.fold > summary::-webkit-details-marker{{display:none}}
       </div>
     </div>
 
+    <div class='panel col-span-2'>
+      <h2>{html.escape(sec.get('action_jobs','작업 현황'))}</h2>
+      <div class='muted' style='margin-bottom:8px'>커밋/푸시·배포 정리·포트 프록시·RP 제어는 백그라운드 작업으로 실행돼. 진행 중이면 자동으로 갱신해.</div>
+      <table id='actionJobsTable'>
+        <thead><tr><th>작업</th><th>상태</th><th>결과 / 출력</th></tr></thead>
+        <tbody>{action_job_rows}</tbody>
+      </table>
+    </div>
+
+    <div class='panel col-span-2'>
+      <h2>{html.escape(sec.get('publish_queue','배포 대기열'))}</h2>
+      <div class='muted' style='margin-bottom:8px'>image/music UI 디스코드 업로드는 대기열에 쌓이고 실패하면 간격을 늘려가며 재시도해. {publish_counts_html}</div>
+      <table>
+        <thead><tr><th>파일</th><th>채널</th><th>상태 (시도)</th><th>오류</th></tr></thead>
+        <tbody>{publish_rows}</tbody>
+      </table>
+      <form method='post' action='publish-retry' style='margin-top:8px'>
+        <button class='btn btn-blue'>실패 항목 다시 시도</button>
+      </form>
+    </div>
+
+    <div class='panel col-span-2'>
+      <h2>{html.escape(sec.get('gemini_usage','Gemini 사용량'))}</h2>
+      <div class='muted' style='margin-bottom:8px'>image/TTS/Veo/RP가 모델별 호출 속도를 같이 나눠 써. 429를 받으면 retryDelay만큼 쉬고 속도를 낮췄다가 천천히 올려. (오늘 기준)</div>
+      <table>
+        <thead><tr><th>모델</th><th>RPM (학습/설정)</th><th>상태</th><th>호출</th><th>대기 합계</th></tr></thead>
+        <tbody>{gemini_rows}</tbody>
+      </table>
+    </div>
+
+    <div class='panel col-span-2'>
+      <h2>{html.escape(sec.get('performance','성능'))}</h2>
+      <div class='muted' style='margin-bottom:8px'>최근 24시간 기록(metrics.jsonl)을 시간 단위로 접은 값이야. 백분위는 로그 눈금 추정치, 추이는 시간별 p95.</div>
+      {perf_html}
+    </div>
+
     <div class='panel col-span-2'>
       <h2>{html.escape(sec.get('pin_message','고정 메시지 관리'))}</h2>
       <div class='op-grid'>
@@ -758,7 +838,7 @@ details.fold > summary::-webkit-details-marker{{display:none}}
           <div class='op-desc'>{html.escape(str(PIN_MESSAGE_FILE))}</div>
           <div class='muted'>이 파일 수정 후 아래 버튼으로 1회 전송+고정</div>
         </div>
-        <form method='post' action='/pin-message' class='op-card'>
+        <form method='post' action='pin-message' class='op-card'>
           <div class='op-title'>고정 메시지 생성 및 즉시 고정</div>
           <div class='op-desc'>대상 채널: {html.escape(dm_channel_id)}</div>
           <button class='btn btn-blue'>고정 메시지 생성 및 고정</button>
@@ -828,6 +908,39 @@ details.fold > summary::-webkit-details-marker{{display:none}}
   }}
   tabDashBtn?.addEventListener('click', () => openTab('dash'));
   tabMgrBtn?.addEventListener('click', () => openTab('mgr'));
+
+  const jobsBody = document.querySelector('#actionJobsTable tbody');
+  const jobColors = {{queued:'#94a3b8', running:'#f59e0b', ok:'#22c55e', error:'#ef4444', interrupted:'#ef4444'}};
+  function esc(v){{
+    const d = document.createElement('div');
+    d.textContent = String(v ?? '');
+    return d.innerHTML;
+  }}
+  function renderJobs(jobs){{
+    if (!jobsBody) return;
+    if (!jobs.length){{
+      jobsBody.innerHTML = "<tr><td colspan='3'>최근 작업 없음</td></tr>";
+      return;
+    }}
+    jobsBody.innerHTML = jobs.map((j) => {{
+      const st = String(j.status || '-');
+      const tail = (j.tail || []).slice(-12).join('\\n');
+      const detail = esc(j.message || '') + (tail ? `<details ${{st === 'running' ? 'open' : ''}}><summary class='muted'>출력 tail</summary><pre class='err' style='background:#0b1220'>${{esc(tail)}}</pre></details>` : '');
+      return `<tr data-job-id='${{esc(j.id)}}'><td>${{esc(j.label || '-')}}<div class='muted'>${{esc(j.id)}}</div></td><td style='color:${{jobColors[st] || '#94a3b8'}}'>${{esc(st.toUpperCase())}}</td><td>${{detail}}</td></tr>`;
+    }}).join('');
+  }}
+  async function pollJobs(){{
+    try {{
+      const r = await fetch('jobs', {{cache:'no-store'}});
+      const data = await r.json();
+      const jobs = data.jobs || [];
+      renderJobs(jobs);
+      if (jobs.some((j) => j.status === 'queued' || j.status === 'running')) setTimeout(pollJobs, 2000);
+    }} catch (_) {{
+      setTimeout(pollJobs, 5000);
+    }}
+  }}
+  if ({'true' if any_active_job else 'false'}) setTimeout(pollJobs, 1500);
 }})();
 </script>
 </body>
@@ -850,10 +963,27 @@ def _post_api() -> dict:
         "create_and_pin_message": _create_and_pin_message,
         "run_portproxy_update": _run_portproxy_update,
         "cleanup_vercel_deployments": _cleanup_vercel_deployments,
+        "submit_job": ACTION_JOBS.submit,
+        "retry_failed_publish": retry_failed_publish,
     }
 
 
-Handler = create_handler(render_page, handle_post, _post_api)
+def _json_get(path: str) -> dict | None:
+    if path == '/jobs':
+        return {'jobs': ACTION_JOBS.recent(8)}
+    if path.startswith('/jobs/'):
+        job = ACTION_JOBS.get(path[len('/jobs/'):])
+        return {'job': job} if job else {'error': 'job not found'}
+    if path == '/publish-queue':
+        return publish_queue_status(50)
+    if path == '/gemini-usage':
+        return gemini_usage(7)
+    if path == '/metrics':
+        return metrics.snapshot(3600)
+    return None
+
+
+Handler = create_handler(render_page, handle_post, _post_api, _json_get)
 
 
 def main() -> int:
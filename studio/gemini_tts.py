@@ -1,17 +1,19 @@
 #!/usr/bin/env python3
 import argparse
 import base64
+import hashlib
+import io
 import json
 import os
 import re
 import sys
 import urllib.error
 import urllib.request
+import uuid
 import wave
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-
-SAFE_DEFAULT_OUTPUT_DIR = MEDIA_AUDIO_DIR
-LEGACY_OUTPUT_DIR = (WORKSPACE_ROOT / 'output').resolve()
+from typing import BinaryIO, Callable
 
 try:
     from utility.common.env_prefer_dotenv import load_env_prefer_dotenv
@@ -19,10 +21,13 @@ try:
         DEFAULT_TTS_MODEL,
         DEFAULT_TTS_VOICE,
         MEDIA_AUDIO_DIR,
+        MEDIA_ROOT,
         WORKSPACE_ROOT,
     )
     from utility.common.path_policy import resolve_out_dir
-    from utility.common.filename_policy import slugify_name, resolve_unique_name
+    from utility.common.filename_policy import append_indexed_name, slugify_name, resolve_unique_name
+    from utility.common.media_stream import CHUNK_SIZE, INLINE_BYTES_KEY, find_inline, inline_mime, load_inline_json, read_inline_json
+    from utility.common import gemini_quota, media_catalog, metrics
 except ModuleNotFoundError:
     import sys
     from pathlib import Path as _Path
@@ -35,10 +40,24 @@ except ModuleNotFoundError:
         DEFAULT_TTS_MODEL,
         DEFAULT_TTS_VOICE,
         MEDIA_AUDIO_DIR,
+        MEDIA_ROOT,
         WORKSPACE_ROOT,
     )
     from utility.common.path_policy import resolve_out_dir
-    from utility.common.filename_policy import slugify_name, resolve_unique_name
+    from utility.common.filename_policy import append_indexed_name, slugify_name, resolve_unique_name
+    from utility.common.media_stream import CHUNK_SIZE, INLINE_BYTES_KEY, find_inline, inline_mime, load_inline_json, read_inline_json
+    from utility.common import gemini_quota, media_catalog, metrics
+
+SAFE_DEFAULT_OUTPUT_DIR = MEDIA_AUDIO_DIR
+LEGACY_OUTPUT_DIR = (WORKSPACE_ROOT / 'output').resolve()
+
+# 배치 TTS: 긴 텍스트는 문장 경계로 잘라 동시에 합성하고 PCM을 이어붙인다.
+TTS_CACHE_DIR = (MEDIA_ROOT / '.cache' / 'tts').resolve()
+TTS_CACHE_MAX_BYTES = int(os.getenv('TTS_CACHE_MAX_MB', '256') or '256') * 1024 * 1024
+TTS_CHUNK_MAX_CHARS = int(os.getenv('TTS_CHUNK_MAX_CHARS', '400') or '400')
+TTS_BATCH_CONCURRENCY = int(os.getenv('TTS_BATCH_CONCURRENCY', '4') or '4')
+_SENTENCE_SPLIT = re.compile(r"(?<=[.!?。！？…])\s+|\n+")
+_CLAUSE_SPLIT = re.compile(r"(?<=[,，、;:])\s+|\s+")
 
 
 def _force_utf8_stdio() -> None:
@@ -57,7 +76,8 @@ def _resolve_unique_name(out_dir: Path, name: str) -> str:
     return resolve_unique_name(out_dir, name)
 
 
-def call_tts(api_key: str, model: str, text: str, voice: str) -> dict:
+def call_tts(api_key: str, model: str, text: str, voice: str, sink: BinaryIO | None = None) -> dict:
+    """sink를 넘기면 오디오 바이트를 디코딩하면서 바로 sink에 쓴다(긴 TTS도 메모리 일정)."""
     url = f"https://generativelanguage.googleapis.com/v1beta/{model}:generateContent?key={api_key}"
     body = {
         "contents": [{"parts": [{"text": text}]}],
@@ -80,23 +100,30 @@ def call_tts(api_key: str, model: str, text: str, voice: str) -> dict:
         method="POST",
     )
 
-    try:
-        with urllib.request.urlopen(req, timeout=180) as resp:
-            return json.loads(resp.read().decode("utf-8", errors="replace"))
-    except urllib.error.HTTPError as e:
-        payload = e.read().decode("utf-8", errors="replace")
-        raise RuntimeError(f"Gemini TTS failed ({e.code}): {payload}") from e
+    gemini_quota.acquire(model)
+    with metrics.timer("gemini.call", model=gemini_quota.model_key(model), op="tts"):
+        try:
+            with urllib.request.urlopen(req, timeout=180) as resp:
+                payload = read_inline_json(resp, sink) if sink is not None else load_inline_json(resp)
+        except urllib.error.HTTPError as e:
+            payload = e.read().decode("utf-8", errors="replace")
+            gemini_quota.record(model, e.code, payload)
+            raise RuntimeError(f"Gemini TTS failed ({e.code}): {payload}") from e
+        except Exception:
+            gemini_quota.record(model, 0)
+            raise
+    gemini_quota.record(model, 200)
+    return payload
 
 
 def extract_audio(payload: dict) -> tuple[bytes, str]:
-    candidates = payload.get("candidates", [])
-    for c in candidates:
-        parts = c.get("content", {}).get("parts", [])
-        for p in parts:
-            inline = p.get("inlineData") or p.get("inline_data")
-            if inline and inline.get("data"):
-                mime = (inline.get("mimeType") or inline.get("mime_type") or "audio/wav").lower()
-                return base64.b64decode(inline["data"]), mime
+    inline = find_inline(payload)
+    if inline is not None:
+        mime = inline_mime(inline, "audio/wav")
+        if inline.get("data"):
+            return base64.b64decode(inline["data"]), mime
+        if payload.get(INLINE_BYTES_KEY):
+            return payload[INLINE_BYTES_KEY], mime
     raise RuntimeError("응답에서 오디오 데이터를 찾지 못함")
 
 
@@ -108,12 +135,7 @@ def ext_from_mime(mime: str) -> str:
     return "wav"
 
 
-def maybe_wrap_pcm_to_wav(audio_bytes: bytes, mime: str) -> bytes:
-    """Gemini can return raw PCM (e.g., audio/L16). Wrap it into a valid WAV container."""
-    m = mime.lower()
-    if "l16" not in m and "pcm" not in m:
-        return audio_bytes
-
+def _pcm_params(mime: str) -> tuple[int, int]:
     sample_rate = 24000
     channels = 1
 
@@ -135,10 +157,22 @@ def maybe_wrap_pcm_to_wav(audio_bytes: bytes, mime: str) -> bytes:
                 channels = int(v)
             except Exception:
                 pass
+    return sample_rate, channels
+
+
+def _is_pcm(mime: str) -> bool:
+    m = mime.lower()
+    return "l16" in m or "pcm" in m
 
-    # 16-bit PCM little-endian assumed for L16 output
-    import io
 
+def maybe_wrap_pcm_to_wav(audio_bytes: bytes, mime: str) -> bytes:
+    """Gemini can return raw PCM (e.g., audio/L16). Wrap it into a valid WAV container."""
+    if not _is_pcm(mime):
+        return audio_bytes
+
+    sample_rate, channels = _pcm_params(mime)
+
+    # 16-bit PCM little-endian assumed for L16 output
     buf = io.BytesIO()
     with wave.open(buf, "wb") as wf:
         wf.setnchannels(max(1, channels))
@@ -148,18 +182,237 @@ def maybe_wrap_pcm_to_wav(audio_bytes: bytes, mime: str) -> bytes:
     return buf.getvalue()
 
 
-def main() -> int:
+def finalize_audio_file(part: Path, out: Path, mime: str) -> None:
+    """디스크에 받은 오디오(part)를 out으로 확정. PCM이면 조각 단위로 WAV 헤더를 씌운다."""
+    if not _is_pcm(mime):
+        part.replace(out)
+        return
+    sample_rate, channels = _pcm_params(mime)
+    tmp = out.with_name(out.name + ".tmp")
+    with part.open("rb") as src, wave.open(str(tmp), "wb") as wf:
+        wf.setnchannels(max(1, channels))
+        wf.setsampwidth(2)
+        wf.setframerate(max(8000, sample_rate))
+        for chunk in iter(lambda: src.read(CHUNK_SIZE), b""):
+            wf.writeframesraw(chunk)
+    tmp.replace(out)
+    part.unlink(missing_ok=True)
+
+
+def split_text_chunks(text: str, max_chars: int = TTS_CHUNK_MAX_CHARS) -> list[str]:
+    """문장 경계로 나눈 뒤 max_chars 이하로 묶는다. 한 문장이 너무 길면 쉼표/공백에서 자른다."""
+    max_chars = max(20, int(max_chars))
+    pieces: list[str] = []
+    for sent in _SENTENCE_SPLIT.split((text or "").strip()):
+        sent = sent.strip()
+        if not sent:
+            continue
+        if len(sent) <= max_chars:
+            pieces.append(sent)
+            continue
+        buf = ""
+        for word in _CLAUSE_SPLIT.split(sent):
+            if buf and len(buf) + 1 + len(word) > max_chars:
+                pieces.append(buf)
+                buf = word
+            else:
+                buf = f"{buf} {word}".strip()
+        if buf:
+            pieces.append(buf)
+
+    chunks: list[str] = []
+    for piece in pieces:
+        if chunks and len(chunks[-1]) + 1 + len(piece) <= max_chars:
+            chunks[-1] = f"{chunks[-1]} {piece}"
+        else:
+            chunks.append(piece)
+    return chunks
+
+
+def _chunk_key(text: str, voice: str, model: str) -> str:
+    raw = json.dumps([text, voice, model], ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _to_pcm(audio_bytes: bytes, mime: str) -> tuple[bytes, str]:
+    """이어붙일 수 있도록 raw PCM(L16)으로 맞춘다. WAV는 헤더만 벗기고, 압축 포맷은 재인코딩하지 않고 거절."""
+    if _is_pcm(mime):
+        return audio_bytes, mime
+    if audio_bytes[:4] == b"RIFF" and audio_bytes[8:12] == b"WAVE":
+        with wave.open(io.BytesIO(audio_bytes), "rb") as wf:
+            if wf.getsampwidth() != 2:
+                raise RuntimeError(f"지원하지 않는 WAV sample width: {wf.getsampwidth()}")
+            return wf.readframes(wf.getnframes()), f"audio/L16;rate={wf.getframerate()};channels={wf.getnchannels()}"
+    raise RuntimeError(f"이어붙일 수 없는 오디오 포맷: {mime}")
+
+
+def synthesize_chunk(api_key: str, model: str, voice: str, text: str, use_cache: bool = True) -> tuple[bytes, str]:
+    """(text, voice, model) 단위 PCM 캐시. 반환: (pcm bytes, L16 mime)"""
+    key = _chunk_key(text, voice, model)
+    pcm_path = TTS_CACHE_DIR / f"{key}.pcm"
+    meta_path = TTS_CACHE_DIR / f"{key}.json"
+    if use_cache:
+        try:
+            meta = json.loads(meta_path.read_text(encoding="utf-8"))
+            pcm = pcm_path.read_bytes()
+        except Exception:
+            meta = None
+        # sidecar가 깨졌거나 mime이 없으면 miss로 보고 다시 합성
+        if isinstance(meta, dict) and meta.get("mime"):
+            # LRU 기준은 mtime: 적중하면 갱신
+            try:
+                os.utime(pcm_path)
+            except OSError:
+                pass
+            return pcm, str(meta.get("mime"))
+
+    payload = call_tts(api_key, model, text, voice)
+    pcm, mime = _to_pcm(*extract_audio(payload))
+    try:
+        TTS_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        tmp = pcm_path.with_suffix(".tmp")
+        tmp.write_bytes(pcm)
+        tmp.replace(pcm_path)
+        meta_path.write_text(json.dumps({"mime": mime, "voice": voice, "model": model, "chars": len(text)}, ensure_ascii=False) + "\n", encoding="utf-8")
+        _cache_evict()
+    except Exception:
+        pass
+    return pcm, mime
+
+
+def _cache_evict() -> None:
+    """용량 상한을 넘으면 가장 오래 안 쓴 조각부터 삭제."""
+    rows: list[tuple[float, int, Path]] = []
+    total = 0
+    for pcm_path in TTS_CACHE_DIR.glob("*.pcm"):
+        try:
+            st = pcm_path.stat()
+        except OSError:
+            continue
+        rows.append((st.st_mtime, st.st_size, pcm_path))
+        total += st.st_size
+    if total <= TTS_CACHE_MAX_BYTES:
+        return
+    for _mtime, size, pcm_path in sorted(rows):
+        if total <= TTS_CACHE_MAX_BYTES:
+            break
+        pcm_path.with_suffix(".json").unlink(missing_ok=True)
+        pcm_path.unlink(missing_ok=True)
+        total -= size
+
+
+def synthesize_batch(
+    lines: list[str],
+    *,
+    api_key: str,
+    model: str = DEFAULT_TTS_MODEL,
+    voice: str = DEFAULT_TTS_VOICE,
+    concurrency: int = TTS_BATCH_CONCURRENCY,
+    max_chars: int = TTS_CHUNK_MAX_CHARS,
+    use_cache: bool = True,
+    log: Callable[[str], None] | None = None,
+) -> list[bytes]:
+    """여러 줄을 한 번에 합성. 줄마다 청크를 동시에 요청하고 PCM을 순서대로 이어 WAV 1개로 만든다.
+
+    같은 청크 텍스트는 한 번만 요청한다(배치 내 중복 + 디스크 캐시).
+    반환: 줄 순서대로 WAV bytes
+    """
+    say = log or (lambda line: None)
+    model = model if model.startswith("models/") else f"models/{model}"
+    plan = [split_text_chunks(line, max_chars) for line in lines]
+    unique = list(dict.fromkeys(chunk for chunks in plan for chunk in chunks))
+    if not unique:
+        raise RuntimeError("합성할 텍스트가 없어.")
+    say(f"[tts] lines={len(lines)} chunks={sum(len(c) for c in plan)} unique={len(unique)}")
+
+    def _one(chunk: str) -> tuple[bytes, str]:
+        return synthesize_chunk(api_key, model, voice, chunk, use_cache=use_cache)
+
+    with ThreadPoolExecutor(max_workers=max(1, min(int(concurrency), len(unique))), thread_name_prefix="tts") as pool:
+        done = dict(zip(unique, pool.map(_one, unique)))
+
+    out: list[bytes] = []
+    for i, chunks in enumerate(plan, 1):
+        if not chunks:
+            raise RuntimeError(f"[{i}] 빈 줄")
+        mimes = {_pcm_params(done[c][1]) for c in chunks}
+        if len(mimes) != 1:
+            raise RuntimeError(f"[{i}] 청크마다 샘플레이트/채널이 달라서 이어붙일 수 없음: {sorted(mimes)}")
+        pcm = b"".join(done[c][0] for c in chunks)
+        out.append(maybe_wrap_pcm_to_wav(pcm, done[chunks[0]][1]))
+    return out
+
+
+def _media_line(out: Path, emit_media: bool) -> str:
+    cwd = Path.cwd().resolve()
+    try:
+        media_path = f"./{out.relative_to(cwd).as_posix()}"
+    except ValueError:
+        media_path = out.as_posix()
+    return f"{'MEDIA' if emit_media else 'AUDIO'}:{media_path}"
+
+
+def _run_batch_cli(args, api_key: str, model: str, texts: list[str]) -> int:
+    out_dir = resolve_out_dir(args.out_dir, SAFE_DEFAULT_OUTPUT_DIR, legacy_aliases=(LEGACY_OUTPUT_DIR,))
+    out_dir.mkdir(parents=True, exist_ok=True)
+    lines = ["\n".join(texts)] if args.join else texts
+    try:
+        wavs = synthesize_batch(
+            lines,
+            api_key=api_key,
+            model=model,
+            voice=args.voice,
+            concurrency=args.concurrency,
+            max_chars=args.max_chars,
+            use_cache=not args.no_cache,
+            log=lambda line: print(line, file=sys.stderr, flush=True),
+        )
+    except Exception as e:
+        print(str(e), file=sys.stderr)
+        return 1
+
+    for i, (line, wav_bytes) in enumerate(zip(lines, wavs), 1):
+        if args.name.strip():
+            raw = args.name.strip()
+            # 배치 결과는 항상 WAV(PCM을 이어붙임)라 확장자도 맞춘다
+            if Path(raw).suffix.lower() != ".wav":
+                if Path(raw).suffix:
+                    print(f"batch 출력은 WAV라 확장자를 .wav로 바꿈: {raw}", file=sys.stderr)
+                raw = str(Path(raw).with_suffix(".wav"))
+            name = append_indexed_name(raw, i, len(lines))
+        else:
+            name = f"{slugify(line)[:60]}.wav"
+        out = (out_dir / _resolve_unique_name(out_dir, name)).resolve()
+        out.write_bytes(wav_bytes)
+        media_catalog.record(out, "audio", prompt=line, model=model)
+        print(_media_line(out, args.emit_media))
+    return 0
+
+
+def main(argv: list[str] | None = None) -> int:
     _force_utf8_stdio()
     load_env_prefer_dotenv()
 
     ap = argparse.ArgumentParser(description="Generate TTS audio using Gemini API")
-    ap.add_argument("text", help="Text to synthesize")
+    ap.add_argument("text", nargs="*", help="Text to synthesize (several = one file per text)")
+    ap.add_argument("--lines-file", default="", help="UTF-8 file, one text per line")
     ap.add_argument("--model", default=DEFAULT_TTS_MODEL, help="Model id (without models/ prefix)")
     ap.add_argument("--voice", default=DEFAULT_TTS_VOICE, help="Prebuilt voice name")
     ap.add_argument("--out-dir", default=str(SAFE_DEFAULT_OUTPUT_DIR), help="Output directory")
     ap.add_argument("--name", default="", help="Output filename (optional)")
     ap.add_argument("--emit-media", action="store_true", help="Print MEDIA:relative_path")
-    args = ap.parse_args()
+    ap.add_argument("--join", action="store_true", help="Stitch all texts into one WAV")
+    ap.add_argument("--max-chars", type=int, default=TTS_CHUNK_MAX_CHARS, help="Max characters per request chunk")
+    ap.add_argument("--concurrency", type=int, default=TTS_BATCH_CONCURRENCY, help="Max parallel chunk requests")
+    ap.add_argument("--no-cache", action="store_true", help="Do not reuse cached chunks")
+    args = ap.parse_args(argv)
+
+    texts = [t for t in args.text if t.strip()]
+    if args.lines_file:
+        texts += [ln.strip() for ln in Path(args.lines_file).read_text(encoding="utf-8").splitlines() if ln.strip()]
+    if not texts:
+        print("Text to synthesize is empty", file=sys.stderr)
+        return 2
 
     api_key = (os.getenv("GEMINI_API_KEY") or os.getenv("GOOGLE_API_KEY") or "").strip()
     if not api_key:
@@ -168,19 +421,31 @@ def main() -> int:
 
     model = args.model if args.model.startswith("models/") else f"models/{args.model}"
 
+    # 여러 줄/긴 텍스트는 청크 단위 배치 경로 (짧은 1건은 기존처럼 디스크로 바로 스트리밍)
+    if len(texts) > 1 or args.join or len(texts[0]) > args.max_chars:
+        return _run_batch_cli(args, api_key, model, texts)
+    text = texts[0]
+
+    out_dir = resolve_out_dir(args.out_dir, SAFE_DEFAULT_OUTPUT_DIR, legacy_aliases=(LEGACY_OUTPUT_DIR,))
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    # 응답 오디오는 디코딩하면서 바로 임시 파일로 (mime을 알아야 최종 이름/컨테이너가 정해짐)
+    # batch가 한 프로세스에서 여러 잡을 스레드로 돌리므로 호출마다 다른 이름
+    part = out_dir / f".tts_{uuid.uuid4().hex}.part"
     try:
-        payload = call_tts(api_key, model, args.text, args.voice)
-        audio_bytes, mime = extract_audio(payload)
-        audio_bytes = maybe_wrap_pcm_to_wav(audio_bytes, mime)
+        with part.open("wb") as sink:
+            payload = call_tts(api_key, model, text, args.voice, sink=sink)
+        inline = find_inline(payload)
+        if inline is None or not part.stat().st_size:
+            raise RuntimeError("응답에서 오디오 데이터를 찾지 못함")
+        mime = inline_mime(inline, "audio/wav")
     except Exception as e:
+        part.unlink(missing_ok=True)
         print(str(e), file=sys.stderr)
         return 1
 
-    out_dir = resolve_out_dir(args.out_dir, SAFE_DEFAULT_OUTPUT_DIR, legacy_aliases=(LEGACY_OUTPUT_DIR,))
-    out_dir.mkdir(parents=True, exist_ok=True)
-
     ext = ext_from_mime(mime)
-    default_name = f"{slugify(args.text)[:60]}.{ext}"
+    default_name = f"{slugify(text)[:60]}.{ext}"
 
     if args.name.strip():
         raw = args.name.strip()
@@ -192,20 +457,13 @@ def main() -> int:
 
     name = _resolve_unique_name(out_dir, name)
     out = (out_dir / name).resolve()
-    out.write_bytes(audio_bytes)
-
-    cwd = Path.cwd().resolve()
     try:
-        rel = out.relative_to(cwd)
-        media_path = f"./{rel.as_posix()}"
-    except ValueError:
-        media_path = out.as_posix()
-
-    if args.emit_media:
-        print(f"MEDIA:{media_path}")
-    else:
-        print(f"AUDIO:{media_path}")
+        finalize_audio_file(part, out, mime)
+    finally:
+        part.unlink(missing_ok=True)
+    media_catalog.record(out, "audio", prompt=text, model=model)
 
+    print(_media_line(out, args.emit_media))
     return 0
 
 
@@ -1,13 +1,15 @@
 #!/usr/bin/env python3
 import argparse
-import base64
+import io
 import json
 import os
 import sys
 import time
 import urllib.error
 import urllib.request
+import uuid
 from pathlib import Path
+from typing import BinaryIO
 
 try:
     from utility.common.env_prefer_dotenv import load_env_prefer_dotenv
@@ -15,9 +17,13 @@ try:
         DEFAULT_VEO_ASPECT_RATIO,
         DEFAULT_VEO_MODEL,
         MEDIA_VIDEO_DIR,
+        WORKSPACE_ROOT,
     )
     from utility.common.path_policy import resolve_out_dir
     from utility.common.filename_policy import resolve_unique_path
+    from utility.common.image_rules import is_outfit_only_request, load_rules, rules_to_text
+    from utility.common.media_stream import INLINE_SIZE_KEY, copy_stream, read_inline_json
+    from utility.common import gemini_quota, media_catalog, metrics
 except ModuleNotFoundError:
     import sys
     from pathlib import Path as _Path
@@ -30,11 +36,14 @@ except ModuleNotFoundError:
         DEFAULT_VEO_ASPECT_RATIO,
         DEFAULT_VEO_MODEL,
         MEDIA_VIDEO_DIR,
+        WORKSPACE_ROOT,
     )
     from utility.common.path_policy import resolve_out_dir
     from utility.common.filename_policy import resolve_unique_path
+    from utility.common.image_rules import is_outfit_only_request, load_rules, rules_to_text
+    from utility.common.media_stream import INLINE_SIZE_KEY, copy_stream, read_inline_json
+    from utility.common import gemini_quota, media_catalog, metrics
 
-RULES_PATH = (WORKSPACE_ROOT / 'studio' / 'image' / 'rules' / 'image_rules.md').resolve()
 SAFE_DEFAULT_OUTPUT_DIR = MEDIA_VIDEO_DIR
 LEGACY_OUTPUT_DIRS = {
     (WORKSPACE_ROOT / 'media' / 'video').resolve(),
@@ -51,54 +60,27 @@ def _resolve_out_dir(out_dir: str) -> Path:
     return resolve_out_dir(out_dir, SAFE_DEFAULT_OUTPUT_DIR, legacy_aliases=tuple(LEGACY_OUTPUT_DIRS))
 
 
-def _parse_rules_sections() -> dict[str, list[str]]:
-    try:
-        text = RULES_PATH.read_text(encoding="utf-8")
-    except Exception:
-        return {}
-
-    sections: dict[str, list[str]] = {}
-    current = ""
-    for raw in text.splitlines():
-        line = raw.strip()
-        if not line:
-            continue
-        if line.startswith("## "):
-            current = line[3:].strip()
-            sections[current] = []
-            continue
-        if current and line.startswith("- "):
-            sections[current].append(line[2:].strip())
-    return sections
-
-
-def _is_outfit_only_request(prompt: str) -> bool:
-    p = (prompt or "").lower()
-    keys = ["의상", "옷", "outfit", "costume", "wardrobe", "착장"]
-    return any(k in p for k in keys)
-
-
-def _rules_to_text(lines: list[str]) -> str:
-    return "\n".join(f"- {x}" for x in lines if x)
-
-
 def _build_locked_prompt(prompt: str) -> str:
-    sections = _parse_rules_sections()
+    rules = load_rules()
     selected: list[str] = []
-    selected += sections.get("COMMON_IDENTITY_LOCK", [])
-    selected += sections.get("REAL_STYLE_GUARD", [])
-    selected += sections.get("HARD_CASE_AVOIDANCE", [])
-    if _is_outfit_only_request(prompt):
-        selected += sections.get("OUTFIT_ONLY_LOCK", [])
+    selected += rules.section("COMMON_IDENTITY_LOCK")
+    selected += rules.section("REAL_STYLE_GUARD")
+    selected += rules.section("HARD_CASE_AVOIDANCE")
+    if is_outfit_only_request(prompt):
+        selected += rules.section("OUTFIT_ONLY_LOCK")
 
-    rules_text = _rules_to_text(selected)
+    rules_text = rules_to_text(selected)
     return (
         f"[규칙 소스: image_rules.md]\n{rules_text}\n\n"
         f"요청: {prompt}"
     )
 
 
-def post_json(url: str, body: dict, api_key: str) -> dict:
+def post_json(url: str, body: dict, api_key: str, sink: BinaryIO | None = None) -> dict:
+    """sink를 넘기면 inline 영상 바이트를 디코딩하면서 sink에 쓰고, payload에는 비운 채로 돌려준다.
+
+    생성 시작 호출이라 모델 quota를 거친다(폴링 get_json은 제외).
+    """
     req = urllib.request.Request(
         url,
         data=json.dumps(body, ensure_ascii=False).encode("utf-8"),
@@ -108,27 +90,35 @@ def post_json(url: str, body: dict, api_key: str) -> dict:
         },
         method="POST",
     )
-    with urllib.request.urlopen(req, timeout=120) as r:
-        return json.loads(r.read().decode("utf-8", errors="replace"))
-
-
-def get_json(url: str, api_key: str) -> dict:
+    model = url.rsplit("/", 1)[-1].split(":", 1)[0]
+    gemini_quota.acquire(model)
+    with metrics.timer("gemini.call", model=model, op="veo_start"):
+        try:
+            with urllib.request.urlopen(req, timeout=120) as r:
+                if sink is not None:
+                    payload = read_inline_json(r, sink)
+                else:
+                    payload = json.loads(r.read().decode("utf-8", errors="replace"))
+        except urllib.error.HTTPError as e:
+            raw = e.read()
+            gemini_quota.record(model, e.code, raw.decode("utf-8", errors="replace"))
+            # 호출부가 본문을 다시 읽을 수 있게 되돌려 준다
+            raise urllib.error.HTTPError(e.url, e.code, e.msg, e.hdrs, io.BytesIO(raw)) from None
+        except Exception:
+            gemini_quota.record(model, 0)
+            raise
+    gemini_quota.record(model, 200)
+    return payload
+
+
+def get_json(url: str, api_key: str, sink: BinaryIO | None = None) -> dict:
     req = urllib.request.Request(url, headers={"x-goog-api-key": api_key}, method="GET")
-    with urllib.request.urlopen(req, timeout=120) as r:
+    with metrics.timer("veo.poll"), urllib.request.urlopen(req, timeout=120) as r:
+        if sink is not None:
+            return read_inline_json(r, sink)
         return json.loads(r.read().decode("utf-8", errors="replace"))
 
 
-def extract_video_bytes(payload: dict) -> bytes | None:
-    cands = payload.get("response", {}).get("candidates", []) or payload.get("candidates", [])
-    for c in cands:
-        parts = c.get("content", {}).get("parts", [])
-        for p in parts:
-            inline = p.get("inlineData") or p.get("inline_data")
-            if inline and inline.get("data"):
-                return base64.b64decode(inline["data"])
-    return None
-
-
 def extract_video_uri(payload: dict) -> str | None:
     resp = payload.get("response", {})
     gen = resp.get("generateVideoResponse", {})
@@ -140,13 +130,44 @@ def extract_video_uri(payload: dict) -> str | None:
     return None
 
 
-def download_bytes(url: str, api_key: str) -> bytes:
+def download_to(url: str, api_key: str, dest: Path) -> int:
+    """영상 URI를 메모리에 올리지 않고 dest로 바로 받는다. 받은 바이트 수 반환."""
     req = urllib.request.Request(url, headers={"x-goog-api-key": api_key}, method="GET")
     with urllib.request.urlopen(req, timeout=240) as r:
-        return r.read()
+        return copy_stream(r, dest)
 
 
-def main() -> int:
+def _part_path(out_dir: Path) -> Path:
+    # pid만 쓰면 같은 프로세스의 동시 잡(batch 스레드)이 한 파일을 나눠 쓴다
+    return out_dir / f".veo_{uuid.uuid4().hex}.part"
+
+
+def _finish_video(payload: dict, part: Path, out_dir: Path, name_base: str, api_key: str) -> Path | None:
+    """inline으로 받은 part 파일 또는 URI 다운로드를 최종 mp4 경로로 확정."""
+    if not payload.get(INLINE_SIZE_KEY):
+        uri = extract_video_uri(payload)
+        if not uri:
+            return None
+        download_to(uri, api_key, part)
+    path = resolve_unique_video_path(out_dir, name_base)
+    part.replace(path)
+    return path
+
+
+def _print_video(path: Path, emit_media: bool) -> None:
+    cwd = Path.cwd().resolve()
+    try:
+        rel = path.resolve().relative_to(cwd)
+        media_path = f"./{rel.as_posix()}"
+    except ValueError:
+        media_path = path.resolve().as_posix()
+    if emit_media:
+        print(f"MEDIA:{media_path}")
+    else:
+        print(f"VIDEO:{media_path}")
+
+
+def main(argv: list[str] | None = None) -> int:
     load_env_prefer_dotenv()
     ap = argparse.ArgumentParser(description="Generate video with Gemini Veo (no-ref workflow)")
     ap.add_argument("prompt")
@@ -156,7 +177,7 @@ def main() -> int:
     ap.add_argument("--poll-seconds", type=int, default=180)
     ap.add_argument("--aspect-ratio", default=DEFAULT_VEO_ASPECT_RATIO, help="Aspect ratio, e.g. 1:1, 9:16, 16:9 (default: 1:1)")
     ap.add_argument("--emit-media", action="store_true", help="Print MEDIA:relative_path")
-    args = ap.parse_args()
+    args = ap.parse_args(argv)
 
     api_key = (os.getenv("GEMINI_API_KEY") or os.getenv("GOOGLE_API_KEY") or "").strip()
     if not api_key:
@@ -172,83 +193,59 @@ def main() -> int:
         "parameters": {"aspectRatio": (args.aspect_ratio or DEFAULT_VEO_ASPECT_RATIO)},
     }
 
+    out = _resolve_out_dir(args.out_dir)
+    out.mkdir(parents=True, exist_ok=True)
+    name_base = (args.name or "").strip() or args.prompt
+    part = _part_path(out)
+
     try:
-        start = post_json(start_url, body, api_key)
-    except urllib.error.HTTPError as e:
-        payload = e.read().decode("utf-8", errors="replace")
-        print(f"Veo start failed ({e.code}): {payload}", file=sys.stderr)
-        return 1
-    except Exception as e:
-        print(f"Veo start failed: {e}", file=sys.stderr)
-        return 1
-
-    video_bytes = extract_video_bytes(start)
-    if not video_bytes:
-        uri = extract_video_uri(start)
-        if uri:
-            video_bytes = download_bytes(uri, api_key)
-    if video_bytes:
-        out = _resolve_out_dir(args.out_dir)
-        out.mkdir(parents=True, exist_ok=True)
-        name_base = (args.name or "").strip() or args.prompt
-        path = resolve_unique_video_path(out, name_base)
-        path.write_bytes(video_bytes)
-        cwd = Path.cwd().resolve()
-        try:
-            rel = path.resolve().relative_to(cwd)
-            media_path = f"./{rel.as_posix()}"
-        except ValueError:
-            media_path = path.resolve().as_posix()
-        if args.emit_media:
-            print(f"MEDIA:{media_path}")
-        else:
-            print(f"VIDEO:{media_path}")
-        return 0
-
-    op_name = start.get("name")
-    if not op_name:
-        print(f"Veo response did not include operation/video payload: {json.dumps(start, ensure_ascii=False)[:1000]}", file=sys.stderr)
-        return 1
-
-    deadline = time.time() + args.poll_seconds
-    last = None
-    while time.time() < deadline:
         try:
-            st = get_json(f"https://generativelanguage.googleapis.com/v1beta/{op_name}", api_key)
+            with part.open("wb") as sink:
+                start = post_json(start_url, body, api_key, sink=sink)
+        except urllib.error.HTTPError as e:
+            payload = e.read().decode("utf-8", errors="replace")
+            print(f"Veo start failed ({e.code}): {payload}", file=sys.stderr)
+            return 1
         except Exception as e:
-            last = {"error": str(e)}
-            time.sleep(3)
-            continue
-        last = st
-        if st.get("done"):
-            if "error" in st:
-                print(f"Veo operation error: {json.dumps(st['error'], ensure_ascii=False)}", file=sys.stderr)
-                return 1
-            video_bytes = extract_video_bytes(st)
-            if not video_bytes:
-                uri = extract_video_uri(st)
-                if uri:
-                    video_bytes = download_bytes(uri, api_key)
-            if not video_bytes:
-                print(f"Veo done but no inline video bytes. Raw: {json.dumps(st, ensure_ascii=False)[:1500]}", file=sys.stderr)
-                return 1
-            out = _resolve_out_dir(args.out_dir)
-            out.mkdir(parents=True, exist_ok=True)
-            name_base = (args.name or "").strip() or args.prompt
-            path = resolve_unique_video_path(out, name_base)
-            path.write_bytes(video_bytes)
-            cwd = Path.cwd().resolve()
-            try:
-                rel = path.resolve().relative_to(cwd)
-                media_path = f"./{rel.as_posix()}"
-            except ValueError:
-                media_path = path.resolve().as_posix()
-            if args.emit_media:
-                print(f"MEDIA:{media_path}")
-            else:
-                print(f"VIDEO:{media_path}")
+            print(f"Veo start failed: {e}", file=sys.stderr)
+            return 1
+
+        path = _finish_video(start, part, out, name_base, api_key)
+        if path is not None:
+            media_catalog.record(path, "video", prompt=args.prompt, model=args.model)
+            _print_video(path, args.emit_media)
             return 0
-        time.sleep(4)
+
+        op_name = start.get("name")
+        if not op_name:
+            print(f"Veo response did not include operation/video payload: {json.dumps(start, ensure_ascii=False)[:1000]}", file=sys.stderr)
+            return 1
+
+        deadline = time.time() + args.poll_seconds
+        last = None
+        while time.time() < deadline:
+            try:
+                with part.open("wb") as sink:
+                    st = get_json(f"https://generativelanguage.googleapis.com/v1beta/{op_name}", api_key, sink=sink)
+            except Exception as e:
+                last = {"error": str(e)}
+                time.sleep(3)
+                continue
+            last = st
+            if st.get("done"):
+                if "error" in st:
+                    print(f"Veo operation error: {json.dumps(st['error'], ensure_ascii=False)}", file=sys.stderr)
+                    return 1
+                path = _finish_video(st, part, out, name_base, api_key)
+                if path is None:
+                    print(f"Veo done but no inline video bytes. Raw: {json.dumps(st, ensure_ascii=False)[:1500]}", file=sys.stderr)
+                    return 1
+                media_catalog.record(path, "video", prompt=args.prompt, model=args.model)
+                _print_video(path, args.emit_media)
+                return 0
+            time.sleep(4)
+    finally:
+        part.unlink(missing_ok=True)
 
     print(f"Veo polling timed out. Last: {json.dumps(last, ensure_ascii=False)[:1200]}", file=sys.stderr)
     return 1
@@ -1,15 +1,22 @@
 #!/usr/bin/env python3
 import argparse
 import base64
+import hashlib
 import json
 import os
 import re
 import shutil
 import subprocess
 import sys
+import threading
+import time
 import urllib.error
 import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from dataclasses import dataclass, replace
 from pathlib import Path
+from typing import Callable
 
 try:
     from utility.common.env_prefer_dotenv import load_env_prefer_dotenv
@@ -25,7 +32,13 @@ try:
         MEDIA_ROOT,
     )
     from utility.common.path_policy import ensure_not_under, resolve_out_dir
-    from utility.common.filename_policy import slugify_name, resolve_unique_name
+    from utility.common.filename_policy import append_indexed_name, slugify_name, resolve_unique_name
+    from utility.common.image_rules import is_outfit_only_request, load_rules, normalize_request_prompt, rules_to_text
+    from utility.common.ref_image_cache import get_ref_part, ref_digest
+    from utility.common.image_bytes import can_transcode, sniff_file_mime, sniff_image_mime, to_png_bytes
+    from utility.common.media_stream import INLINE_BYTES_KEY, find_inline, inline_mime, load_inline_json
+    from utility.common import gemini_quota, media_catalog, metrics, model_circuit
+    from utility.common.json_cache import load_json_cached
 except ModuleNotFoundError:
     import sys
     from pathlib import Path as _Path
@@ -46,14 +59,33 @@ except ModuleNotFoundError:
         MEDIA_IMAGE_DIR,
     )
     from utility.common.path_policy import ensure_not_under, resolve_out_dir
-    from utility.common.filename_policy import slugify_name, resolve_unique_name
-
-RULES_PATH = (WORKSPACE_ROOT / 'studio' / 'image' / 'rules' / 'image_rules.md').resolve()
+    from utility.common.filename_policy import append_indexed_name, slugify_name, resolve_unique_name
+    from utility.common.image_rules import is_outfit_only_request, load_rules, normalize_request_prompt, rules_to_text
+    from utility.common.ref_image_cache import get_ref_part, ref_digest
+    from utility.common.image_bytes import can_transcode, sniff_file_mime, sniff_image_mime, to_png_bytes
+    from utility.common.media_stream import INLINE_BYTES_KEY, find_inline, inline_mime, load_inline_json
+    from utility.common import gemini_quota, media_catalog, metrics, model_circuit
+    from utility.common.json_cache import load_json_cached
 
 BANNED_OUTPUT_ROOT = MEDIA_AVATAR_DIR
 SAFE_DEFAULT_OUTPUT_DIR = MEDIA_IMAGE_DIR
 LEGACY_IMAGES_DIR = (MEDIA_ROOT / 'images').resolve()
 
+# 결과 캐시: 최종 프롬프트/모델/비율/참조 digest가 같으면 API를 다시 부르지 않는다.
+# mode: off(기본) | use(있으면 재사용) | refresh(새로 생성해서 캐시 갱신)
+RESULT_CACHE_DIR = (MEDIA_ROOT / '.cache' / 'image_results').resolve()
+RESULT_CACHE_MAX_BYTES = int(os.getenv('IMAGE_RESULT_CACHE_MAX_MB', '512') or '512') * 1024 * 1024
+RESULT_CACHE_MODES = ('off', 'use', 'refresh')
+DEFAULT_RESULT_CACHE_MODE = (os.getenv('IMAGE_RESULT_CACHE') or 'off').strip().lower()
+
+# 429는 모델 실패가 아니라 quota 신호라서 fallback하지 않고 같은 모델을 기다렸다 다시 부른다.
+# 대기 시간/속도는 gemini_quota가 프로세스 간에 공유해서 정한다.
+RATE_LIMIT_RETRIES = int(os.getenv("IMAGE_RATE_LIMIT_RETRIES", "3") or "3")
+
+# 모델별 fallback 체인 {"nano-banana-pro-preview": ["gemini-2.5-flash-image"], "*": []}
+# 파일이 없으면 기본 체인. 체인 순서대로 시도하되 circuit이 열린 모델은 건너뛴다(model_circuit).
+MODEL_FALLBACKS_PATH = (WORKSPACE_ROOT / "studio" / "image" / "model_fallbacks.json").resolve()
+
 def _force_utf8_stdio() -> None:
     try:
         sys.stdout.reconfigure(encoding="utf-8", errors="replace")
@@ -83,141 +115,40 @@ def _purge_out_dir_matches(out_dir: Path, pattern: str) -> int:
             removed += 1
     return removed
 
-def _parse_rules_sections() -> dict[str, list[str]]:
-    try:
-        text = RULES_PATH.read_text(encoding="utf-8")
-    except Exception:
-        return {}
-
-    sections: dict[str, list[str]] = {}
-    current = ""
-    for raw in text.splitlines():
-        line = raw.strip()
-        if not line:
-            continue
-        if line.startswith("## "):
-            current = line[3:].strip()
-            sections[current] = []
-            continue
-        if current and line.startswith("- "):
-            sections[current].append(line[2:].strip())
-    return sections
-
-def _is_outfit_only_request(prompt: str) -> bool:
-    p = (prompt or "").lower()
-    keys = ["의상", "옷", "outfit", "costume", "wardrobe", "착장"]
-    return any(k in p for k in keys)
-
-def _rules_to_text(lines: list[str]) -> str:
-    return "\n".join(f"- {x}" for x in lines if x)
-
-def _parse_kv_section(sections: dict[str, list[str]], name: str) -> dict[str, str]:
-    out: dict[str, str] = {}
-    for line in sections.get(name, []):
-        if ':' not in line:
-            continue
-        k, v = line.split(':', 1)
-        out[k.strip().lower()] = v.strip()
-    return out
-
-def _normalize_request_prompt(prompt: str) -> str:
-    p = (prompt or "").strip()
-    if not p:
-        return "기본값 유지"
-
-    sections = _parse_rules_sections()
-    noise_terms = [x.strip().lower() for x in sections.get("REQUEST_NOISE_DROP", []) if x.strip()]
-    noise_contains = [x.strip().lower() for x in sections.get("REQUEST_NOISE_CONTAINS", []) if x.strip()]
-
-    rewrite_pairs: list[tuple[str, str]] = []
-    for line in sections.get("REQUEST_CANONICAL_REWRITE", []):
-        if "=>" not in line:
-            continue
-        src, dst = line.split("=>", 1)
-        src = re.sub(r"\s+", " ", src.strip().lower())
-        dst = dst.strip()
-        if src and dst:
-            rewrite_pairs.append((src, dst))
-
-    # 쉼표/줄바꿈 단위로 잘라서 규칙 기반 노이즈 제거/정규화 적용
-    tokens = [t.strip() for t in re.split(r"[\n,]", p) if t.strip()]
-
-    normalized: list[str] = []
-    seen_norm: set[str] = set()
-    for t in tokens:
-        norm = re.sub(r"\s+", " ", t.lower()).strip()
-        if norm in noise_terms:
-            continue
-
-        replaced = t
-        # contains 규칙은 토큰 전체를 버리지 않고 해당 문구만 제거한다.
-        if noise_contains:
-            for k in noise_contains:
-                if not k:
-                    continue
-                replaced = re.sub(re.escape(k), " ", replaced, flags=re.IGNORECASE)
-            replaced = re.sub(r"\s+", " ", replaced).strip(" ,.-:;")
-            if not replaced:
-                continue
-            norm = re.sub(r"\s+", " ", replaced.lower()).strip()
-        for src, dst in rewrite_pairs:
-            if norm == src:
-                replaced = dst
-                norm = re.sub(r"\s+", " ", dst.lower()).strip()
-                break
-
-        if norm in seen_norm:
-            continue
-        seen_norm.add(norm)
-        normalized.append(replaced)
-
-    joined = ", ".join(normalized).strip(" ,.-:;")
-    return joined or "기본값 유지"
-
-def _guess_mime(path: Path) -> str:
-    ext = path.suffix.lower()
-    if ext == ".png":
-        return "image/png"
-    if ext in {".jpg", ".jpeg"}:
-        return "image/jpeg"
-    if ext == ".webp":
-        return "image/webp"
-    return "application/octet-stream"
-
 def _avatar_lock_prompt(prompt: str, allow_2d: bool = False, model: str = "", profile: str = "taeyul") -> str:
-    sections = _parse_rules_sections()
+    rules = load_rules()
 
     selected: list[str] = []
-    selected += sections.get("COMMON_IDENTITY_LOCK", [])
-    selected += sections.get("REF_IMAGE_POLICY", [])
+    selected += rules.section("COMMON_IDENTITY_LOCK")
+    selected += rules.section("REF_IMAGE_POLICY")
 
     if allow_2d:
-        selected += sections.get("TWO_D_STYLE_GUARD", [])
+        selected += rules.section("TWO_D_STYLE_GUARD")
     else:
-        selected += sections.get("REAL_STYLE_GUARD", [])
+        selected += rules.section("REAL_STYLE_GUARD")
 
     # baseline rules that should apply regardless of model family
-    selected += sections.get("FRAMING_AND_POSE_BASELINE", [])
-    selected += sections.get("BACKGROUND_QUALITY_BASELINE", [])
+    selected += rules.section("FRAMING_AND_POSE_BASELINE")
+    selected += rules.section("BACKGROUND_QUALITY_BASELINE")
 
     if DEFAULT_IMAGE_MODEL in (model or ""):
-        selected += sections.get("NANO_BANANA_PRO_GUARD", [])
-        selected += sections.get("HARD_CASE_AVOIDANCE", [])
+        selected += rules.section("NANO_BANANA_PRO_GUARD")
+        selected += rules.section("HARD_CASE_AVOIDANCE")
 
-    if _is_outfit_only_request(prompt):
-        selected += sections.get("OUTFIT_ONLY_LOCK", [])
+    if is_outfit_only_request(prompt):
+        selected += rules.section("OUTFIT_ONLY_LOCK")
 
     profile_key = (profile or "").strip().lower()
     profile_boost: list[str] = []
     if profile_key == "ketose":
-        profile_boost = sections.get("REQUEST_PROFILE_BOOST_KETOSE", [])
+        profile_boost = rules.section("REQUEST_PROFILE_BOOST_KETOSE")
     elif profile_key == "kwonjinhyuk":
-        profile_boost = sections.get("REQUEST_PROFILE_BOOST_KWONJINHYUK", [])
+        profile_boost = rules.section("REQUEST_PROFILE_BOOST_KWONJINHYUK")
 
-    req = _normalize_request_prompt(prompt)
+    req = normalize_request_prompt(prompt, rules)
 
     # 과적합 방지: 규칙 기반으로 프로필 부스트 주입량을 제한한다.
-    limits = _parse_kv_section(sections, "REQUEST_PROFILE_BOOST_LIMIT")
+    limits = rules.kv("REQUEST_PROFILE_BOOST_LIMIT")
     try:
         default_limit = max(0, int(limits.get("default", "3")))
     except Exception:
@@ -245,7 +176,7 @@ def _avatar_lock_prompt(prompt: str, allow_2d: bool = False, model: str = "", pr
     if boost_items:
         req = req + "\n" + "\n".join(f"+ {x}" for x in boost_items)
 
-    rules_text = _rules_to_text(selected)
+    rules_text = rules_to_text(selected)
     mode = "2D 모드" if allow_2d else "실사 모드"
     return (
         f"[규칙 소스: image_rules.md]\n{rules_text}\n\n"
@@ -289,6 +220,15 @@ def _validate_out_dir_path(out_dir: str) -> Path:
     )
     return p
 
+def encode_ref_part(ref_image: str, api_key: str = "", mode: str = "", max_side: int | None = None) -> dict:
+    # 경로+mtime 기준 캐시 (축소/재압축, Files API URI 참조는 ref_image_cache 설정을 따른다)
+    return get_ref_part(ref_image, api_key, mode=mode, max_side=max_side)
+
+def build_prompt_text(prompt: str, *, ref_image: str = "", lock_avatar: bool = True, allow_2d: bool = False, model: str = "", profile: str = "taeyul") -> str:
+    if ref_image and lock_avatar:
+        return _avatar_lock_prompt(prompt, allow_2d=allow_2d, model=model, profile=profile)
+    return normalize_request_prompt(prompt)
+
 def call_generate(
     api_key: str,
     model: str,
@@ -298,25 +238,16 @@ def call_generate(
     allow_2d: bool = False,
     profile: str = "taeyul",
     aspect_ratio: str = "",
+    ref_part: dict | None = None,
 ) -> dict:
+    """ref_part를 넘기면 참조 이미지를 다시 읽/인코딩하지 않는다(배치 공용)."""
     url = f"https://generativelanguage.googleapis.com/v1beta/{model}:generateContent?key={api_key}"
 
-    prompt_text = _avatar_lock_prompt(prompt, allow_2d=allow_2d, model=model, profile=profile) if (ref_image and lock_avatar) else _normalize_request_prompt(prompt)
+    prompt_text = build_prompt_text(prompt, ref_image=ref_image, lock_avatar=lock_avatar, allow_2d=allow_2d, model=model, profile=profile)
     parts = []
 
     if ref_image:
-        p = Path(ref_image).expanduser().resolve()
-        if not p.exists() or not p.is_file():
-            raise RuntimeError(f"reference image not found: {p}")
-        b64 = base64.b64encode(p.read_bytes()).decode("ascii")
-        parts.append(
-            {
-                "inline_data": {
-                    "mime_type": _guess_mime(p),
-                    "data": b64,
-                }
-            }
-        )
+        parts.append(ref_part or encode_ref_part(ref_image, api_key))
 
     parts.append({"text": prompt_text})
 
@@ -337,22 +268,30 @@ def call_generate(
         method="POST",
     )
 
-    try:
-        with urllib.request.urlopen(req, timeout=180) as resp:
-            return json.loads(resp.read().decode("utf-8", errors="replace"))
-    except urllib.error.HTTPError as e:
-        payload = e.read().decode("utf-8", errors="replace")
-        raise RuntimeError(f"Gemini image generation failed ({e.code}): {payload}") from e
+    gemini_quota.acquire(model)
+    with metrics.timer("gemini.call", model=gemini_quota.model_key(model), op="image"):
+        try:
+            with urllib.request.urlopen(req, timeout=180) as resp:
+                # base64 문자열을 통째로 들지 않고 조각 단위로 디코딩
+                payload = load_inline_json(resp)
+        except urllib.error.HTTPError as e:
+            payload = e.read().decode("utf-8", errors="replace")
+            gemini_quota.record(model, e.code, payload)
+            raise RuntimeError(f"Gemini image generation failed ({e.code}): {payload}") from e
+        except Exception:
+            gemini_quota.record(model, 0)
+            raise
+    gemini_quota.record(model, 200)
+    return payload
 
 def extract_image(payload: dict) -> tuple[bytes, str]:
-    candidates = payload.get("candidates", [])
-    for c in candidates:
-        parts = c.get("content", {}).get("parts", [])
-        for p in parts:
-            inline = p.get("inlineData") or p.get("inline_data")
-            if inline and inline.get("data"):
-                mime = (inline.get("mimeType") or inline.get("mime_type") or "image/jpeg").lower()
-                return base64.b64decode(inline["data"]), mime
+    inline = find_inline(payload)
+    if inline is not None:
+        mime = inline_mime(inline, "image/jpeg")
+        if inline.get("data"):
+            return base64.b64decode(inline["data"]), mime
+        if payload.get(INLINE_BYTES_KEY):
+            return payload[INLINE_BYTES_KEY], mime
     raise RuntimeError("응답에서 이미지 데이터를 찾지 못함")
 
 def ext_from_mime(mime: str) -> str:
@@ -364,21 +303,28 @@ def ext_from_mime(mime: str) -> str:
 
 
 def _ensure_true_png(path: Path) -> Path:
-    """If file is not PNG bytes, transcode to a new *_converted.png file and return that path."""
-    try:
-        out = subprocess.run(["file", "--mime-type", "-b", str(path)], capture_output=True, text=True, check=False)
-        mime = (out.stdout or '').strip().lower()
-    except Exception:
-        mime = ''
-    if mime == 'image/png':
+    """If file is not PNG bytes, transcode to a new *_converted.png file and return that path.
+
+    디스크에 이미 있는 파일용 폴백 경로. 생성 결과는 _save_image에서 메모리 변환한다.
+    """
+    if sniff_file_mime(path) == 'image/png':
         return path
 
     converted = path.with_name(f"{path.stem}_converted.png")
     tmp = converted.with_suffix('.tmp.png')
-    cmd = ['ffmpeg', '-y', '-i', str(path), str(tmp)]
-    proc = subprocess.run(cmd, capture_output=True, text=True)
-    if proc.returncode != 0 or (not tmp.exists()):
-        raise RuntimeError('PNG 변환 실패(ffmpeg)')
+    if can_transcode():
+        try:
+            tmp.write_bytes(to_png_bytes(path.read_bytes()))
+        except RuntimeError:
+            tmp.unlink(missing_ok=True)
+    if not tmp.exists():
+        cmd = ['ffmpeg', '-y', '-i', str(path), str(tmp)]
+        try:
+            proc = subprocess.run(cmd, capture_output=True, text=True)
+        except FileNotFoundError:
+            raise RuntimeError('PNG 변환 실패(Pillow/ffmpeg 없음)')
+        if proc.returncode != 0 or (not tmp.exists()):
+            raise RuntimeError('PNG 변환 실패(ffmpeg)')
     tmp.replace(converted)
     try:
         path.unlink(missing_ok=True)
@@ -386,7 +332,358 @@ def _ensure_true_png(path: Path) -> Path:
         pass
     return converted
 
-def main() -> int:
+def _model_chain(model: str) -> list[str]:
+    m = model if model.startswith("models/") else f"models/{model}"
+    cfg = load_json_cached(MODEL_FALLBACKS_PATH, None)
+    if not isinstance(cfg, dict):
+        cfg = {DEFAULT_IMAGE_MODEL: ["gemini-2.5-flash-image"]}
+    fallbacks = cfg.get(m.removeprefix("models/"), cfg.get("*", []))
+    chain = [m]
+    for fb in fallbacks if isinstance(fallbacks, list) else []:
+        fm = fb if str(fb).startswith("models/") else f"models/{fb}"
+        if fm not in chain:
+            chain.append(fm)
+    return chain
+
+def _is_model_failure(err: Exception) -> bool:
+    """circuit에 셀 장애만: 5xx/404/timeout/연결 실패. 429·프롬프트 거절·빈 응답은 모델 문제가 아님."""
+    if isinstance(err, (urllib.error.URLError, TimeoutError, ConnectionError)):
+        return True
+    m = re.search(r"failed \((\d{3})\)", str(err))
+    return bool(m) and (m.group(1) == "404" or m.group(1).startswith("5"))
+
+def _media_path(out: Path) -> str:
+    cwd = Path.cwd().resolve()
+    try:
+        rel = out.relative_to(cwd)
+        return f"./{rel.as_posix()}"
+    except ValueError:
+        return out.as_posix()
+
+
+def _is_rate_limited(err: Exception) -> bool:
+    text = str(err)
+    return "(429)" in text or "RESOURCE_EXHAUSTED" in text
+
+
+# 동시 저장 시 resolve_unique_name 경합 방지
+_SAVE_LOCK = threading.Lock()
+
+def _save_image(out_dir: Path, name: str, prompt: str, img_bytes: bytes, mime: str, model: str = "") -> Path:
+    ext = ext_from_mime(mime)
+    raw = name.strip()
+    if raw:
+        if "." not in Path(raw).name:
+            raw = f"{raw}.{ext}"
+    else:
+        raw = f"{slugify(prompt)[:60]}.{ext}"
+
+    # 사용자가 PNG 경로를 기대할 때, 실제 바이너리도 PNG로 통일
+    # (실제 변환이 일어난 경우에만 파일명을 *_converted.png로 변경)
+    # magic byte로 판별하고, 변환은 응답 바이트에서 바로 해서 원본을 쓰고 다시 읽지 않는다.
+    want_png = raw.lower().endswith('.png')
+    png_bytes = b''
+    if want_png and sniff_image_mime(img_bytes[:16]) != 'image/png' and can_transcode():
+        try:
+            png_bytes = to_png_bytes(img_bytes)
+        except RuntimeError:
+            png_bytes = b''
+
+    with _SAVE_LOCK:
+        out = (out_dir / _resolve_unique_name(out_dir, raw)).resolve()
+        if png_bytes:
+            out = out.with_name(f"{out.stem}_converted.png")
+            out.write_bytes(png_bytes)
+            media_catalog.record(out, "image", prompt=prompt, model=model)
+            return out
+        out.write_bytes(img_bytes)
+
+    if want_png:
+        # Pillow가 없거나 디코딩에 실패했을 때만 ffmpeg 폴백
+        out = _ensure_true_png(out)
+    media_catalog.record(out, "image", prompt=prompt, model=model)
+    return out
+
+
+def _result_cache_key(prompt_text: str, model: str, aspect_ratio: str, ref_sha: str, variant: int) -> str:
+    raw = json.dumps([prompt_text, model, (aspect_ratio or "").strip(), ref_sha, int(variant)], ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+def _result_cache_get(key: str) -> tuple[bytes, str, dict] | None:
+    meta_path = RESULT_CACHE_DIR / f"{key}.json"
+    try:
+        meta = json.loads(meta_path.read_text(encoding="utf-8"))
+        data_path = RESULT_CACHE_DIR / str(meta["file"])
+        data = data_path.read_bytes()
+    except Exception:
+        return None
+    # LRU 기준은 mtime: 적중하면 갱신
+    try:
+        os.utime(data_path)
+        os.utime(meta_path)
+    except Exception:
+        pass
+    return data, str(meta.get("mime") or "image/jpeg"), meta
+
+def _result_cache_put(key: str, data: bytes, mime: str, meta: dict) -> None:
+    try:
+        RESULT_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        name = f"{key}.{ext_from_mime(mime)}"
+        tmp = RESULT_CACHE_DIR / f"{name}.tmp"
+        tmp.write_bytes(data)
+        tmp.replace(RESULT_CACHE_DIR / name)
+        (RESULT_CACHE_DIR / f"{key}.json").write_text(
+            json.dumps({**meta, "file": name, "mime": mime, "bytes": len(data), "created": int(time.time())}, ensure_ascii=False) + "\n",
+            encoding="utf-8",
+        )
+        _result_cache_evict()
+    except Exception:
+        pass
+
+def _result_cache_evict() -> None:
+    """용량 상한을 넘으면 가장 오래 안 쓴 항목부터 삭제."""
+    rows: list[tuple[float, int, Path]] = []
+    total = 0
+    for meta_path in RESULT_CACHE_DIR.glob("*.json"):
+        try:
+            meta = json.loads(meta_path.read_text(encoding="utf-8"))
+            data_path = RESULT_CACHE_DIR / str(meta["file"])
+            st = data_path.stat()
+        except Exception:
+            meta_path.unlink(missing_ok=True)
+            continue
+        rows.append((st.st_mtime, st.st_size, meta_path))
+        total += st.st_size
+    if total <= RESULT_CACHE_MAX_BYTES:
+        return
+    for _mtime, size, meta_path in sorted(rows):
+        if total <= RESULT_CACHE_MAX_BYTES:
+            break
+        try:
+            meta = json.loads(meta_path.read_text(encoding="utf-8"))
+            (RESULT_CACHE_DIR / str(meta["file"])).unlink(missing_ok=True)
+        except Exception:
+            pass
+        meta_path.unlink(missing_ok=True)
+        total -= size
+
+
+@dataclass
+class ImageRequest:
+    prompt: str
+    model: str = DEFAULT_IMAGE_MODEL
+    name: str = ""
+    ref_image: str = ""  # "" = 참조 없음, allow_2d면 기본 아바타는 2D 참조로 자동 교체
+    lock_avatar: bool = True
+    allow_2d: bool = False
+    profile: str = "taeyul"
+    aspect_ratio: str = DEFAULT_IMAGE_ASPECT_RATIO
+
+
+@dataclass
+class ImageResult:
+    index: int
+    ok: bool
+    path: Path | None = None
+    media_path: str = ""
+    model: str = ""
+    error: str = ""
+    attempts: int = 0
+    cached: bool = False
+    elapsed: float = 0.0
+
+
+def generate_batch(
+    requests: list[ImageRequest],
+    *,
+    out_dir: str = "",
+    api_key: str = "",
+    concurrency: int = 3,
+    retries: int = 0,
+    purge_glob: str | list[str] = "",
+    ref_mode: str = "",
+    ref_max_side: int | None = None,
+    cache_mode: str = "",
+    per_model_concurrency: int = 0,
+    log: Callable[[str], None] | None = None,
+) -> list[ImageResult]:
+    """여러 이미지 요청을 한 프로세스에서 동시 실행.
+
+    - 참조 이미지는 경로별로 한 번만 인코딩해서 모든 요청이 공유한다.
+      (ref_mode=files면 Files API URI로 참조, ref_max_side>0이면 축소본 사용)
+    - 요청마다 모델 fallback 체인을 돌고, 실패하면 retries 횟수만큼 backoff 후 재시도(기본 0, 배치/프리셋 호출부가 켠다).
+    - cache_mode=use/refresh면 결과 캐시를 조회/갱신한다. 같은 배치의 동일 요청은
+      variant 번호로 구분해서 count장이 서로 다른 캐시 항목이 된다.
+    - per_model_concurrency>0이면 모델별 동시 호출 수를 제한한다(모델을 섞은 매트릭스 실행용).
+      429는 gemini_quota가 정한 만큼 기다렸다 같은 모델로 다시 부른다.
+    - circuit이 열린 모델(연속 장애)은 timeout을 기다리지 않고 다음 fallback으로 바로 넘어간다.
+    - purge_glob은 첫 결과를 저장하기 직전에 한 번만 지운다(전부 실패하면 기존 파일 유지).
+    - 결과는 요청 순서대로 돌려준다(실패 포함, elapsed는 요청별 소요 초).
+    """
+    say = log or (lambda _line: None)
+    if not api_key:
+        load_env_prefer_dotenv()
+        api_key = (os.getenv("GEMINI_API_KEY") or os.getenv("GOOGLE_API_KEY") or "").strip()
+    if not api_key:
+        raise RuntimeError("Missing GEMINI_API_KEY or GOOGLE_API_KEY")
+
+    out_path = _validate_out_dir_path(out_dir)
+    out_path.mkdir(parents=True, exist_ok=True)
+
+    # 프리셋 여러 개를 한 배치로 돌릴 때는 프리셋별 glob 목록
+    purge_patterns = [p for p in ([purge_glob] if isinstance(purge_glob, str) else purge_glob) if p.strip()]
+    for pattern in purge_patterns:
+        if '/' in pattern or '\\' in pattern:
+            raise RuntimeError('purge pattern must be a filename glob (no path separators)')
+    purge_lock = threading.Lock()
+    purged = False
+
+    def _purge_before_save() -> None:
+        # 첫 결과가 나왔을 때 한 번만 정리한다. 전부 실패한 배치는 기존 이미지를 지우지 않고,
+        # 저장 전에 지우니 이번 배치 결과는 안 지워지고 이름도 preset_1.jpg처럼 그대로 유지된다.
+        nonlocal purged
+        with purge_lock:
+            if purged:
+                return
+            purged = True
+            for pattern in purge_patterns:
+                removed = _purge_out_dir_matches(out_path, pattern)
+                if removed > 0:
+                    append_daily(f'- [이미지 정리] gemini_image purge-glob={pattern} removed={removed}')
+
+    # 호출부의 요청 객체는 건드리지 않는다
+    requests = [replace(r, ref_image=_resolve_ref_image(r.ref_image, r.allow_2d)) if r.ref_image else r for r in requests]
+
+    ref_parts: dict[str, dict] = {}
+    for r in requests:
+        if r.ref_image and r.ref_image not in ref_parts:
+            _validate_ref_image_path(r.ref_image)
+            ref_parts[r.ref_image] = encode_ref_part(r.ref_image, api_key, ref_mode, ref_max_side)
+
+    cache_mode = (cache_mode or DEFAULT_RESULT_CACHE_MODE).strip().lower()
+    if cache_mode not in RESULT_CACHE_MODES:
+        cache_mode = "off"
+    cache_keys: dict[int, str] = {}
+    if cache_mode != "off":
+        ref_shas = {ref: ref_digest(ref) for ref in ref_parts}
+        variants: dict[str, int] = {}
+        for i, r in enumerate(requests, 1):
+            chain_head = _model_chain(r.model)[0]
+            text = build_prompt_text(r.prompt, ref_image=r.ref_image, lock_avatar=r.lock_avatar, allow_2d=r.allow_2d, model=chain_head, profile=r.profile)
+            base = _result_cache_key(text, chain_head, r.aspect_ratio, ref_shas.get(r.ref_image, ""), 0)
+            variants[base] = variants.get(base, 0) + 1
+            cache_keys[i] = _result_cache_key(text, chain_head, r.aspect_ratio, ref_shas.get(r.ref_image, ""), variants[base])
+
+    model_slots: dict[str, threading.Semaphore] = {}
+    if per_model_concurrency > 0:
+        for r in requests:
+            for m in _model_chain(r.model):
+                model_slots.setdefault(m, threading.Semaphore(per_model_concurrency))
+
+    def _call(idx: int, model_try: str, r: ImageRequest) -> dict:
+        rl = 0
+        while True:
+            try:
+                with model_slots.get(model_try) or nullcontext():
+                    return call_generate(
+                        api_key,
+                        model_try,
+                        r.prompt,
+                        ref_image=r.ref_image,
+                        lock_avatar=r.lock_avatar,
+                        allow_2d=r.allow_2d,
+                        profile=r.profile,
+                        aspect_ratio=r.aspect_ratio,
+                        ref_part=ref_parts.get(r.ref_image),
+                    )
+            except RuntimeError as e:
+                if not _is_rate_limited(e) or rl >= RATE_LIMIT_RETRIES:
+                    raise
+                rl += 1
+                # 다음 acquire()가 retryDelay만큼 기다려 준다
+                say(f"[{idx}] rate limited: {model_try} 대기 후 재시도 {rl}/{RATE_LIMIT_RETRIES}")
+
+    def _one(idx: int, r: ImageRequest) -> ImageResult:
+        started = time.monotonic()
+        res = _one_inner(idx, r)
+        res.elapsed = round(time.monotonic() - started, 2)
+        return res
+
+    def _one_inner(idx: int, r: ImageRequest) -> ImageResult:
+        key = cache_keys.get(idx, "")
+        if key and cache_mode == "use":
+            hit = _result_cache_get(key)
+            if hit is not None:
+                img_bytes, mime, meta = hit
+                model_hit = str(meta.get("model") or "")
+                try:
+                    _purge_before_save()
+                    out = _save_image(out_path, r.name, r.prompt, img_bytes, mime, model_hit)
+                except Exception as e:
+                    return ImageResult(idx, False, model=model_hit, error=f"저장 실패: {e}", cached=True)
+                say(f"[{idx}] cache hit: {key[:12]} (model={meta.get('model', '-')})")
+                return ImageResult(idx, True, out, _media_path(out), model_hit, attempts=0, cached=True)
+
+        chain = _model_chain(r.model)
+        last_err: Exception | None = None
+        payload: dict | None = None
+        for attempt in range(1, max(0, retries) + 2):
+            tried = False
+            for mi, model_try in enumerate(chain):
+                if mi:
+                    say(f"fallback model: {model_try}")
+                if not model_circuit.allow(model_try):
+                    say(f"[{idx}] circuit open: {model_try} 건너뜀")
+                    continue
+                tried = True
+                try:
+                    payload = _call(idx, model_try, r)
+                except Exception as e:
+                    last_err = e
+                    if _is_rate_limited(e) or isinstance(e, gemini_quota.QuotaTimeout):
+                        # quota 소진을 fallback 모델로 넘기면 그 모델 quota까지 태운다
+                        say(f"[{idx}] rate limited: {model_try} (quota 대기 한도 초과)")
+                        break
+                    if not _is_model_failure(e):
+                        # 응답은 왔으니 모델은 살아 있음 (half-open probe도 여기서 닫힌다)
+                        model_circuit.record_success(model_try)
+                    elif model_circuit.record_failure(model_try, str(e)):
+                        say(f"[{idx}] circuit opened: {model_try}")
+                    continue
+                model_circuit.record_success(model_try)
+                break
+            if payload is not None:
+                break
+            if not tried:
+                # 전부 open이면 backoff 몇 초로는 안 풀린다
+                last_err = RuntimeError(f"모든 모델 circuit open: {', '.join(chain)} (model_circuit.py --reset 으로 해제)")
+                break
+            if attempt <= retries:
+                say(f"[{idx}] retry {attempt}/{retries}: {str(last_err)[:200]}")
+                time.sleep(min(10.0, 2.0 * attempt))
+        if payload is None:
+            return ImageResult(idx, False, error=str(last_err), attempts=retries + 1)
+
+        # 여기부터는 응답 처리/저장(로컬 실패): 다른 모델로 다시 생성하면 유료 호출만 한 번 더 나가니 요청 실패로 끝낸다
+        try:
+            img_bytes, mime = extract_image(payload)
+            # 캐시 키는 체인 첫 모델 기준이라 fallback 결과는 넣지 않는다 (다음 hit가 primary 결과처럼 보임)
+            if key and mi == 0:
+                _result_cache_put(key, img_bytes, mime, {"model": model_try, "prompt": r.prompt[:200]})
+                say(f"[{idx}] cache {'refresh' if cache_mode == 'refresh' else 'store'}: {key[:12]}")
+            _purge_before_save()
+            out = _save_image(out_path, r.name, r.prompt, img_bytes, mime, model_try)
+        except Exception as e:
+            say(f"[{idx}] 응답 처리/저장 실패: {e}")
+            return ImageResult(idx, False, model=model_try, error=f"응답 처리/저장 실패: {e}", attempts=attempt)
+        return ImageResult(idx, True, out, _media_path(out), model_try, attempts=attempt)
+
+    workers = max(1, min(int(concurrency), len(requests) or 1))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="image-gen") as pool:
+        futs = [pool.submit(_one, i, r) for i, r in enumerate(requests, 1)]
+        return [f.result() for f in futs]
+
+def main(argv: list[str] | None = None) -> int:
     _force_utf8_stdio()
     load_env_prefer_dotenv()
 
@@ -403,100 +700,55 @@ def main() -> int:
     ap.add_argument("--profile", default="taeyul", choices=["taeyul","ketose","kwonjinhyuk","default"], help="Profile hint for rule selection")
     ap.add_argument("--aspect-ratio", default=DEFAULT_IMAGE_ASPECT_RATIO, help="Aspect ratio, e.g. 1:1, 4:5, 16:9, 9:16 (default: 1:1)")
     ap.add_argument("--purge-glob", default="", help="Delete existing files in out-dir matching this filename glob before save (e.g. 'ketose_selfie_clone_*.jpg')")
-    args = ap.parse_args()
-
-    api_key = (os.getenv("GEMINI_API_KEY") or os.getenv("GOOGLE_API_KEY") or "").strip()
-    if not api_key:
-        print("Missing GEMINI_API_KEY or GOOGLE_API_KEY", file=sys.stderr)
-        return 2
-
-    model = args.model if args.model.startswith("models/") else f"models/{args.model}"
-
-    resolved_ref = "" if args.no_ref else _resolve_ref_image(args.ref_image, args.allow_2d)
-    if resolved_ref:
-        _validate_ref_image_path(resolved_ref)
-
-    img_bytes = b""
-    mime = "image/jpeg"
-    last_err: Exception | None = None
-
-    model_chain = [model]
-    if model == f"models/{DEFAULT_IMAGE_MODEL}":
-        model_chain.append("models/gemini-2.5-flash-image")
-
-    for mi, model_try in enumerate(model_chain):
-        try:
-            payload = call_generate(
-                api_key,
-                model_try,
-                args.prompt,
-                ref_image=resolved_ref,
-                lock_avatar=not args.no_avatar_lock,
-                allow_2d=args.allow_2d,
-                profile=args.profile,
-                aspect_ratio=args.aspect_ratio,
-            )
-            img_bytes, mime = extract_image(payload)
-            last_err = None
-            break
-        except Exception as e:
-            last_err = e
-        if mi < len(model_chain) - 1:
-            print(f"fallback model: {model_chain[mi+1]}", file=sys.stderr)
-
-    if last_err is not None:
-        print(str(last_err), file=sys.stderr)
-        return 1
+    ap.add_argument("--count", type=int, default=1, help="Generate N images in one process (--name gets _01, _02 ... suffix)")
+    ap.add_argument("--concurrency", type=int, default=int(os.getenv("IMAGE_BATCH_CONCURRENCY", "3") or "3"), help="Max parallel requests for --count")
+    ap.add_argument("--retries", type=int, default=0, help="Retries per image after the model fallback chain fails (default: 0)")
+    ap.add_argument("--ref-mode", default="", choices=["", "inline", "files"], help="Reference upload: inline base64 or Gemini Files API URI (default: IMAGE_REF_MODE or inline)")
+    ap.add_argument("--cache", dest="cache_mode", action="store_const", const="use", default="", help="Reuse cached results for identical prompt/model/aspect/ref (default: IMAGE_RESULT_CACHE or off)")
+    ap.add_argument("--no-cache", dest="cache_mode", action="store_const", const="off", help="Bypass the result cache")
+    ap.add_argument("--refresh", dest="cache_mode", action="store_const", const="refresh", help="Regenerate and overwrite the cached result")
+    ap.add_argument("--ref-max-side", type=int, default=None, help="Downscale reference so the long side is at most N px (needs Pillow; default: IMAGE_REF_MAX_SIDE or off)")
+    args = ap.parse_args(argv)
+
+    count = max(1, int(args.count or 1))
+    reqs = [
+        ImageRequest(
+            prompt=args.prompt,
+            model=args.model,
+            name=append_indexed_name(args.name.strip(), i, count) if args.name.strip() else "",
+            ref_image="" if args.no_ref else args.ref_image,
+            lock_avatar=not args.no_avatar_lock,
+            allow_2d=args.allow_2d,
+            profile=args.profile,
+            aspect_ratio=args.aspect_ratio,
+        )
+        for i in range(1, count + 1)
+    ]
 
     try:
-        out_dir = _validate_out_dir_path(args.out_dir)
+        results = generate_batch(
+            reqs,
+            out_dir=args.out_dir,
+            concurrency=args.concurrency,
+            retries=args.retries,
+            purge_glob=args.purge_glob,
+            ref_mode=args.ref_mode,
+            ref_max_side=args.ref_max_side,
+            cache_mode=args.cache_mode,
+            log=lambda line: print(line, file=sys.stderr, flush=True),
+        )
     except Exception as e:
         print(str(e), file=sys.stderr)
-        return 1
-
-    out_dir.mkdir(parents=True, exist_ok=True)
-
-    if args.purge_glob.strip():
-        try:
-            removed = _purge_out_dir_matches(out_dir, args.purge_glob)
-            if removed > 0:
-                append_daily(f'- [이미지 정리] gemini_image purge-glob={args.purge_glob} removed={removed}')
-        except Exception as e:
-            print(str(e), file=sys.stderr)
-            return 1
-
-    ext = ext_from_mime(mime)
-    default_name = f"{slugify(args.prompt)[:60]}.{ext}"
-
-    if args.name.strip():
-        raw = args.name.strip()
-        if "." not in Path(raw).name:
-            raw = f"{raw}.{ext}"
-        name = raw
-    else:
-        name = default_name
-
-    name = _resolve_unique_name(out_dir, name)
-    out = (out_dir / name).resolve()
-    out.write_bytes(img_bytes)
-
-    # 사용자가 PNG 경로를 기대할 때, 실제 바이너리도 PNG로 통일
-    # (실제 변환이 일어난 경우에만 파일명을 *_converted.png로 변경)
-    if out.suffix.lower() == '.png':
-        out = _ensure_true_png(out)
+        return 2 if "Missing GEMINI_API_KEY" in str(e) else 1
 
-    cwd = Path.cwd().resolve()
-    try:
-        rel = out.relative_to(cwd)
-        media_path = f"./{rel.as_posix()}"
-    except ValueError:
-        media_path = out.as_posix()
-
-    if args.emit_media:
-        print(f"MEDIA:{media_path}")
-    else:
-        print(f"IMAGE:{media_path}")
-    return 0
+    rc = 0
+    for r in results:
+        if not r.ok:
+            print(r.error, file=sys.stderr)
+            rc = 1
+            continue
+        print(f"{'MEDIA' if args.emit_media else 'IMAGE'}:{r.media_path}")
+    return rc
 
 if __name__ == "__main__":
     raise SystemExit(main())
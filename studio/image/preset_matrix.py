@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+import html
+import itertools
+import json
+import os
+import sys
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from image.generate import DEFAULT_RESULT_CACHE_MODE, ImageRequest, ImageResult, generate_batch
+from image.preset_store import MATRIX_AXES, PresetStore, default_store, normalize_preset, validate_preset
+from utility.common.filename_policy import slugify_name
+from utility.common.generation_defaults import DEFAULT_TAEYUL_REF_IMAGE, MEDIA_IMAGE_DIR
+
+# 매트릭스 결과는 실행마다 폴더 하나 (이미지 + index.html 컨택트 시트)
+MATRIX_ROOT = (MEDIA_IMAGE_DIR / 'matrix').resolve()
+MATRIX_CONCURRENCY = int(os.getenv('IMAGE_MATRIX_CONCURRENCY', '4') or '4')
+# 모델별 동시 호출 상한 (모델마다 rate limit이 따로라서)
+MATRIX_PER_MODEL = int(os.getenv('IMAGE_MATRIX_PER_MODEL', '2') or '2')
+CONTACT_SHEET_NAME = 'index.html'
+
+
+@dataclass
+class MatrixCell:
+    index: int
+    model: str
+    profile: str
+    aspect_ratio: str
+    prompt: str
+    variant: int = 0
+
+    @property
+    def row_key(self) -> tuple[int, str]:
+        return self.variant, self.profile
+
+    @property
+    def col_key(self) -> tuple[str, str]:
+        return self.model, self.aspect_ratio
+
+    def file_name(self) -> str:
+        model = slugify_name(self.model.replace('models/', ''), fallback='model')[:30]
+        return f"{self.index:02d}_{model}_{self.profile}_{self.aspect_ratio.replace(':', 'x')}_v{self.variant + 1}.jpg"
+
+
+@dataclass
+class MatrixRun:
+    preset: str
+    out_dir: Path
+    cells: list[MatrixCell] = field(default_factory=list)
+    results: list[ImageResult] = field(default_factory=list)
+    elapsed: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return bool(self.results) and all(r.ok for r in self.results)
+
+    @property
+    def sheet_path(self) -> Path:
+        return self.out_dir / CONTACT_SHEET_NAME
+
+
+def expand_matrix(preset: dict) -> list[MatrixCell]:
+    """preset + matrix 축 -> 곱집합 셀. 축이 없으면 preset 값 하나로 고정."""
+    matrix = preset.get('matrix') or {}
+    base_prompt = str(preset.get('prompt', '')).strip()
+    axes = {
+        'model': matrix.get('model') or [str(preset.get('model', ''))],
+        'profile': matrix.get('profile') or [str(preset.get('profile', ''))],
+        'aspect_ratio': matrix.get('aspect_ratio') or [str(preset.get('aspect_ratio', ''))],
+        'prompt_variants': matrix.get('prompt_variants') or ['{prompt}'],
+    }
+    cells: list[MatrixCell] = []
+    for (variant, prompt_tpl), profile, model, aspect_ratio in itertools.product(
+        enumerate(axes['prompt_variants']), axes['profile'], axes['model'], axes['aspect_ratio']
+    ):
+        cells.append(MatrixCell(
+            index=len(cells) + 1,
+            model=model,
+            profile=profile,
+            aspect_ratio=aspect_ratio,
+            prompt=prompt_tpl.replace('{prompt}', base_prompt).strip(),
+            variant=variant,
+        ))
+    return cells
+
+
+def run_matrix(
+    preset_name: str,
+    *,
+    store: PresetStore | None = None,
+    cache_mode: str = '',
+    concurrency: int = MATRIX_CONCURRENCY,
+    per_model_concurrency: int = MATRIX_PER_MODEL,
+    log: Callable[[str], None] | None = None,
+) -> MatrixRun:
+    """프리셋 matrix를 펼쳐 한 배치로 동시 실행하고 컨택트 시트를 만든다. 실행할 수 없으면 ValueError."""
+    store = store or default_store()
+    preset = store.get(preset_name)
+    if preset is None:
+        raise ValueError(f'Preset not found: {preset_name}')
+    preset = normalize_preset(preset)
+    errs = validate_preset(preset)
+    if errs:
+        raise ValueError(f'프리셋 검증 실패({preset_name}): ' + '; '.join(errs))
+    if not preset.get('matrix'):
+        raise ValueError(f"matrix가 없는 프리셋: {preset_name} ({', '.join(MATRIX_AXES)} 목록 필요)")
+
+    cells = expand_matrix(preset)
+    ref_image = str(preset.get('ref_image', '')).strip()
+    ref = str(Path(ref_image).expanduser().resolve()) if ref_image else DEFAULT_TAEYUL_REF_IMAGE
+    out_dir = MATRIX_ROOT / f"{slugify_name(preset_name, fallback='preset')}_{time.strftime('%Y%m%d_%H%M%S')}"
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    reqs = [
+        ImageRequest(prompt=c.prompt, model=c.model, name=c.file_name(), ref_image=ref, profile=c.profile, aspect_ratio=c.aspect_ratio)
+        for c in cells
+    ]
+    started = time.monotonic()
+    results = generate_batch(
+        reqs,
+        out_dir=str(out_dir),
+        concurrency=concurrency,
+        retries=1,
+        per_model_concurrency=per_model_concurrency,
+        cache_mode=cache_mode or DEFAULT_RESULT_CACHE_MODE,
+        log=log,
+    )
+    run = MatrixRun(preset_name, out_dir, cells, results, round(time.monotonic() - started, 2))
+    write_contact_sheet(run)
+    return run
+
+
+def _cell_html(run: MatrixRun, cell: MatrixCell, res: ImageResult) -> str:
+    meta = f"#{cell.index} · {res.elapsed:.1f}s" + (' · cache' if res.cached else '') + (f' · 재시도 {res.attempts - 1}' if res.attempts > 1 else '')
+    if res.model and res.model.replace('models/', '') != cell.model.replace('models/', ''):
+        meta += f" · fallback {html.escape(res.model.replace('models/', ''))}"
+    if res.ok and res.path is not None:
+        try:
+            src = res.path.relative_to(run.out_dir).as_posix()
+        except ValueError:
+            src = res.path.as_uri()
+        img = f"<a href='{html.escape(src)}'><img src='{html.escape(src)}' loading='lazy'></a>"
+    else:
+        img = f"<div class='err'>{html.escape(res.error[-300:])}</div>"
+    return f"<td>{img}<div class='meta'>{meta}</div></td>"
+
+
+def write_contact_sheet(run: MatrixRun) -> Path:
+    """행 = (prompt variant, profile), 열 = (model, aspect_ratio) 그리드."""
+    cols = list(dict.fromkeys(c.col_key for c in run.cells))
+    rows = list(dict.fromkeys(c.row_key for c in run.cells))
+    by_key = {(c.row_key, c.col_key): (c, r) for c, r in zip(run.cells, run.results)}
+    prompts = {c.variant: c.prompt for c in run.cells}
+
+    head = ''.join(
+        f"<th>{html.escape(m.replace('models/', ''))}<div class='meta'>{html.escape(ar)}</div></th>" for m, ar in cols
+    )
+    body_rows = []
+    for variant, profile in rows:
+        tds = ''.join(
+            _cell_html(run, *by_key[((variant, profile), col)]) if ((variant, profile), col) in by_key else '<td></td>'
+            for col in cols
+        )
+        label = f"v{variant + 1} · {html.escape(profile)}<div class='meta'>{html.escape(prompts[variant][:160])}</div>"
+        body_rows.append(f"<tr><th class='rowh'>{label}</th>{tds}</tr>")
+
+    ok_count = sum(1 for r in run.results if r.ok)
+    times = [r.elapsed for r in run.results if r.ok]
+    summary = (
+        f"{ok_count}/{len(run.results)} 성공 · 전체 {run.elapsed:.1f}s"
+        + (f" · 셀 평균 {sum(times) / len(times):.1f}s · 최대 {max(times):.1f}s" if times else '')
+    )
+    doc = f"""<!doctype html>
+<html lang='ko'><head><meta charset='utf-8'><title>{html.escape(run.preset)} matrix</title>
+<style>
+body{{font-family:system-ui,sans-serif;background:#0b1220;color:#e2e8f0;margin:16px}}
+table{{border-collapse:collapse}} th,td{{border:1px solid #334155;padding:6px;vertical-align:top;text-align:center}}
+th.rowh{{text-align:left;max-width:220px}} img{{max-width:240px;max-height:240px;display:block;margin:auto}}
+.meta{{color:#94a3b8;font-size:12px;margin-top:4px;font-weight:normal}} .err{{color:#f87171;font-size:12px;max-width:240px;white-space:pre-wrap}}
+</style></head><body>
+<h2>{html.escape(run.preset)} · matrix</h2>
+<div class='meta'>{html.escape(summary)}</div>
+<table><thead><tr><th></th>{head}</tr></thead><tbody>{''.join(body_rows)}</tbody></table>
+</body></html>
+"""
+    run.sheet_path.write_text(doc, encoding='utf-8')
+    (run.out_dir / 'matrix.json').write_text(
+        json.dumps(
+            [
+                {**c.__dict__, 'ok': r.ok, 'path': str(r.path or ''), 'model_used': r.model, 'elapsed': r.elapsed, 'cached': r.cached, 'error': r.error}
+                for c, r in zip(run.cells, run.results)
+            ],
+            ensure_ascii=False,
+            indent=2,
+        ) + '\n',
+        encoding='utf-8',
+    )
+    return run.sheet_path
+
+
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description='Run an image preset matrix (model x profile x aspect ratio x prompt variant)')
+    ap.add_argument('preset', help='preset name (without _preset.json)')
+    ap.add_argument('--concurrency', type=int, default=MATRIX_CONCURRENCY)
+    ap.add_argument('--per-model', type=int, default=MATRIX_PER_MODEL, help='max concurrent calls per model (0 = no cap)')
+    ap.add_argument('--cache', default='', choices=['', 'off', 'use', 'refresh'])
+    args = ap.parse_args(argv)
+
+    try:
+        run = run_matrix(
+            args.preset,
+            cache_mode=args.cache,
+            concurrency=args.concurrency,
+            per_model_concurrency=args.per_model,
+            log=lambda line: print(line, file=sys.stderr, flush=True),
+        )
+    except Exception as e:
+        print(str(e), file=sys.stderr)
+        return 1
+    print(f'CONTACT_SHEET:{run.sheet_path}')
+    return 0 if run.ok else 1
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import copy
+import json
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+try:
+    from utility.common.generation_defaults import DEFAULT_IMAGE_ASPECT_RATIO, DEFAULT_IMAGE_MODEL, WORKSPACE_ROOT
+except ModuleNotFoundError:
+    import sys
+    from pathlib import Path as _Path
+    for _p in _Path(__file__).resolve().parents:
+        if (_p / 'utility').exists():
+            sys.path.append(str(_p))
+            break
+    from utility.common.generation_defaults import DEFAULT_IMAGE_ASPECT_RATIO, DEFAULT_IMAGE_MODEL, WORKSPACE_ROOT
+
+PRESETS_DIR = (WORKSPACE_ROOT / 'studio' / 'image' / 'presets').resolve()
+PRESET_SUFFIX = '_preset.json'
+SCHEMA_KEYS = [
+    'name', 'description', 'model', 'profile', 'aspect_ratio',
+    'count', 'prompt', 'output_name_pattern', 'purge_existing_outputs', 'ref_image', 'matrix'
+]
+DEFAULTS: dict[str, Any] = {
+    'model': DEFAULT_IMAGE_MODEL,
+    'profile': 'ketose',
+    'aspect_ratio': DEFAULT_IMAGE_ASPECT_RATIO,
+    'count': 1,
+    'purge_existing_outputs': True,
+}
+PROFILE_OPTIONS = ['taeyul', 'ketose', 'kwonjinhyuk', 'default']
+MAX_COUNT = 20
+# matrix: 축별 값 목록 -> 곱집합으로 펼쳐 비교 실행 (prompt_variants의 {prompt}는 기본 prompt로 치환)
+MATRIX_AXES = ('model', 'profile', 'aspect_ratio', 'prompt_variants')
+MAX_MATRIX_CELLS = 36
+# 디렉터리/파일 stat 재확인 간격 (요청마다 stat 하지 않게)
+WATCH_INTERVAL_SEC = 1.0
+
+_ASPECT_RE = re.compile(r'^\d{1,2}:\d{1,2}$')
+
+
+def normalize_preset(raw: dict) -> dict:
+    """스키마 키 순서 + 기본값 채움. 모르는 키는 뒤에 그대로 둔다."""
+    out: dict = {}
+    for k in SCHEMA_KEYS:
+        if k in raw:
+            out[k] = raw[k]
+        elif k in DEFAULTS:
+            out[k] = DEFAULTS[k]
+    for k, v in raw.items():
+        if k not in out:
+            out[k] = v
+    return out
+
+
+def dump_preset(data: dict) -> str:
+    return json.dumps(normalize_preset(data), ensure_ascii=False, indent=2) + '\n'
+
+
+def validate_preset(data: dict) -> list[str]:
+    """실행 전에 잡을 수 있는 오류 목록 (비어 있으면 통과)."""
+    errs: list[str] = []
+    for k in ('name', 'description', 'model', 'profile', 'aspect_ratio', 'prompt', 'output_name_pattern', 'ref_image'):
+        if k in data and not isinstance(data[k], str):
+            errs.append(f'{k}: 문자열이어야 함')
+    if not str(data.get('prompt', '')).strip():
+        errs.append('prompt: 비어 있음')
+    if not str(data.get('model', '')).strip():
+        errs.append('model: 비어 있음')
+    if str(data.get('profile', '')) not in PROFILE_OPTIONS:
+        errs.append(f"profile: {', '.join(PROFILE_OPTIONS)} 중 하나")
+    if not _ASPECT_RE.match(str(data.get('aspect_ratio', ''))):
+        errs.append('aspect_ratio: W:H 형식 (예: 1:1)')
+    count = data.get('count', 1)
+    if isinstance(count, bool) or not isinstance(count, int) or not (1 <= count <= MAX_COUNT):
+        errs.append(f'count: 1~{MAX_COUNT} 정수')
+    pattern = str(data.get('output_name_pattern', ''))
+    if pattern:
+        if '/' in pattern or '\\' in pattern:
+            errs.append('output_name_pattern: 경로 구분자 금지')
+        if isinstance(count, int) and count > 1 and '{n}' not in pattern:
+            errs.append('output_name_pattern: count>1이면 {n} 필요')
+    if 'purge_existing_outputs' in data and not isinstance(data['purge_existing_outputs'], bool):
+        errs.append('purge_existing_outputs: true/false')
+    if 'matrix' in data:
+        errs += _validate_matrix(data['matrix'])
+    return errs
+
+
+def _validate_matrix(matrix: Any) -> list[str]:
+    if not isinstance(matrix, dict):
+        return ['matrix: 객체여야 함']
+    errs: list[str] = []
+    cells = 1
+    for k, v in matrix.items():
+        if k not in MATRIX_AXES:
+            errs.append(f"matrix.{k}: 지원 축은 {', '.join(MATRIX_AXES)}")
+            continue
+        if not isinstance(v, list) or not v or not all(isinstance(x, str) and x.strip() for x in v):
+            errs.append(f'matrix.{k}: 비어 있지 않은 문자열 목록')
+            continue
+        cells *= len(v)
+        if k == 'profile':
+            errs += [f'matrix.profile: 알 수 없는 프로필 {x}' for x in v if x not in PROFILE_OPTIONS]
+        if k == 'aspect_ratio':
+            errs += [f'matrix.aspect_ratio: W:H 형식 ({x})' for x in v if not _ASPECT_RE.match(x)]
+    if cells > MAX_MATRIX_CELLS:
+        errs.append(f'matrix: 조합 {cells}개 (최대 {MAX_MATRIX_CELLS})')
+    return errs
+
+
+class PresetStore:
+    """프리셋 폴더 인덱스. 한 번 읽어 두고 바뀐 파일만 다시 파싱한다."""
+
+    def __init__(self, presets_dir: Path = PRESETS_DIR):
+        self.dir = Path(presets_dir)
+        self._lock = threading.Lock()
+        # name -> {'path', 'sig': (mtime_ns, size), 'data', 'errors'}
+        self._items: dict[str, dict[str, Any]] = {}
+        self._dir_sig = -1
+        self._checked_at = 0.0
+
+    @staticmethod
+    def name_of(path: Path) -> str:
+        return path.name[:-len(PRESET_SUFFIX)]
+
+    def path_for(self, name: str) -> Path:
+        return self.dir / f'{name}{PRESET_SUFFIX}'
+
+    def _load_one(self, path: Path, sig: tuple[int, int]) -> dict[str, Any]:
+        try:
+            data = json.loads(path.read_text(encoding='utf-8'))
+            if not isinstance(data, dict):
+                raise ValueError('JSON 객체가 아님')
+            errors = validate_preset(normalize_preset(data))
+        except Exception as e:
+            data, errors = {}, [f'파싱 실패: {e}']
+        return {'path': path, 'sig': sig, 'data': data, 'errors': errors}
+
+    def refresh(self, force: bool = False) -> None:
+        now = time.monotonic()
+        with self._lock:
+            if not force and now - self._checked_at < WATCH_INTERVAL_SEC:
+                return
+            self._checked_at = now
+            try:
+                dir_sig = self.dir.stat().st_mtime_ns
+            except OSError:
+                self._items.clear()
+                self._dir_sig = -1
+                return
+            if force or dir_sig != self._dir_sig:
+                paths = {self.name_of(p): p for p in self.dir.glob(f'*{PRESET_SUFFIX}') if p.is_file()}
+                self._dir_sig = dir_sig
+            else:
+                paths = {n: it['path'] for n, it in self._items.items()}
+            items: dict[str, dict[str, Any]] = {}
+            for name, path in paths.items():
+                try:
+                    st = path.stat()
+                except OSError:
+                    continue
+                sig = (st.st_mtime_ns, st.st_size)
+                prev = self._items.get(name)
+                items[name] = prev if prev and prev['sig'] == sig else self._load_one(path, sig)
+            self._items = items
+
+    def names(self) -> list[str]:
+        self.refresh()
+        with self._lock:
+            return sorted(self._items)
+
+    def get(self, name: str) -> dict | None:
+        self.refresh()
+        with self._lock:
+            it = self._items.get(name)
+            return copy.deepcopy(it['data']) if it else None
+
+    def errors(self, name: str) -> list[str]:
+        self.refresh()
+        with self._lock:
+            it = self._items.get(name)
+            return list(it['errors']) if it else [f'프리셋 없음: {name}']
+
+    def all_errors(self) -> dict[str, list[str]]:
+        self.refresh()
+        with self._lock:
+            return {n: list(it['errors']) for n, it in sorted(self._items.items()) if it['errors']}
+
+    def save(self, name: str, data: dict) -> bool:
+        """정규화한 내용이 디스크와 다를 때만 쓴다. 반환: 실제로 썼으면 True."""
+        path = self.path_for(name)
+        text = dump_preset(data)
+        try:
+            if path.read_text(encoding='utf-8') == text:
+                return False
+        except OSError:
+            pass
+        tmp = path.with_name(f'.{path.name}.tmp')
+        tmp.write_text(text, encoding='utf-8')
+        tmp.replace(path)
+        self.refresh(force=True)
+        return True
+
+    def normalize_all(self) -> list[tuple[str, bool]]:
+        """모든 프리셋을 정규화. 반환: [(name, 변경 여부)] (파싱 실패 파일은 건드리지 않음)"""
+        out: list[tuple[str, bool]] = []
+        for name in self.names():
+            with self._lock:
+                it = self._items.get(name)
+                data = copy.deepcopy(it['data']) if it else {}
+            if not data:
+                continue
+            out.append((name, self.save(name, data)))
+        return out
+
+
+_STORE: PresetStore | None = None
+
+
+def default_store() -> PresetStore:
+    global _STORE
+    if _STORE is None:
+        _STORE = PresetStore()
+    return _STORE
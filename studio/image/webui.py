@@ -4,142 +4,163 @@ from __future__ import annotations
 import argparse
 import html
 import json
+import mimetypes
 import os
 import socket
 import subprocess
 import sys
 from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from pathlib import Path
-from urllib.parse import parse_qs
+from urllib.parse import parse_qs, quote, unquote
 
 sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
 sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from common.publish_channels import publish_channel_options
+from common.publish_queue import enqueue_publish, ensure_publish_worker
 from common.webui_shell import render_page
-from utility.common.generation_defaults import DEFAULT_IMAGE_ASPECT_RATIO, DEFAULT_IMAGE_MODEL
+from image.generate import DEFAULT_RESULT_CACHE_MODE, RESULT_CACHE_MODES, ImageRequest, generate_batch
+from image.preset_matrix import MATRIX_ROOT, run_matrix
+from image.preset_store import PRESET_SUFFIX, PROFILE_OPTIONS, default_store, normalize_preset, validate_preset
+from utility.common.generation_defaults import DEFAULT_IMAGE_ASPECT_RATIO, DEFAULT_IMAGE_MODEL, DEFAULT_TAEYUL_REF_IMAGE
 
 from utility.common.generation_defaults import MEDIA_IMAGE_DIR, WORKSPACE_ROOT
 
 WORKSPACE = WORKSPACE_ROOT
-PRESETS_DIR = WORKSPACE / 'studio' / 'image' / 'presets'
-NORMALIZER = PRESETS_DIR / 'normalize_preset_json.py'
-VENV_PY = WORKSPACE / '.venv' / 'bin' / 'python3'
-SCHEMA_KEYS = [
-    'name', 'description', 'model', 'profile', 'aspect_ratio',
-    'count', 'prompt', 'output_name_pattern', 'purge_existing_outputs', 'ref_image'
-]
-PROFILE_OPTIONS = ['taeyul', 'ketose', 'kwonjinhyuk', 'default']
+# 프리셋은 한 번 읽어 두고 폴더/파일이 바뀐 경우에만 다시 파싱 (요청마다 glob+parse 하지 않음)
+PRESETS = default_store()
 DEFAULT_PUBLISH_CHANNEL_ID = '1470802274518433885'
+IMAGE_BATCH_CONCURRENCY = int(os.getenv('IMAGE_BATCH_CONCURRENCY', '3') or '3')
 
 
 def _val(form: dict[str, list[str]], key: str, default: str = '') -> str:
     return (form.get(key, [default])[0] or default).strip()
 
 
-def _preset_files() -> list[Path]:
-    return sorted(p for p in PRESETS_DIR.glob('*_preset.json') if p.is_file())
-
-
-def _load_preset(path: Path) -> dict:
-    return json.loads(path.read_text(encoding='utf-8'))
-
-
-def _ordered_preset(raw: dict) -> dict:
-    out: dict = {}
-    defaults = {
-        'model': DEFAULT_IMAGE_MODEL,
-        'profile': 'ketose',
-        'aspect_ratio': DEFAULT_IMAGE_ASPECT_RATIO,
-        'count': 1,
-        'purge_existing_outputs': True,
-    }
-    for k in SCHEMA_KEYS:
-        if k in raw:
-            out[k] = raw[k]
-        elif k in defaults:
-            out[k] = defaults[k]
-    for k, v in raw.items():
-        if k not in out:
-            out[k] = v
-    return out
-
-
-def _save_preset(path: Path, data: dict) -> None:
-    ordered = _ordered_preset(data)
-    path.write_text(json.dumps(ordered, ensure_ascii=False, indent=2) + '\n', encoding='utf-8')
-
-
-def _run_normalizer() -> tuple[bool, str]:
-    py = str(VENV_PY) if VENV_PY.exists() else 'python3'
-    p = subprocess.run([py, str(NORMALIZER)], cwd=str(WORKSPACE), text=True, capture_output=True)
-    msg = (p.stdout or p.stderr or '').strip()
-    return p.returncode == 0, msg
-
+def _run_batch(
+    header: str,
+    prompt: str,
+    model: str,
+    profile: str,
+    aspect_ratio: str,
+    count: int,
+    name_pattern: str,
+    purge: bool,
+    ref_image: str,
+    cache_mode: str = '',
+) -> tuple[bool, str, list[str]]:
+    """generate.py 배치 API를 프로세스 안에서 호출 (이미지마다 subprocess 띄우지 않음)."""
+    reqs = _build_requests(prompt, model, profile, aspect_ratio, count, name_pattern, ref_image)
+    ok, logs, media = _execute_batch([header], reqs, [name_pattern.replace('{n}', '*')] if purge else [], cache_mode)
+    return ok, logs, [m for group in media for m in group]
+
+
+def _build_requests(prompt: str, model: str, profile: str, aspect_ratio: str, count: int, name_pattern: str, ref_image: str) -> list[ImageRequest]:
+    return [
+        ImageRequest(
+            prompt=prompt,
+            model=model,
+            name=name_pattern.replace('{n}', str(i)),
+            ref_image=ref_image,
+            profile=profile,
+            aspect_ratio=aspect_ratio,
+        )
+        for i in range(1, count + 1)
+    ]
 
-def _run_preset(preset_name: str) -> tuple[bool, str, list[str]]:
-    preset_path = PRESETS_DIR / f'{preset_name}_preset.json'
-    if not preset_path.exists():
-        return False, f'Preset not found: {preset_name}', []
 
+def _execute_batch(
+    logs: list[str],
+    reqs: list[ImageRequest],
+    purge_globs: list[str],
+    cache_mode: str,
+    groups: list[int] | None = None,
+) -> tuple[bool, str, list[list[str]]]:
+    """groups: 요청을 프리셋별로 나눈 개수 (반환 media도 같은 단위로 묶는다)."""
     try:
-        preset = _load_preset(preset_path)
-        count = max(1, int(preset.get('count', 1)))
-        prompt = str(preset.get('prompt', '')).strip()
-        if not prompt:
-            return False, 'preset prompt가 비어있어.', []
-
-        profile = str(preset.get('profile', 'ketose'))
-        aspect_ratio = str(preset.get('aspect_ratio', DEFAULT_IMAGE_ASPECT_RATIO))
-        model = str(preset.get('model', DEFAULT_IMAGE_MODEL))
-        name_pattern = str(preset.get('output_name_pattern', f'{preset_name}_{{n}}.jpg'))
-        purge_existing_outputs = bool(preset.get('purge_existing_outputs', True))
-
-        ref_image = str(preset.get('ref_image', '')).strip()
-        if ref_image:
-            rp = Path(ref_image).expanduser().resolve()
-            if not rp.exists() or not rp.is_file():
-                return False, f'ref_image not found: {rp}', []
-            image_root = MEDIA_IMAGE_DIR.resolve()
-            try:
-                rp.relative_to(image_root)
-                return False, '재귀참조 방지: media/image 아래 파일은 ref_image로 금지', []
-            except ValueError:
-                pass
-
-        py = str(VENV_PY) if VENV_PY.exists() else 'python3'
-        logs: list[str] = [f"[preset] {preset_path.name} count={count} purge={purge_existing_outputs}"]
-        media: list[str] = []
-        purge_glob = name_pattern.replace('{n}', '*') if purge_existing_outputs else ''
-
-        for i in range(1, count + 1):
-            name = name_pattern.replace('{n}', str(i))
-            cmd = [
-                py, str(WORKSPACE / 'studio' / 'image' / 'generate.py'), prompt,
-                '--model', model,
-                '--profile', profile,
-                '--aspect-ratio', aspect_ratio,
-                '--emit-media',
-                '--name', name,
-            ]
-            if ref_image:
-                cmd += ['--ref-image', str(Path(ref_image).expanduser().resolve())]
-            if purge_glob and i == 1:
-                cmd += ['--purge-glob', purge_glob]
-
-            p = subprocess.run(cmd, cwd=str(WORKSPACE), text=True, capture_output=True)
-            merged = ((p.stdout or '') + '\n' + (p.stderr or '')).strip()
-            if merged:
-                logs.append(merged)
-            for line in merged.splitlines():
-                line = line.strip()
-                if line.startswith('MEDIA:'):
-                    media.append(line[6:].strip())
-            if p.returncode != 0:
-                return False, '\n'.join(logs)[-8000:], media
-
-        return True, '\n'.join(logs)[-8000:], media
+        results = generate_batch(
+            reqs,
+            concurrency=IMAGE_BATCH_CONCURRENCY,
+            retries=1,
+            purge_glob=purge_globs,
+            cache_mode=cache_mode,
+            log=logs.append,
+        )
     except Exception as e:
-        return False, str(e), []
-
+        logs.append(str(e))
+        return False, '\n'.join(logs)[-8000:], []
+
+    media: list[list[str]] = []
+    pos = 0
+    for size in groups or [len(results)]:
+        group: list[str] = []
+        for r in results[pos:pos + size]:
+            if r.ok and r.path is not None:
+                group.append(str(r.path))
+                logs.append(f'MEDIA:{r.media_path}')
+            else:
+                logs.append(f'[{r.index}] {r.error}')
+        media.append(group)
+        pos += size
+    ok = all(r.ok for r in results)
+    return ok, '\n'.join(logs)[-8000:], media
+
+
+def _preset_plan(preset_name: str) -> tuple[dict, list[ImageRequest], str]:
+    """프리셋 -> (프리셋 데이터, 요청 목록, purge glob). 실행할 수 없으면 ValueError."""
+    preset = PRESETS.get(preset_name)
+    if preset is None:
+        raise ValueError(f'Preset not found: {preset_name}')
+    errs = PRESETS.errors(preset_name)
+    if errs:
+        raise ValueError(f'프리셋 검증 실패({preset_name}): ' + '; '.join(errs))
+
+    count = max(1, int(preset.get('count', 1)))
+    prompt = str(preset.get('prompt', '')).strip()
+    profile = str(preset.get('profile', 'ketose'))
+    aspect_ratio = str(preset.get('aspect_ratio', DEFAULT_IMAGE_ASPECT_RATIO))
+    model = str(preset.get('model', DEFAULT_IMAGE_MODEL))
+    name_pattern = str(preset.get('output_name_pattern', '') or f'{preset_name}_{{n}}.jpg')
+    purge_existing_outputs = bool(preset.get('purge_existing_outputs', True))
+
+    ref_image = str(preset.get('ref_image', '')).strip()
+    if ref_image:
+        rp = Path(ref_image).expanduser().resolve()
+        if not rp.exists() or not rp.is_file():
+            raise ValueError(f'ref_image not found: {rp}')
+        if rp.is_relative_to(MEDIA_IMAGE_DIR.resolve()):
+            raise ValueError('재귀참조 방지: media/image 아래 파일은 ref_image로 금지')
+
+    ref = str(Path(ref_image).expanduser().resolve()) if ref_image else DEFAULT_TAEYUL_REF_IMAGE
+    reqs = _build_requests(prompt, model, profile, aspect_ratio, count, name_pattern, ref)
+    return preset, reqs, name_pattern.replace('{n}', '*') if purge_existing_outputs else ''
+
+
+def _run_preset(preset_name: str, cache_mode: str = '') -> tuple[bool, str, list[str]]:
+    ok, logs, media = _run_presets([preset_name], cache_mode)
+    return ok, logs, media.get(preset_name, [])
+
+
+def _run_presets(preset_names: list[str], cache_mode: str = '') -> tuple[bool, str, dict[str, list[str]]]:
+    """프리셋 여러 개를 generate_batch 한 번으로 실행 (동시성/참조 인코딩 공유)."""
+    names = list(dict.fromkeys(n for n in preset_names if n))
+    if not names:
+        return False, '실행할 프리셋을 골라줘.', {}
+    logs: list[str] = []
+    reqs: list[ImageRequest] = []
+    globs: list[str] = []
+    groups: list[int] = []
+    try:
+        for name in names:
+            preset, preset_reqs, purge_glob = _preset_plan(name)
+            logs.append(f"[preset] {name}{PRESET_SUFFIX} count={len(preset_reqs)} purge={bool(purge_glob)}")
+            reqs += preset_reqs
+            groups.append(len(preset_reqs))
+            if purge_glob:
+                globs.append(purge_glob)
+    except Exception as e:
+        return False, str(e), {}
+    ok, out, media = _execute_batch(logs, reqs, globs, cache_mode, groups)
+    return ok, out, dict(zip(names, media))
 
 
 def _run_direct(form: dict[str, list[str]]) -> tuple[bool, str, list[str]]:
@@ -153,51 +174,14 @@ def _run_direct(form: dict[str, list[str]]) -> tuple[bool, str, list[str]]:
     count = max(1, int(_val(form, 'direct_count', '1') or '1'))
     name_pattern = _val(form, 'direct_name_pattern', 'direct_image_{n}.jpg')
     purge = _val(form, 'direct_purge') == 'on'
+    cache_mode = _val(form, 'result_cache', DEFAULT_RESULT_CACHE_MODE)
 
-    py = str(VENV_PY) if VENV_PY.exists() else 'python3'
-    logs: list[str] = [f"[direct] count={count} purge={purge}"]
-    media: list[str] = []
-    purge_glob = name_pattern.replace('{n}', '*') if purge else ''
-
-    for i in range(1, count + 1):
-        name = name_pattern.replace('{n}', str(i))
-        cmd = [
-            py, str(WORKSPACE / 'studio' / 'image' / 'generate.py'), prompt,
-            '--model', model,
-            '--profile', profile,
-            '--aspect-ratio', aspect_ratio,
-            '--emit-media',
-            '--name', name,
-        ]
-        if purge_glob and i == 1:
-            cmd += ['--purge-glob', purge_glob]
-
-        proc = subprocess.run(cmd, cwd=str(WORKSPACE), text=True, capture_output=True)
-        merged = ((proc.stdout or '') + '\n' + (proc.stderr or '')).strip()
-        if merged:
-            logs.append(merged)
-        for line in merged.splitlines():
-            line = line.strip()
-            if line.startswith('MEDIA:'):
-                media.append(line[6:].strip())
-        if proc.returncode != 0:
-            return False, '\n'.join(logs)[-8000:], media
-
-    return True, '\n'.join(logs)[-8000:], media
-
-def _upload_discord(channel_id: str, media_path: str, content: str = '') -> tuple[bool, str]:
-    py = str(VENV_PY) if VENV_PY.exists() else 'python3'
-    cmd = [
-        py,
-        str(WORKSPACE / 'utility' / 'discord' / 'discord_send_media.py'),
-        '--channel-id', str(channel_id),
-        '--file', media_path,
-    ]
-    if content.strip():
-        cmd += ['--content', content.strip()]
-    p = subprocess.run(cmd, cwd=str(WORKSPACE), text=True, capture_output=True)
-    msg = (p.stdout or p.stderr or '').strip()
-    return p.returncode == 0, (msg or ('업로드 완료' if p.returncode == 0 else '업로드 실패'))
+    return _run_batch(f"[direct] count={count} purge={purge}", prompt, model, profile, aspect_ratio, count, name_pattern, purge, DEFAULT_TAEYUL_REF_IMAGE, cache_mode)
+
+def _upload_discord(channel_id: str, media_path: str | list[str], content: str = '') -> tuple[bool, str]:
+    # 업로드는 배포 큐 worker가 재시도/중복제거/묶음 전송으로 처리하고, 요청은 등록만 하고 바로 응답
+    files = [media_path] if isinstance(media_path, str) else list(media_path)
+    return enqueue_publish(channel_id, files, content.strip())
 
 
 def _build_upload_caption(prompt: str, requested_model: str, logs: str) -> str:
@@ -238,44 +222,8 @@ def _try_auto_port_proxy(port: int) -> tuple[bool, str]:
         return False, f'Windows 포트 연결 스킵: {e}'
 
 
-def _load_publish_allowlist() -> list[tuple[str, str]]:
-    file_path = WORKSPACE / 'studio' / 'publish_channels_allowlist.json'
-    out: list[tuple[str, str]] = []
-
-    if file_path.exists():
-        try:
-            data = json.loads(file_path.read_text(encoding='utf-8'))
-            if isinstance(data, list):
-                for row in data:
-                    if not isinstance(row, dict):
-                        continue
-                    cid = str(row.get('id', '')).strip()
-                    label = str(row.get('label', '')).strip() or f'채널 {cid}'
-                    if cid.isdigit():
-                        out.append((cid, f'{label} ({cid})'))
-            elif isinstance(data, dict):
-                for cid, label in data.items():
-                    cid = str(cid).strip()
-                    if cid.isdigit():
-                        name = str(label).strip() or f'채널 {cid}'
-                        out.append((cid, f'{name} ({cid})'))
-        except Exception:
-            out = []
-
-    dedup: dict[str, str] = {}
-    for cid, label in out:
-        dedup[cid] = label
-    return sorted(dedup.items(), key=lambda x: x[1].lower())
-
-
 def _discord_publish_channel_options() -> list[tuple[str, str]]:
-    default_opt = (DEFAULT_PUBLISH_CHANNEL_ID, f'요청 채널 ({DEFAULT_PUBLISH_CHANNEL_ID})')
-    allowed = _load_publish_allowlist()
-    if not allowed:
-        return [default_opt]
-    if not any(cid == DEFAULT_PUBLISH_CHANNEL_ID for cid, _ in allowed):
-        return [default_opt] + allowed
-    return allowed
+    return publish_channel_options(DEFAULT_PUBLISH_CHANNEL_ID)
 
 
 def _local_ip() -> str:
@@ -289,11 +237,24 @@ def _local_ip() -> str:
         s.close()
 
 
-def _form(selected: str, data: dict, alert: str = '') -> bytes:
-    presets = _preset_files()
+def _form(selected: str, data: dict, alert: str = '', link: tuple[str, str] | None = None) -> bytes:
+    names = PRESETS.names()
+    invalid = PRESETS.all_errors()
     options = ''.join(
-        f"<option value='{html.escape(p.stem.replace('_preset',''))}'" + (" selected" if p.stem.replace('_preset','') == selected else '') + f">{html.escape(p.name)}</option>"
-        for p in presets
+        f"<option value='{html.escape(n)}'" + (" selected" if n == selected else '') + f">{html.escape(n + PRESET_SUFFIX)}{' ⚠' if n in invalid else ''}</option>"
+        for n in names
+    )
+    batch_checks_html = ''.join(
+        f"<label class='checkline'><input type='checkbox' name='batch_presets' value='{html.escape(n)}'"
+        + (' checked' if n in data.get('_batch_presets', []) else '')
+        + (' disabled' if n in invalid else '')
+        + f"> {html.escape(n)}{' (검증 실패)' if n in invalid else ''}</label>"
+        for n in names
+    )
+    matrix_val = data.get('matrix')
+    matrix_json = html.escape(json.dumps(matrix_val, ensure_ascii=False) if isinstance(matrix_val, dict) else str(matrix_val or ''))
+    preset_errors_html = ''.join(
+        f"<small class='hint'>⚠ {html.escape(e)}</small>" for e in invalid.get(selected, [])
     )
 
     def g(k: str, d: str = '') -> str:
@@ -303,6 +264,9 @@ def _form(selected: str, data: dict, alert: str = '') -> bytes:
         return html.escape(str(v))
 
     alert_html = f"<div class='alert'>{html.escape(alert)}</div>" if alert else ''
+    if link:
+        href, label = link
+        alert_html += f"<div class='alert'><a href='{html.escape(href)}' target='_blank'>{html.escape(label)}</a></div>"
     checked = 'checked' if data.get('purge_existing_outputs', True) else ''
     selected_profile = str(data.get('profile', 'ketose'))
     profile_options_html = ''.join(
@@ -315,6 +279,11 @@ def _form(selected: str, data: dict, alert: str = '') -> bytes:
         for cid, label in _discord_publish_channel_options()
     )
     upload_caption_checked = 'checked' if bool(data.get('_upload_with_caption', True)) else ''
+    selected_cache_mode = str(data.get('_result_cache', DEFAULT_RESULT_CACHE_MODE))
+    result_cache_options_html = ''.join(
+        f"<option value='{m}'" + (" selected" if m == selected_cache_mode else '') + f">{m}</option>"
+        for m in RESULT_CACHE_MODES
+    )
 
     body = f"""
 {alert_html}
@@ -328,6 +297,17 @@ def _form(selected: str, data: dict, alert: str = '') -> bytes:
       <button name='action' value='load' type='submit' class='secondary'>불러오기</button>
       <button name='action' value='normalize' type='submit' class='secondary'>형식 정규화</button>
       <button name='action' value='run' type='submit'>생성 실행</button>
+      <button name='action' value='run_matrix' type='submit' class='secondary'>매트릭스 비교 실행</button>
+    </div>
+    {preset_errors_html}
+  </div>
+
+  <div class='section'>
+    <h3>프리셋 일괄 실행</h3>
+    {batch_checks_html}
+    <small class='hint'>선택한 프리셋을 한 번의 배치로 생성하고, 업로드는 프리셋별로 대기열에 등록해.</small>
+    <div class='action-row'>
+      <button name='action' value='run_batch' type='submit'>선택 프리셋 일괄 실행</button>
     </div>
   </div>
 
@@ -349,6 +329,8 @@ def _form(selected: str, data: dict, alert: str = '') -> bytes:
     <label>레퍼런스 이미지(ref_image, 선택)</label><input name='ref_image' value='{g('ref_image')}'>
     <label class='checkline'><input type='checkbox' name='purge_existing_outputs' {checked}> 기존 출력 정리 후 생성(purge_existing_outputs)</label>
     <label>요청 프롬프트(prompt)</label><textarea class='textarea-compact' name='prompt'>{g('prompt')}</textarea>
+    <label>비교 매트릭스(matrix, 선택 · JSON)</label><textarea class='textarea-compact' name='matrix'>{matrix_json}</textarea>
+    <small class='hint'>예: {{"model": ["a", "b"], "profile": ["ketose"], "aspect_ratio": ["1:1", "9:16"], "prompt_variants": ["{{prompt}}", "{{prompt}}, 야외 자연광"]}} · 매트릭스 비교 실행 시 조합마다 1장 생성 후 컨택트 시트 작성</small>
   </div>
 
   <div class='section'>
@@ -370,6 +352,8 @@ def _form(selected: str, data: dict, alert: str = '') -> bytes:
     <h3>배포</h3>
     <label>publish_channel_id</label><select name='publish_channel_id'>{upload_options_html}</select>
     <label class='checkline'><input type='checkbox' name='upload_with_caption' {upload_caption_checked}> 업로드 시 프롬프트/모델 문구 함께 첨부</label>
+    <label>결과 캐시(result_cache)</label><select name='result_cache'>{result_cache_options_html}</select>
+    <small class='hint'>use: 같은 프롬프트/모델/비율/레퍼런스면 이전 결과 재사용 · refresh: 새로 생성해서 캐시 갱신 · 기본값: {DEFAULT_RESULT_CACHE_MODE}</small>
   </div>
 
   <button name='action' value='run_direct' type='submit'>즉시 실행</button>
@@ -392,16 +376,45 @@ class Handler(BaseHTTPRequestHandler):
         self.end_headers()
         self.wfile.write(body)
 
+    def _send_matrix_file(self) -> None:
+        """컨택트 시트/결과 이미지를 LAN에서 바로 보기 위한 읽기 전용 경로 (/matrix/<run>/<file>)."""
+        rel = unquote(self.path.split('?', 1)[0][len('/matrix/'):])
+        target = (MATRIX_ROOT / rel).resolve()
+        if not target.is_file() or not target.is_relative_to(MATRIX_ROOT):
+            self._send(b'not found', 404)
+            return
+        body = target.read_bytes()
+        self.send_response(200)
+        self.send_header('Content-Type', mimetypes.guess_type(target.name)[0] or 'application/octet-stream')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
     def do_GET(self):  # noqa: N802
-        files = _preset_files()
-        if not files:
+        if self.path.startswith('/matrix/'):
+            self._send_matrix_file()
+            return
+        names = PRESETS.names()
+        if not names:
             self._send(_form('', {}, '프리셋 파일이 없어. studio/image/presets/*_preset.json 확인해줘'), 200)
             return
-        p = files[0]
-        d = _load_preset(p)
+        d = PRESETS.get(names[0]) or {}
         d['_publish_channel_id'] = DEFAULT_PUBLISH_CHANNEL_ID
         d['_upload_with_caption'] = True
-        self._send(_form(p.stem.replace('_preset', ''), d))
+        self._send(_form(names[0], d))
+
+    def _enqueue_upload(self, form: dict[str, list[str]], media_paths: list[str], prompt: str, model: str, logs: str) -> str:
+        allowed_ids = {cid for cid, _ in _discord_publish_channel_options()}
+        cid = _val(form, 'publish_channel_id', DEFAULT_PUBLISH_CHANNEL_ID)
+        if not (media_paths and cid):
+            return ''
+        if cid not in allowed_ids:
+            return "\n\n업로드: 허용되지 않은 채널 선택"
+        up_content = ''
+        if _val(form, 'upload_with_caption') == 'on':
+            up_content = _build_upload_caption(prompt, model, logs)
+        ok_up, msg = _upload_discord(cid, media_paths, up_content)
+        return f"\n\n업로드: {'대기열 등록' if ok_up else '실패'}\n{msg}"
 
     def do_POST(self):  # noqa: N802
         ln = int(self.headers.get('Content-Length', '0'))
@@ -409,17 +422,17 @@ class Handler(BaseHTTPRequestHandler):
         form = parse_qs(raw)
 
         preset_name = _val(form, 'preset')
-        preset_path = PRESETS_DIR / f'{preset_name}_preset.json'
+        preset_file = f'{preset_name}{PRESET_SUFFIX}'
         action = _val(form, 'action', 'load')
+        loaded = PRESETS.get(preset_name)
 
-        if action != 'run_direct' and (not preset_path.exists()):
-            self._send(_form(preset_name, {}, f'프리셋 없음: {preset_path.name}'), 404)
+        if action not in ('run_direct', 'run_batch') and loaded is None:
+            self._send(_form(preset_name, {}, f'프리셋 없음: {preset_file}'), 404)
             return
 
         alert = ''
-        data = _load_preset(preset_path)
-        data['_publish_channel_id'] = _val(form, 'publish_channel_id', DEFAULT_PUBLISH_CHANNEL_ID)
-        data['_upload_with_caption'] = (_val(form, 'upload_with_caption') == 'on')
+        link: tuple[str, str] | None = None
+        data = loaded or {}
 
         if action == 'save':
             try:
@@ -437,60 +450,93 @@ class Handler(BaseHTTPRequestHandler):
                 ref = _val(form, 'ref_image')
                 if ref:
                     updated['ref_image'] = ref
-                _save_preset(preset_path, updated)
-                data = _load_preset(preset_path)
-                alert = f'저장 완료: {preset_path.name}'
+                matrix_raw = _val(form, 'matrix')
+                if matrix_raw:
+                    updated['matrix'] = json.loads(matrix_raw)
+                errs = validate_preset(normalize_preset(updated))
+                if errs:
+                    data = {**data, **updated}
+                    alert = '저장 실패: ' + '; '.join(errs)
+                else:
+                    changed = PRESETS.save(preset_name, updated)
+                    data = PRESETS.get(preset_name) or updated
+                    alert = f'저장 완료: {preset_file}' if changed else f'변경 없음: {preset_file}'
             except Exception as e:
                 alert = f'저장 실패: {e}'
 
         elif action == 'normalize':
-            ok, msg = _run_normalizer()
-            data = _load_preset(preset_path)
-            alert = ('정규화 완료\n' + msg) if ok else ('정규화 실패\n' + msg)
+            try:
+                results = PRESETS.normalize_all()
+                changed = [n for n, c in results if c]
+                alert = f'정규화 완료: 변경 {len(changed)}개 / 전체 {len(results)}개'
+                if changed:
+                    alert += '\n' + '\n'.join(f'normalized: {n}{PRESET_SUFFIX}' for n in changed)
+                for n, errs in PRESETS.all_errors().items():
+                    alert += f'\ninvalid: {n}{PRESET_SUFFIX} - ' + '; '.join(errs)
+            except Exception as e:
+                alert = f'정규화 실패\n{e}'
+            data = PRESETS.get(preset_name) or {}
 
         elif action == 'run':
-            ok, logs, media_paths = _run_preset(preset_name)
+            ok, logs, media_paths = _run_preset(preset_name, _val(form, 'result_cache', DEFAULT_RESULT_CACHE_MODE))
             alert = ('결과: 생성 성공\n' if ok else '결과: 생성 실패\n') + '실행 로그:\n' + logs
-            allowed_ids = {cid for cid, _ in _discord_publish_channel_options()}
-            cid = _val(form, 'publish_channel_id', DEFAULT_PUBLISH_CHANNEL_ID)
-            if ok and media_paths and cid and cid in allowed_ids:
-                with_caption = (_val(form, 'upload_with_caption') == 'on')
-                up_content = ''
-                if with_caption:
-                    up_content = _build_upload_caption(
-                        _val(form, 'prompt', str(data.get('prompt', ''))).strip(),
-                        _val(form, 'model', str(data.get('model', DEFAULT_IMAGE_MODEL))).strip(),
-                        logs,
-                    )
-                ok_up, msg = _upload_discord(cid, media_paths[-1], up_content)
-                alert += f"\n\n업로드: {'성공' if ok_up else '실패'}\n{msg}"
-            elif ok and cid:
-                alert += "\n\n업로드: 허용되지 않은 채널 선택"
-            data = _load_preset(preset_path)
+            if ok:
+                alert += self._enqueue_upload(
+                    form,
+                    media_paths,
+                    _val(form, 'prompt', str(data.get('prompt', ''))).strip(),
+                    _val(form, 'model', str(data.get('model', DEFAULT_IMAGE_MODEL))).strip(),
+                    logs,
+                )
+            data = PRESETS.get(preset_name) or {}
+
+        elif action == 'run_matrix':
+            logs: list[str] = []
+            try:
+                run = run_matrix(preset_name, store=PRESETS, cache_mode=_val(form, 'result_cache', DEFAULT_RESULT_CACHE_MODE), log=logs.append)
+                ok_count = sum(1 for r in run.results if r.ok)
+                alert = (
+                    f'결과: 매트릭스 {ok_count}/{len(run.results)} 성공 ({run.elapsed:.1f}s)\n'
+                    f'파일: {run.sheet_path}\n실행 로그:\n' + '\n'.join(logs)[-6000:]
+                )
+                # 상대 경로: app_host 마운트 루트(/image/)든 단독 실행(/)이든 페이지 기준으로 풀린다
+                link = (f'matrix/{quote(run.out_dir.name)}/{quote(run.sheet_path.name)}', f'컨택트 시트 열기: {run.sheet_path.name}')
+            except Exception as e:
+                alert = f'매트릭스 실행 실패: {e}\n' + '\n'.join(logs)[-3000:]
+            data = PRESETS.get(preset_name) or {}
+
+        elif action == 'run_batch':
+            names = [n.strip() for n in form.get('batch_presets', []) if n.strip()]
+            ok, logs, media_by_preset = _run_presets(names, _val(form, 'result_cache', DEFAULT_RESULT_CACHE_MODE))
+            alert = ('결과: 일괄 실행 성공\n' if ok else '결과: 일괄 실행 실패\n') + '실행 로그:\n' + logs
+            # 부분 실패여도 성공한 프리셋 결과는 올린다
+            for name, media_paths in media_by_preset.items():
+                preset = PRESETS.get(name) or {}
+                alert += self._enqueue_upload(
+                    form,
+                    media_paths,
+                    str(preset.get('prompt', '')).strip(),
+                    str(preset.get('model', DEFAULT_IMAGE_MODEL)).strip(),
+                    logs,
+                )
+            data = PRESETS.get(preset_name) or {}
+            data['_batch_presets'] = names
 
         elif action == 'run_direct':
             ok, logs, media_paths = _run_direct(form)
             alert = ('결과: 즉시 실행 성공\n' if ok else '결과: 즉시 실행 실패\n') + '실행 로그:\n' + logs
-            allowed_ids = {cid for cid, _ in _discord_publish_channel_options()}
-            cid = _val(form, 'publish_channel_id', DEFAULT_PUBLISH_CHANNEL_ID)
-            if ok and media_paths and cid and cid in allowed_ids:
-                with_caption = (_val(form, 'upload_with_caption') == 'on')
-                up_content = ''
-                if with_caption:
-                    up_content = _build_upload_caption(
-                        _val(form, 'direct_prompt').strip(),
-                        _val(form, 'direct_model', DEFAULT_IMAGE_MODEL).strip(),
-                        logs,
-                    )
-                ok_up, msg = _upload_discord(cid, media_paths[-1], up_content)
-                alert += f"\n\n업로드: {'성공' if ok_up else '실패'}\n{msg}"
-            elif ok and cid:
-                alert += "\n\n업로드: 허용되지 않은 채널 선택"
-            data = _load_preset(preset_path) if preset_path.exists() else {}
+            if ok:
+                alert += self._enqueue_upload(
+                    form,
+                    media_paths,
+                    _val(form, 'direct_prompt').strip(),
+                    _val(form, 'direct_model', DEFAULT_IMAGE_MODEL).strip(),
+                    logs,
+                )
+            data = PRESETS.get(preset_name) or {}
 
         else:  # load
-            data = _load_preset(preset_path)
-            alert = f'불러옴: {preset_path.name}'
+            alert = f'불러옴: {preset_file}'
 
         data['_publish_channel_id'] = _val(form, 'publish_channel_id', DEFAULT_PUBLISH_CHANNEL_ID)
         data['_upload_with_caption'] = (_val(form, 'upload_with_caption') == 'on')
@@ -501,7 +547,8 @@ class Handler(BaseHTTPRequestHandler):
         data['_direct_count'] = _val(form, 'direct_count', '1')
         data['_direct_name_pattern'] = _val(form, 'direct_name_pattern', 'direct_image_{n}.jpg')
         data['_direct_purge'] = (_val(form, 'direct_purge') == 'on')
-        self._send(_form(preset_name, data, alert), 200)
+        data['_result_cache'] = _val(form, 'result_cache', DEFAULT_RESULT_CACHE_MODE)
+        self._send(_form(preset_name, data, alert, link), 200)
 
 
 def main() -> int:
@@ -515,6 +562,7 @@ def main() -> int:
         ok, msg = _try_auto_port_proxy(args.port)
         print(msg if ok else f'[portproxy] {msg}')
 
+    ensure_publish_worker()
     server = ThreadingHTTPServer((args.host, args.port), Handler)
     ip = _local_ip()
     print(f'PRESET_WEBUI:http://127.0.0.1:{args.port}')
@@ -4,14 +4,17 @@ from __future__ import annotations
 import argparse
 import html
 import json
-import subprocess
+import sqlite3
 import sys
 from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from pathlib import Path
 from urllib.parse import parse_qs
 
 sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from common.publish_channels import publish_channel_options
+from common.publish_queue import enqueue_publish, ensure_publish_worker
 from common.webui_shell import render_page
+from utility.common import media_catalog
 from utility.common.generation_defaults import MEDIA_ROOT, WORKSPACE_ROOT
 
 WORKSPACE = WORKSPACE_ROOT
@@ -23,45 +26,21 @@ STRUDEL_WAV_DIRS = [
 ]
 
 
-def _load_publish_allowlist() -> list[tuple[str, str]]:
-    file_path = WORKSPACE / 'studio' / 'publish_channels_allowlist.json'
-    out: list[tuple[str, str]] = []
-    if file_path.exists():
-        try:
-            data = json.loads(file_path.read_text(encoding='utf-8'))
-            if isinstance(data, list):
-                for row in data:
-                    if not isinstance(row, dict):
-                        continue
-                    cid = str(row.get('id', '')).strip()
-                    label = str(row.get('label', '')).strip() or f'채널 {cid}'
-                    if cid.isdigit():
-                        out.append((cid, f'{label} ({cid})'))
-            elif isinstance(data, dict):
-                for cid, label in data.items():
-                    cid = str(cid).strip()
-                    if cid.isdigit():
-                        out.append((cid, f"{str(label).strip() or f'채널 {cid}'} ({cid})"))
-        except Exception:
-            out = []
-
-    dedup: dict[str, str] = {}
-    for cid, label in out:
-        dedup[cid] = label
-    return sorted(dedup.items(), key=lambda x: x[1].lower())
-
-
 def _discord_publish_channel_options() -> list[tuple[str, str]]:
-    default_opt = (DEFAULT_PUBLISH_CHANNEL_ID, f'요청 채널 ({DEFAULT_PUBLISH_CHANNEL_ID})')
-    allowed = _load_publish_allowlist()
-    if not allowed:
-        return [default_opt]
-    if not any(cid == DEFAULT_PUBLISH_CHANNEL_ID for cid, _ in allowed):
-        return [default_opt] + allowed
-    return allowed
+    return publish_channel_options(DEFAULT_PUBLISH_CHANNEL_ID)
 
 
 def _latest_strudel_wav() -> Path | None:
+    # Strudel 렌더는 UI 밖에서 저장되므로 폴더 mtime이 바뀐 경우에만 색인을 다시 맞춘다
+    try:
+        for root in STRUDEL_WAV_DIRS:
+            media_catalog.sync_dir(root, '*.wav', kind='strudel')
+        hit = media_catalog.latest('strudel', STRUDEL_WAV_DIRS)
+        if hit is not None:
+            return hit
+    except (OSError, sqlite3.Error):
+        pass
+    # 색인이 비었거나 어긋났으면 디스크에서 직접 찾는다
     files: list[Path] = []
     for root in STRUDEL_WAV_DIRS:
         if root.exists():
@@ -81,18 +60,7 @@ def _publish_latest_wav_to_discord(channel_id: str) -> tuple[bool, str]:
     if not target:
         return False, 'Strudel 생성 wav가 없어. 먼저 렌더/저장부터 해줘'
 
-    py = str(WORKSPACE / '.venv' / 'bin' / 'python3') if (WORKSPACE / '.venv' / 'bin' / 'python3').exists() else 'python3'
-    cmd = [
-        py,
-        str(WORKSPACE / 'utility' / 'discord' / 'discord_send_media.py'),
-        '--channel-id', cid,
-        '--file', str(target),
-        '--content', f'Strudel wav 배포: {target.name}',
-    ]
-    p = subprocess.run(cmd, cwd=str(WORKSPACE), text=True, capture_output=True)
-    if p.returncode == 0:
-        return True, (p.stdout or f'배포 완료: {target.name}').strip()
-    return False, (p.stderr or p.stdout or '배포 실패').strip()
+    return enqueue_publish(cid, [target], f'Strudel wav 배포: {target.name}')
 
 
 DEFAULT_PRESETS = {
@@ -252,7 +220,7 @@ async function runNow() {{
   try {{
     const body = new URLSearchParams();
     body.set('channel_id', document.getElementById('publishChannel').value || '');
-    const r = await fetch('/publish-wav', {{
+    const r = await fetch('publish-wav', {{
       method:'POST',
       headers:{{'content-type':'application/x-www-form-urlencoded'}},
       body,
@@ -281,7 +249,7 @@ document.getElementById('upsertPreset').addEventListener('click', async () => {{
 
     const body = new URLSearchParams();
     body.set('presets_json', JSON.stringify(presets));
-    const r = await fetch('/save', {{
+    const r = await fetch('save', {{
       method:'POST',
       headers:{{'content-type':'application/x-www-form-urlencoded'}},
       body,
@@ -345,6 +313,7 @@ def main() -> int:
     ap.add_argument('--host', default='0.0.0.0')
     ap.add_argument('--port', type=int, default=8795)
     args = ap.parse_args()
+    ensure_publish_worker()
     httpd = ThreadingHTTPServer((args.host, args.port), Handler)
     print(f'[studio-music] http://{args.host}:{args.port}')
     httpd.serve_forever()
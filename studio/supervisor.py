@@ -0,0 +1,464 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import logging.handlers
+import os
+import signal
+import socket
+import socketserver
+import subprocess
+import threading
+import time
+from collections import deque
+from typing import Any
+
+try:
+    from utility.common.generation_defaults import WORKSPACE_ROOT
+    from utility.common.supervisor_client import SUPERVISOR_DIR, SUPERVISOR_SOCKET, supervisor_request
+except ModuleNotFoundError:
+    import sys
+    from pathlib import Path as _Path
+    for _p in _Path(__file__).resolve().parents:
+        if (_p / 'utility').exists():
+            sys.path.append(str(_p))
+            break
+    from utility.common.generation_defaults import WORKSPACE_ROOT
+    from utility.common.supervisor_client import SUPERVISOR_DIR, SUPERVISOR_SOCKET, supervisor_request
+
+from ui_runtime import UI_TARGETS
+
+WORKSPACE = WORKSPACE_ROOT
+PYTHON_BIN = str((WORKSPACE / '.venv' / 'bin' / 'python')) if (WORKSPACE / '.venv' / 'bin' / 'python').exists() else 'python3'
+PID_PATH = SUPERVISOR_DIR / 'studio_supervisor.pid'
+LOG_DIR = SUPERVISOR_DIR / 'logs'
+DAEMON_LOG = LOG_DIR / 'supervisor.log'
+
+LOG_MAX_BYTES = 2 * 1024 * 1024
+LOG_BACKUPS = 3
+TAIL_LINES = 80
+TICK_SEC = 0.5
+HEALTH_EVERY_SEC = 10.0
+BACKOFF_BASE_SEC = 1.0
+BACKOFF_MAX_SEC = 60.0
+STABLE_AFTER_SEC = 30.0
+MAX_FAST_FAILURES = 8
+STOP_GRACE_SEC = 8.0
+
+# name -> spec
+# - port: 있으면 readiness/헬스를 TCP 포트로 판단, 없으면 readyAfterSec 동안 살아있으면 ready
+# - autostart: 데몬 기동 시 바로 올릴지 (RP는 대시보드 ON/OFF로만 제어)
+# - stopSignal: 런타임은 SIGINT로 보내 finally(락 해제)가 돌게 한다
+PROGRAMS: dict[str, dict[str, Any]] = {
+    **{
+        name: {
+            'cmd': [PYTHON_BIN, *spec['cmd'][1:]],
+            'port': spec['port'],
+            'autostart': True,
+            'stopSignal': signal.SIGTERM,
+            'readyTimeoutSec': 30.0,
+        }
+        for name, spec in UI_TARGETS.items()
+    },
+    # 단일 포트 통합 호스트(선택). 켜면 위 개별 UI 대신 쓰는 용도라 기본은 꺼둔다.
+    'host': {
+        'cmd': [PYTHON_BIN, str(WORKSPACE / 'studio' / 'app_host.py'), '--host', '0.0.0.0', '--port', '8760'],
+        'port': 8760,
+        'autostart': False,
+        'stopSignal': signal.SIGTERM,
+        'readyTimeoutSec': 30.0,
+    },
+    'rp': {
+        'cmd': [PYTHON_BIN, str(WORKSPACE / 'studio' / 'dashboard' / 'actions' / 'rp_runtime_action.py')],
+        'port': None,
+        'autostart': False,
+        'stopSignal': signal.SIGINT,
+        'readyAfterSec': 3.0,
+    },
+    'dm-bulk': {
+        'cmd': [PYTHON_BIN, str(WORKSPACE / 'studio' / 'dashboard' / 'actions' / 'discord_bulk_delete_action.py'), 'run', '--poll-sec', '2'],
+        'port': None,
+        'autostart': True,
+        'stopSignal': signal.SIGINT,
+        'readyAfterSec': 2.0,
+    },
+}
+
+
+def _is_port_open(port: int) -> bool:
+    s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    s.settimeout(0.3)
+    try:
+        return s.connect_ex(('127.0.0.1', int(port))) == 0
+    finally:
+        s.close()
+
+
+def _program_logger(name: str) -> logging.Logger:
+    LOG_DIR.mkdir(parents=True, exist_ok=True)
+    lg = logging.getLogger(f'studio-supervisor.{name}')
+    lg.propagate = False
+    if not lg.handlers:
+        h = logging.handlers.RotatingFileHandler(LOG_DIR / f'{name}.log', maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUPS, encoding='utf-8')
+        h.setFormatter(logging.Formatter('%(asctime)s %(message)s'))
+        lg.addHandler(h)
+        lg.setLevel(logging.INFO)
+    return lg
+
+
+class Program:
+    def __init__(self, name: str, spec: dict[str, Any]):
+        self.name = name
+        self.spec = spec
+        self.want_up = bool(spec.get('autostart', True))
+        self.proc: subprocess.Popen | None = None
+        self.state = 'stopped'
+        self.started_at = 0.0
+        self.ready_at = 0.0
+        self.next_start_at = 0.0
+        self.fast_failures = 0
+        self.restarts = 0
+        self.last_exit: int | None = None
+        self.port_open = False
+        self.last_health_at = 0.0
+        self.stop_sent_at = 0.0
+        self.tail: deque[str] = deque(maxlen=TAIL_LINES)
+        self.log = _program_logger(name)
+
+    # ---- process control (supervisor lock 안에서 호출) ----
+    def spawn(self) -> None:
+        port = self.spec.get('port')
+        if port and _is_port_open(int(port)):
+            # 수동으로 띄운 프로세스가 포트를 잡고 있으면 중복 기동하지 않는다.
+            self.state = 'external'
+            self.port_open = True
+            self.next_start_at = time.time() + HEALTH_EVERY_SEC
+            return
+        self.proc = subprocess.Popen(
+            self.spec['cmd'],
+            cwd=str(WORKSPACE),
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            errors='replace',
+            start_new_session=True,
+        )
+        self.state = 'starting'
+        self.started_at = time.time()
+        self.ready_at = 0.0
+        self._emit(f'[supervisor] started pid={self.proc.pid}')
+        threading.Thread(target=self._pump, args=(self.proc,), name=f'pump-{self.name}', daemon=True).start()
+
+    def _pump(self, proc: subprocess.Popen) -> None:
+        assert proc.stdout is not None
+        for line in proc.stdout:
+            self._emit(line.rstrip('\n'))
+
+    def _emit(self, line: str) -> None:
+        self.tail.append(line)
+        self.log.info(line)
+
+    def terminate(self) -> None:
+        proc = self.send_stop()
+        if proc is not None:
+            self.wait_stopped(proc)
+
+    def send_stop(self) -> subprocess.Popen | None:
+        """정지 신호만 보내고 기다리지는 않는다. 살아 있던 프로세스를 돌려준다."""
+        proc = self.proc
+        if not proc or proc.poll() is not None:
+            return None
+        try:
+            os.killpg(proc.pid, self.spec.get('stopSignal', signal.SIGTERM))
+        except Exception:
+            pass
+        self.stop_sent_at = time.time()
+        return proc
+
+    def wait_stopped(self, proc: subprocess.Popen) -> None:
+        """STOP_GRACE_SEC까지 기다렸다가 안 죽으면 SIGKILL. supervisor lock 밖에서 불러도 된다."""
+        deadline = time.time() + STOP_GRACE_SEC
+        while proc.poll() is None and time.time() < deadline:
+            time.sleep(0.1)
+        if proc.poll() is None:
+            try:
+                os.killpg(proc.pid, signal.SIGKILL)
+            except Exception:
+                pass
+            proc.wait(timeout=5)
+        self._emit(f'[supervisor] stopped pid={proc.pid} code={proc.returncode}')
+
+    def tick(self, now: float) -> None:
+        port = self.spec.get('port')
+        proc = self.proc
+
+        if proc is not None and proc.poll() is not None:
+            self.last_exit = proc.returncode
+            uptime = now - self.started_at
+            self.proc = None
+            self.port_open = False
+            self._emit(f'[supervisor] exited code={proc.returncode} uptime={uptime:.1f}s')
+            if not self.want_up:
+                self.state = 'stopped'
+                return
+            self.fast_failures = 0 if uptime >= STABLE_AFTER_SEC else self.fast_failures + 1
+            if self.fast_failures >= MAX_FAST_FAILURES:
+                self.state = 'fatal'
+                self._emit(f'[supervisor] giving up after {self.fast_failures} fast failures')
+                return
+            delay = min(BACKOFF_MAX_SEC, BACKOFF_BASE_SEC * (2 ** self.fast_failures))
+            self.state = 'backoff'
+            self.next_start_at = now + delay
+            self.restarts += 1
+            return
+
+        if self.proc is None:
+            if self.want_up and self.state in {'stopped', 'backoff', 'external'} and now >= self.next_start_at:
+                self.spawn()
+            return
+
+        if self.state == 'stopping':
+            if now - self.stop_sent_at >= STOP_GRACE_SEC:
+                try:
+                    os.killpg(self.proc.pid, signal.SIGKILL)
+                except Exception:
+                    pass
+            return
+
+        if self.state == 'starting':
+            if port:
+                self.port_open = _is_port_open(int(port))
+                if self.port_open:
+                    self.state, self.ready_at = 'ready', now
+                    self.last_health_at = now
+                elif now - self.started_at > float(self.spec.get('readyTimeoutSec', 30.0)):
+                    self._emit('[supervisor] readiness timeout, restarting')
+                    # tick은 supervisor lock 안이라 기다리지 않는다. 종료 확인/backoff는 다음 tick의 exit 경로가 처리
+                    self.send_stop()
+                    self.state = 'stopping'
+            elif now - self.started_at >= float(self.spec.get('readyAfterSec', 2.0)):
+                self.state, self.ready_at = 'ready', now
+            return
+
+        if port and now - self.last_health_at >= HEALTH_EVERY_SEC:
+            self.last_health_at = now
+            self.port_open = _is_port_open(int(port))
+
+    def snapshot(self) -> dict[str, Any]:
+        pid = self.proc.pid if self.proc and self.proc.poll() is None else None
+        port = self.spec.get('port')
+        return {
+            'name': self.name,
+            'state': self.state,
+            'want': 'up' if self.want_up else 'down',
+            'pid': pid,
+            'pidAlive': bool(pid) or self.state == 'external',
+            'port': port,
+            'portOpen': self.port_open if port else None,
+            'ready': self.state in {'ready', 'external'},
+            'startedAt': int(self.started_at) if pid else None,
+            'restarts': self.restarts,
+            'lastExit': self.last_exit,
+            'nextStartInSec': round(max(0.0, self.next_start_at - time.time()), 1) if self.state == 'backoff' else None,
+        }
+
+
+class Supervisor:
+    def __init__(self, names: list[str] | None = None):
+        self.lock = threading.RLock()
+        self.programs = {n: Program(n, PROGRAMS[n]) for n in (names or list(PROGRAMS))}
+        self.stopping = threading.Event()
+
+    def _targets(self, target: str) -> list[Program]:
+        if target == 'all':
+            return list(self.programs.values())
+        if target not in self.programs:
+            raise KeyError(target)
+        return [self.programs[target]]
+
+    def loop(self) -> None:
+        while not self.stopping.is_set():
+            now = time.time()
+            with self.lock:
+                for p in self.programs.values():
+                    try:
+                        p.tick(now)
+                    except Exception as e:
+                        p._emit(f'[supervisor] tick error: {e}')
+            self.stopping.wait(TICK_SEC)
+
+    def handle(self, req: dict[str, Any]) -> dict[str, Any]:
+        cmd = str(req.get('cmd') or '')
+        target = str(req.get('target') or 'all')
+        if cmd == 'ping':
+            return {'ok': True, 'pid': os.getpid()}
+        try:
+            if cmd in {'start', 'stop', 'restart'}:
+                return self._control(cmd, self._targets(target))
+            with self.lock:
+                if cmd == 'status':
+                    return {'ok': True, 'rows': [p.snapshot() for p in self._targets(target)]}
+                if cmd == 'tail':
+                    p = self._targets(target)[0]
+                    n = max(1, min(TAIL_LINES, int(req.get('lines') or 30)))
+                    return {'ok': True, 'name': p.name, 'lines': list(p.tail)[-n:]}
+                if cmd == 'shutdown':
+                    self.stopping.set()
+                    return {'ok': True, 'message': 'supervisor shutting down'}
+        except KeyError:
+            return {'ok': False, 'error': f'unknown target: {target}'}
+        return {'ok': False, 'error': f'unknown cmd: {cmd}'}
+
+    def _control(self, cmd: str, targets: list[Program]) -> dict[str, Any]:
+        errors = []
+        skipped: set[str] = set()
+        if cmd in {'stop', 'restart'}:
+            # 신호는 lock 안에서 보내고, 최대 STOP_GRACE_SEC 대기는 lock 밖에서 한다.
+            # (기다리는 동안 status/tick/다른 프로그램 제어가 막히지 않게)
+            stopping = []
+            with self.lock:
+                for p in targets:
+                    if p.state == 'external':
+                        # 우리가 띄운 프로세스가 아니라 내릴 수 없다
+                        errors.append(f"{p.name}: external process on port {p.spec.get('port')} is not managed; stop it manually")
+                        skipped.add(p.name)
+                        continue
+                    p.want_up = False
+                    proc = p.send_stop()
+                    if proc is not None:
+                        p.state = 'stopping'
+                        stopping.append((p, proc))
+            for p, proc in stopping:
+                p.wait_stopped(proc)
+            with self.lock:
+                for p in targets:
+                    if p.name in skipped:
+                        continue
+                    if p.proc is None or p.proc.poll() is not None:
+                        p.proc = None
+                        p.state = 'stopped'
+        logs = []
+        with self.lock:
+            for p in targets:
+                if cmd in {'start', 'restart'} and p.name not in skipped:
+                    p.want_up = True
+                    p.fast_failures = 0
+                    p.next_start_at = 0.0
+                    if p.proc is None:
+                        p.state = 'stopped'
+                        p.spawn()
+                snap = p.snapshot()
+                logs.append(f"{p.name}: {snap['state']} pid={snap['pid']}")
+        if errors:
+            return {'ok': False, 'error': '\n'.join(errors), 'message': '\n'.join(logs)}
+        return {'ok': True, 'message': '\n'.join(logs)}
+
+    def stop_all(self) -> None:
+        with self.lock:
+            for p in self.programs.values():
+                p.want_up = False
+                p.terminate()
+
+
+def _make_server(sup: Supervisor) -> socketserver.ThreadingUnixStreamServer:
+    class _Handler(socketserver.StreamRequestHandler):
+        def handle(self) -> None:
+            try:
+                req = json.loads(self.rfile.readline().decode('utf-8') or '{}')
+                res = sup.handle(req if isinstance(req, dict) else {})
+            except Exception as e:
+                res = {'ok': False, 'error': str(e)}
+            self.wfile.write((json.dumps(res, ensure_ascii=False) + '\n').encode('utf-8'))
+
+    SUPERVISOR_SOCKET.unlink(missing_ok=True)
+    server = socketserver.ThreadingUnixStreamServer(str(SUPERVISOR_SOCKET), _Handler)
+    server.daemon_threads = True
+    os.chmod(SUPERVISOR_SOCKET, 0o600)
+    return server
+
+
+def serve(names: list[str] | None = None) -> int:
+    SUPERVISOR_DIR.mkdir(parents=True, exist_ok=True)
+    if supervisor_request({'cmd': 'ping'}, timeout=1.0):
+        print('supervisor already running')
+        return 3
+    PID_PATH.write_text(str(os.getpid()), encoding='utf-8')
+
+    sup = Supervisor(names)
+    server = _make_server(sup)
+    threading.Thread(target=server.serve_forever, name='supervisor-ctl', daemon=True).start()
+
+    def _on_signal(_sig, _frm) -> None:
+        sup.stopping.set()
+
+    signal.signal(signal.SIGTERM, _on_signal)
+    signal.signal(signal.SIGINT, _on_signal)
+
+    print(f'supervisor serving pid={os.getpid()} socket={SUPERVISOR_SOCKET}', flush=True)
+    try:
+        sup.loop()
+    finally:
+        server.shutdown()
+        server.server_close()
+        sup.stop_all()
+        SUPERVISOR_SOCKET.unlink(missing_ok=True)
+        PID_PATH.unlink(missing_ok=True)
+    print('supervisor stopped', flush=True)
+    return 0
+
+
+def _spawn_daemon() -> str:
+    if supervisor_request({'cmd': 'ping'}, timeout=1.0):
+        return 'supervisor already running'
+    LOG_DIR.mkdir(parents=True, exist_ok=True)
+    with open(DAEMON_LOG, 'a', encoding='utf-8') as fp:
+        proc = subprocess.Popen(
+            [PYTHON_BIN, str(WORKSPACE / 'studio' / 'supervisor.py'), 'serve'],
+            cwd=str(WORKSPACE), stdin=subprocess.DEVNULL, stdout=fp, stderr=subprocess.STDOUT,
+            start_new_session=True,
+        )
+    for _ in range(30):
+        if supervisor_request({'cmd': 'ping'}, timeout=0.5):
+            return f'supervisor started pid={proc.pid}'
+        if proc.poll() is not None:
+            return f'supervisor failed code={proc.returncode} (log: {DAEMON_LOG})'
+        time.sleep(0.2)
+    return f'supervisor starting pid={proc.pid} (socket not ready yet)'
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description='Studio process supervisor (UIs + RP/bulk-delete runtimes)')
+    ap.add_argument('action', choices=['serve', 'daemon', 'status', 'start', 'stop', 'restart', 'tail', 'shutdown'])
+    ap.add_argument('--target', default='all', choices=['all', *PROGRAMS.keys()])
+    ap.add_argument('--lines', type=int, default=30)
+    ap.add_argument('--only', default='', help='serve: comma separated program names (default: all)')
+    args = ap.parse_args()
+
+    if args.action == 'serve':
+        names = [x.strip() for x in args.only.split(',') if x.strip()] or None
+        unknown = [n for n in names or [] if n not in PROGRAMS]
+        if unknown:
+            raise SystemExit(f'unknown program: {",".join(unknown)}')
+        return serve(names)
+    if args.action == 'daemon':
+        print(_spawn_daemon())
+        return 0
+
+    res = supervisor_request({'cmd': args.action, 'target': args.target, 'lines': args.lines}, timeout=STOP_GRACE_SEC + 5)
+    if res is None:
+        print(json.dumps({'ok': False, 'error': 'supervisor not running'}, ensure_ascii=False))
+        return 2
+    if args.action == 'tail' and res.get('ok'):
+        print('\n'.join(res.get('lines') or []))
+    elif 'message' in res and res.get('ok'):
+        print(res['message'])
+    else:
+        print(json.dumps(res, ensure_ascii=False, indent=2))
+    return 0 if res.get('ok') else 1
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
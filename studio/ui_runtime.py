@@ -12,6 +12,7 @@ from pathlib import Path
 
 try:
     from utility.common.generation_defaults import WORKSPACE_ROOT
+    from utility.common.supervisor_client import supervisor_request
 except ModuleNotFoundError:
     import sys
     from pathlib import Path as _Path
@@ -20,6 +21,7 @@ except ModuleNotFoundError:
             sys.path.append(str(_p))
             break
     from utility.common.generation_defaults import WORKSPACE_ROOT
+    from utility.common.supervisor_client import supervisor_request
 
 WORKSPACE = WORKSPACE_ROOT
 STATE_PATH = WORKSPACE / 'memory' / 'runtime' / 'studio_ui_runtime.json'
@@ -131,6 +133,22 @@ def main() -> int:
     args = ap.parse_args()
 
     targets = _targets_from_arg(args.target)
+
+    # supervisor 데몬이 떠 있으면 상태/제어를 위임 (pid/port 직접 probe 대신 메모리 조회)
+    if args.action == 'status':
+        res = supervisor_request({'cmd': 'status'})
+        if res and res.get('ok'):
+            rows = [r for r in res.get('rows', []) if r.get('name') in targets]
+            print(json.dumps({'ok': True, 'supervised': True, 'rows': rows}, ensure_ascii=False, indent=2))
+            return 0
+    elif supervisor_request({'cmd': 'ping'}):
+        logs = []
+        for t in targets:
+            res = supervisor_request({'cmd': args.action, 'target': t}, timeout=30) or {}
+            logs.append(str(res.get('message') or res.get('error') or f'{t}: no response'))
+        print('\n'.join(logs))
+        return 0
+
     state = _load_state()
 
     if args.action == 'status':
@@ -0,0 +1,385 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+import urllib.error
+from pathlib import Path
+from typing import Callable
+
+try:
+    from utility.common.env_prefer_dotenv import load_env_prefer_dotenv
+    from utility.common.generation_defaults import DEFAULT_VEO_ASPECT_RATIO, DEFAULT_VEO_MODEL, WORKSPACE_ROOT
+except ModuleNotFoundError:
+    from pathlib import Path as _Path
+    for _p in _Path(__file__).resolve().parents:
+        if (_p / 'utility').exists():
+            sys.path.append(str(_p))
+            break
+    from utility.common.env_prefer_dotenv import load_env_prefer_dotenv
+    from utility.common.generation_defaults import DEFAULT_VEO_ASPECT_RATIO, DEFAULT_VEO_MODEL, WORKSPACE_ROOT
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from gemini_veo import (
+    SAFE_DEFAULT_OUTPUT_DIR,
+    _build_locked_prompt,
+    _resolve_out_dir,
+    download_to,
+    extract_video_uri,
+    get_json,
+    post_json,
+    resolve_unique_video_path,
+)
+from utility.common import media_catalog
+from utility.common.media_stream import INLINE_SIZE_KEY
+
+API_BASE = 'https://generativelanguage.googleapis.com/v1beta'
+# operation 이름을 저장해 두고 재시작 시 재제출(과금) 없이 polling만 이어간다.
+STATE_PATH = WORKSPACE_ROOT / 'memory' / 'runtime' / 'veo_jobs.json'
+
+# adaptive backoff: 처음엔 촘촘히, 오래 걸리는 작업일수록 간격을 늘린다.
+POLL_MIN_SEC = 4.0
+POLL_MAX_SEC = 30.0
+POLL_GROWTH = 1.5
+ERROR_BACKOFF_MAX_SEC = 60.0
+
+ACTIVE_STATUSES = ('pending', 'submitted')
+
+
+def _now() -> float:
+    return time.time()
+
+
+def job_id_for(prompt: str, model: str, aspect_ratio: str, name: str) -> str:
+    raw = json.dumps([prompt, model, aspect_ratio, name], ensure_ascii=False)
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()[:16]
+
+
+class VeoJobStore:
+    """veo_jobs.json 읽기/쓰기 (tmp -> replace, 프로세스 내 lock)."""
+
+    def __init__(self, path: Path = STATE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def load(self) -> dict:
+        try:
+            data = json.loads(self.path.read_text(encoding='utf-8'))
+        except Exception:
+            return {'jobs': {}}
+        if not isinstance(data, dict) or not isinstance(data.get('jobs'), dict):
+            return {'jobs': {}}
+        return data
+
+    def _save(self, data: dict) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix('.tmp')
+        tmp.write_text(json.dumps(data, ensure_ascii=False, indent=2) + '\n', encoding='utf-8')
+        tmp.replace(self.path)
+
+    def jobs(self) -> dict[str, dict]:
+        with self._lock:
+            return self.load()['jobs']
+
+    def update(self, job_id: str, **fields) -> dict:
+        with self._lock:
+            data = self.load()
+            job = data['jobs'].setdefault(job_id, {'id': job_id, 'created': int(_now())})
+            job.update(fields)
+            job['updated'] = int(_now())
+            self._save(data)
+            return dict(job)
+
+    def add(self, prompt: str, *, model: str, aspect_ratio: str, name: str, out_dir: str, force: bool = False) -> tuple[dict, bool]:
+        """같은 요청이 이미 있으면 기존 job을 돌려준다 (진행 중/완료분 재제출 방지)."""
+        jid = job_id_for(prompt, model, aspect_ratio, name)
+        with self._lock:
+            data = self.load()
+            job = data['jobs'].get(jid)
+            if job and not force and job.get('status') in ('pending', 'submitted', 'done'):
+                return dict(job), False
+            data['jobs'][jid] = {
+                'id': jid,
+                'prompt': prompt,
+                'model': model,
+                'aspect_ratio': aspect_ratio,
+                'name': name,
+                'out_dir': out_dir,
+                'status': 'pending',
+                'op_name': '',
+                'path': '',
+                'error': '',
+                'polls': 0,
+                'created': int(_now()),
+                'updated': int(_now()),
+            }
+            self._save(data)
+            return dict(data['jobs'][jid]), True
+
+    def prune(self, statuses: tuple[str, ...] = ('done', 'failed')) -> int:
+        with self._lock:
+            data = self.load()
+            before = len(data['jobs'])
+            data['jobs'] = {k: v for k, v in data['jobs'].items() if v.get('status') not in statuses}
+            self._save(data)
+            return before - len(data['jobs'])
+
+
+class VeoJobManager:
+    """여러 predictLongRunning 작업을 제출하고, 한 asyncio 루프에서 pending operation을 함께 polling.
+
+    - 제출/polling/다운로드는 urllib 블로킹 호출이라 asyncio.to_thread로 돌린다.
+    - 작업마다 다음 polling 시각을 따로 두고(adaptive backoff), 가장 빠른 시각까지만 잔다.
+    - 완료된 작업은 다른 작업 polling을 기다리지 않고 바로 다운로드한다.
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        store: VeoJobStore | None = None,
+        *,
+        concurrency: int = 4,
+        log: Callable[[str], None] | None = None,
+    ):
+        self.api_key = api_key
+        self.store = store or VeoJobStore()
+        self.concurrency = max(1, int(concurrency))
+        self.log = log or (lambda line: None)
+        self._next_poll: dict[str, float] = {}
+        self._interval: dict[str, float] = {}
+
+    # ---- blocking helpers (thread) ----
+    def _part(self, job: dict) -> Path:
+        return _resolve_out_dir(job.get('out_dir', '')) / f".veo_{job['id']}.part"
+
+    def _finish(self, job: dict, payload: dict, part: Path) -> dict:
+        out_dir = _resolve_out_dir(job.get('out_dir', ''))
+        if not payload.get(INLINE_SIZE_KEY):
+            uri = extract_video_uri(payload)
+            if not uri:
+                raise RuntimeError(f"Veo done but no video payload: {json.dumps(payload, ensure_ascii=False)[:600]}")
+            download_to(uri, self.api_key, part)
+        path = resolve_unique_video_path(out_dir, (job.get('name') or '').strip() or job.get('prompt', ''))
+        part.replace(path)
+        media_catalog.record(path, 'video', prompt=job.get('prompt', ''), model=job.get('model', ''))
+        return self.store.update(job['id'], status='done', path=str(path), error='')
+
+    def _submit_blocking(self, job: dict) -> dict:
+        out_dir = _resolve_out_dir(job.get('out_dir', ''))
+        out_dir.mkdir(parents=True, exist_ok=True)
+        body = {
+            'instances': [{'prompt': _build_locked_prompt(job['prompt'])}],
+            'parameters': {'aspectRatio': job.get('aspect_ratio') or DEFAULT_VEO_ASPECT_RATIO},
+        }
+        part = self._part(job)
+        try:
+            with part.open('wb') as sink:
+                start = post_json(f"{API_BASE}/{job['model']}:predictLongRunning", body, self.api_key, sink=sink)
+            if start.get(INLINE_SIZE_KEY) or extract_video_uri(start):
+                return self._finish(job, start, part)
+        finally:
+            part.unlink(missing_ok=True)
+        op_name = str(start.get('name') or '')
+        if not op_name:
+            raise RuntimeError(f"Veo response did not include operation/video payload: {json.dumps(start, ensure_ascii=False)[:600]}")
+        return self.store.update(job['id'], status='submitted', op_name=op_name, submitted=int(_now()))
+
+    def _poll_blocking(self, job: dict) -> dict:
+        part = self._part(job)
+        part.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            with part.open('wb') as sink:
+                st = get_json(f"{API_BASE}/{job['op_name']}", self.api_key, sink=sink)
+            polls = int(job.get('polls', 0)) + 1
+            if not st.get('done'):
+                return self.store.update(job['id'], polls=polls)
+            if 'error' in st:
+                return self.store.update(job['id'], status='failed', polls=polls, error=json.dumps(st['error'], ensure_ascii=False)[:1000])
+            self.store.update(job['id'], polls=polls)
+            return self._finish(job, st, part)
+        finally:
+            part.unlink(missing_ok=True)
+
+    # ---- async loop ----
+    async def _submit(self, job: dict, sem: asyncio.Semaphore) -> dict:
+        async with sem:
+            try:
+                job = await asyncio.to_thread(self._submit_blocking, job)
+            except urllib.error.HTTPError as e:
+                err = f"Veo start failed ({e.code}): {e.read().decode('utf-8', errors='replace')[:600]}"
+                job = self.store.update(job['id'], status='failed', error=err)
+            except Exception as e:
+                job = self.store.update(job['id'], status='failed', error=f'Veo start failed: {e}')
+        self._report(job)
+        return job
+
+    async def _poll(self, job: dict, sem: asyncio.Semaphore) -> dict:
+        jid = job['id']
+        async with sem:
+            try:
+                job = await asyncio.to_thread(self._poll_blocking, job)
+                step = min(POLL_MAX_SEC, self._interval.get(jid, POLL_MIN_SEC) * POLL_GROWTH)
+            except urllib.error.HTTPError as e:
+                if e.code in (400, 404):
+                    # 만료/삭제된 operation: 다시 제출해야 함
+                    job = self.store.update(jid, status='failed', error=f'operation 조회 실패 ({e.code})')
+                step = min(ERROR_BACKOFF_MAX_SEC, self._interval.get(jid, POLL_MIN_SEC) * 2)
+            except Exception as e:
+                self.log(f"[{jid}] poll error: {e}")
+                step = min(ERROR_BACKOFF_MAX_SEC, self._interval.get(jid, POLL_MIN_SEC) * 2)
+        self._interval[jid] = step
+        self._next_poll[jid] = _now() + step
+        if job.get('status') != 'submitted':
+            self._report(job)
+        return job
+
+    def _report(self, job: dict) -> None:
+        status = job.get('status')
+        if status == 'done':
+            self.log(f"[{job['id']}] done: {job.get('path')}")
+        elif status == 'failed':
+            self.log(f"[{job['id']}] failed: {job.get('error')}")
+        elif status == 'submitted':
+            self.log(f"[{job['id']}] submitted: {job.get('op_name')}")
+
+    async def run(self, job_ids: list[str] | None = None, *, max_wait: float = 600.0) -> list[dict]:
+        """pending은 제출하고 submitted는 polling해서 끝날 때까지(또는 max_wait) 돌린다.
+
+        max_wait을 넘겨도 operation 이름은 저장돼 있으니 다음 run/resume에서 이어서 polling한다.
+        """
+        jobs = self.store.jobs()
+        ids = [jid for jid in (job_ids or list(jobs.keys())) if jid in jobs]
+        sem = asyncio.Semaphore(self.concurrency)
+        deadline = _now() + max(0.0, float(max_wait))
+
+        pending = [jobs[jid] for jid in ids if jobs[jid].get('status') == 'pending']
+        if pending:
+            await asyncio.gather(*(self._submit(j, sem) for j in pending))
+
+        inflight: dict[str, asyncio.Task] = {}
+        while True:
+            jobs = self.store.jobs()
+            active = [jobs[jid] for jid in ids if jobs.get(jid, {}).get('status') == 'submitted']
+            if not active or _now() >= deadline:
+                break
+            now = _now()
+            for job in active:
+                jid = job['id']
+                if jid in inflight or self._next_poll.get(jid, 0.0) > now:
+                    continue
+                inflight[jid] = asyncio.create_task(self._poll(job, sem))
+            wake = min([self._next_poll.get(j['id'], now) for j in active if j['id'] not in inflight] or [now + POLL_MAX_SEC])
+            timeout = max(0.2, min(wake, deadline) - _now())
+            if inflight:
+                done, _ = await asyncio.wait(set(inflight.values()), timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                for jid in [k for k, t in inflight.items() if t in done]:
+                    inflight.pop(jid)
+            else:
+                await asyncio.sleep(timeout)
+
+        if inflight:
+            await asyncio.gather(*inflight.values(), return_exceptions=True)
+        final = self.store.jobs()
+        return [final[jid] for jid in ids if jid in final]
+
+
+def _media_line(path: str, emit_media: bool) -> str:
+    p = Path(path).resolve()
+    try:
+        shown = f"./{p.relative_to(Path.cwd().resolve()).as_posix()}"
+    except ValueError:
+        shown = p.as_posix()
+    return f"{'MEDIA' if emit_media else 'VIDEO'}:{shown}"
+
+
+def _load_manifest(path: str) -> list[dict]:
+    data = json.loads(Path(path).read_text(encoding='utf-8'))
+    rows = data.get('jobs', []) if isinstance(data, dict) else data
+    out: list[dict] = []
+    for row in rows if isinstance(rows, list) else []:
+        if isinstance(row, str):
+            row = {'prompt': row}
+        if isinstance(row, dict) and str(row.get('prompt', '')).strip():
+            out.append(row)
+    return out
+
+
+def main(argv: list[str] | None = None) -> int:
+    load_env_prefer_dotenv()
+    ap = argparse.ArgumentParser(description='Veo multi-job manager (shared async polling, resumable)')
+    ap.add_argument('action', choices=['submit', 'resume', 'status', 'prune'])
+    ap.add_argument('prompts', nargs='*')
+    ap.add_argument('--manifest', default='', help='JSON list of prompts or {prompt,name,model,aspect_ratio} objects')
+    ap.add_argument('--model', default=DEFAULT_VEO_MODEL)
+    ap.add_argument('--aspect-ratio', default=DEFAULT_VEO_ASPECT_RATIO)
+    ap.add_argument('--out-dir', default=str(SAFE_DEFAULT_OUTPUT_DIR))
+    ap.add_argument('--name', default='', help='Output filename stem (prompts 여러 개면 _1, _2 ... 붙음)')
+    ap.add_argument('--concurrency', type=int, default=int(os.getenv('VEO_JOBS_CONCURRENCY', '4') or '4'))
+    ap.add_argument('--max-wait', type=float, default=600.0, help='seconds to keep polling in this run')
+    ap.add_argument('--force', action='store_true', help='re-submit even if an identical job exists')
+    ap.add_argument('--emit-media', action='store_true', help='Print MEDIA:relative_path')
+    args = ap.parse_args(argv)
+
+    store = VeoJobStore()
+    if args.action == 'status':
+        print(json.dumps(list(store.jobs().values()), ensure_ascii=False, indent=2))
+        return 0
+    if args.action == 'prune':
+        print(json.dumps({'ok': True, 'removed': store.prune()}, ensure_ascii=False))
+        return 0
+
+    api_key = (os.getenv('GEMINI_API_KEY') or os.getenv('GOOGLE_API_KEY') or '').strip()
+    if not api_key:
+        print('Missing GEMINI_API_KEY or GOOGLE_API_KEY', file=sys.stderr)
+        return 2
+
+    job_ids: list[str] | None = None
+    if args.action == 'submit':
+        rows = [{'prompt': p} for p in args.prompts if p.strip()]
+        if args.manifest:
+            rows += _load_manifest(args.manifest)
+        if not rows:
+            print('submit할 prompt가 없어.', file=sys.stderr)
+            return 2
+        job_ids = []
+        for i, row in enumerate(rows, 1):
+            name = str(row.get('name') or '').strip()
+            if not name and args.name:
+                name = args.name if len(rows) == 1 else f'{args.name}_{i}'
+            model = str(row.get('model') or args.model)
+            job, created = store.add(
+                str(row['prompt']).strip(),
+                model=model if model.startswith('models/') else f'models/{model}',
+                aspect_ratio=str(row.get('aspect_ratio') or args.aspect_ratio),
+                name=name,
+                out_dir=str(row.get('out_dir') or args.out_dir),
+                force=args.force,
+            )
+            if not created:
+                print(f"[{job['id']}] 기존 작업 재사용 ({job.get('status')})", file=sys.stderr)
+            job_ids.append(job['id'])
+
+    mgr = VeoJobManager(api_key, store, concurrency=args.concurrency, log=lambda line: print(line, file=sys.stderr, flush=True))
+    results = asyncio.run(mgr.run(job_ids, max_wait=args.max_wait))
+
+    rc = 0
+    for job in results:
+        status = job.get('status')
+        if status == 'done' and job.get('path'):
+            print(_media_line(job['path'], args.emit_media))
+        elif status == 'failed':
+            rc = 1
+        elif status in ACTIVE_STATUSES:
+            print(f"[{job['id']}] 아직 진행 중 (resume으로 이어서 polling)", file=sys.stderr)
+            rc = rc or 3
+    return rc
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -1,8 +1,11 @@
 from __future__ import annotations
 
 import re
+import sqlite3
 from pathlib import Path
 
+from utility.common import media_catalog
+
 
 def slugify_name(text: str, fallback: str = 'file') -> str:
     t = (text or '').lower().strip()
@@ -12,6 +15,11 @@ def slugify_name(text: str, fallback: str = 'file') -> str:
 
 
 def resolve_unique_name(out_dir: Path, name: str) -> str:
+    # 색인으로 다음 번호를 바로 할당, 색인을 못 쓰면(권한/손상) exists() 탐색으로 폴백
+    try:
+        return media_catalog.allocate_name(out_dir, name)
+    except (OSError, sqlite3.Error):
+        pass
     p = Path(name)
     stem, suf = p.stem, p.suffix
     cand = out_dir / f"{stem}{suf}"
@@ -24,6 +32,10 @@ def resolve_unique_name(out_dir: Path, name: str) -> str:
 
 def resolve_unique_path(out_dir: Path, stem_text: str, ext: str, fallback: str = 'file') -> Path:
     stem = slugify_name(stem_text, fallback=fallback)[:60]
+    try:
+        return out_dir / media_catalog.allocate_name(out_dir, f"{stem}{ext}")
+    except (OSError, sqlite3.Error):
+        pass
     cand = out_dir / f"{stem}{ext}"
     i = 2
     while cand.exists():
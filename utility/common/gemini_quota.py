@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+import atexit
+import json
+import os
+import re
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from typing import Any, Iterator
+
+try:
+    from utility.common.generation_defaults import WORKSPACE_ROOT
+    from utility.common.json_state import locked_json_state, read_json_state
+    from utility.common.json_cache import load_json_cached
+    from utility.common import metrics
+except ModuleNotFoundError:
+    import sys
+    from pathlib import Path as _Path
+    for _p in _Path(__file__).resolve().parents:
+        if (_p / 'utility').exists():
+            sys.path.append(str(_p))
+            break
+    from utility.common.generation_defaults import WORKSPACE_ROOT
+    from utility.common.json_state import locked_json_state, read_json_state
+    from utility.common.json_cache import load_json_cached
+    from utility.common import metrics
+
+# 같은 GEMINI_API_KEY를 쓰는 image/TTS/Veo/RP 프로세스가 공유하는 모델별 token bucket + 사용 장부.
+# 상태는 flock으로 묶은 JSON 하나라서 데몬 없이 여러 프로세스가 같이 쓴다.
+# 설정 상한이 없는 모델은 429를 받기 전까지 막지 않는다. 429를 받으면 그때부터 학습한 rpm으로 bucket을 돌린다.
+STATE_PATH = WORKSPACE_ROOT / 'memory' / 'runtime' / 'gemini_quota.json'
+LOCK_PATH = STATE_PATH.with_suffix('.lock')
+# 모델별 분당 요청 상한 설정 {"gemini-2.5-flash": 15, ...} (없으면 GEMINI_DEFAULT_RPM, 0 = 상한 없음)
+LIMITS_PATH = WORKSPACE_ROOT / 'studio' / 'gemini_quota_limits.json'
+DEFAULT_RPM = float(os.getenv('GEMINI_DEFAULT_RPM', '0') or '0')
+MIN_RPM = 1.0
+# 첫 429인데 이 프로세스에서 최근 호출을 못 봤을 때 시작 rpm
+FIRST_LIMIT_RPM = 10.0
+# 상한 설정이 없는 모델은 429 없이 이만큼 지나면 학습값을 버리고 다시 무제한
+RELAX_SEC = 600.0
+DEFAULT_WAIT_SEC = 120.0
+# 429에 retryDelay가 없을 때 쉬는 시간 (연속이면 2배씩)
+FALLBACK_BLOCK_SEC = 10.0
+MAX_BLOCK_SEC = 120.0
+KEEP_LEDGER_DAYS = 14
+# 장부 카운트는 프로세스 안에 모았다가 상태를 쓸 때 같이, 아니면 이 주기로 한 번에 반영
+LEDGER_FLUSH_SEC = 10.0
+KST = timezone(timedelta(hours=9))
+
+_RETRY_DELAY_RE = re.compile(r'"retryDelay"\s*:\s*"([\d.]+)s"')
+_LEDGER_KEYS = ('calls', 'ok', 'rate_limited', 'errors', 'wait_sec')
+
+_PENDING_LOCK = threading.Lock()
+_PENDING: dict[str, dict[str, float]] = {}
+_PENDING_SINCE = 0.0
+# 모델별 이 프로세스의 최근 1분 호출 시각 (첫 429 때 rpm 추정용)
+_RECENT: dict[str, deque[float]] = {}
+
+
+class QuotaTimeout(RuntimeError):
+    pass
+
+
+def model_key(model: str) -> str:
+    return (model or '').strip().removeprefix('models/') or 'unknown'
+
+
+def parse_retry_delay(body: str) -> float | None:
+    """429 응답 본문의 RetryInfo.retryDelay ("37s") -> 초."""
+    m = _RETRY_DELAY_RE.search(body or '')
+    return float(m.group(1)) if m else None
+
+
+def configured_rpm(model: str) -> float:
+    """설정 상한. 0이면 상한 없음."""
+    limits = load_json_cached(LIMITS_PATH, {})
+    try:
+        v = float(limits.get(model_key(model), DEFAULT_RPM))
+    except (AttributeError, TypeError, ValueError):
+        v = DEFAULT_RPM
+    return max(MIN_RPM, v) if v > 0 else 0.0
+
+
+def _effective_rpm(b: dict[str, Any], cap: float) -> float:
+    learned = float(b.get('rpm') or 0.0)
+    limits = [x for x in (cap, learned) if x > 0]
+    return min(limits) if limits else 0.0
+
+
+def _read_state() -> dict[str, Any]:
+    return read_json_state(STATE_PATH)
+
+
+def _merge_pending(state: dict[str, Any]) -> None:
+    global _PENDING_SINCE
+    with _PENDING_LOCK:
+        pending = dict(_PENDING)
+        _PENDING.clear()
+        _PENDING_SINCE = 0.0
+    if not pending:
+        return
+    day = datetime.now(KST).strftime('%Y-%m-%d')
+    ledger = state['ledger']
+    for model, delta in pending.items():
+        row = ledger.setdefault(day, {}).setdefault(model, {})
+        for k in _LEDGER_KEYS:
+            row[k] = round(row.get(k, 0) + delta.get(k, 0), 3)
+    for old in sorted(ledger)[:-KEEP_LEDGER_DAYS]:
+        ledger.pop(old, None)
+
+
+def _prepare(state: dict[str, Any]) -> None:
+    state.setdefault('models', {})
+    state.setdefault('ledger', {})
+
+
+@contextmanager
+def _locked() -> Iterator[dict[str, Any]]:
+    """잠금 안에서 상태를 고친다. 밀린 장부도 같이 반영하고, 내용이 바뀌었을 때만 파일을 다시 쓴다."""
+    with locked_json_state(STATE_PATH, LOCK_PATH, prepare=_prepare, before_save=_merge_pending) as state:
+        yield state
+
+
+def flush() -> None:
+    """밀린 장부 카운트를 상태 파일에 반영."""
+    with _PENDING_LOCK:
+        if not _PENDING:
+            return
+    with _locked():
+        pass
+
+
+def _note(model: str, **delta: float) -> bool:
+    """장부 증감을 메모리에 쌓는다. 반환: LEDGER_FLUSH_SEC가 지나서 반영할 때가 됐는지."""
+    global _PENDING_SINCE
+    with _PENDING_LOCK:
+        row = _PENDING.setdefault(model, {})
+        for k, v in delta.items():
+            row[k] = row.get(k, 0) + v
+        if not _PENDING_SINCE:
+            _PENDING_SINCE = time.monotonic()
+        return time.monotonic() - _PENDING_SINCE >= LEDGER_FLUSH_SEC
+
+
+def _refill(b: dict[str, Any], rpm: float, now: float) -> None:
+    elapsed = max(0.0, now - float(b.get('ts', now)))
+    b['tokens'] = min(rpm, float(b.get('tokens', rpm)) + elapsed * rpm / 60.0)
+    b['ts'] = now
+
+
+def acquire(model: str, *, timeout: float = DEFAULT_WAIT_SEC) -> float:
+    """모델 bucket에서 토큰 1개를 받을 때까지 기다린다. 반환: 기다린 초. timeout 넘으면 QuotaTimeout.
+    상한도 학습값도 없고 막혀 있지 않은 모델은 파일을 쓰지 않고 바로 통과한다."""
+    key = model_key(model)
+    cap = configured_rpm(key)
+    started = time.monotonic()
+    while True:
+        now = time.time()
+        b = (_read_state().get('models') or {}).get(key) or {}
+        blocked = float(b.get('blocked_until', 0.0)) - now
+        if blocked <= 0 and _effective_rpm(b, cap) <= 0:
+            break
+        if blocked <= 0:
+            with _locked() as state:
+                b = state['models'].setdefault(key, {})
+                rpm = _effective_rpm(b, cap)
+                blocked = float(b.get('blocked_until', 0.0)) - now
+                if blocked <= 0 and rpm <= 0:
+                    break
+                if blocked <= 0:
+                    _refill(b, rpm, now)
+                    if b['tokens'] >= 1.0:
+                        b['tokens'] -= 1.0
+                        break
+            wait = blocked if blocked > 0 else (1.0 - b['tokens']) * 60.0 / rpm
+        else:
+            wait = blocked
+        remaining = timeout - (time.monotonic() - started)
+        if remaining <= 0:
+            raise QuotaTimeout(f'Gemini quota 대기 시간 초과: {key} (필요 대기 {wait:.0f}s)')
+        time.sleep(max(0.05, min(wait, remaining, 5.0)))
+    waited = round(time.monotonic() - started, 3)
+    with _PENDING_LOCK:
+        recent = _RECENT.setdefault(key, deque())
+        recent.append(now)
+        while recent and recent[0] < now - 60:
+            recent.popleft()
+    if waited > 0.05:
+        _note(key, wait_sec=waited)
+        metrics.observe('gemini.quota_wait', waited * 1000.0, model=key)
+    return waited
+
+
+def record(model: str, status: int, body: str = '') -> None:
+    """호출 결과 반영. 429면 retryDelay만큼 막고 rpm을 낮추고(처음이면 최근 호출 속도 기준으로 학습 시작),
+    성공이 이어지면 1분에 1씩 올린다. 상태가 바뀔 일이 없는 성공은 장부만 메모리에 쌓는다."""
+    key = model_key(model)
+    now = time.time()
+    if status == 429:
+        _note(key, calls=1, rate_limited=1)
+        with _locked() as state:
+            b = state['models'].setdefault(key, {})
+            cap = configured_rpm(key)
+            streak = int(b.get('streak', 0))
+            delay = parse_retry_delay(body)
+            if delay is None:
+                delay = min(MAX_BLOCK_SEC, FALLBACK_BLOCK_SEC * (2 ** streak))
+            current = _effective_rpm(b, cap)
+            if current <= 0:
+                with _PENDING_LOCK:
+                    seen = len(_RECENT.get(key) or ())
+                current = float(seen) if seen >= 2 else FIRST_LIMIT_RPM
+            b['rpm'] = max(MIN_RPM, round(current * 0.7, 2))
+            b['blocked_until'] = max(float(b.get('blocked_until', 0.0)), now + delay)
+            # retryDelay가 끝나면 한 번은 바로 보내고, 그 뒤로는 낮춘 속도로
+            b['tokens'] = min(float(b.get('tokens', 1.0)), 1.0)
+            b['ts'] = now
+            b['streak'] = streak + 1
+            b['last_429'] = now
+            b['last_retry_delay'] = delay
+        return
+    if not 200 <= status < 300:
+        if _note(key, calls=1, errors=1):
+            flush()
+        return
+    due = _note(key, calls=1, ok=1)
+    b = (_read_state().get('models') or {}).get(key) or {}
+    quiet = now - float(b.get('last_429', 0.0)) > 60 and now - float(b.get('raised_at', 0.0)) > 60
+    if not (int(b.get('streak', 0)) or (b.get('rpm') and quiet)):
+        if due:
+            flush()
+        return
+    with _locked() as state:
+        b = state['models'].setdefault(key, {})
+        b['streak'] = 0
+        learned = float(b.get('rpm') or 0.0)
+        if learned and now - float(b.get('last_429', 0.0)) > 60 and now - float(b.get('raised_at', 0.0)) > 60:
+            cap = configured_rpm(key)
+            if cap <= 0 and now - float(b.get('last_429', 0.0)) > RELAX_SEC:
+                b.pop('rpm', None)
+                b.pop('tokens', None)
+            elif cap > 0 and learned + 1.0 >= cap:
+                b.pop('rpm', None)
+            else:
+                b['rpm'] = learned + 1.0
+            b['raised_at'] = now
+
+
+atexit.register(flush)
+
+
+def usage_summary(days: int = 1) -> dict[str, Any]:
+    """대시보드용: 모델별 현재 bucket 상태 + 최근 days일 합계. rpm/cap이 None이면 제한 없음."""
+    flush()
+    state = _read_state()
+    now = time.time()
+    ledger = state.get('ledger', {})
+    since = (datetime.now(KST) - timedelta(days=max(1, days) - 1)).strftime('%Y-%m-%d')
+    recent_days = [d for d in sorted(ledger) if d >= since]
+    totals: dict[str, dict[str, float]] = {}
+    for day in recent_days:
+        for model, row in (ledger.get(day) or {}).items():
+            t = totals.setdefault(model, {k: 0 for k in _LEDGER_KEYS})
+            for k in t:
+                t[k] += row.get(k, 0)
+    models = state.get('models', {})
+    rows = []
+    for model in sorted(set(models) | set(totals)):
+        b = models.get(model, {})
+        cap = configured_rpm(model)
+        rows.append({
+            'model': model,
+            'rpm': b.get('rpm') or None,
+            'cap': cap or None,
+            'blocked_sec': max(0.0, round(float(b.get('blocked_until', 0.0)) - now, 1)),
+            'last_retry_delay': b.get('last_retry_delay'),
+            **{k: round(v, 1) if k == 'wait_sec' else int(v) for k, v in totals.get(model, {}).items()},
+        })
+    return {'days': recent_days, 'models': rows}
+
+
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description='Gemini shared quota state / usage ledger')
+    ap.add_argument('--days', type=int, default=1)
+    args = ap.parse_args(argv)
+    print(json.dumps(usage_summary(args.days), ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import io
+
+try:
+    from PIL import Image  # optional: 프로세스 안에서 PNG 변환
+except Exception:  # pragma: no cover - Pillow 없으면 호출부가 ffmpeg로 폴백
+    Image = None  # type: ignore[assignment]
+
+# (offset, magic, mime) - 생성 결과/참조 이미지에서 실제로 나오는 포맷만
+_MAGIC: tuple[tuple[int, bytes, str], ...] = (
+    (0, b'\x89PNG\r\n\x1a\n', 'image/png'),
+    (0, b'\xff\xd8\xff', 'image/jpeg'),
+    (0, b'GIF87a', 'image/gif'),
+    (0, b'GIF89a', 'image/gif'),
+    (0, b'BM', 'image/bmp'),
+)
+
+
+def sniff_image_mime(head: bytes) -> str:
+    """앞부분 바이트(16바이트면 충분)로 이미지 포맷 판별. 모르면 ''."""
+    for offset, magic, mime in _MAGIC:
+        if head[offset:offset + len(magic)] == magic:
+            return mime
+    if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        return 'image/webp'
+    return ''
+
+
+def sniff_file_mime(path) -> str:
+    try:
+        with open(path, 'rb') as fp:
+            return sniff_image_mime(fp.read(16))
+    except OSError:
+        return ''
+
+
+def can_transcode() -> bool:
+    return Image is not None
+
+
+def to_png_bytes(data: bytes) -> bytes:
+    """메모리 안에서 PNG로 재인코딩. Pillow가 없거나 디코딩 실패 시 RuntimeError."""
+    if Image is None:
+        raise RuntimeError('Pillow 없음')
+    try:
+        with Image.open(io.BytesIO(data)) as im:
+            if im.mode not in {'RGB', 'RGBA', 'L', 'LA', 'P'}:
+                im = im.convert('RGBA' if 'A' in im.getbands() else 'RGB')
+            buf = io.BytesIO()
+            im.save(buf, format='PNG')
+    except Exception as e:
+        raise RuntimeError(f'PNG 변환 실패(Pillow): {e}') from e
+    return buf.getvalue()
+
+
+def to_webp_bytes(data: bytes, quality: int = 85) -> bytes:
+    """보관용 WebP 재인코딩 (media_lifecycle). 실패 시 RuntimeError."""
+    if Image is None:
+        raise RuntimeError('Pillow 없음')
+    try:
+        with Image.open(io.BytesIO(data)) as im:
+            if im.mode not in {'RGB', 'RGBA'}:
+                im = im.convert('RGBA' if 'A' in im.getbands() else 'RGB')
+            buf = io.BytesIO()
+            im.save(buf, format='WEBP', quality=int(quality), method=4)
+    except Exception as e:
+        raise RuntimeError(f'WebP 변환 실패(Pillow): {e}') from e
+    return buf.getvalue()
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import re
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+
+try:
+    from utility.common.generation_defaults import WORKSPACE_ROOT
+except ModuleNotFoundError:
+    import sys
+    from pathlib import Path as _Path
+    for _p in _Path(__file__).resolve().parents:
+        if (_p / 'utility').exists():
+            sys.path.append(str(_p))
+            break
+    from utility.common.generation_defaults import WORKSPACE_ROOT
+
+# 이미지/영상 프롬프트 빌더가 공유하는 규칙 파일
+RULES_PATH = (WORKSPACE_ROOT / 'studio' / 'image' / 'rules' / 'image_rules.md').resolve()
+
+_WS = re.compile(r"\s+")
+_TOKEN_SPLIT = re.compile(r"[\n,]")
+_OUTFIT_KEYS = ("의상", "옷", "outfit", "costume", "wardrobe", "착장")
+
+
+def _norm(text: str) -> str:
+    return _WS.sub(" ", (text or "").lower()).strip()
+
+
+@dataclass(frozen=True)
+class ParsedRules:
+    sections: dict[str, list[str]] = field(default_factory=dict)
+    noise_terms: frozenset[str] = frozenset()
+    # REQUEST_NOISE_CONTAINS 전체를 하나의 alternation으로 (긴 문구 우선)
+    noise_contains: re.Pattern[str] | None = None
+    # 정규화된 토큰 -> 치환 문구
+    rewrites: dict[str, str] = field(default_factory=dict)
+
+    def section(self, name: str) -> list[str]:
+        return self.sections.get(name, [])
+
+    def kv(self, name: str) -> dict[str, str]:
+        out: dict[str, str] = {}
+        for line in self.section(name):
+            if ':' not in line:
+                continue
+            k, v = line.split(':', 1)
+            out[k.strip().lower()] = v.strip()
+        return out
+
+
+def parse_rules_text(text: str) -> dict[str, list[str]]:
+    sections: dict[str, list[str]] = {}
+    current = ""
+    for raw in text.splitlines():
+        line = raw.strip()
+        if not line:
+            continue
+        if line.startswith("## "):
+            current = line[3:].strip()
+            sections[current] = []
+            continue
+        if current and line.startswith("- "):
+            sections[current].append(line[2:].strip())
+    return sections
+
+
+def compile_rules(sections: dict[str, list[str]]) -> ParsedRules:
+    noise_terms = frozenset(_norm(x) for x in sections.get("REQUEST_NOISE_DROP", []) if x.strip())
+
+    contains = sorted({x.strip().lower() for x in sections.get("REQUEST_NOISE_CONTAINS", []) if x.strip()}, key=len, reverse=True)
+    contains_re = re.compile("|".join(re.escape(k) for k in contains), re.IGNORECASE) if contains else None
+
+    rewrites: dict[str, str] = {}
+    for line in sections.get("REQUEST_CANONICAL_REWRITE", []):
+        if "=>" not in line:
+            continue
+        src, dst = line.split("=>", 1)
+        src, dst = _norm(src), dst.strip()
+        if src and dst and src not in rewrites:
+            rewrites[src] = dst
+
+    return ParsedRules(sections, noise_terms, contains_re, rewrites)
+
+
+_LOCK = threading.Lock()
+_CACHE: dict[str, tuple[int, int, ParsedRules]] = {}
+
+
+def load_rules(path: Path = RULES_PATH) -> ParsedRules:
+    """규칙 파일을 mtime/size 기준으로 한 번만 파싱해서 재사용."""
+    key = str(path)
+    try:
+        st = path.stat()
+    except OSError:
+        return ParsedRules()
+    with _LOCK:
+        hit = _CACHE.get(key)
+        if hit and hit[0] == st.st_mtime_ns and hit[1] == st.st_size:
+            return hit[2]
+    try:
+        text = path.read_text(encoding="utf-8")
+    except Exception:
+        return ParsedRules()
+    rules = compile_rules(parse_rules_text(text))
+    with _LOCK:
+        _CACHE[key] = (st.st_mtime_ns, st.st_size, rules)
+    return rules
+
+
+def is_outfit_only_request(prompt: str) -> bool:
+    p = (prompt or "").lower()
+    return any(k in p for k in _OUTFIT_KEYS)
+
+
+def rules_to_text(lines: list[str]) -> str:
+    return "\n".join(f"- {x}" for x in lines if x)
+
+
+def normalize_request_prompt(prompt: str, rules: ParsedRules | None = None) -> str:
+    p = (prompt or "").strip()
+    if not p:
+        return "기본값 유지"
+    rules = rules or load_rules()
+
+    # 쉼표/줄바꿈 단위로 잘라서 규칙 기반 노이즈 제거/정규화 적용
+    tokens = [t.strip() for t in _TOKEN_SPLIT.split(p) if t.strip()]
+
+    normalized: list[str] = []
+    seen_norm: set[str] = set()
+    for t in tokens:
+        norm = _norm(t)
+        if norm in rules.noise_terms:
+            continue
+
+        replaced = t
+        # contains 규칙은 토큰 전체를 버리지 않고 해당 문구만 제거한다.
+        if rules.noise_contains is not None:
+            replaced = _WS.sub(" ", rules.noise_contains.sub(" ", replaced)).strip(" ,.-:;")
+            if not replaced:
+                continue
+            norm = _norm(replaced)
+
+        dst = rules.rewrites.get(norm)
+        if dst is not None:
+            replaced = dst
+            norm = _norm(dst)
+
+        if norm in seen_norm:
+            continue
+        seen_norm.add(norm)
+        normalized.append(replaced)
+
+    joined = ", ".join(normalized).strip(" ,.-:;")
+    return joined or "기본값 유지"
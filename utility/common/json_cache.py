@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import copy
+import json
+import threading
+from pathlib import Path
+from typing import Any
+
+_LOCK = threading.Lock()
+_CACHE: dict[str, tuple[int, int, Any]] = {}
+
+
+def load_json_cached(path: Path, default: Any = None) -> Any:
+    """mtime/size 기준 JSON 캐시.
+
+    - 파일이 바뀌지 않았으면 다시 파싱하지 않는다(요청마다 읽던 설정 파일용).
+    - 호출 측 수정이 캐시에 번지지 않도록 사본을 돌려준다.
+    - 파일이 없거나 파싱 실패면 default.
+    """
+    key = str(path)
+    try:
+        st = path.stat()
+    except OSError:
+        with _LOCK:
+            _CACHE.pop(key, None)
+        return copy.deepcopy(default)
+
+    with _LOCK:
+        hit = _CACHE.get(key)
+    if hit and hit[0] == st.st_mtime_ns and hit[1] == st.st_size:
+        return copy.deepcopy(hit[2])
+
+    try:
+        data = json.loads(path.read_text(encoding='utf-8'))
+    except Exception:
+        return copy.deepcopy(default)
+    with _LOCK:
+        _CACHE[key] = (st.st_mtime_ns, st.st_size, data)
+    return copy.deepcopy(data)
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import fcntl
+import json
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Iterator
+
+# 여러 프로세스가 함께 쓰는 runtime 상태 JSON (publish_queue, gemini_quota, model_circuit).
+# flock으로 read-modify-write를 묶고, 쓰기는 tmp + replace라 잠금 없는 읽기도 반쯤 쓴 파일을 안 본다.
+
+
+def read_json_state(path: Path) -> dict[str, Any]:
+    """잠금 없이 읽기. 파일이 없거나 깨졌으면 빈 dict."""
+    try:
+        state = json.loads(path.read_text(encoding='utf-8'))
+    except Exception:
+        state = {}
+    return state if isinstance(state, dict) else {}
+
+
+@contextmanager
+def locked_json_state(
+    path: Path,
+    lock_path: Path,
+    *,
+    prepare: Callable[[dict[str, Any]], None] | None = None,
+    before_save: Callable[[dict[str, Any]], None] | None = None,
+) -> Iterator[dict[str, Any]]:
+    """잠금 안에서 상태를 고친다. 내용이 바뀌었을 때만 파일을 다시 쓴다.
+
+    prepare: 읽은 직후 기본 키 채우기/형식 보정 (이것만으로는 쓰지 않는다)
+    before_save: 비교 직전 정리 (오래된 항목 잘라내기, 밀린 카운트 반영 등)
+    """
+    lock_path.parent.mkdir(parents=True, exist_ok=True)
+    with lock_path.open('a+') as lock_fp:
+        fcntl.flock(lock_fp, fcntl.LOCK_EX)
+        try:
+            state = read_json_state(path)
+            if prepare is not None:
+                prepare(state)
+            before = json.dumps(state, sort_keys=True)
+            yield state
+            if before_save is not None:
+                before_save(state)
+            if json.dumps(state, sort_keys=True) == before:
+                return
+            tmp = path.with_suffix('.tmp')
+            tmp.write_text(json.dumps(state, ensure_ascii=False, indent=2) + '\n', encoding='utf-8')
+            tmp.replace(path)
+        finally:
+            fcntl.flock(lock_fp, fcntl.LOCK_UN)
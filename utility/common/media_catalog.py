@@ -0,0 +1,340 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import mimetypes
+import os
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+try:
+    from utility.common.generation_defaults import MEDIA_ROOT
+    from utility.common import metrics
+except ModuleNotFoundError:
+    import sys
+    from pathlib import Path as _Path
+    for _p in _Path(__file__).resolve().parents:
+        if (_p / 'utility').exists():
+            sys.path.append(str(_p))
+            break
+    from utility.common.generation_defaults import MEDIA_ROOT
+    from utility.common import metrics
+
+# 생성 산출물 색인. 이름 할당/최신 파일 조회를 디렉터리 glob+stat 대신 SQLite 한 번으로 처리한다.
+# 색인이 깨지거나 못 쓰는 환경이면 호출부가 기존 파일시스템 방식으로 폴백한다.
+CATALOG_PATH = MEDIA_ROOT / '.cache' / 'media_catalog.sqlite3'
+BUSY_TIMEOUT_MS = 5000
+# 할당했지만 아직 안 써진 이름을 다른 프로세스가 다시 받지 않게 잠깐 잡아 둔다
+NAME_LEASE_SEC = 60.0
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS media (
+    path TEXT PRIMARY KEY,
+    dir TEXT NOT NULL,
+    name TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    prompt_hash TEXT NOT NULL DEFAULT '',
+    model TEXT NOT NULL DEFAULT '',
+    size INTEGER NOT NULL DEFAULT 0,
+    mtime REAL NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS media_kind_mtime ON media(kind, mtime DESC);
+CREATE INDEX IF NOT EXISTS media_dir ON media(dir);
+CREATE TABLE IF NOT EXISTS name_seq (
+    dir TEXT NOT NULL,
+    stem TEXT NOT NULL,
+    suffix TEXT NOT NULL,
+    next_idx INTEGER NOT NULL,
+    PRIMARY KEY (dir, stem, suffix)
+);
+CREATE TABLE IF NOT EXISTS name_lease (
+    dir TEXT NOT NULL,
+    name TEXT NOT NULL,
+    at REAL NOT NULL,
+    PRIMARY KEY (dir, name)
+);
+CREATE TABLE IF NOT EXISTS dir_state (
+    dir TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL
+);
+'''
+
+_INDEXED_RE = re.compile(r'^(.*)_(\d+)$')
+_LOCAL = threading.local()
+
+
+def _connect() -> sqlite3.Connection:
+    """스레드마다 연결 1개 (sqlite3 연결은 스레드 간 공유 불가)."""
+    conn = getattr(_LOCAL, 'conn', None)
+    if conn is not None and getattr(_LOCAL, 'path', None) == CATALOG_PATH:
+        return conn
+    CATALOG_PATH.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(str(CATALOG_PATH), timeout=BUSY_TIMEOUT_MS / 1000, isolation_level=None)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    conn.executescript(_SCHEMA)
+    _LOCAL.conn = conn
+    _LOCAL.path = CATALOG_PATH
+    return conn
+
+
+def _dir_key(out_dir: Path) -> str:
+    return str(Path(out_dir).resolve())
+
+
+def prompt_hash(prompt: str) -> str:
+    return hashlib.sha256((prompt or '').encode('utf-8')).hexdigest()[:16] if prompt else ''
+
+
+def kind_from_name(name: str) -> str:
+    mime = mimetypes.guess_type(name)[0] or ''
+    major = mime.split('/', 1)[0]
+    return major if major in {'image', 'audio', 'video'} else 'other'
+
+
+def _split_index(stem: str) -> tuple[str, int]:
+    """'cat_3' -> ('cat', 3), 'cat' -> ('cat', 1)."""
+    m = _INDEXED_RE.match(stem)
+    if m and int(m.group(2)) >= 2:
+        return m.group(1), int(m.group(2))
+    return stem, 1
+
+
+def allocate_name(out_dir: Path, name: str) -> str:
+    """out_dir 안에서 아직 안 쓰인 파일명을 예약해서 반환 (name, name_2, name_3 ...).
+
+    디스크에 원래 이름이 비어 있으면 그대로 준다(purge 후 재생성해도 이름이 안정적).
+    겹칠 때만 stem별 다음 번호를 힌트로 써서 stat 몇 번으로 끝내고,
+    방금 할당한 이름은 NAME_LEASE_SEC 동안 잡아 둬서 여러 프로세스가 같은 이름을 받지 않는다.
+    """
+    out_dir = Path(out_dir)
+    p = Path(name)
+    stem, suffix = p.stem, p.suffix
+    key = _dir_key(out_dir)
+    now = time.time()
+    conn = _connect()
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        conn.execute('DELETE FROM name_lease WHERE dir=? AND at<?', (key, now - NAME_LEASE_SEC))
+        leased = {r[0] for r in conn.execute('SELECT name FROM name_lease WHERE dir=?', (key,))}
+
+        def taken(idx: int) -> bool:
+            cand = f'{stem}{suffix}' if idx <= 1 else f'{stem}_{idx}{suffix}'
+            return cand in leased or (out_dir / cand).exists()
+
+        idx = 1
+        if taken(1):
+            row = conn.execute(
+                'SELECT next_idx FROM name_seq WHERE dir=? AND stem=? AND suffix=?', (key, stem, suffix)
+            ).fetchone()
+            hint = int(row[0]) if row else 2
+            # 힌트 바로 앞 번호가 비어 있으면 그 사이가 지워진 것: 2부터 가장 낮은 빈 번호를 찾는다
+            idx = hint if hint > 2 and taken(hint - 1) else 2
+            while taken(idx):
+                idx += 1
+            conn.execute(
+                'INSERT INTO name_seq(dir, stem, suffix, next_idx) VALUES (?, ?, ?, ?) '
+                'ON CONFLICT(dir, stem, suffix) DO UPDATE SET next_idx=excluded.next_idx',
+                (key, stem, suffix, idx + 1),
+            )
+        cand = f'{stem}{suffix}' if idx <= 1 else f'{stem}_{idx}{suffix}'
+        conn.execute(
+            'INSERT INTO name_lease(dir, name, at) VALUES (?, ?, ?) ON CONFLICT(dir, name) DO UPDATE SET at=excluded.at',
+            (key, cand, now),
+        )
+        conn.execute('COMMIT')
+    except BaseException:
+        conn.execute('ROLLBACK')
+        raise
+    return cand
+
+
+def record(path: Path, kind: str = '', *, prompt: str = '', model: str = '', count: bool = True) -> None:
+    """생성 직후 호출. 색인 실패는 생성 결과에 영향을 주지 않게 삼킨다.
+
+    트랜스코딩처럼 새로 생성한 게 아니면 count=False로 생성량 집계에서 뺀다.
+    """
+    try:
+        p = Path(path).resolve()
+        st = p.stat()
+        _connect().execute(
+            'INSERT OR REPLACE INTO media(path, dir, name, kind, prompt_hash, model, size, mtime, created_at) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+            (str(p), str(p.parent), p.name, kind or kind_from_name(p.name), prompt_hash(prompt), model, st.st_size, st.st_mtime, time.time()),
+        )
+    except (OSError, sqlite3.Error):
+        pass
+    # 대시보드 시간당 생성량
+    if count:
+        metrics.incr('media.generated', kind=kind or kind_from_name(Path(path).name))
+
+
+def forget(paths: list[Path]) -> None:
+    """삭제/이동한 파일을 색인에서 뺀다 (media_lifecycle 등)."""
+    try:
+        _connect().executemany('DELETE FROM media WHERE path=?', [(str(Path(p).resolve()),) for p in paths])
+    except (OSError, sqlite3.Error):
+        pass
+
+
+def sync_dir(root: Path, pattern: str = '*', kind: str = '') -> bool:
+    """색인 밖에서 파일이 생기는 디렉터리(예: Strudel 렌더)를 맞춘다.
+
+    디렉터리 mtime이 그대로면 stat 1번으로 끝내고, 바뀌었을 때만 다시 훑는다.
+    (같은 이름으로 덮어쓰기만 한 경우는 디렉터리 mtime이 안 바뀌므로 잡히지 않는다)
+    반환: 다시 훑었으면 True
+    """
+    root = Path(root)
+    key = _dir_key(root)
+    conn = _connect()
+    try:
+        mtime_ns = root.stat().st_mtime_ns
+    except OSError:
+        conn.execute('DELETE FROM media WHERE dir=?', (key,))
+        conn.execute('DELETE FROM dir_state WHERE dir=?', (key,))
+        return False
+    row = conn.execute('SELECT mtime_ns FROM dir_state WHERE dir=?', (key,)).fetchone()
+    if row and int(row[0]) == mtime_ns:
+        return False
+
+    rows = []
+    for p in root.glob(pattern):
+        try:
+            st = p.stat()
+        except OSError:
+            continue
+        if p.is_file():
+            rows.append((str(p.resolve()), key, p.name, kind or kind_from_name(p.name), st.st_size, st.st_mtime))
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        known = {r[0]: r for r in conn.execute('SELECT path, kind FROM media WHERE dir=?', (key,))}
+        seen = set()
+        # kind를 지정했으면 rebuild가 확장자로 넣어 둔 kind(audio 등)도 덮어쓴다
+        upsert = 'size=excluded.size, mtime=excluded.mtime' + (', kind=excluded.kind' if kind else '')
+        for path, d, name, k, size, mtime in rows:
+            seen.add(path)
+            conn.execute(
+                'INSERT INTO media(path, dir, name, kind, size, mtime, created_at) VALUES (?, ?, ?, ?, ?, ?, ?) '
+                f'ON CONFLICT(path) DO UPDATE SET {upsert}',
+                (path, d, name, k, size, mtime, mtime),
+            )
+        gone = [p for p, r in known.items() if p not in seen and (not kind or r[1] == kind)]
+        conn.executemany('DELETE FROM media WHERE path=?', [(p,) for p in gone])
+        conn.execute(
+            'INSERT INTO dir_state(dir, mtime_ns) VALUES (?, ?) ON CONFLICT(dir) DO UPDATE SET mtime_ns=excluded.mtime_ns',
+            (key, mtime_ns),
+        )
+        conn.execute('COMMIT')
+    except BaseException:
+        conn.execute('ROLLBACK')
+        raise
+    return True
+
+
+def latest(kind: str, dirs: list[Path] | None = None) -> Path | None:
+    """kind별 가장 최근 파일. 디스크에서 사라진 항목은 색인에서 지우고 다음 후보로."""
+    conn = _connect()
+    sql = 'SELECT path FROM media WHERE kind=?'
+    params: list = [kind]
+    if dirs:
+        keys = [_dir_key(d) for d in dirs]
+        sql += f' AND dir IN ({",".join("?" * len(keys))})'
+        params += keys
+    sql += ' ORDER BY mtime DESC LIMIT 8'
+    while True:
+        rows = conn.execute(sql, params).fetchall()
+        if not rows:
+            return None
+        for (path,) in rows:
+            p = Path(path)
+            if p.is_file():
+                return p
+            conn.execute('DELETE FROM media WHERE path=?', (path,))
+
+
+def rebuild(root: Path | None = None) -> dict[str, int]:
+    """디스크 기준으로 색인을 다시 만든다. 점(.)으로 시작하는 폴더(.cache 등)는 건너뛴다."""
+    root = Path(root or MEDIA_ROOT).resolve()
+    files: list[tuple] = []
+    seq: dict[tuple[str, str, str], int] = {}
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = [d for d in dirnames if not d.startswith('.')]
+        for fn in filenames:
+            if fn.startswith('.'):
+                continue
+            p = Path(dirpath) / fn
+            try:
+                st = p.stat()
+            except OSError:
+                continue
+            files.append((str(p), dirpath, fn, kind_from_name(fn), st.st_size, st.st_mtime, st.st_mtime))
+            base, idx = _split_index(p.stem)
+            k = (dirpath, base, p.suffix)
+            seq[k] = max(seq.get(k, 1), idx)
+
+    conn = _connect()
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        # prompt/model은 디스크에서 복원할 수 없으니 기존 값을 살린다
+        old = {r[0]: (r[1], r[2], r[3]) for r in conn.execute('SELECT path, kind, prompt_hash, model FROM media')}
+        conn.execute('DELETE FROM media WHERE path LIKE ?', (f'{root}{os.sep}%',))
+        conn.execute('DELETE FROM name_seq WHERE dir=? OR dir LIKE ?', (str(root), f'{root}{os.sep}%'))
+        conn.execute('DELETE FROM dir_state WHERE dir=? OR dir LIKE ?', (str(root), f'{root}{os.sep}%'))
+        conn.execute('DELETE FROM name_lease WHERE dir=? OR dir LIKE ?', (str(root), f'{root}{os.sep}%'))
+        for path, d, name, kind, size, mtime, created in files:
+            prev = old.get(path)
+            conn.execute(
+                'INSERT OR REPLACE INTO media(path, dir, name, kind, prompt_hash, model, size, mtime, created_at) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (path, d, name, prev[0] if prev else kind, prev[1] if prev else '', prev[2] if prev else '', size, mtime, created),
+            )
+        conn.executemany(
+            'INSERT OR REPLACE INTO name_seq(dir, stem, suffix, next_idx) VALUES (?, ?, ?, ?)',
+            [(d, stem, suf, top + 1) for (d, stem, suf), top in seq.items()],
+        )
+        conn.execute('COMMIT')
+    except BaseException:
+        conn.execute('ROLLBACK')
+        raise
+    return {'files': len(files), 'stems': len(seq)}
+
+
+def stats() -> dict[str, dict[str, int]]:
+    out: dict[str, dict[str, int]] = {}
+    for kind, n, total in _connect().execute('SELECT kind, COUNT(*), COALESCE(SUM(size), 0) FROM media GROUP BY kind'):
+        out[kind] = {'files': int(n), 'bytes': int(total)}
+    return out
+
+
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description='Media catalog (SQLite index of generated files)')
+    sub = ap.add_subparsers(dest='cmd', required=True)
+    rb = sub.add_parser('rebuild', help='rebuild the index from disk')
+    rb.add_argument('--root', default=str(MEDIA_ROOT))
+    lt = sub.add_parser('latest', help='print the newest file of a kind')
+    lt.add_argument('kind')
+    lt.add_argument('--dir', action='append', default=[])
+    sub.add_parser('stats', help='files/bytes per kind')
+    args = ap.parse_args(argv)
+
+    if args.cmd == 'rebuild':
+        print(json.dumps(rebuild(Path(args.root)), ensure_ascii=False))
+        return 0
+    if args.cmd == 'latest':
+        p = latest(args.kind, [Path(d) for d in args.dir] or None)
+        if p is None:
+            return 1
+        print(p)
+        return 0
+    print(json.dumps(stats(), ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
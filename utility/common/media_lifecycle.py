@@ -0,0 +1,365 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+import fcntl
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+try:
+    from utility.common import media_catalog
+    from utility.common.generation_defaults import MEDIA_AUDIO_DIR, MEDIA_IMAGE_DIR, MEDIA_VIDEO_DIR, WORKSPACE_ROOT
+    from utility.common.image_bytes import can_transcode, to_webp_bytes
+    from utility.common.memory_auto_log import append_daily
+except ModuleNotFoundError:
+    import sys
+    from pathlib import Path as _Path
+    for _p in _Path(__file__).resolve().parents:
+        if (_p / 'utility').exists():
+            sys.path.append(str(_p))
+            break
+    from utility.common import media_catalog
+    from utility.common.generation_defaults import MEDIA_AUDIO_DIR, MEDIA_IMAGE_DIR, MEDIA_VIDEO_DIR, WORKSPACE_ROOT
+    from utility.common.image_bytes import can_transcode, to_webp_bytes
+    from utility.common.memory_auto_log import append_daily
+
+# 미디어 폴더 수명 관리: 중복 hardlink -> (선택) 오래된 대용량 변환 -> kind별 용량/기간 상한 LRU 삭제
+POLICY_PATH = WORKSPACE_ROOT / 'studio' / 'media_lifecycle.json'
+RUNTIME_DIR = WORKSPACE_ROOT / 'memory' / 'runtime'
+RUNS_PATH = RUNTIME_DIR / 'media_lifecycle_runs.jsonl'
+LOCK_PATH = RUNTIME_DIR / 'media_lifecycle.lock'
+MAX_RUNS_LINES = 50
+HASH_CHUNK = 1024 * 1024
+
+DEFAULT_POLICY: dict[str, Any] = {
+    # max_mb/max_age_days가 0이면 해당 상한 없음
+    'kinds': {
+        'image': {'dir': str(MEDIA_IMAGE_DIR), 'max_mb': 4096, 'max_age_days': 0},
+        'audio': {'dir': str(MEDIA_AUDIO_DIR), 'max_mb': 2048, 'max_age_days': 0},
+        'video': {'dir': str(MEDIA_VIDEO_DIR), 'max_mb': 8192, 'max_age_days': 0},
+    },
+    # 방금 생성돼 배포 대기 중일 수 있는 파일은 건드리지 않는다
+    'min_keep_hours': 24,
+    'dedupe': True,
+    # 확장자가 바뀌므로 기본은 끔 (기존 경로를 참조하는 곳이 깨질 수 있음)
+    'transcode': {'enabled': False, 'older_than_days': 30, 'min_kb': 512, 'webp_quality': 85, 'opus_kbps': 96},
+}
+
+WEBP_SOURCES = {'.png', '.jpg', '.jpeg', '.bmp'}
+OPUS_SOURCES = {'.wav'}
+
+
+def now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def load_policy(path: Path | None = None) -> dict[str, Any]:
+    policy = json.loads(json.dumps(DEFAULT_POLICY))
+    try:
+        user = json.loads(Path(path or POLICY_PATH).read_text(encoding='utf-8'))
+    except Exception:
+        return policy
+    if not isinstance(user, dict):
+        return policy
+    for kind, cfg in (user.get('kinds') or {}).items():
+        if isinstance(cfg, dict):
+            policy['kinds'].setdefault(kind, {}).update(cfg)
+    if isinstance(user.get('transcode'), dict):
+        policy['transcode'].update(user['transcode'])
+    for key in ('min_keep_hours', 'dedupe'):
+        if key in user:
+            policy[key] = user[key]
+    return policy
+
+
+def _scan(root: Path) -> list[tuple[Path, os.stat_result]]:
+    """점(.)으로 시작하는 파일/폴더(.cache, 작성 중 .part)는 제외."""
+    out: list[tuple[Path, os.stat_result]] = []
+    if not root.is_dir():
+        return out
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = [d for d in dirnames if not d.startswith('.')]
+        for fn in filenames:
+            if fn.startswith('.'):
+                continue
+            p = Path(dirpath) / fn
+            try:
+                st = p.stat()
+            except OSError:
+                continue
+            out.append((p, st))
+    return out
+
+
+def _sha256(path: Path, st: os.stat_result) -> str:
+    h = hashlib.sha256()
+    with path.open('rb') as fp:
+        for chunk in iter(lambda: fp.read(HASH_CHUNK), b''):
+            h.update(chunk)
+    # 해시하느라 읽은 것이 LRU 사용 시각(atime)으로 잡히지 않게 되돌린다
+    try:
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns))
+    except OSError:
+        pass
+    return h.hexdigest()
+
+
+def dedupe(roots: list[Path], *, dry_run: bool = False) -> dict[str, int]:
+    """내용이 같은 파일을 가장 오래된 사본의 hardlink로 바꾼다.
+
+    같은 장치+같은 크기끼리만 해시하고, 이미 같은 inode인 경로는 다시 읽지 않는다.
+    """
+    by_size: dict[tuple[int, int], dict[int, list[tuple[Path, os.stat_result]]]] = {}
+    for root in roots:
+        for p, st in _scan(root):
+            if st.st_size == 0:
+                continue
+            by_size.setdefault((st.st_dev, st.st_size), {}).setdefault(st.st_ino, []).append((p, st))
+
+    report = {'groups': 0, 'linked': 0, 'bytes': 0}
+    for (_dev, size), inodes in by_size.items():
+        if len(inodes) < 2:
+            continue
+        by_hash: dict[str, list[list[tuple[Path, os.stat_result]]]] = {}
+        for paths in inodes.values():
+            try:
+                by_hash.setdefault(_sha256(paths[0][0], paths[0][1]), []).append(paths)
+            except OSError:
+                continue
+        for groups in by_hash.values():
+            if len(groups) < 2:
+                continue
+            groups.sort(key=lambda g: g[0][1].st_mtime)
+            keep = groups[0][0][0]
+            report['groups'] += 1
+            for paths in groups[1:]:
+                replaced = 0
+                for p, _st in paths:
+                    if not dry_run:
+                        tmp = p.with_name(f'.{p.name}.lnk')
+                        try:
+                            tmp.unlink(missing_ok=True)
+                            os.link(keep, tmp)
+                            os.replace(tmp, p)
+                        except OSError:
+                            tmp.unlink(missing_ok=True)
+                            continue
+                    replaced += 1
+                report['linked'] += replaced
+                if replaced == len(paths):
+                    report['bytes'] += size
+    return report
+
+
+def _transcode_image(src: Path, cfg: dict[str, Any]) -> Path | None:
+    dest = src.with_suffix('.webp')
+    if dest.exists():
+        return None
+    data = to_webp_bytes(src.read_bytes(), int(cfg.get('webp_quality', 85)))
+    if len(data) >= src.stat().st_size:
+        return None
+    tmp = dest.with_name(f'.{dest.name}.tmp')
+    tmp.write_bytes(data)
+    tmp.replace(dest)
+    return dest
+
+
+def _transcode_audio(src: Path, cfg: dict[str, Any]) -> Path | None:
+    dest = src.with_suffix('.opus')
+    if dest.exists():
+        return None
+    tmp = dest.with_name(f'.{dest.stem}.tmp.opus')
+    cmd = ['ffmpeg', '-y', '-loglevel', 'error', '-i', str(src), '-c:a', 'libopus', '-b:a', f"{int(cfg.get('opus_kbps', 96))}k", str(tmp)]
+    if subprocess.run(cmd, capture_output=True).returncode != 0 or not tmp.exists():
+        tmp.unlink(missing_ok=True)
+        return None
+    if tmp.stat().st_size >= src.stat().st_size:
+        tmp.unlink(missing_ok=True)
+        return None
+    tmp.replace(dest)
+    return dest
+
+
+def transcode_old(policy: dict[str, Any], *, dry_run: bool = False) -> dict[str, int]:
+    """오래되고 큰 이미지 -> WebP, WAV -> Opus. 결과가 더 작을 때만 원본을 지운다."""
+    cfg = policy['transcode']
+    report = {'files': 0, 'bytes': 0, 'skipped': 0}
+    cutoff = time.time() - float(cfg.get('older_than_days', 30)) * 86400
+    min_bytes = int(float(cfg.get('min_kb', 512)) * 1024)
+    has_ffmpeg = shutil.which('ffmpeg') is not None
+    for kind, kcfg in policy['kinds'].items():
+        for p, st in _scan(Path(kcfg['dir'])):
+            suffix = p.suffix.lower()
+            if st.st_mtime > cutoff or st.st_size < min_bytes or st.st_nlink > 1:
+                continue
+            if suffix in WEBP_SOURCES:
+                if not can_transcode():
+                    report['skipped'] += 1
+                    continue
+                convert = _transcode_image
+            elif suffix in OPUS_SOURCES:
+                if not has_ffmpeg:
+                    report['skipped'] += 1
+                    continue
+                convert = _transcode_audio
+            else:
+                continue
+            if dry_run:
+                report['files'] += 1
+                continue
+            try:
+                dest = convert(p, cfg)
+            except (OSError, RuntimeError):
+                dest = None
+            if dest is None:
+                report['skipped'] += 1
+                continue
+            # LRU 순서가 바뀌지 않게 원본 시각을 유지
+            os.utime(dest, (st.st_atime, st.st_mtime))
+            report['bytes'] += st.st_size - dest.stat().st_size
+            report['files'] += 1
+            p.unlink(missing_ok=True)
+            media_catalog.forget([p])
+            media_catalog.record(dest, kind, count=False)  # 변환은 생성량에 안 센다
+    return report
+
+
+def enforce_quota(kind: str, kcfg: dict[str, Any], min_keep_hours: float, *, dry_run: bool = False) -> dict[str, int]:
+    """max_age_days보다 오래 안 쓴 파일 삭제 후, max_mb를 넘으면 최근 사용이 오래된 순으로 삭제.
+
+    사용 시각은 max(atime, mtime). hardlink는 마지막 링크를 지울 때만 용량이 줄어든 것으로 센다.
+    """
+    entries = _scan(Path(kcfg['dir']))
+    now = time.time()
+    protect_after = now - float(min_keep_hours) * 3600
+    max_age = float(kcfg.get('max_age_days', 0) or 0) * 86400
+    max_bytes = int(float(kcfg.get('max_mb', 0) or 0) * 1024 * 1024)
+
+    links: dict[tuple[int, int], int] = {}
+    sizes: dict[tuple[int, int], int] = {}
+    for _p, st in entries:
+        key = (st.st_dev, st.st_ino)
+        links[key] = links.get(key, 0) + 1
+        sizes[key] = st.st_size
+    total = sum(sizes.values())
+    report = {'files': 0, 'bytes': 0, 'before_bytes': total}
+    removed: list[Path] = []
+
+    def _drop(p: Path, st: os.stat_result) -> None:
+        nonlocal total
+        if not dry_run:
+            try:
+                p.unlink()
+            except OSError:
+                return
+        removed.append(p)
+        report['files'] += 1
+        key = (st.st_dev, st.st_ino)
+        links[key] -= 1
+        if links[key] == 0:
+            total -= st.st_size
+            report['bytes'] += st.st_size
+
+    ordered = sorted(entries, key=lambda e: max(e[1].st_atime, e[1].st_mtime))
+    rest = []
+    for p, st in ordered:
+        last_use = max(st.st_atime, st.st_mtime)
+        if max_age and last_use < now - max_age and last_use < protect_after:
+            _drop(p, st)
+        else:
+            rest.append((p, st))
+    if max_bytes:
+        for p, st in rest:
+            if total <= max_bytes:
+                break
+            if max(st.st_atime, st.st_mtime) >= protect_after:
+                continue
+            _drop(p, st)
+    if removed and not dry_run:
+        media_catalog.forget(removed)
+    report['after_bytes'] = total
+    return report
+
+
+def _append_jsonl(path: Path, obj: dict[str, Any], *, max_lines: int) -> None:
+    lines: list[str] = []
+    if path.exists():
+        try:
+            lines = [ln for ln in path.read_text(encoding='utf-8').splitlines() if ln.strip()]
+        except Exception:
+            lines = []
+    lines.append(json.dumps(obj, ensure_ascii=False))
+    path.write_text('\n'.join(lines[-max_lines:]) + '\n', encoding='utf-8')
+
+
+def run(policy: dict[str, Any] | None = None, *, dry_run: bool = False) -> dict[str, Any]:
+    policy = policy or load_policy()
+    RUNTIME_DIR.mkdir(parents=True, exist_ok=True)
+    with LOCK_PATH.open('a+') as lock_fp:
+        try:
+            fcntl.flock(lock_fp, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            return {'ok': False, 'error': '이미 실행 중'}
+
+        started = time.time()
+        roots = [Path(k['dir']) for k in policy['kinds'].values()]
+        report: dict[str, Any] = {'ok': True, 'started_at': now_iso(), 'dry_run': dry_run}
+        report['dedupe'] = dedupe(roots, dry_run=dry_run) if policy.get('dedupe', True) else {'groups': 0, 'linked': 0, 'bytes': 0}
+        report['transcode'] = transcode_old(policy, dry_run=dry_run) if policy['transcode'].get('enabled') else {'files': 0, 'bytes': 0, 'skipped': 0}
+        report['quota'] = {
+            kind: enforce_quota(kind, kcfg, float(policy.get('min_keep_hours', 24)), dry_run=dry_run)
+            for kind, kcfg in policy['kinds'].items()
+        }
+        report['reclaimed_bytes'] = (
+            report['dedupe']['bytes']
+            + report['transcode']['bytes']
+            + sum(q['bytes'] for q in report['quota'].values())
+        )
+        report['elapsed_sec'] = round(time.time() - started, 2)
+        if not dry_run:
+            _append_jsonl(RUNS_PATH, report, max_lines=MAX_RUNS_LINES)
+            if report['reclaimed_bytes']:
+                append_daily(f"- [미디어 정리] {summary_line(report)}")
+        return report
+
+
+def summary_line(report: dict[str, Any]) -> str:
+    mb = report.get('reclaimed_bytes', 0) / (1024 * 1024)
+    evicted = sum(q['files'] for q in report.get('quota', {}).values())
+    return (
+        f"회수 {mb:.1f}MB (중복 링크 {report['dedupe']['linked']}, 변환 {report['transcode']['files']}, 삭제 {evicted})"
+        + (' [dry-run]' if report.get('dry_run') else '')
+    )
+
+
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description='Media lifecycle: dedupe, optional transcode, per-kind quota eviction')
+    ap.add_argument('--policy', default=str(POLICY_PATH), help='policy JSON (missing keys use defaults)')
+    ap.add_argument('--dry-run', action='store_true', help='report only, change nothing')
+    ap.add_argument('--transcode', action='store_true', help='enable WebP/Opus transcode for this run')
+    ap.add_argument('--no-dedupe', action='store_true')
+    ap.add_argument('--json', action='store_true', help='print the full report as JSON')
+    args = ap.parse_args(argv)
+
+    policy = load_policy(Path(args.policy))
+    if args.transcode:
+        policy['transcode']['enabled'] = True
+    if args.no_dedupe:
+        policy['dedupe'] = False
+    report = run(policy, dry_run=args.dry_run)
+    if not report.get('ok'):
+        print(report.get('error', 'failed'))
+        return 1
+    print(json.dumps(report, ensure_ascii=False, indent=2) if args.json else summary_line(report))
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
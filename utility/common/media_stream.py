@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import base64
+import io
+import json
+import re
+import shutil
+from pathlib import Path
+from typing import BinaryIO
+
+# generateContent 응답의 inlineData.data 값 시작 ("data": ")
+_DATA_KEY = re.compile(rb'"data"\s*:\s*"')
+CHUNK_SIZE = 64 * 1024
+# load_inline_json이 메모리로 디코딩한 첫 inline 바이트를 붙여두는 키
+INLINE_BYTES_KEY = '_inline_bytes'
+INLINE_SIZE_KEY = '_inline_size'
+
+
+def read_inline_json(fp: BinaryIO, sink: BinaryIO, *, chunk_size: int = CHUNK_SIZE) -> dict:
+    """JSON 응답을 읽으면서 첫 번째 "data" 문자열(base64)만 조각 단위로 디코딩해 sink에 쓴다.
+
+    반환 payload에서는 해당 data 값이 ""로 비워지고, 디코딩한 바이트 수는 INLINE_SIZE_KEY에 담긴다.
+    JSON 전체/base64 문자열/디코딩 결과를 동시에 메모리에 들지 않아서 큰 영상/오디오도 peak가 일정하다.
+    """
+    skel = bytearray()
+    scan_from = 0
+    in_data = False
+    streamed = False
+    pending = b''
+    total = 0
+
+    while True:
+        chunk = fp.read(chunk_size)
+        if not chunk:
+            break
+        while chunk:
+            if in_data:
+                q = chunk.find(b'"')
+                body = chunk if q < 0 else chunk[:q]
+                # base64 알파벳에는 역슬래시가 없다 (\/ 이스케이프 대비)
+                buf = pending + body.replace(b'\\', b'')
+                n = len(buf) // 4 * 4
+                if n:
+                    decoded = base64.b64decode(buf[:n])
+                    sink.write(decoded)
+                    total += len(decoded)
+                pending = buf[n:]
+                if q < 0:
+                    chunk = b''
+                    continue
+                if pending:
+                    decoded = base64.b64decode(pending + b'=' * (-len(pending) % 4))
+                    sink.write(decoded)
+                    total += len(decoded)
+                    pending = b''
+                in_data = False
+                streamed = True
+                skel += b'"'
+                scan_from = len(skel)
+                chunk = chunk[q + 1:]
+            elif streamed:
+                skel += chunk
+                chunk = b''
+            else:
+                skel += chunk
+                chunk = b''
+                # 청크 경계에 걸친 키도 찾도록 조금 겹쳐서 검색
+                m = _DATA_KEY.search(skel, max(0, scan_from - 32))
+                if m:
+                    chunk = bytes(skel[m.end():])
+                    del skel[m.end():]
+                    in_data = True
+                scan_from = len(skel)
+
+    if in_data:
+        raise ValueError('응답이 inline data 중간에서 끊김')
+    payload = json.loads(skel.decode('utf-8', errors='replace'))
+    if isinstance(payload, dict):
+        payload[INLINE_SIZE_KEY] = total
+    return payload
+
+
+def load_inline_json(fp: BinaryIO, *, chunk_size: int = CHUNK_SIZE) -> dict:
+    """read_inline_json의 메모리 버전. 디코딩한 바이트는 payload[INLINE_BYTES_KEY]에 둔다."""
+    buf = io.BytesIO()
+    payload = read_inline_json(fp, buf, chunk_size=chunk_size)
+    if isinstance(payload, dict) and payload.get(INLINE_SIZE_KEY):
+        payload[INLINE_BYTES_KEY] = buf.getvalue()
+    return payload
+
+
+def find_inline(payload: dict) -> dict | None:
+    """candidates[*].content.parts[*] (또는 response.candidates) 중 첫 inline part."""
+    cands = payload.get('candidates') or (payload.get('response') or {}).get('candidates') or []
+    for c in cands:
+        for p in (c.get('content') or {}).get('parts', []):
+            inline = p.get('inlineData') or p.get('inline_data')
+            if inline is not None:
+                return inline
+    return None
+
+
+def inline_mime(inline: dict, default: str) -> str:
+    return str(inline.get('mimeType') or inline.get('mime_type') or default).lower()
+
+
+def copy_stream(src: BinaryIO, dest: Path, *, chunk_size: int = CHUNK_SIZE) -> int:
+    """src를 dest로 조각 복사 (tmp에 쓰고 교체). 쓴 바이트 수 반환."""
+    tmp = dest.with_name(dest.name + '.part')
+    try:
+        with tmp.open('wb') as out:
+            shutil.copyfileobj(src, out, chunk_size)
+        tmp.replace(dest)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+    return dest.stat().st_size
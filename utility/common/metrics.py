@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+import atexit
+import fcntl
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Iterable, Iterator
+
+try:
+    from utility.common.generation_defaults import WORKSPACE_ROOT
+except ModuleNotFoundError:
+    import sys
+    from pathlib import Path as _Path
+    for _p in _Path(__file__).resolve().parents:
+        if (_p / 'utility').exists():
+            sys.path.append(str(_p))
+            break
+    from utility.common.generation_defaults import WORKSPACE_ROOT
+
+# 외부 호출/상태 파일 I/O 타이밍. 이벤트는 프로세스 안에 모았다가 FLUSH_SEC마다 한 번에 append 한다.
+# 한 줄: {"ts", "name", "ms"(타이머) 또는 "n"(카운터), "ok", "tags", "err"}
+METRICS_PATH = WORKSPACE_ROOT / 'memory' / 'runtime' / 'metrics.jsonl'
+LOCK_PATH = METRICS_PATH.with_suffix('.lock')
+MAX_BYTES = int(os.getenv('METRICS_MAX_MB', '8') or '8') * 1024 * 1024
+KEEP_FILES = 3  # metrics.jsonl.1 ~ .3
+FLUSH_SEC = 2.0
+FLUSH_EVENTS = 200
+ENABLED = (os.getenv('METRICS_DISABLED', '').strip() != '1')
+# 히스토그램 상한 (ms). 마지막 칸은 그보다 큰 값
+LATENCY_BUCKETS_MS = (10, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000, 180000)
+
+_LOCK = threading.Lock()
+_BUF: list[str] = []
+_FLUSHER: threading.Thread | None = None
+
+
+def _rotate_if_needed() -> None:
+    try:
+        if METRICS_PATH.stat().st_size < MAX_BYTES:
+            return
+    except OSError:
+        return
+    LOCK_PATH.parent.mkdir(parents=True, exist_ok=True)
+    with LOCK_PATH.open('a+') as lock_fp:
+        fcntl.flock(lock_fp, fcntl.LOCK_EX)
+        try:
+            # 다른 프로세스가 먼저 돌렸을 수 있음
+            if not METRICS_PATH.exists() or METRICS_PATH.stat().st_size < MAX_BYTES:
+                return
+            for i in range(KEEP_FILES - 1, 0, -1):
+                src = METRICS_PATH.with_name(f'{METRICS_PATH.name}.{i}')
+                if src.exists():
+                    src.replace(METRICS_PATH.with_name(f'{METRICS_PATH.name}.{i + 1}'))
+            METRICS_PATH.replace(METRICS_PATH.with_name(f'{METRICS_PATH.name}.1'))
+        finally:
+            fcntl.flock(lock_fp, fcntl.LOCK_UN)
+
+
+def flush() -> None:
+    with _LOCK:
+        if not _BUF:
+            return
+        data = ''.join(_BUF).encode('utf-8')
+        _BUF.clear()
+    try:
+        METRICS_PATH.parent.mkdir(parents=True, exist_ok=True)
+        _rotate_if_needed()
+        # O_APPEND 한 번의 write라 여러 프로세스가 같이 써도 줄이 섞이지 않는다
+        fd = os.open(METRICS_PATH, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, data)
+        finally:
+            os.close(fd)
+    except OSError:
+        pass
+
+
+def _flush_loop() -> None:
+    while True:
+        time.sleep(FLUSH_SEC)
+        flush()
+
+
+def _emit(event: dict[str, Any]) -> None:
+    global _FLUSHER
+    if not ENABLED:
+        return
+    line = json.dumps(event, ensure_ascii=False, separators=(',', ':')) + '\n'
+    with _LOCK:
+        _BUF.append(line)
+        full = len(_BUF) >= FLUSH_EVENTS
+        if _FLUSHER is None:
+            _FLUSHER = threading.Thread(target=_flush_loop, name='metrics-flush', daemon=True)
+            _FLUSHER.start()
+    if full:
+        flush()
+
+
+def observe(name: str, ms: float, *, ok: bool = True, err: str = '', **tags: Any) -> None:
+    event: dict[str, Any] = {'ts': round(time.time(), 3), 'name': name, 'ms': round(float(ms), 2), 'ok': bool(ok)}
+    if tags:
+        event['tags'] = {k: str(v) for k, v in tags.items() if v is not None and v != ''}
+    if err:
+        event['err'] = err[:120]
+    _emit(event)
+
+
+def incr(name: str, n: float = 1, **tags: Any) -> None:
+    event: dict[str, Any] = {'ts': round(time.time(), 3), 'name': name, 'n': n}
+    if tags:
+        event['tags'] = {k: str(v) for k, v in tags.items() if v is not None and v != ''}
+    _emit(event)
+
+
+def observe_queue_wait(queue: str, job: dict[str, Any]) -> None:
+    """큐 잡의 created_at(ISO)부터 지금까지를 queue.wait로 기록. 시각이 없거나 깨졌으면 건너뛴다."""
+    try:
+        created = datetime.fromisoformat(str(job.get('created_at', '')))
+    except ValueError:
+        return
+    if created.tzinfo is None:
+        created = created.replace(tzinfo=timezone.utc)
+    observe('queue.wait', max(0.0, (datetime.now(timezone.utc) - created).total_seconds() * 1000.0), queue=queue)
+
+
+@contextmanager
+def timer(name: str, **tags: Any) -> Iterator[dict[str, Any]]:
+    """with timer('gemini.call', model=m) as t: ...  예외면 ok=False로 기록하고 다시 던진다.
+    반환값으로 실패를 알리는 호출은 t['ok'] = False, 태그 추가는 t['tags'][k] = v."""
+    t: dict[str, Any] = {'ok': True, 'err': '', 'tags': dict(tags)}
+    started = time.perf_counter()
+    try:
+        yield t
+    except BaseException as e:
+        t['ok'] = False
+        t['err'] = t['err'] or type(e).__name__
+        raise
+    finally:
+        observe(name, (time.perf_counter() - started) * 1000.0, ok=t['ok'], err=t['err'], **t['tags'])
+
+
+atexit.register(flush)
+
+
+# ---- read side (dashboard / CLI) ----
+def read_events(since: float = 0.0, names: Iterable[str] | None = None) -> list[dict[str, Any]]:
+    """회전 파일까지 포함해 since(epoch) 이후 이벤트를 시간순으로."""
+    wanted = set(names or [])
+    files = [METRICS_PATH.with_name(f'{METRICS_PATH.name}.{i}') for i in range(KEEP_FILES, 0, -1)] + [METRICS_PATH]
+    out: list[dict[str, Any]] = []
+    for path in files:
+        try:
+            if since and path.stat().st_mtime < since:
+                continue
+            fp = path.open('r', encoding='utf-8', errors='replace')
+        except OSError:
+            continue
+        with fp:
+            for line in fp:
+                try:
+                    ev = json.loads(line)
+                except ValueError:
+                    continue
+                if not isinstance(ev, dict) or float(ev.get('ts', 0)) < since:
+                    continue
+                if wanted and ev.get('name') not in wanted:
+                    continue
+                out.append(ev)
+    return out
+
+
+def percentile(sorted_values: list[float], p: float) -> float:
+    if not sorted_values:
+        return 0.0
+    k = min(len(sorted_values) - 1, max(0, int(round(p / 100.0 * (len(sorted_values) - 1)))))
+    return sorted_values[k]
+
+
+def series_key(ev: dict[str, Any], tag_keys: Iterable[str] = ()) -> str:
+    tags = ev.get('tags') or {}
+    parts = [str(ev.get('name', ''))] + [f'{k}={tags[k]}' for k in tag_keys if tags.get(k)]
+    return ' '.join(parts)
+
+
+def summarize(events: Iterable[dict[str, Any]], tag_keys: Iterable[str] = ('model', 'op', 'method')) -> dict[str, dict[str, Any]]:
+    """이름(+주요 태그)별 count/errors/p50/p95/p99/max + 히스토그램, 카운터는 합계."""
+    tag_keys = tuple(tag_keys)
+    timings: dict[str, list[float]] = {}
+    errors: dict[str, int] = {}
+    counters: dict[str, float] = {}
+    for ev in events:
+        key = series_key(ev, tag_keys)
+        if 'ms' in ev:
+            timings.setdefault(key, []).append(float(ev['ms']))
+            if not ev.get('ok', True):
+                errors[key] = errors.get(key, 0) + 1
+        elif 'n' in ev:
+            counters[key] = counters.get(key, 0) + float(ev['n'])
+    out: dict[str, dict[str, Any]] = {}
+    for key, vals in sorted(timings.items()):
+        vals.sort()
+        hist = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        for v in vals:
+            hist[next((i for i, b in enumerate(LATENCY_BUCKETS_MS) if v <= b), len(LATENCY_BUCKETS_MS))] += 1
+        out[key] = {
+            'count': len(vals),
+            'errors': errors.get(key, 0),
+            'p50': round(percentile(vals, 50), 1),
+            'p95': round(percentile(vals, 95), 1),
+            'p99': round(percentile(vals, 99), 1),
+            'max': round(vals[-1], 1),
+            'histogram': dict(zip([f'<={b}' for b in LATENCY_BUCKETS_MS] + ['>'], hist)),
+        }
+    for key, total in sorted(counters.items()):
+        out[key] = {'total': total}
+    return out
+
+
+def snapshot(window_sec: float = 3600.0) -> dict[str, Any]:
+    flush()
+    now = time.time()
+    return {'window_sec': window_sec, 'generated_at': round(now, 3), 'series': summarize(read_events(since=now - window_sec))}
+
+
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description='Summarize recorded call timings')
+    ap.add_argument('--window', type=float, default=3600.0, help='seconds')
+    args = ap.parse_args(argv)
+    print(json.dumps(snapshot(args.window), ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
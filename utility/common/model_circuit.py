@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import time
+from contextlib import contextmanager
+from typing import Any, Iterator
+
+try:
+    from utility.common.generation_defaults import WORKSPACE_ROOT
+    from utility.common.json_state import locked_json_state, read_json_state
+except ModuleNotFoundError:
+    import sys
+    from pathlib import Path as _Path
+    for _p in _Path(__file__).resolve().parents:
+        if (_p / 'utility').exists():
+            sys.path.append(str(_p))
+            break
+    from utility.common.generation_defaults import WORKSPACE_ROOT
+    from utility.common.json_state import locked_json_state, read_json_state
+
+# 모델별 circuit breaker. 상태를 파일에 두어서 CLI 한 번 실행마다 죽은 모델에 timeout을 다시 내지 않게 한다.
+# closed -> (연속 실패 FAILURE_THRESHOLD회) open -> (cooldown 후) half-open: 한 프로세스만 probe -> 성공하면 closed
+STATE_PATH = WORKSPACE_ROOT / 'memory' / 'runtime' / 'model_circuit.json'
+LOCK_PATH = STATE_PATH.with_suffix('.lock')
+FAILURE_THRESHOLD = int(os.getenv('MODEL_CIRCUIT_FAILURES', '3') or '3')
+COOLDOWN_SEC = float(os.getenv('MODEL_CIRCUIT_COOLDOWN_SEC', '120') or '120')
+MAX_COOLDOWN_SEC = 1800.0
+# probe 한 건이 끝날 때까지 다른 프로세스는 open으로 본다 (생성 timeout보다 길게)
+PROBE_LEASE_SEC = 300.0
+
+
+def _key(model: str) -> str:
+    return (model or '').strip().removeprefix('models/')
+
+
+def _read_state() -> dict[str, Any]:
+    return read_json_state(STATE_PATH)
+
+
+@contextmanager
+def _locked() -> Iterator[dict[str, Any]]:
+    """잠금 안에서 상태를 고친다. 내용이 바뀌었을 때만 파일을 다시 쓴다."""
+    with locked_json_state(STATE_PATH, LOCK_PATH) as state:
+        yield state
+
+
+def _state_of(c: dict[str, Any], now: float) -> str:
+    if not c.get('opened_at'):
+        return 'closed'
+    if now < float(c.get('open_until', 0.0)) or now < float(c.get('probe_until', 0.0)):
+        return 'open'
+    return 'half-open'
+
+
+def allow(model: str) -> bool:
+    """지금 이 모델을 불러도 되는지. half-open이면 probe 권한을 잡고 True (다른 프로세스는 lease 동안 False)."""
+    now = time.time()
+    # closed/open은 잠금 없이 읽고 끝낸다. probe 권한을 잡는 half-open만 잠금 안에서 다시 확인
+    c = _read_state().get(_key(model))
+    st = _state_of(c, now) if c else 'closed'
+    if st != 'half-open':
+        return st == 'closed'
+    with _locked() as state:
+        c = state.get(_key(model))
+        if not c:
+            return True
+        st = _state_of(c, now)
+        if st == 'half-open':
+            c['probe_until'] = now + PROBE_LEASE_SEC
+            c['probes'] = int(c.get('probes', 0)) + 1
+            return True
+        return st == 'closed'
+
+
+def record_success(model: str) -> None:
+    c = _read_state().get(_key(model))
+    if not c or not (c.get('failures') or c.get('opened_at')):
+        return
+    with _locked() as state:
+        c = state.get(_key(model))
+        if c and (c.get('failures') or c.get('opened_at')):
+            state[_key(model)] = {'failures': 0, 'closed_at': time.time(), 'last_error': c.get('last_error', '')}
+
+
+def record_failure(model: str, error: str = '') -> bool:
+    """연속 실패 누적. 반환: 이번 실패로 circuit이 열렸으면(또는 probe 실패로 다시 열렸으면) True."""
+    now = time.time()
+    with _locked() as state:
+        c = state.setdefault(_key(model), {'failures': 0})
+        c['failures'] = int(c.get('failures', 0)) + 1
+        c['last_error'] = (error or '')[-300:]
+        c['last_failure_at'] = now
+        was_probe = bool(c.get('opened_at')) and float(c.get('probe_until', 0.0)) > now
+        if not was_probe and (c.get('opened_at') or c['failures'] < FAILURE_THRESHOLD):
+            return False
+        # probe 실패면 cooldown 2배
+        cooldown = min(MAX_COOLDOWN_SEC, float(c.get('cooldown', COOLDOWN_SEC)) * 2) if was_probe else COOLDOWN_SEC
+        c.update({'opened_at': now, 'open_until': now + cooldown, 'cooldown': cooldown, 'probe_until': 0.0})
+        return True
+
+
+def reset(model: str = '') -> None:
+    with _locked() as state:
+        if model:
+            state.pop(_key(model), None)
+        else:
+            state.clear()
+
+
+def status() -> dict[str, dict[str, Any]]:
+    state = _read_state()
+    now = time.time()
+    out: dict[str, dict[str, Any]] = {}
+    for model, c in sorted(state.items()):
+        st = _state_of(c, now)
+        out[model] = {
+            'state': st,
+            'failures': int(c.get('failures', 0)),
+            'retry_in_sec': max(0.0, round(float(c.get('open_until', 0.0)) - now, 1)) if st == 'open' else 0.0,
+            'last_error': c.get('last_error', ''),
+        }
+    return out
+
+
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description='Model circuit breaker state')
+    ap.add_argument('--reset', nargs='?', const='*', default='', help='close circuit for MODEL (or all)')
+    args = ap.parse_args(argv)
+    if args.reset:
+        reset('' if args.reset == '*' else args.reset)
+    print(json.dumps(status(), ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import base64
+import hashlib
+import io
+import json
+import os
+import threading
+import time
+import urllib.error
+import urllib.request
+from datetime import datetime
+from pathlib import Path
+
+try:
+    from utility.common.generation_defaults import MEDIA_ROOT
+    from utility.common.image_bytes import sniff_file_mime
+except ModuleNotFoundError:
+    import sys
+    from pathlib import Path as _Path
+    for _p in _Path(__file__).resolve().parents:
+        if (_p / 'utility').exists():
+            sys.path.append(str(_p))
+            break
+    from utility.common.generation_defaults import MEDIA_ROOT
+    from utility.common.image_bytes import sniff_file_mime
+
+try:
+    from PIL import Image  # optional: 참조 이미지 축소/재압축용
+except Exception:  # pragma: no cover - Pillow 없으면 원본 그대로 사용
+    Image = None  # type: ignore[assignment]
+
+CACHE_DIR = (MEDIA_ROOT / '.cache' / 'ref').resolve()
+FILES_INDEX_PATH = CACHE_DIR / 'files_api_index.json'
+UPLOAD_URL = 'https://generativelanguage.googleapis.com/upload/v1beta/files'
+# 만료 직전 URI는 새로 올린다 (Files API 보관 기간 48h)
+FILES_EXPIRY_MARGIN_SEC = 3600
+
+# env 기본값: 모드(inline|files), 긴 변 최대 픽셀(0=원본 유지)
+DEFAULT_REF_MODE = (os.getenv('IMAGE_REF_MODE') or 'inline').strip().lower()
+DEFAULT_REF_MAX_SIDE = int(os.getenv('IMAGE_REF_MAX_SIDE', '0') or '0')
+
+# inline part는 base64라 장당 수 MB. 최근에 쓴 것만 남긴다 (dict 순서 = LRU)
+MAX_PARTS = 16
+
+# _LOCK은 dict 조회/삽입만, 인코딩/축소/업로드는 키별 잠금(_key_lock) 안에서 한다
+_LOCK = threading.Lock()
+_INDEX_LOCK = threading.Lock()
+_PARTS: dict[str, dict] = {}
+_DIGESTS: dict[str, tuple[int, int, str]] = {}
+_INFLIGHT: dict[str, threading.Lock] = {}
+
+
+def _guess_mime(path: Path) -> str:
+    # 확장자보다 실제 바이트를 우선 (jpg 내용에 .png 이름이 붙은 참조 이미지 대응)
+    sniffed = sniff_file_mime(path)
+    if sniffed:
+        return sniffed
+    ext = path.suffix.lower()
+    if ext == '.png':
+        return 'image/png'
+    if ext in {'.jpg', '.jpeg'}:
+        return 'image/jpeg'
+    if ext == '.webp':
+        return 'image/webp'
+    return 'application/octet-stream'
+
+
+def _cache_key(p: Path, max_side: int) -> str:
+    st = p.stat()
+    raw = f'{p}|{st.st_mtime_ns}|{st.st_size}|{max_side}'
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()[:32]
+
+
+def ref_digest(ref_image: str) -> str:
+    """참조 이미지 내용 sha256 (mtime/size가 같으면 다시 읽지 않음). 결과 캐시 키용."""
+    p = Path(ref_image).expanduser().resolve()
+    st = p.stat()
+    with _LOCK:
+        hit = _DIGESTS.get(str(p))
+    if hit and hit[0] == st.st_mtime_ns and hit[1] == st.st_size:
+        return hit[2]
+    h = hashlib.sha256()
+    with p.open('rb') as fp:
+        for chunk in iter(lambda: fp.read(1024 * 1024), b''):
+            h.update(chunk)
+    digest = h.hexdigest()
+    with _LOCK:
+        _DIGESTS[str(p)] = (st.st_mtime_ns, st.st_size, digest)
+    return digest
+
+
+def _downscale(p: Path, max_side: int, key: str) -> tuple[bytes, str]:
+    """긴 변이 max_side를 넘으면 축소/재압축한 바이트를 디스크 캐시와 함께 돌려준다."""
+    mime = _guess_mime(p)
+    if max_side <= 0 or Image is None:
+        return p.read_bytes(), mime
+
+    for ext, m in (('.jpg', 'image/jpeg'), ('.png', 'image/png')):
+        cached = CACHE_DIR / f'{key}{ext}'
+        if cached.exists():
+            return cached.read_bytes(), m
+
+    with Image.open(p) as im:
+        if max(im.size) <= max_side:
+            return p.read_bytes(), mime
+        im.thumbnail((max_side, max_side), Image.LANCZOS)
+        buf = io.BytesIO()
+        if im.mode in {'RGBA', 'LA', 'P'}:
+            im.save(buf, format='PNG', optimize=True)
+            ext, out_mime = '.png', 'image/png'
+        else:
+            im.convert('RGB').save(buf, format='JPEG', quality=90)
+            ext, out_mime = '.jpg', 'image/jpeg'
+    data = buf.getvalue()
+    try:
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        tmp = CACHE_DIR / f'{key}{ext}.tmp'
+        tmp.write_bytes(data)
+        tmp.replace(CACHE_DIR / f'{key}{ext}')
+    except Exception:
+        pass
+    return data, out_mime
+
+
+# ---- Files API (upload once, reference by URI) ----
+def _load_files_index() -> dict:
+    try:
+        data = json.loads(FILES_INDEX_PATH.read_text(encoding='utf-8'))
+        return data if isinstance(data, dict) else {}
+    except Exception:
+        return {}
+
+
+def _save_files_index(index: dict) -> None:
+    now = time.time()
+    index = {k: v for k, v in index.items() if float(v.get('expires_at', 0)) > now}
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    tmp = FILES_INDEX_PATH.with_suffix('.tmp')
+    tmp.write_text(json.dumps(index, ensure_ascii=False, indent=2) + '\n', encoding='utf-8')
+    tmp.replace(FILES_INDEX_PATH)
+
+
+def _expires_at(text: str) -> float:
+    try:
+        return datetime.fromisoformat((text or '').replace('Z', '+00:00')).timestamp()
+    except Exception:
+        return time.time() + 47 * 3600
+
+
+def upload_file(api_key: str, data: bytes, mime: str, display_name: str) -> dict:
+    """Gemini Files API resumable upload. 반환: {'uri','name','mime','expires_at'}"""
+    start = urllib.request.Request(
+        UPLOAD_URL,
+        data=json.dumps({'file': {'display_name': display_name}}).encode('utf-8'),
+        headers={
+            'x-goog-api-key': api_key,
+            'X-Goog-Upload-Protocol': 'resumable',
+            'X-Goog-Upload-Command': 'start',
+            'X-Goog-Upload-Header-Content-Length': str(len(data)),
+            'X-Goog-Upload-Header-Content-Type': mime,
+            'Content-Type': 'application/json',
+        },
+        method='POST',
+    )
+    with urllib.request.urlopen(start, timeout=60) as r:
+        upload_url = r.headers.get('X-Goog-Upload-URL') or r.headers.get('x-goog-upload-url')
+    if not upload_url:
+        raise RuntimeError('Files API upload URL 없음')
+
+    put = urllib.request.Request(
+        upload_url,
+        data=data,
+        headers={
+            'Content-Length': str(len(data)),
+            'X-Goog-Upload-Offset': '0',
+            'X-Goog-Upload-Command': 'upload, finalize',
+        },
+        method='POST',
+    )
+    with urllib.request.urlopen(put, timeout=180) as r:
+        info = json.loads(r.read().decode('utf-8', errors='replace')).get('file') or {}
+    uri = str(info.get('uri') or '')
+    if not uri:
+        raise RuntimeError('Files API 응답에 uri 없음')
+    return {
+        'uri': uri,
+        'name': str(info.get('name') or ''),
+        'mime': str(info.get('mimeType') or mime),
+        'expires_at': _expires_at(str(info.get('expirationTime') or '')),
+    }
+
+
+def _files_part(api_key: str, p: Path, key: str, side: int) -> dict:
+    # 같은 파일이라도 API 키(프로젝트)가 다르면 URI를 공유할 수 없다.
+    idx_key = f"{hashlib.sha256(api_key.encode('utf-8')).hexdigest()[:12]}:{key}"
+    row = _load_files_index().get(idx_key)
+    if not row or float(row.get('expires_at', 0)) - time.time() < FILES_EXPIRY_MARGIN_SEC:
+        data, mime = _downscale(p, side, key)
+        row = upload_file(api_key, data, mime, display_name=p.name)
+        # 업로드하는 동안 다른 키가 인덱스에 들어왔을 수 있으니 다시 읽어서 합친다
+        with _INDEX_LOCK:
+            index = _load_files_index()
+            index[idx_key] = row
+            _save_files_index(index)
+    return {'file_data': {'mime_type': row['mime'], 'file_uri': row['uri']}}
+
+
+def _key_lock(key: str) -> threading.Lock:
+    with _LOCK:
+        return _INFLIGHT.setdefault(key, threading.Lock())
+
+
+def _parts_get(mem_key: str) -> dict | None:
+    with _LOCK:
+        hit = _PARTS.pop(mem_key, None)
+        if hit is not None:
+            _PARTS[mem_key] = hit
+        return hit
+
+
+def _parts_put(mem_key: str, part: dict) -> None:
+    with _LOCK:
+        _PARTS.pop(mem_key, None)
+        _PARTS[mem_key] = part
+        while len(_PARTS) > MAX_PARTS:
+            _PARTS.pop(next(iter(_PARTS)))
+
+
+def get_ref_part(ref_image: str, api_key: str = '', *, mode: str = '', max_side: int | None = None) -> dict:
+    """참조 이미지 request part를 캐시해서 돌려준다.
+
+    - key: 경로 + mtime/size + max_side (파일이 바뀌면 자동 무효화)
+    - mode=inline: base64 inline_data (프로세스 내 캐시, 축소본은 디스크 캐시)
+    - mode=files: Files API에 한 번 올리고 file_data URI로 참조 (실패 시 inline 폴백)
+    """
+    p = Path(ref_image).expanduser().resolve()
+    if not p.exists() or not p.is_file():
+        raise RuntimeError(f'reference image not found: {p}')
+    mode = (mode or DEFAULT_REF_MODE).strip().lower()
+    side = DEFAULT_REF_MAX_SIDE if max_side is None else int(max_side)
+    key = _cache_key(p, side)
+
+    # 같은 키는 한 스레드만 만들고(나머지는 기다렸다 캐시를 본다), 다른 키는 동시에 진행한다
+    with _key_lock(key):
+        if mode == 'files' and api_key:
+            # URI는 만료가 있으므로 메모리 캐시 대신 만료 시각이 있는 인덱스를 매번 확인한다.
+            try:
+                return _files_part(api_key, p, key, side)
+            except (urllib.error.URLError, RuntimeError, OSError, ValueError):
+                pass
+
+        mem_key = f'inline:{key}'
+        hit = _parts_get(mem_key)
+        if hit is not None:
+            return hit
+        data, mime = _downscale(p, side, key)
+        part = {'inline_data': {'mime_type': mime, 'data': base64.b64encode(data).decode('ascii')}}
+        _parts_put(mem_key, part)
+        return part
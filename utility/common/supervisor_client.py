@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import json
+import socket
+from typing import Any
+
+try:
+    from utility.common.generation_defaults import WORKSPACE_ROOT
+except ModuleNotFoundError:
+    import sys
+    from pathlib import Path as _Path
+    for _p in _Path(__file__).resolve().parents:
+        if (_p / 'utility').exists():
+            sys.path.append(str(_p))
+            break
+    from utility.common.generation_defaults import WORKSPACE_ROOT
+
+SUPERVISOR_DIR = WORKSPACE_ROOT / 'memory' / 'runtime' / 'supervisor'
+SUPERVISOR_SOCKET = SUPERVISOR_DIR / 'studio_supervisor.sock'
+
+
+def supervisor_request(payload: dict[str, Any], timeout: float = 3.0) -> dict[str, Any] | None:
+    """studio supervisor 제어 소켓에 JSON 한 줄 요청.
+
+    데몬이 떠 있지 않으면 None을 돌려준다(호출 측에서 기존 방식으로 폴백).
+    """
+    if not SUPERVISOR_SOCKET.exists():
+        return None
+    s = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    s.settimeout(timeout)
+    try:
+        s.connect(str(SUPERVISOR_SOCKET))
+        s.sendall((json.dumps(payload, ensure_ascii=False) + '\n').encode('utf-8'))
+        buf = b''
+        while not buf.endswith(b'\n'):
+            chunk = s.recv(65536)
+            if not chunk:
+                break
+            buf += chunk
+        data = json.loads(buf.decode('utf-8') or '{}')
+        return data if isinstance(data, dict) else None
+    except (OSError, ValueError):
+        return None
+    finally:
+        s.close()
+
+
+def supervisor_available() -> bool:
+    res = supervisor_request({'cmd': 'ping'}, timeout=1.0)
+    return bool(res and res.get('ok'))
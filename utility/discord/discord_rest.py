@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import http.client
+import json
+import mimetypes
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Iterator
+
+try:
+    from utility.common.env_prefer_dotenv import load_env_prefer_dotenv
+    from utility.common import metrics
+except ModuleNotFoundError:
+    import sys
+    from pathlib import Path as _Path
+    for _p in _Path(__file__).resolve().parents:
+        if (_p / 'utility').exists():
+            sys.path.append(str(_p))
+            break
+    from utility.common.env_prefer_dotenv import load_env_prefer_dotenv
+    from utility.common import metrics
+
+# gateway 로그인 없이 REST(POST /channels/{id}/messages)로 바로 업로드한다.
+API_HOST = 'discord.com'
+API_PREFIX = '/api/v10'
+USER_AGENT = 'DiscordBot (https://github.com/openclaw, 1.0) studio-uploader'
+MAX_FILES_PER_MESSAGE = 10
+MAX_RETRIES = 3
+STREAM_CHUNK = 64 * 1024
+
+# keep-alive 연결 풀. 요청 스레드(ThreadingHTTPServer/ThreadPoolExecutor)는 수명이 짧아서
+# 스레드별 연결로는 거의 재사용이 안 되니 모듈 단위로 몇 개를 빌려 쓰고 돌려놓는다.
+POOL_SIZE = 4
+_POOL: list[http.client.HTTPSConnection] = []
+_POOL_LOCK = threading.Lock()
+
+
+def _token() -> str:
+    token = os.getenv('DISCORD_BOT_TOKEN', '').strip()
+    if not token:
+        load_env_prefer_dotenv()
+        token = os.getenv('DISCORD_BOT_TOKEN', '').strip()
+    return token
+
+
+def _checkout(timeout: float) -> tuple[http.client.HTTPSConnection, bool]:
+    """반환: (연결, 풀에서 재사용한 연결인지)"""
+    with _POOL_LOCK:
+        conn = _POOL.pop() if _POOL else None
+    if conn is None:
+        return http.client.HTTPSConnection(API_HOST, timeout=timeout), False
+    conn.timeout = timeout
+    if conn.sock is not None:
+        conn.sock.settimeout(timeout)
+    return conn, True
+
+
+def _checkin(conn: http.client.HTTPSConnection) -> None:
+    with _POOL_LOCK:
+        if len(_POOL) < POOL_SIZE:
+            _POOL.append(conn)
+            return
+    conn.close()
+
+
+def _multipart(payload: dict, files: list[Path]) -> tuple[str, int, Callable[[], Iterator[bytes]]]:
+    """파일을 메모리에 올리지 않는 multipart body. 반환: (content-type, length, body factory)"""
+    boundary = f'----studio{uuid.uuid4().hex}'
+    parts: list[tuple[bytes, Path | None]] = []
+    head = (
+        f'--{boundary}\r\nContent-Disposition: form-data; name="payload_json"\r\n'
+        f'Content-Type: application/json\r\n\r\n{json.dumps(payload, ensure_ascii=False)}\r\n'
+    ).encode('utf-8')
+    parts.append((head, None))
+    for i, p in enumerate(files):
+        ctype = mimetypes.guess_type(p.name)[0] or 'application/octet-stream'
+        fname = p.name.replace('"', '_')
+        hdr = (
+            f'--{boundary}\r\nContent-Disposition: form-data; name="files[{i}]"; filename="{fname}"\r\n'
+            f'Content-Type: {ctype}\r\n\r\n'
+        ).encode('utf-8')
+        parts.append((hdr, p))
+    tail = f'--{boundary}--\r\n'.encode('utf-8')
+    length = sum(len(h) + ((p.stat().st_size + 2) if p is not None else 0) for h, p in parts) + len(tail)
+
+    def body() -> Iterator[bytes]:
+        for hdr, p in parts:
+            yield hdr
+            if p is not None:
+                with p.open('rb') as fp:
+                    for chunk in iter(lambda: fp.read(STREAM_CHUNK), b''):
+                        yield chunk
+                yield b'\r\n'
+        yield tail
+
+    return f'multipart/form-data; boundary={boundary}', length, body
+
+
+def _post_message(channel_id: str, content: str, files: list[Path], token: str, timeout: float) -> tuple[int, dict]:
+    payload: dict = {'content': content or '', 'attachments': [{'id': i, 'filename': p.name} for i, p in enumerate(files)]}
+    ctype, length, body = _multipart(payload, files)
+    headers = {
+        'Authorization': f'Bot {token}',
+        'User-Agent': USER_AGENT,
+        'Content-Type': ctype,
+        'Content-Length': str(length),
+    }
+    path = f'{API_PREFIX}/channels/{channel_id}/messages'
+    while True:
+        conn, reused = _checkout(timeout)
+        sent = False
+        try:
+            conn.request('POST', path, body=body(), headers=headers, encode_chunked=False)
+            sent = True
+            resp = conn.getresponse()
+            raw = resp.read()
+        except (http.client.HTTPException, OSError) as e:
+            conn.close()
+            # POST는 멱등이 아니다. 재사용한 keep-alive 연결을 서버가 이미 닫은 경우
+            # (쓰는 도중 끊김, 또는 상태줄 없이 바로 닫힘)만 새 연결로 다시 보낸다.
+            # 응답 대기 timeout 등은 Discord가 이미 받았을 수 있어 재전송하면 메시지가 중복된다.
+            stale = isinstance(e, http.client.RemoteDisconnected) or (
+                not sent and isinstance(e, (BrokenPipeError, ConnectionResetError))
+            )
+            if reused and stale:
+                continue
+            raise
+        if resp.will_close:
+            conn.close()
+        else:
+            _checkin(conn)
+        try:
+            data = json.loads(raw.decode('utf-8', errors='replace')) if raw else {}
+        except ValueError:
+            data = {'message': raw.decode('utf-8', errors='replace')[:300]}
+        return resp.status, data if isinstance(data, dict) else {'data': data}
+
+
+def send_files(channel_id: str, files: list[str | Path], content: str = '', *, timeout: float = 120.0) -> tuple[bool, str]:
+    """채널 1곳에 파일 여러 개 업로드 (10개 단위로 메시지 분할, 본문은 첫 메시지에만)."""
+    cid = str(channel_id or '').strip()
+    if not cid.isdigit():
+        return False, f'채널 ID가 올바르지 않아: {cid}'
+    token = _token()
+    if not token:
+        return False, 'DISCORD_BOT_TOKEN이 필요함'
+    paths = [Path(f).expanduser() for f in files]
+    missing = [str(p) for p in paths if not p.is_file()]
+    if missing:
+        return False, f'파일 없음: {", ".join(missing)}'
+    if not paths:
+        return False, '업로드할 파일이 없어'
+
+    sent: list[str] = []
+    for start in range(0, len(paths), MAX_FILES_PER_MESSAGE):
+        group = paths[start:start + MAX_FILES_PER_MESSAGE]
+        text = content.strip() if start == 0 else ''
+        for attempt in range(MAX_RETRIES):
+            try:
+                with metrics.timer('discord.send', op='rest_upload') as t:
+                    status, data = _post_message(cid, text, group, token, timeout)
+                    t['ok'] = 200 <= status < 300
+                    t['tags']['status'] = status
+            except Exception as e:
+                return False, f'업로드 실패: {e}'
+            if status == 429:
+                time.sleep(min(30.0, float(data.get('retry_after', 1.0) or 1.0)))
+                continue
+            if 200 <= status < 300:
+                sent.extend(p.name for p in group)
+                break
+            return False, f'업로드 실패 ({status}): {data.get("message") or data}'
+        else:
+            return False, '업로드 실패: rate limit 재시도 초과'
+    return True, f'업로드 완료: {cid} -> {", ".join(sent)}'
+
+
+def send_files_to_channels(
+    channel_ids: list[str],
+    files: list[str | Path],
+    content: str = '',
+    *,
+    concurrency: int = 4,
+    timeout: float = 120.0,
+) -> dict[str, tuple[bool, str]]:
+    """여러 채널에 동시에 업로드. 반환: {channel_id: (ok, msg)}"""
+    ids = list(dict.fromkeys(str(c).strip() for c in channel_ids if str(c).strip()))
+    if not ids:
+        return {}
+    with ThreadPoolExecutor(max_workers=max(1, min(int(concurrency), len(ids))), thread_name_prefix='discord-rest') as pool:
+        results = pool.map(lambda cid: send_files(cid, files, content, timeout=timeout), ids)
+        return dict(zip(ids, results))
+
@@ -6,10 +6,23 @@ import asyncio
 import os
 from pathlib import Path
 
-import discord
+try:
+    from utility.discord.discord_rest import send_files_to_channels
+    from utility.common import metrics
+except ModuleNotFoundError:
+    import sys
+    for _p in Path(__file__).resolve().parents:
+        if (_p / 'utility').exists():
+            sys.path.append(str(_p))
+            break
+    from utility.discord.discord_rest import send_files_to_channels
+    from utility.common import metrics
 
 
 async def run(channel_id: int, file_path: str, content: str) -> int:
+    """gateway 로그인 방식(백업 경로). 기본 업로드는 discord_rest의 REST 호출을 쓴다."""
+    import discord
+
     token = os.getenv("DISCORD_BOT_TOKEN", "").strip()
     if not token:
         print("DISCORD_BOT_TOKEN이 필요함")
@@ -35,7 +48,8 @@ async def run(channel_id: int, file_path: str, content: str) -> int:
                 print(f"지원하지 않는 채널 타입: {type(ch).__name__}")
                 code = 1
             else:
-                await ch.send(content=content or None, file=discord.File(str(p)))
+                with metrics.timer('discord.send', op='gateway_upload'):
+                    await ch.send(content=content or None, file=discord.File(str(p)))
                 print(f"업로드 완료: {channel_id} -> {p}")
         except Exception as e:
             print(f"업로드 실패: {e}")
@@ -57,11 +71,18 @@ async def run(channel_id: int, file_path: str, content: str) -> int:
 
 def main() -> None:
     ap = argparse.ArgumentParser(description="Send local media file to Discord channel")
-    ap.add_argument("--channel-id", type=int, required=True)
-    ap.add_argument("--file", required=True)
+    ap.add_argument("--channel-id", action="append", required=True, help="repeatable")
+    ap.add_argument("--file", action="append", required=True, help="repeatable (one message, up to 10 per message)")
     ap.add_argument("--content", default="")
+    ap.add_argument("--gateway", action="store_true", help="use discord.py gateway login instead of REST (single channel/file)")
     args = ap.parse_args()
-    raise SystemExit(asyncio.run(run(args.channel_id, args.file, args.content)))
+    if args.gateway:
+        raise SystemExit(asyncio.run(run(int(args.channel_id[0]), args.file[0], args.content)))
+
+    results = send_files_to_channels(args.channel_id, args.file, args.content)
+    for _cid, (_ok, msg) in results.items():
+        print(msg)
+    raise SystemExit(0 if results and all(ok for ok, _ in results.values()) else 1)
 
 
 if __name__ == "__main__":
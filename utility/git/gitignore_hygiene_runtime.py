@@ -13,6 +13,7 @@ from typing import Any
 
 try:
     from utility.common.generation_defaults import WORKSPACE_ROOT
+    from utility.common import metrics
 except ModuleNotFoundError:
     import sys
     from pathlib import Path as _Path
@@ -21,6 +22,7 @@ except ModuleNotFoundError:
             sys.path.append(str(_p))
             break
     from utility.common.generation_defaults import WORKSPACE_ROOT
+    from utility.common import metrics
 BASE = WORKSPACE_ROOT
 RUNTIME_DIR = BASE / 'memory' / 'runtime'
 QUEUE_PATH = RUNTIME_DIR / 'gitignore_hygiene_queue.jsonl'
@@ -78,6 +80,7 @@ def _pop_next_job() -> dict[str, Any] | None:
 
 
 def _run_job(job: dict[str, Any]) -> dict[str, Any]:
+    metrics.observe_queue_wait('gitignore_hygiene', job)
     started = now_iso()
     # tracked + ignored files 목록 추출
     list_cmd = "git ls-files -ci --exclude-standard"
@@ -155,7 +158,7 @@ def runtime_loop(poll_sec: float = 10.0) -> int:
         _release_lock()
 
 
-def main() -> int:
+def main(argv: list[str] | None = None) -> int:
     ap = argparse.ArgumentParser(description='Gitignore hygiene runtime / enqueue helper')
     sub = ap.add_subparsers(dest='cmd', required=True)
 
@@ -165,7 +168,7 @@ def main() -> int:
     p_q = sub.add_parser('enqueue')
     p_q.add_argument('--reason', default='')
 
-    args = ap.parse_args()
+    args = ap.parse_args(argv)
     if args.cmd == 'run':
         return runtime_loop(poll_sec=args.poll_sec)
 
@@ -0,0 +1,360 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Callable
+
+try:
+    from utility.common.generation_defaults import WORKSPACE_ROOT
+    from utility.common import gemini_quota, metrics
+    from utility.rp import rp_engine
+except ModuleNotFoundError:
+    from pathlib import Path as _Path
+    for _p in _Path(__file__).resolve().parents:
+        if (_p / 'utility').exists():
+            sys.path.append(str(_p))
+            break
+    from utility.common.generation_defaults import WORKSPACE_ROOT
+    from utility.common import gemini_quota, metrics
+    from utility.rp import rp_engine
+
+# rp_engine 핫패스 벤치마크. 실제 룸/쿼터/메트릭 파일은 건드리지 않고 임시 폴더에서 돌린다.
+# 리포트 JSON에 커밋 해시를 남겨서 저장/캐시 구조를 바꾼 전후를 --compare로 비교한다.
+REPORT_DIR = WORKSPACE_ROOT / 'memory' / 'runtime' / 'rp_bench'
+REPO_ROOT = Path(__file__).resolve().parents[2]
+DEFAULT_TURNS = '10,100,500'
+FILLER_TURNS = 20
+STUB_REPLY = '*잔을 내려놓고 천천히 고개를 든다.*\n그래, 그 얘기 계속해 봐. 오늘은 끝까지 들을게.'
+
+
+# ---- fake Gemini ----
+class _StubGemini(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, latency_ms: float, jitter_ms: float, dist: str = 'normal'):
+        super().__init__(('127.0.0.1', 0), _StubHandler)
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.dist = dist
+        self.requests = 0
+        self.slept_ms = 0.0
+        self.prompt_bytes = 0
+        self.lock = threading.Lock()
+
+    def sample_ms(self) -> float:
+        """normal: 평균±jitter, lognormal: 중앙값=latency에 꼬리가 긴 분포, fixed: 고정."""
+        if self.dist == 'fixed' or self.latency_ms <= 0:
+            return self.latency_ms
+        if self.dist == 'lognormal':
+            return self.latency_ms * random.lognormvariate(0.0, self.jitter_ms / self.latency_ms)
+        return max(0.0, random.gauss(self.latency_ms, self.jitter_ms))
+
+    @property
+    def base_url(self) -> str:
+        return f'http://127.0.0.1:{self.server_address[1]}/v1beta'
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    server: _StubGemini
+
+    def do_POST(self) -> None:  # noqa: N802
+        size = int(self.headers.get('Content-Length') or 0)
+        self.rfile.read(size)
+        delay = self.server.sample_ms()
+        time.sleep(delay / 1000.0)
+        with self.server.lock:
+            self.server.requests += 1
+            self.server.slept_ms += delay
+            self.server.prompt_bytes += size
+        body = json.dumps({'candidates': [{'content': {'parts': [{'text': STUB_REPLY}]}}]}, ensure_ascii=False).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: Any) -> None:  # noqa: A002
+        pass
+
+
+# ---- sandbox ----
+def _isolate(root: Path, stub_url: str) -> None:
+    """rp_engine/gemini_quota/metrics 경로를 전부 root 아래로 돌린다."""
+    rooms = root / 'rp_rooms'
+    rooms.mkdir(parents=True, exist_ok=True)
+    rp_engine.ROOMS_DIR = rooms
+    rp_engine.ACTIVE_ROOMS_PATH = rooms / '_active_rooms.json'
+    rp_engine.RUNTIME_LOCK_PATH = rooms / '_runtime_lock.json'
+    rp_engine.LEGACY_CACHE_PATH = rooms / '_legacy_cache.json'
+    rp_engine.PREFS_PATH = rooms / '_room_prefs.json'
+    rp_engine.SESSIONS_INDEX_PATH = root / 'sessions.json'
+    rp_engine.GEMINI_API_BASE = stub_url
+    gemini_quota.STATE_PATH = root / 'gemini_quota.json'
+    gemini_quota.LOCK_PATH = root / 'gemini_quota.lock'
+    gemini_quota.LIMITS_PATH = root / 'gemini_quota_limits.json'
+    gemini_quota.DEFAULT_RPM = 0.0
+    # 계측 오버헤드도 핫패스의 일부라서 끄지 않고 임시 파일로만 보낸다
+    metrics.METRICS_PATH = root / 'metrics.jsonl'
+    metrics.LOCK_PATH = root / 'metrics.lock'
+    os.environ['GEMINI_API_KEY'] = 'bench'
+
+
+def _ctx(channel: str, user: str = 'u-owner') -> rp_engine.Ctx:
+    return rp_engine.Ctx('discord', channel, user)
+
+
+def _synthetic_room(ctx: rp_engine.Ctx, turns: int) -> dict[str, Any]:
+    speakers = [('u-owner', '주인'), ('u-guest1', '손님1'), ('u-guest2', '손님2')]
+    history = []
+    for i in range(turns):
+        uid, name = speakers[i % len(speakers)] if i % 2 == 0 else ('bot', 'RP')
+        history.append({
+            'user_id': uid,
+            'speaker_name': name,
+            'text': f'{i}번째 턴. *창밖을 본다.* 비가 그치면 시장 골목으로 가 보자. ' * (1 + i % 3),
+            'at': rp_engine.now_iso(),
+            'message_id': f'{ctx.channel_id}-{i}',
+        })
+    return {
+        'id': rp_engine.room_id(ctx),
+        'title': f'bench {ctx.channel_id}',
+        'kind': 'thread',
+        'parent_channel_id': '',
+        'owner_id': ctx.user_id,
+        'participants': sorted({t['user_id'] for t in history} | {ctx.user_id}),
+        'history': history,
+        'opening': '비 오는 항구 도시의 작은 찻집.',
+        'world': {'title': '항구 도시', 'summary': '비가 자주 오는 항구 도시. 밀수꾼과 상인이 섞여 산다.', 'rules': [], 'tags': []},
+        'settings': {'tone': 'balanced', 'rating': 'safe', 'style': 'narrative', 'user_alias': '주인'},
+        'recent_message_ids': [t['message_id'] for t in history][-rp_engine.MAX_RECENT_MESSAGE_IDS:],
+        'is_active': True,
+        'created_at': rp_engine.now_iso(),
+        'updated_at': rp_engine.now_iso(),
+    }
+
+
+def _seed(sizes: list[int], rooms: int, inactive: int) -> dict[int, rp_engine.Ctx]:
+    """크기별 측정 룸 + 활성 filler 룸 rooms개 + 종료된 룸 inactive개 + 채널별 호칭."""
+    measured: dict[int, rp_engine.Ctx] = {}
+    for n in sizes:
+        ctx = _ctx(f'bench{n}')
+        room = _synthetic_room(ctx, n)
+        rp_engine.save_room(ctx, room)
+        rp_engine._set_active_room(ctx, room)
+        rp_engine.room_md_path(ctx).write_text(''.join(f"{t['speaker_name']}: {t['text']}\n" for t in room['history']), encoding='utf-8')
+        measured[n] = ctx
+    for i in range(rooms + inactive):
+        ctx = _ctx(f'filler{i}')
+        room = _synthetic_room(ctx, FILLER_TURNS)
+        if i >= rooms:
+            room['is_active'] = False
+        rp_engine.save_room(ctx, room)
+        if i < rooms:
+            rp_engine._set_active_room(ctx, room)
+        rp_engine.set_channel_user_alias(ctx, f'손님{i}', speaker_id=f'u-{i}')
+    for ctx in measured.values():
+        rp_engine.set_channel_user_alias(ctx, '주인')
+        rp_engine.set_channel_user_alias(ctx, '단골', speaker_id='u-guest1')
+    return measured
+
+
+# ---- timing ----
+def _time(fn: Callable[[int], Any], n: int, setup: Callable[[int], Any] | None = None) -> list[float]:
+    out: list[float] = []
+    for i in range(n):
+        if setup is not None:
+            setup(i)
+        started = time.perf_counter()
+        fn(i)
+        out.append((time.perf_counter() - started) * 1000.0)
+    return out
+
+
+def _stats(samples: list[float]) -> dict[str, Any]:
+    vals = sorted(samples)
+    return {
+        'n': len(vals),
+        'mean_ms': round(sum(vals) / len(vals), 3) if vals else 0.0,
+        'p50_ms': round(metrics.percentile(vals, 50), 3),
+        'p95_ms': round(metrics.percentile(vals, 95), 3),
+        'min_ms': round(vals[0], 3) if vals else 0.0,
+        'max_ms': round(vals[-1], 3) if vals else 0.0,
+    }
+
+
+def _git_commit() -> tuple[str, bool]:
+    try:
+        head = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_ROOT, capture_output=True, text=True, timeout=10).stdout.strip()
+        dirty = bool(subprocess.run(['git', 'status', '--porcelain', '--', 'utility', 'studio'], cwd=REPO_ROOT, capture_output=True, text=True, timeout=30).stdout.strip())
+        return head or 'unknown', dirty
+    except Exception:
+        return 'unknown', False
+
+
+def run_bench(
+    *,
+    sizes: list[int],
+    rooms: int,
+    inactive: int,
+    iterations: int,
+    reply_iterations: int,
+    latency_ms: float,
+    jitter_ms: float,
+    dist: str = 'normal',
+    log: Callable[[str], None] | None = None,
+) -> dict[str, Any]:
+    log = log or (lambda _line: None)
+    stub = _StubGemini(latency_ms, jitter_ms, dist)
+    threading.Thread(target=stub.serve_forever, name='rp-bench-stub', daemon=True).start()
+    results: dict[str, dict[str, Any]] = {}
+    room_bytes: dict[str, int] = {}
+    try:
+        with tempfile.TemporaryDirectory(prefix='rp_bench_') as tmp:
+            _isolate(Path(tmp), stub.base_url)
+            measured = _seed(sizes, rooms, inactive)
+            log(f'seeded: sizes={sizes} active={rooms + len(sizes)} inactive={inactive}')
+
+            for n, ctx in measured.items():
+                label = f'turns={n}'
+                snapshot = rp_engine.load_room(ctx) or {}
+                raw = json.dumps(snapshot, ensure_ascii=False)
+                room_bytes[label] = rp_engine.room_json_path(ctx).stat().st_size
+
+                results.setdefault('load_room', {})[label] = _stats(_time(lambda i: rp_engine.load_room(ctx), iterations))
+                results.setdefault('save_room', {})[label] = _stats(_time(lambda i: rp_engine.save_room(ctx, snapshot), iterations))
+                results.setdefault('build_rp_prompt', {})[label] = _stats(
+                    _time(lambda i: rp_engine._build_rp_prompt(snapshot, user_display='주인', bot_name='RP'), iterations)
+                )
+                # 매번 같은 크기에서 시작하도록 룸을 되돌린 뒤 1턴 적재
+                results.setdefault('ingest_plain_chat', {})[label] = _stats(_time(
+                    lambda i: rp_engine.ingest_plain_chat(ctx, '비가 그쳤어. 나가 볼까?', message_id=f'bench-{n}-{i}', speaker_name='주인'),
+                    iterations,
+                    setup=lambda i: rp_engine.save_room(ctx, json.loads(raw)),
+                ))
+                rp_engine.save_room(ctx, json.loads(raw))
+                before = stub.requests
+                results.setdefault('generate_rp_reply', {})[label] = _stats(
+                    _time(lambda i: rp_engine.generate_rp_reply(ctx, user_display='주인', bot_name='RP'), reply_iterations)
+                )
+                if stub.requests - before != reply_iterations:
+                    log(f'warn: {label} stub 요청 {stub.requests - before}회 (재시도 포함)')
+                log(f'{label}: room {room_bytes[label]} bytes done')
+
+            probe = measured[max(measured)]
+            results['channel_alias'] = {
+                'get': _stats(_time(lambda i: rp_engine.get_channel_user_alias(probe, speaker_id='u-guest1'), iterations)),
+                'get_default': _stats(_time(lambda i: rp_engine.get_channel_user_alias(probe, speaker_id='u-nobody'), iterations)),
+                'set': _stats(_time(lambda i: rp_engine.set_channel_user_alias(probe, f'단골{i % 3}', speaker_id='u-guest1'), iterations)),
+            }
+            results['cleanup_non_active_rooms'] = {
+                f'active={rooms + len(sizes)},inactive={inactive}': _stats(_time(lambda i: rp_engine.cleanup_non_active_rooms(), max(1, iterations // 10))),
+            }
+            metrics.flush()
+    finally:
+        stub.shutdown()
+        stub.server_close()
+
+    stub_mean = stub.slept_ms / stub.requests if stub.requests else 0.0
+    # 응답 생성 시간에서 stub이 잡아먹은 지연을 빼면 엔진 자체 오버헤드
+    for row in results.get('generate_rp_reply', {}).values():
+        row['overhead_p50_ms'] = round(row['p50_ms'] - stub_mean, 3)
+    commit, dirty = _git_commit()
+    return {
+        'commit': commit,
+        'dirty': dirty,
+        'created_at': datetime.now(timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'params': {
+            'sizes': sizes,
+            'rooms': rooms,
+            'inactive': inactive,
+            'iterations': iterations,
+            'reply_iterations': reply_iterations,
+            'latency_ms': latency_ms,
+            'jitter_ms': jitter_ms,
+            'dist': dist,
+        },
+        'room_bytes': room_bytes,
+        'stub': {'requests': stub.requests, 'mean_latency_ms': round(stub_mean, 3), 'prompt_bytes': stub.prompt_bytes},
+        'results': results,
+    }
+
+
+def compare(base: dict[str, Any], cur: dict[str, Any]) -> list[str]:
+    """op/label별 p50 비교 줄. 양쪽에 있는 항목만."""
+    lines = [f"base {base.get('commit', '?')} -> {cur.get('commit', '?')}{' (dirty)' if cur.get('dirty') else ''}"]
+    for op, rows in (cur.get('results') or {}).items():
+        for label, row in rows.items():
+            old = ((base.get('results') or {}).get(op) or {}).get(label)
+            if not old or not old.get('p50_ms'):
+                continue
+            delta = (row['p50_ms'] - old['p50_ms']) / old['p50_ms'] * 100.0
+            lines.append(f"{op:<26} {label:<28} p50 {old['p50_ms']:>10.3f} -> {row['p50_ms']:>10.3f} ms ({delta:+.1f}%)")
+    return lines
+
+
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description='Benchmark rp_engine hot paths against a local fake Gemini')
+    ap.add_argument('--turns', default=DEFAULT_TURNS, help='comma separated room sizes (history turns)')
+    ap.add_argument('--rooms', type=int, default=50, help='extra active rooms in the index')
+    ap.add_argument('--inactive', type=int, default=50, help='closed rooms left on disk')
+    ap.add_argument('--iterations', type=int, default=200)
+    ap.add_argument('--reply-iterations', type=int, default=20, help='generate_rp_reply calls per room size')
+    ap.add_argument('--latency-ms', type=float, default=300.0, help='fake Gemini mean latency')
+    ap.add_argument('--jitter-ms', type=float, default=50.0, help='fake Gemini latency stddev')
+    ap.add_argument('--dist', default='normal', choices=['normal', 'lognormal', 'fixed'], help='fake Gemini latency distribution')
+    ap.add_argument('--out', default='', help='report path (default: memory/runtime/rp_bench/<time>_<commit>.json)')
+    ap.add_argument('--compare', default='', help='previous report to diff p50 against')
+    args = ap.parse_args(argv)
+
+    try:
+        sizes = sorted({int(x) for x in args.turns.split(',') if x.strip()})
+    except ValueError:
+        ap.error('--turns must be comma separated integers')
+    if not sizes or min(sizes) < 1:
+        ap.error('--turns needs at least one positive size')
+
+    report = run_bench(
+        sizes=sizes,
+        rooms=max(0, args.rooms),
+        inactive=max(0, args.inactive),
+        iterations=max(1, args.iterations),
+        reply_iterations=max(1, args.reply_iterations),
+        latency_ms=max(0.0, args.latency_ms),
+        jitter_ms=max(0.0, args.jitter_ms),
+        dist=args.dist,
+        log=lambda line: print(line, file=sys.stderr, flush=True),
+    )
+    out = Path(args.out) if args.out else REPORT_DIR / f"{time.strftime('%Y%m%d_%H%M%S')}_{report['commit']}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(report, ensure_ascii=False, indent=2) + '\n', encoding='utf-8')
+
+    for op, rows in report['results'].items():
+        for label, row in rows.items():
+            print(f"{op:<26} {label:<28} p50 {row['p50_ms']:>10.3f}  p95 {row['p95_ms']:>10.3f}  mean {row['mean_ms']:>10.3f} ms")
+    if args.compare:
+        try:
+            base = json.loads(Path(args.compare).read_text(encoding='utf-8'))
+        except Exception as e:
+            print(f'비교 리포트를 못 읽음: {e}', file=sys.stderr)
+            return 1
+        print('\n'.join(compare(base, report)))
+    print(f'REPORT:{out}')
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,441 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Iterator
+
+import discord
+
+try:
+    from studio.dashboard.actions import rp_runtime_action
+    from utility.common import metrics
+    from utility.rp import rp_engine
+    from utility.rp.rp_bench import REPORT_DIR, _git_commit, _isolate, _stats, _StubGemini, _synthetic_room
+except ModuleNotFoundError:
+    from pathlib import Path as _Path
+    for _p in _Path(__file__).resolve().parents:
+        if (_p / 'utility').exists():
+            sys.path.append(str(_p))
+            break
+    from studio.dashboard.actions import rp_runtime_action
+    from utility.common import metrics
+    from utility.rp import rp_engine
+    from utility.rp.rp_bench import REPORT_DIR, _git_commit, _isolate, _stats, _StubGemini, _synthetic_room
+
+# RpDiscordClient.on_message에 가짜 Message/Thread/DMChannel을 흘려서 부하를 본다.
+# 토큰/게이트웨이 없이 돌고, LLM은 로컬 fake Gemini(rp_bench와 같은 stub)로 보낸다.
+SNOWFLAKE_BASE = 10 ** 17
+LAG_INTERVAL_SEC = 0.05
+# 실제 송신률이 목표의 이 비율 밑이면 경고 (부하가 덜 걸린 결과)
+RATE_WARN_RATIO = 0.8
+USER_LINES = (
+    '비가 그쳤어. 나가 볼까?',
+    '*우산을 접으며* 시장 골목은 아직 열려 있을까.',
+    '그 사람 얘기 좀 더 해 줘.',
+    '잠깐, 저기 누가 오는 것 같은데.',
+    '오늘은 좀 피곤하네. 차 한 잔 더 줄래?',
+)
+
+
+# ---- fake discord objects ----
+class FakeUser:
+    def __init__(self, uid: int, name: str, bot: bool = False):
+        self.id = uid
+        self.name = name
+        self.display_name = name
+        self.bot = bot
+        self.mention = f'<@{uid}>'
+
+
+class FakeGuild:
+    def __init__(self, gid: int):
+        self.id = gid
+
+
+class FakeThread(discord.Thread):
+    """isinstance(ch, discord.Thread) 분기를 타도록 상속만 하고 상태는 직접 채운다."""
+
+    def __init__(self, sim: 'DiscordSim', cid: int, parent_id: int):
+        self.id = cid
+        self.parent_id = parent_id
+        self.archived = False
+        self._sim = sim
+
+    async def send(self, content: str | None = None, **kwargs: Any) -> 'FakeMessage':
+        return await self._sim.bot_send(self, content or '')
+
+
+class FakeDMChannel(discord.DMChannel):
+    def __init__(self, sim: 'DiscordSim', cid: int):
+        self.id = cid
+        self._sim = sim
+
+    async def send(self, content: str | None = None, **kwargs: Any) -> 'FakeMessage':
+        return await self._sim.bot_send(self, content or '')
+
+
+class FakeMessage:
+    def __init__(self, sim: 'DiscordSim', mid: int, channel: Any, author: FakeUser, content: str, guild: FakeGuild | None):
+        self._sim = sim
+        self.id = mid
+        self.channel = channel
+        self.author = author
+        self.content = content
+        self.guild = guild
+        self.mentions: list[FakeUser] = []
+        self.dispatched_at = 0.0
+
+    async def reply(self, content: str, **kwargs: Any) -> 'FakeMessage':
+        sent = await self._sim.bot_send(self.channel, content)
+        self._sim.on_reply(self)
+        return sent
+
+    async def pin(self, **kwargs: Any) -> None:
+        return None
+
+
+# ---- io accounting ----
+def _io_kind(path: Path) -> str:
+    name = path.name
+    if name == '_active_rooms.json':
+        return 'active_index'
+    if name == '_room_prefs.json':
+        return 'prefs'
+    if name == '_command_seen.json':
+        return 'command_seen'
+    if name == '_runtime_lock.json':
+        return 'runtime_lock'
+    if path.parent.name == 'rp_rooms':
+        return 'room_md' if path.suffix == '.md' else 'room_json'
+    if name.startswith('gemini_quota'):
+        return 'quota'
+    return 'other'
+
+
+@contextmanager
+def _count_io(io: dict[str, dict[str, int]]) -> Iterator[None]:
+    """Path.read_text/write_text 호출 수와 쓴 바이트를 파일 종류별로 센다."""
+    orig_read, orig_write = Path.read_text, Path.write_text
+    lock = threading.Lock()
+
+    def _bump(path: Path, key: str, n: int = 1) -> None:
+        with lock:
+            row = io.setdefault(_io_kind(path), {'reads': 0, 'writes': 0, 'bytes_written': 0})
+            row[key] += n
+
+    def read_text(self: Path, *args: Any, **kwargs: Any) -> str:
+        _bump(self, 'reads')
+        return orig_read(self, *args, **kwargs)
+
+    def write_text(self: Path, data: str, *args: Any, **kwargs: Any) -> int:
+        n = orig_write(self, data, *args, **kwargs)
+        _bump(self, 'writes')
+        _bump(self, 'bytes_written', len(data.encode('utf-8')))
+        return n
+
+    Path.read_text, Path.write_text = read_text, write_text  # type: ignore[method-assign]
+    try:
+        yield
+    finally:
+        Path.read_text, Path.write_text = orig_read, orig_write  # type: ignore[method-assign]
+
+
+# ---- simulator ----
+class DiscordSim:
+    def __init__(self, *, rooms: int, dm_rooms: int, users: int, seed_turns: int, send_ms: float, dup_rate: float):
+        self.send_ms = send_ms
+        self.dup_rate = dup_rate
+        self.guild = FakeGuild(SNOWFLAKE_BASE + 1)
+        self._next_id = SNOWFLAKE_BASE + 1000
+        self.channels: list[Any] = []
+        self.users: dict[int, list[FakeUser]] = {}
+        parent_id = self._snowflake()
+        for i in range(rooms + dm_rooms):
+            ch = FakeThread(self, self._snowflake(), parent_id) if i < rooms else FakeDMChannel(self, self._snowflake())
+            self.channels.append(ch)
+            count = users if i < rooms else 1
+            self.users[ch.id] = [FakeUser(self._snowflake(), f'손님{i}-{u}') for u in range(count)]
+            ctx = rp_engine.Ctx('discord', str(ch.id), str(self.users[ch.id][0].id))
+            room = _synthetic_room(ctx, seed_turns)
+            room['kind'] = 'thread' if i < rooms else 'dm'
+            rp_engine.save_room(ctx, room)
+            rp_engine._set_active_room(ctx, room)
+        # message id -> 전송 시각/룸, 답장 횟수
+        self.sent: dict[int, FakeMessage] = {}
+        self.replies: dict[int, int] = {}
+        self.reply_ms: list[float] = []
+        self.bot_messages = 0
+        self.duplicates_injected = 0
+
+    def _snowflake(self) -> int:
+        self._next_id += 1
+        return self._next_id
+
+    async def bot_send(self, channel: Any, content: str) -> FakeMessage:
+        # Discord REST 왕복 흉내
+        if self.send_ms > 0:
+            await asyncio.sleep(random.uniform(0.5, 1.5) * self.send_ms / 1000.0)
+        self.bot_messages += 1
+        return FakeMessage(self, self._snowflake(), channel, FakeUser(0, 'RP', bot=True), content, None)
+
+    def on_reply(self, message: FakeMessage) -> None:
+        if message.id not in self.sent:
+            return
+        self.replies[message.id] = self.replies.get(message.id, 0) + 1
+        if self.replies[message.id] == 1:
+            self.reply_ms.append((time.perf_counter() - message.dispatched_at) * 1000.0)
+
+    def next_message(self) -> FakeMessage:
+        ch = random.choice(self.channels)
+        author = random.choice(self.users[ch.id])
+        guild = None if isinstance(ch, FakeDMChannel) else self.guild
+        msg = FakeMessage(self, self._snowflake(), ch, author, random.choice(USER_LINES), guild)
+        self.sent[msg.id] = msg
+        return msg
+
+    def audit(self) -> dict[str, Any]:
+        """룸 JSON과 답장 기록을 대조해 유실/중복 턴을 센다. 히스토리가 MAX_HISTORY에 닿은 룸은 유실 판정에서 뺀다."""
+        by_room: dict[int, list[int]] = {}
+        for mid, msg in self.sent.items():
+            by_room.setdefault(msg.channel.id, []).append(mid)
+        dropped = duplicated = truncated = 0
+        for ch in self.channels:
+            room = rp_engine.load_room(rp_engine.Ctx('discord', str(ch.id), '')) or {}
+            history = room.get('history') or []
+            seen: dict[str, int] = {}
+            for turn in history:
+                mid = str(turn.get('message_id') or '')
+                if mid:
+                    seen[mid] = seen.get(mid, 0) + 1
+            full = len(history) >= rp_engine.MAX_HISTORY
+            truncated += 1 if full else 0
+            for mid in by_room.get(ch.id, []):
+                n = seen.get(str(mid), 0)
+                if n == 0 and not full:
+                    dropped += 1
+                elif n > 1:
+                    duplicated += 1
+        return {
+            'sent': len(self.sent),
+            'duplicates_injected': self.duplicates_injected,
+            'replied': sum(1 for n in self.replies.values() if n),
+            'unreplied': sum(1 for mid in self.sent if not self.replies.get(mid)),
+            'duplicate_replies': sum(1 for n in self.replies.values() if n > 1),
+            'dropped_turns': dropped,
+            'duplicated_turns': duplicated,
+            'rooms_history_full': truncated,
+            'bot_messages': self.bot_messages,
+        }
+
+
+async def _lag_monitor(samples: list[float], stop: asyncio.Event) -> None:
+    """LAG_INTERVAL_SEC마다 깨어나서 늦은 만큼을 이벤트 루프 지연으로 본다 (동기 LLM 호출이 루프를 막는 시간)."""
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(LAG_INTERVAL_SEC)
+        samples.append(max(0.0, (time.perf_counter() - started - LAG_INTERVAL_SEC) * 1000.0))
+
+
+async def _drive(sim: DiscordSim, client: rp_runtime_action.RpDiscordClient, *, rate: float, duration: float, drain_sec: float) -> dict[str, Any]:
+    loop = asyncio.get_running_loop()
+    lag: list[float] = []
+    stop = asyncio.Event()
+    monitor = loop.create_task(_lag_monitor(lag, stop))
+    tasks: set[asyncio.Task] = set()
+    errors: list[str] = []
+
+    def track(task: asyncio.Task) -> None:
+        tasks.add(task)
+
+        def _done(t: asyncio.Task) -> None:
+            tasks.discard(t)
+            if not t.cancelled() and t.exception() is not None:
+                errors.append(f'{type(t.exception()).__name__}: {t.exception()}'[:200])
+
+        task.add_done_callback(_done)
+
+    def dispatch(msg: FakeMessage) -> None:
+        # discord.py도 이벤트마다 태스크를 하나씩 띄운다
+        track(loop.create_task(client.on_message(msg)))
+
+    async def redeliver(msg: FakeMessage) -> None:
+        await asyncio.sleep(random.uniform(0.0, 2.0))
+        dispatch(msg)
+
+    started = time.perf_counter()
+    # 도착 시각을 절대 시각으로 미리 뽑는다. 루프가 막혀 늦게 깨면 밀린 도착을 한꺼번에 내보내서
+    # 제공 부하가 조용히 줄지 않게 한다 (그래도 못 따라가면 achieved_rate에 드러난다).
+    next_at = started + (random.expovariate(rate) if rate > 0 else duration)
+    sent = 0
+    while next_at - started < duration:
+        await asyncio.sleep(max(0.0, next_at - time.perf_counter()))
+        now = time.perf_counter()
+        while next_at <= now and next_at - started < duration:
+            msg = sim.next_message()
+            msg.dispatched_at = next_at  # 예정 도착 시각 기준이라 밀린 시간도 응답 지연에 잡힌다
+            dispatch(msg)
+            sent += 1
+            if random.random() < sim.dup_rate:
+                # 게이트웨이 resume 재전송 같은 같은 메시지 재도착
+                sim.duplicates_injected += 1
+                track(loop.create_task(redeliver(msg)))
+            next_at += random.expovariate(rate)
+    send_elapsed = max(time.perf_counter() - started, duration, 1e-9)
+    # 재전송 대기 태스크가 새 턴을 띄우므로 집합이 빌 때까지 반복
+    deadline = time.perf_counter() + drain_sec
+    while tasks and time.perf_counter() < deadline:
+        await asyncio.wait(set(tasks), timeout=max(0.0, deadline - time.perf_counter()))
+    pending = len(tasks)
+    for t in list(tasks):
+        t.cancel()
+    stop.set()
+    await monitor
+    return {
+        'elapsed_sec': round(time.perf_counter() - started, 2),
+        'target_rate': rate,
+        'achieved_rate': round(sent / send_elapsed, 3),
+        'pending_at_end': pending,
+        'task_errors': errors[:20],
+        'lag': lag,
+    }
+
+
+def run_sim(
+    *,
+    rooms: int,
+    dm_rooms: int,
+    users: int,
+    rate: float,
+    duration: float,
+    seed_turns: int,
+    llm_ms: float,
+    llm_jitter_ms: float,
+    llm_dist: str,
+    send_ms: float,
+    dup_rate: float,
+    reply_mode: str,
+    drain_sec: float,
+) -> dict[str, Any]:
+    stub = _StubGemini(llm_ms, llm_jitter_ms, llm_dist)
+    threading.Thread(target=stub.serve_forever, name='rp-sim-stub', daemon=True).start()
+    io: dict[str, dict[str, int]] = {}
+    try:
+        with tempfile.TemporaryDirectory(prefix='rp_sim_') as tmp:
+            root = Path(tmp)
+            _isolate(root, stub.base_url)
+            rp_runtime_action.COMMAND_SEEN_PATH = root / 'rp_rooms' / '_command_seen.json'
+            # 실제 .env의 채널 allowlist가 가짜 채널을 막지 않게
+            os.environ['RP_ALLOWED_CHANNEL_IDS'] = ''
+            os.environ['RP_ALLOWED_GUILD_IDS'] = ''
+            os.environ['RP_REPLY_MODE'] = reply_mode
+            sim = DiscordSim(rooms=rooms, dm_rooms=dm_rooms, users=users, seed_turns=seed_turns, send_ms=send_ms, dup_rate=dup_rate)
+
+            async def _main() -> dict[str, Any]:
+                client = rp_runtime_action.RpDiscordClient(intents=discord.Intents.default(), runtime_pid=os.getpid())
+                return await _drive(sim, client, rate=rate, duration=duration, drain_sec=drain_sec)
+
+            with _count_io(io):
+                driven = asyncio.run(_main())
+                audit = sim.audit()
+            metrics.flush()
+            metrics_bytes = metrics.METRICS_PATH.stat().st_size if metrics.METRICS_PATH.exists() else 0
+    finally:
+        stub.shutdown()
+        stub.server_close()
+
+    lag = driven.pop('lag')
+    commit, dirty = _git_commit()
+    return {
+        'commit': commit,
+        'dirty': dirty,
+        'created_at': datetime.now(timezone.utc).isoformat(),
+        'params': {
+            'rooms': rooms,
+            'dm_rooms': dm_rooms,
+            'users': users,
+            'rate': rate,
+            'duration': duration,
+            'seed_turns': seed_turns,
+            'llm_ms': llm_ms,
+            'llm_jitter_ms': llm_jitter_ms,
+            'llm_dist': llm_dist,
+            'send_ms': send_ms,
+            'dup_rate': dup_rate,
+            'reply_mode': reply_mode,
+        },
+        **driven,
+        'messages': audit,
+        'reply_latency': _stats(sim.reply_ms),
+        'loop_lag': {**_stats(lag), 'over_100ms': sum(1 for v in lag if v > 100), 'interval_ms': LAG_INTERVAL_SEC * 1000},
+        'disk': {'by_kind': io, 'writes': sum(r['writes'] for r in io.values()), 'bytes_written': sum(r['bytes_written'] for r in io.values()), 'metrics_bytes': metrics_bytes},
+        'stub': {'requests': stub.requests, 'mean_latency_ms': round(stub.slept_ms / stub.requests, 3) if stub.requests else 0.0},
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description='Load-simulate RpDiscordClient.on_message with fake Discord objects and a fake Gemini')
+    ap.add_argument('--rooms', type=int, default=50, help='active RP threads')
+    ap.add_argument('--dm-rooms', type=int, default=5, help='active RP DM channels')
+    ap.add_argument('--users', type=int, default=3, help='speakers per thread')
+    ap.add_argument('--rate', type=float, default=5.0, help='user messages per second (Poisson, all rooms)')
+    ap.add_argument('--duration', type=float, default=30.0, help='seconds of traffic')
+    ap.add_argument('--seed-turns', type=int, default=20, help='history turns per room before the run')
+    ap.add_argument('--llm-ms', type=float, default=800.0, help='fake Gemini latency (mean or median)')
+    ap.add_argument('--llm-jitter-ms', type=float, default=300.0)
+    ap.add_argument('--llm-dist', default='lognormal', choices=['normal', 'lognormal', 'fixed'])
+    ap.add_argument('--send-ms', type=float, default=120.0, help='fake Discord send/reply round trip')
+    ap.add_argument('--dup-rate', type=float, default=0.02, help='fraction of messages delivered twice')
+    ap.add_argument('--reply-mode', default='active', choices=['active', 'mention', 'off'])
+    ap.add_argument('--drain-sec', type=float, default=300.0, help='max wait for in-flight turns after traffic stops')
+    ap.add_argument('--out', default='', help='report path (default: memory/runtime/rp_bench/<time>_<commit>_discord_sim.json)')
+    args = ap.parse_args(argv)
+
+    if args.rooms + args.dm_rooms < 1:
+        ap.error('--rooms + --dm-rooms must be at least 1')
+    report = run_sim(
+        rooms=max(0, args.rooms),
+        dm_rooms=max(0, args.dm_rooms),
+        users=max(1, args.users),
+        rate=max(0.0, args.rate),
+        duration=max(0.0, args.duration),
+        seed_turns=max(0, args.seed_turns),
+        llm_ms=max(0.0, args.llm_ms),
+        llm_jitter_ms=max(0.0, args.llm_jitter_ms),
+        llm_dist=args.llm_dist,
+        send_ms=max(0.0, args.send_ms),
+        dup_rate=min(1.0, max(0.0, args.dup_rate)),
+        reply_mode=args.reply_mode,
+        drain_sec=max(0.0, args.drain_sec),
+    )
+    out = Path(args.out) if args.out else REPORT_DIR / f"{time.strftime('%Y%m%d_%H%M%S')}_{report['commit']}_discord_sim.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(report, ensure_ascii=False, indent=2) + '\n', encoding='utf-8')
+
+    target, achieved = report['target_rate'], report['achieved_rate']
+    print(f"rate: target {target:.2f}/s · achieved {achieved:.2f}/s")
+    if target > 0 and achieved < target * RATE_WARN_RATIO:
+        print(f"WARNING: 실제 송신률이 목표의 {achieved / target:.0%} — 루프가 막혀 부하가 덜 걸렸다. 결과를 그대로 믿지 말 것", file=sys.stderr)
+    m = report['messages']
+    print(f"messages: sent {m['sent']} (+{m['duplicates_injected']} 재전송) · replied {m['replied']} · unreplied {m['unreplied']}")
+    print(f"turns: dropped {m['dropped_turns']} · duplicated {m['duplicated_turns']} · duplicate replies {m['duplicate_replies']} · pending {report['pending_at_end']}")
+    r, lag = report['reply_latency'], report['loop_lag']
+    print(f"reply latency: p50 {r['p50_ms']:.0f}ms · p95 {r['p95_ms']:.0f}ms · max {r['max_ms']:.0f}ms")
+    print(f"loop lag: p50 {lag['p50_ms']:.1f}ms · p95 {lag['p95_ms']:.1f}ms · max {lag['max_ms']:.0f}ms · >100ms {lag['over_100ms']}회")
+    print(f"disk: {report['disk']['writes']} writes · {report['disk']['bytes_written']} bytes")
+    print(f'REPORT:{out}')
+    return 0 if not report['task_errors'] else 1
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
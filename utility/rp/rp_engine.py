@@ -15,6 +15,7 @@ from typing import Any
 # ---- paths/constants ----
 try:
     from utility.common.generation_defaults import WORKSPACE_ROOT
+    from utility.common import gemini_quota, metrics
 except ModuleNotFoundError:
     import sys
     from pathlib import Path as _Path
@@ -23,6 +24,7 @@ except ModuleNotFoundError:
             sys.path.append(str(_p))
             break
     from utility.common.generation_defaults import WORKSPACE_ROOT
+    from utility.common import gemini_quota, metrics
 ROOMS_DIR = (WORKSPACE_ROOT / 'memory' / 'rp_rooms').resolve()
 ACTIVE_ROOMS_PATH = ROOMS_DIR / '_active_rooms.json'
 RUNTIME_LOCK_PATH = ROOMS_DIR / '_runtime_lock.json'
@@ -33,6 +35,10 @@ MAX_HISTORY = 500
 MAX_RECENT_MESSAGE_IDS = 200
 PREFS_PROTECTED_KEYS_FIELD = '__protected_keys__'
 PREFS_ALLOWLIST_SNAPSHOT_FIELD = '__allowlist_keys__'
+# 대화 응답이라 quota 대기는 짧게 (넘으면 호출부가 무출력으로 처리)
+RP_QUOTA_WAIT_SEC = float(os.getenv('RP_QUOTA_WAIT_SEC', '15') or '15')
+# 벤치마크/로컬 stub 서버로 돌릴 때만 바꾼다
+GEMINI_API_BASE = (os.getenv('GEMINI_API_BASE') or 'https://generativelanguage.googleapis.com/v1beta').rstrip('/')
 
 def now_iso() -> str:
     return datetime.now(timezone.utc).isoformat()
@@ -78,14 +84,16 @@ def _load_active_rooms() -> dict[str, Any]:
     if not ACTIVE_ROOMS_PATH.exists():
         return {}
     try:
-        obj = json.loads(ACTIVE_ROOMS_PATH.read_text(encoding='utf-8'))
+        with metrics.timer('state.io', op='load_active_rooms'):
+            obj = json.loads(ACTIVE_ROOMS_PATH.read_text(encoding='utf-8'))
         return obj if isinstance(obj, dict) else {}
     except Exception:
         return {}
 
 def _save_active_rooms(data: dict[str, Any]) -> None:
     ACTIVE_ROOMS_PATH.parent.mkdir(parents=True, exist_ok=True)
-    ACTIVE_ROOMS_PATH.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding='utf-8')
+    with metrics.timer('state.io', op='save_active_rooms'):
+        ACTIVE_ROOMS_PATH.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding='utf-8')
 
 # ---- io helpers ----
 def _load_json(path: Path) -> dict[str, Any]:
@@ -236,14 +244,19 @@ def load_room(ctx: Ctx) -> dict[str, Any] | None:
     if not p.exists():
         return None
     try:
-        return json.loads(p.read_text(encoding='utf-8'))
+        with metrics.timer('state.io', op='load_room'):
+            return json.loads(p.read_text(encoding='utf-8'))
     except Exception:
         return None
 
 def save_room(ctx: Ctx, room: dict[str, Any]) -> None:
     p = room_json_path(ctx)
     p.parent.mkdir(parents=True, exist_ok=True)
-    p.write_text(json.dumps(room, ensure_ascii=False, indent=2), encoding='utf-8')
+    # 응답 생성 스레드가 같은 룸을 읽을 수 있으니 반쯤 쓴 파일이 보이지 않게 교체로 저장
+    tmp = p.with_name(p.name + '.tmp')
+    with metrics.timer('state.io', op='save_room'):
+        tmp.write_text(json.dumps(room, ensure_ascii=False, indent=2), encoding='utf-8')
+        tmp.replace(p)
 
 # ---- room lifecycle ----
 def start_room(ctx: Ctx, title: str = '', kind: str = 'thread', opening: str = '') -> tuple[bool, str]:
@@ -487,7 +500,7 @@ def _call_gemini_text(prompt: str) -> str:
         raise RuntimeError('missing GEMINI_API_KEY/GOOGLE_API_KEY')
 
     model = (os.getenv('RP_LLM_MODEL') or 'gemini-2.5-flash').strip()
-    url = f"https://generativelanguage.googleapis.com/v1beta/models/{model}:generateContent?key={api_key}"
+    url = f"{GEMINI_API_BASE}/models/{model}:generateContent?key={api_key}"
     generation_config: dict[str, Any] = {
         'temperature': float(os.getenv('RP_LLM_TEMPERATURE', '0.9')),
     }
@@ -507,8 +520,19 @@ def _call_gemini_text(prompt: str) -> str:
         headers={'Content-Type': 'application/json; charset=utf-8'},
         method='POST',
     )
-    with urllib.request.urlopen(req, timeout=20) as resp:
-        payload = json.loads(resp.read().decode('utf-8', errors='replace'))
+    gemini_quota.acquire(model, timeout=RP_QUOTA_WAIT_SEC)
+    with metrics.timer('gemini.call', model=model, op='text'):
+        try:
+            with urllib.request.urlopen(req, timeout=20) as resp:
+                payload = json.loads(resp.read().decode('utf-8', errors='replace'))
+        except urllib.error.HTTPError as e:
+            detail = e.read().decode('utf-8', errors='replace')
+            gemini_quota.record(model, e.code, detail)
+            raise RuntimeError(f'Gemini text failed ({e.code}): {detail[:300]}') from e
+        except Exception:
+            gemini_quota.record(model, 0)
+            raise
+    gemini_quota.record(model, 200)
 
     cands = payload.get('candidates') or []
     if not cands:
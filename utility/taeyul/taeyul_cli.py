@@ -2,9 +2,11 @@
 from __future__ import annotations
 
 import argparse
+import importlib
 import json
 import subprocess
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 try:
@@ -41,27 +43,108 @@ IMAGE_DIR = STUDIO / "image"
 SHORTS_DIR = STUDIO / "shorts"
 
 
+# 스크립트 -> 프로세스 안에서 부를 모듈 (각 모듈의 main(argv))
+INPROC_MODULES = {
+    "gemini_tts.py": "studio.gemini_tts",
+    "gemini_veo.py": "studio.gemini_veo",
+    "veo_jobs.py": "studio.veo_jobs",
+    "generate.py": "studio.image.generate",
+    "discord_bulk_delete_action.py": "studio.dashboard.actions.discord_bulk_delete_action",
+    "gitignore_hygiene_runtime.py": "utility.git.gitignore_hygiene_runtime",
+    "media_lifecycle.py": "utility.common.media_lifecycle",
+}
+VENV_PY = WORKSPACE_ROOT / ".venv" / "bin" / "python3"
+# batch manifest에서 막는 명령 (상주 런타임/중첩 batch)
+BATCH_BLOCKED = {"batch", "bulk-delete-runtime", "gitignore-hygiene-runtime"}
+
+
+def _python() -> str:
+    return str(VENV_PY) if VENV_PY.exists() else sys.executable
+
+
 def _run(script: str, *args: str) -> int:
+    """가능하면 모듈 main(argv)를 같은 프로세스에서 호출하고, 없으면 venv 인터프리터로 실행."""
+    module = INPROC_MODULES.get(script)
+    if module:
+        try:
+            main_fn = importlib.import_module(module).main
+        except ImportError as e:
+            print(f"[taeyul] {module} in-process import 실패, subprocess로 실행: {e}", file=sys.stderr)
+        else:
+            try:
+                return int(main_fn(list(args)) or 0)
+            except SystemExit as e:
+                return e.code if isinstance(e.code, int) else 1
+
     script_map = {
         "gemini_tts.py": STUDIO / "gemini_tts.py",
         "gemini_veo.py": STUDIO / "gemini_veo.py",
+        "veo_jobs.py": STUDIO / "veo_jobs.py",
         "generate.py": IMAGE_DIR / "generate.py",
         "pipeline.py": SHORTS_DIR / "pipeline.py",
+        "discord_bulk_delete_action.py": STUDIO / "dashboard" / "actions" / "discord_bulk_delete_action.py",
+        "gitignore_hygiene_runtime.py": WORKSPACE_ROOT / "utility" / "git" / "gitignore_hygiene_runtime.py",
+        "media_lifecycle.py": WORKSPACE_ROOT / "utility" / "common" / "media_lifecycle.py",
     }
     target = script_map.get(script)
     if target is None:
         target = STUDIO / script
-    return subprocess.run(["python3", str(target), *args]).returncode
+    return subprocess.run([_python(), str(target), *args]).returncode
+
+
+def _load_manifest(path: str) -> list[list[str]]:
+    """[["image", "prompt", "--count", "2"], {"cmd": "tts", "args": ["안녕"]}, ...] 형태."""
+    data = json.loads(Path(path).read_text(encoding="utf-8"))
+    rows = data.get("jobs", []) if isinstance(data, dict) else data
+    out: list[list[str]] = []
+    for row in rows if isinstance(rows, list) else []:
+        if isinstance(row, list) and row:
+            out.append([str(x) for x in row])
+        elif isinstance(row, dict) and row.get("cmd"):
+            out.append([str(row["cmd"]), *[str(x) for x in row.get("args", [])]])
+    return out
+
+
+def _run_batch(parser: argparse.ArgumentParser, manifest: str, workers: int) -> int:
+    try:
+        jobs = _load_manifest(manifest)
+    except Exception as e:
+        print(f"manifest 읽기 실패: {e}", file=sys.stderr)
+        return 2
+    if not jobs:
+        print("manifest에 작업이 없어.", file=sys.stderr)
+        return 2
+
+    def _one(argv: list[str]) -> int:
+        if argv[0] in BATCH_BLOCKED:
+            print(f"[batch] {argv[0]}는 batch에서 실행할 수 없어.", file=sys.stderr)
+            return 2
+        try:
+            return _dispatch(parser, parser.parse_args(argv))
+        except SystemExit as e:
+            return e.code if isinstance(e.code, int) else 1
+        except Exception as e:
+            print(f"[batch] {argv[0]} 실패: {e}", file=sys.stderr)
+            return 1
+
+    with ThreadPoolExecutor(max_workers=max(1, min(int(workers), len(jobs))), thread_name_prefix="taeyul-batch") as pool:
+        rcs = list(pool.map(_one, jobs))
+    results = [{"index": i, "cmd": argv[0], "rc": rc} for i, (argv, rc) in enumerate(zip(jobs, rcs), 1)]
+    ok = all(rc == 0 for rc in rcs)
+    print(json.dumps({"ok": ok, "results": results}, ensure_ascii=False))
+    return 0 if ok else 1
 
 
 # filename indexing uses utility.common.filename_policy.append_indexed_name
 
-def main() -> int:
+def build_parser() -> argparse.ArgumentParser:
     p = argparse.ArgumentParser(description="taeyul internal compact cli")
     sub = p.add_subparsers(dest="cmd", required=True)
 
     p_tts = sub.add_parser("tts")
-    p_tts.add_argument("text")
+    p_tts.add_argument("text", nargs="*")
+    p_tts.add_argument("--lines-file", default="", help="one text per line, synthesized in one batch")
+    p_tts.add_argument("--join", action="store_true", help="stitch all texts into one WAV")
     p_tts.add_argument("--voice", default=DEFAULT_TTS_VOICE)
     p_tts.add_argument("--out-dir", default=str(MEDIA_AUDIO_DIR))
     p_tts.add_argument("--name", default="")
@@ -80,6 +163,7 @@ def main() -> int:
     p_img.add_argument("--count", type=int, default=1, help="generate N images")
     p_img.add_argument("--profile", default="taeyul", choices=["taeyul", "ketose", "kwonjinhyuk", "default"], help="identity profile hint")
     p_img.add_argument("--aspect-ratio", default=DEFAULT_IMAGE_ASPECT_RATIO)
+    p_img.add_argument("--concurrency", type=int, default=3, help="max parallel requests when --count > 1")
 
     p_veo = sub.add_parser("veo")
     p_veo.add_argument("prompt")
@@ -89,6 +173,16 @@ def main() -> int:
     p_veo.add_argument("--poll-seconds", type=int, default=180)
     p_veo.add_argument("--aspect-ratio", default=DEFAULT_VEO_ASPECT_RATIO)
 
+    p_vj = sub.add_parser("veo-jobs", help="submit/resume several Veo jobs with shared polling")
+    p_vj.add_argument("action", choices=["submit", "resume", "status", "prune"])
+    p_vj.add_argument("prompts", nargs="*")
+    p_vj.add_argument("--manifest", default="")
+    p_vj.add_argument("--model", default=DEFAULT_VEO_MODEL)
+    p_vj.add_argument("--out-dir", default=str(MEDIA_VIDEO_DIR))
+    p_vj.add_argument("--aspect-ratio", default=DEFAULT_VEO_ASPECT_RATIO)
+    p_vj.add_argument("--max-wait", type=float, default=600.0)
+    p_vj.add_argument("--emit-media", action="store_true")
+
     p_shorts = sub.add_parser("shorts")
     for req in ("--channel-id", "--title", "--lines", "--subs", "--out"):
         p_shorts.add_argument(req, required=True)
@@ -111,10 +205,23 @@ def main() -> int:
     p_ghe.add_argument("--reason", default="")
     p_rph.add_argument("--recover", action="store_true")
 
+    p_mlc = sub.add_parser("media-lifecycle", help="dedupe/transcode/quota-evict the media tree (cron-friendly)")
+    p_mlc.add_argument("--dry-run", action="store_true")
+    p_mlc.add_argument("--transcode", action="store_true")
+    p_mlc.add_argument("--json", action="store_true")
+
     p_fbl = sub.add_parser("feedback-log", help="append auto feedback signal into memory")
     p_fbl.add_argument("text")
 
-    a = p.parse_args()
+    p_batch = sub.add_parser("batch", help="run a JSON manifest of subcommands in one process")
+    p_batch.add_argument("manifest")
+    p_batch.add_argument("--workers", type=int, default=4)
+    return p
+
+
+def _dispatch(p: argparse.ArgumentParser, a: argparse.Namespace) -> int:
+    if a.cmd == "batch":
+        return _run_batch(p, a.manifest, a.workers)
 
     if a.cmd == "feedback-log":
         kind = maybe_log_feedback(a.text)
@@ -122,7 +229,11 @@ def main() -> int:
         return 0
 
     if a.cmd == "tts":
-        args = [a.text, "--voice", a.voice, "--out-dir", a.out_dir]
+        args = [*a.text, "--voice", a.voice, "--out-dir", a.out_dir]
+        if a.lines_file:
+            args += ["--lines-file", a.lines_file]
+        if a.join:
+            args += ["--join"]
         if a.name:
             args += ["--name", a.name]
         if a.emit_media:
@@ -130,28 +241,40 @@ def main() -> int:
         return _run("gemini_tts.py", *args)
 
     if a.cmd == "image":
+        # count장을 한 프로세스에서 동시 생성 (참조 이미지 인코딩 1회)
+        from studio.image.generate import ImageRequest, generate_batch
+
         count = max(1, int(a.count or 1))
+        reqs = [
+            ImageRequest(
+                prompt=a.prompt,
+                model=a.model,
+                name=append_indexed_name(a.name, i, count) if a.name else "",
+                ref_image="" if a.no_ref else a.ref_image,
+                lock_avatar=not a.no_avatar_lock,
+                allow_2d=a.allow_2d,
+                profile=a.profile,
+                aspect_ratio=a.aspect_ratio,
+            )
+            for i in range(1, count + 1)
+        ]
         rc = 0
-        for i in range(1, count + 1):
-            args = [a.prompt, "--model", a.model, "--out-dir", a.out_dir, "--profile", a.profile]
-            if a.aspect_ratio:
-                args += ["--aspect-ratio", a.aspect_ratio]
-            if a.name:
-                args += ["--name", append_indexed_name(a.name, i, count)]
-            if a.no_ref:
-                args += ["--no-ref"]
-            elif a.ref_image:
-                args += ["--ref-image", a.ref_image]
-            if a.no_avatar_lock:
-                args += ["--no-avatar-lock"]
-            if a.allow_2d:
-                args += ["--allow-2d"]
-            if a.emit_media:
-                args += ["--emit-media"]
-            one = _run("generate.py", *args)
-            if one != 0:
-                rc = one
-                break
+        try:
+            results = generate_batch(
+                reqs,
+                out_dir=a.out_dir,
+                concurrency=a.concurrency,
+                log=lambda line: print(line, file=sys.stderr, flush=True),
+            )
+        except Exception as e:
+            print(str(e), file=sys.stderr)
+            results, rc = [], 1
+        for r in results:
+            if r.ok:
+                print(f"{'MEDIA' if a.emit_media else 'IMAGE'}:{r.media_path}")
+            else:
+                print(r.error, file=sys.stderr)
+                rc = 1
         append_retro("image", "ok" if rc == 0 else f"fail({rc})", "출력 품질/포맷 편차", "실패 시 프롬프트 1요소만 조정")
         return rc
 
@@ -168,6 +291,17 @@ def main() -> int:
         append_retro("veo", "ok" if rc == 0 else f"fail({rc})", "생성 지연/실패", "실패 시 모델/프롬프트 1개만 조정")
         return rc
 
+    if a.cmd == "veo-jobs":
+        args = [a.action, *a.prompts, "--model", a.model, "--out-dir", a.out_dir, "--aspect-ratio", a.aspect_ratio, "--max-wait", str(a.max_wait)]
+        if a.manifest:
+            args += ["--manifest", a.manifest]
+        if a.emit_media:
+            args += ["--emit-media"]
+        rc = _run("veo_jobs.py", *args)
+        if a.action in ("submit", "resume"):
+            append_retro("veo-jobs", "ok" if rc == 0 else f"fail({rc})", "operation 만료/polling 지연", "진행 중(rc=3)이면 resume으로 이어받기")
+        return rc
+
     if a.cmd == "rp-healthcheck":
         from utility.rp.rp_engine import runtime_healthcheck
 
@@ -178,26 +312,29 @@ def main() -> int:
         return rc
 
     if a.cmd == "bulk-delete-runtime":
-        script = (WORKSPACE_ROOT / 'studio' / 'dashboard' / 'actions' / 'discord_bulk_delete_action.py').resolve()
-        rc = subprocess.run(["python3", str(script), "run", "--poll-sec", str(a.poll_sec)]).returncode
+        rc = _run("discord_bulk_delete_action.py", "run", "--poll-sec", str(a.poll_sec))
         append_retro("bulk-delete-runtime", "ok" if rc == 0 else f"fail({rc})", "동시 실행/잠금 충돌", "큐 상태 확인 후 단일 런타임 유지")
         return rc
 
     if a.cmd == "gitignore-hygiene-runtime":
-        script = (WORKSPACE_ROOT / 'utility' / 'git' / 'gitignore_hygiene_runtime.py').resolve()
-        rc = subprocess.run(["python3", str(script), "run", "--poll-sec", str(a.poll_sec)]).returncode
+        rc = _run("gitignore_hygiene_runtime.py", "run", "--poll-sec", str(a.poll_sec))
         append_retro("gitignore-hygiene-runtime", "ok" if rc == 0 else f"fail({rc})", "추적해제 누락", "tracked-but-ignored 목록 재확인")
         return rc
 
     if a.cmd == "gitignore-hygiene-enqueue":
-        script = (WORKSPACE_ROOT / 'utility' / 'git' / 'gitignore_hygiene_runtime.py').resolve()
         args = ["enqueue"]
         if a.reason:
             args += ["--reason", a.reason]
-        rc = subprocess.run(["python3", str(script), *args]).returncode
+        rc = _run("gitignore_hygiene_runtime.py", *args)
         append_retro("gitignore-hygiene-enqueue", "ok" if rc == 0 else f"fail({rc})", "enqueue 파라미터 누락", "run 결과와 git status 동시 확인")
         return rc
 
+    if a.cmd == "media-lifecycle":
+        args = [flag for flag, on in (("--dry-run", a.dry_run), ("--transcode", a.transcode), ("--json", a.json)) if on]
+        rc = _run("media_lifecycle.py", *args)
+        append_retro("media-lifecycle", "ok" if rc == 0 else f"fail({rc})", "사용 중 파일 삭제", "min_keep_hours/용량 상한 정책 확인")
+        return rc
+
     subtitle = a.subtitle.strip() or "핵심 요약"
     args = [
         "--workspace", str(STUDIO),
@@ -221,5 +358,10 @@ def main() -> int:
     return rc
 
 
+def main(argv: list[str] | None = None) -> int:
+    p = build_parser()
+    return _dispatch(p, p.parse_args(argv))
+
+
 if __name__ == "__main__":
     raise SystemExit(main())